@@ -1,2 +1,9 @@
 import os
-__parent_dir__ = os.path.dirname(os.path.abspath(__file__))
\ No newline at end of file
+__parent_dir__ = os.path.dirname(os.path.abspath(__file__))
+
+from maguniverse.registry import list_catalogs, load
+
+__all__ = [
+    'list_catalogs',
+    'load',
+]
@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""Run the ``maguniverse`` command as ``python -m maguniverse``."""
+
+import sys
+
+from maguniverse.cli import main
+
+sys.exit(main())
@@ -0,0 +1,52 @@
+"""
+Derived physical quantities computed from the loaded catalogs.
+
+Names are resolved lazily from their submodules, as in
+:mod:`maguniverse.utils`.
+"""
+
+import importlib
+
+_EXPORTS = {
+    'CATALOG_COLUMNS'    : 'dispersion',
+    'angle_difference'   : 'dispersion',
+    'angle_dispersion'   : 'dispersion',
+    'structure_function' : 'dispersion',
+    'hildebrand_fit'     : 'dispersion',
+    'STOKES_COLUMNS'     : 'stokes',
+    'stokes_qu'          : 'stokes',
+    'debias_polarization': 'stokes',
+    'stokes_columns'     : 'stokes',
+    'add_stokes_columns' : 'stokes',
+    'GAS_COLUMNS'        : 'dcf',
+    'dcf_field_strength' : 'dcf',
+    'dcf_estimates'      : 'dcf',
+    'ZEEMAN_COLUMNS'     : 'zeeman',
+    'bmax_model'         : 'zeeman',
+    'los_pdf'            : 'zeeman',
+    'los_likelihood'     : 'zeeman',
+    'LikelihoodTable'    : 'zeeman',
+    'log_likelihood_grid': 'zeeman',
+    'grid_posterior'     : 'zeeman',
+    'posterior_summary'  : 'zeeman',
+    'propagate'          : 'montecarlo',
+    'dcf_propagation'    : 'montecarlo',
+    'mass_to_flux'       : 'montecarlo',
+    'mass_to_flux_propagation': 'montecarlo',
+    'COLUMN_DENSITY_COLUMNS'  : 'montecarlo',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    module = importlib.import_module('maguniverse.analysis.' + _EXPORTS[name])
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+dcf.py
+-----------
+
+Davis-Chandrasekhar-Fermi (DCF) estimates of the plane-of-sky field.
+
+The DCF relation
+
+    B_pos = Q sqrt(4 pi rho) sigma_v / sigma_theta
+
+turns the dispersion of polarization angles `sigma_theta` (radians) of a
+region, its gas mass density `rho` and its one-dimensional velocity
+dispersion `sigma_v` into a field strength. :func:`dcf_estimates` takes
+the angle statistics of every object of a polarization catalog
+(:mod:`maguniverse.analysis.dispersion`) and the densities and line widths
+of a gas catalog (e.g. Jijina1999 'logNtot ([cm-3])' and 'DVint (km/s)'),
+joins them on normalized source names and evaluates the relation for all
+regions at once.
+"""
+
+import numpy as np
+import pandas as pd
+
+from maguniverse.analysis.dispersion import (
+    CATALOG_COLUMNS, angle_dispersion, hildebrand_fit, structure_function,
+)
+from maguniverse.utils.names import normalize_names
+
+M_H = 1.6735575e-24          # hydrogen atom mass (g)
+FWHM_TO_SIGMA = 1.0 / np.sqrt(8.0 * np.log(2.0))
+
+# Ostriker, Stone & Gammie (2001) correction factor
+DEFAULT_Q = 0.5
+
+# Mean particle mass (in m_H) of molecular gas
+DEFAULT_MU = 2.33
+
+# Column keyword arguments of dcf_estimates for each gas catalog
+GAS_COLUMNS = {
+    'Jijina1999': {
+        'name_col'     : 'Name',
+        'density_col'  : 'logNtot ([cm-3])',
+        'linewidth_col': 'DVint (km/s)',
+        'log_density'  : True,
+        'fwhm'         : True,
+    },
+}
+
+
+def dcf_field_strength(density, sigma_v, dispersion, q=DEFAULT_Q, mu=DEFAULT_MU):
+    """
+    DCF plane-of-sky field strength.
+
+    Parameters
+    ----------
+    density : array_like
+        Particle number density (cm^-3).
+    sigma_v : array_like
+        One-dimensional velocity dispersion (km/s).
+    dispersion : array_like
+        Angle dispersion (degrees), or the turbulent-to-ordered field ratio
+        expressed in degrees.
+    q : float, optional
+        Correction factor for line-of-sight and beam averaging.
+    mu : float, optional
+        Mean particle mass in units of the hydrogen mass.
+
+    Returns
+    -------
+    ndarray
+        Field strength in microgauss. Zero dispersions give inf.
+    """
+    rho = mu * M_H * np.asarray(density, dtype=np.float64)
+    sigma_v = np.asarray(sigma_v, dtype=np.float64) * 1e5
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return q * np.sqrt(4.0 * np.pi * rho) * sigma_v \
+            / np.radians(np.asarray(dispersion, dtype=np.float64)) * 1e6
+
+
+def _gas_properties(gas, name_col, density_col, linewidth_col, log_density, fwhm):
+    """Density (cm^-3) and sigma_v (km/s) per normalized name (first row wins)."""
+    density = gas[density_col].to_numpy(dtype=np.float64)
+    if log_density:
+        density = 10.0 ** density
+    sigma_v = gas[linewidth_col].to_numpy(dtype=np.float64)
+    if fwhm:
+        sigma_v = sigma_v * FWHM_TO_SIGMA
+    table = pd.DataFrame({
+        'density (cm^-3)': density,
+        'sigma_v (km/s)' : sigma_v,
+    }, index=pd.Index(normalize_names(gas[name_col]).array, name='key'))
+    table = table[table.index.notna()]
+    return table[~table.index.duplicated()]
+
+
+def dcf_estimates(polarization, gas, method='dispersion', bins=None, max_lag=None,
+                  columns=None, gas_columns=None, q=DEFAULT_Q, mu=DEFAULT_MU):
+    """
+    DCF field strengths for every object found in both catalogs.
+
+    Parameters
+    ----------
+    polarization : DataFrame
+        Polarization vectors (e.g. Dotson2010 or Matthews2009).
+    gas : DataFrame
+        Gas properties per region (e.g. Jijina1999).
+    method : {'dispersion', 'structure'}, optional
+        'dispersion' uses the error-corrected RMS angle dispersion about the
+        mean orientation; 'structure' uses the turbulent-to-ordered ratio
+        from the structure-function intercept (Hildebrand et al. 2009),
+        which is insensitive to large-scale field curvature.
+    bins : array_like, optional
+        Lag bin edges for the 'structure' method.
+    max_lag : float, optional
+        Largest mean lag entering the structure-function fit.
+    columns : dict or str, optional
+        Polarization column names (see ``CATALOG_COLUMNS`` of
+        :mod:`maguniverse.analysis.dispersion`), or a catalog name.
+        Dotson2010 by default.
+    gas_columns : dict or str, optional
+        Gas column names and conventions (see ``GAS_COLUMNS``), or a
+        catalog name. Jijina1999 by default.
+    q, mu : float, optional
+        See :func:`dcf_field_strength`.
+
+    Returns
+    -------
+    DataFrame
+        Indexed by polarization object, with 'n', 'dispersion (deg)' (the
+        value fed to the DCF relation), 'density (cm^-3)',
+        'sigma_v (km/s)' and 'B_pos (muG)'.
+
+    Raises
+    ------
+    ValueError
+        For an unknown `method`, or 'structure' without `bins`.
+    """
+    if columns is None or isinstance(columns, str):
+        columns = CATALOG_COLUMNS[columns or 'Dotson2010']
+    if gas_columns is None or isinstance(gas_columns, str):
+        gas_columns = GAS_COLUMNS[gas_columns or 'Jijina1999']
+
+    stats = angle_dispersion(polarization, **columns)
+    if method == 'dispersion':
+        dispersion = stats['dispersion_corr (deg)']
+    elif method == 'structure':
+        if bins is None:
+            raise ValueError("method='structure' requires lag bins.")
+        sf = structure_function(polarization, bins, **columns)
+        fit = hildebrand_fit(sf, max_lag=max_lag, group_col=columns['group_col'])
+        dispersion = np.degrees(fit['turbulent_ratio']).reindex(stats.index)
+    else:
+        raise ValueError("Unknown method %r; use 'dispersion' or 'structure'." % (method,))
+
+    result = pd.DataFrame({'n': stats['n'], 'dispersion (deg)': dispersion})
+    keys = normalize_names(pd.Series(stats.index, dtype=object)).array
+    props = _gas_properties(gas, **gas_columns).reindex(keys)
+    result['density (cm^-3)'] = props['density (cm^-3)'].to_numpy()
+    result['sigma_v (km/s)'] = props['sigma_v (km/s)'].to_numpy()
+    result = result[result['density (cm^-3)'].notna() & result['sigma_v (km/s)'].notna()]
+    result['B_pos (muG)'] = dcf_field_strength(
+        result['density (cm^-3)'], result['sigma_v (km/s)'], result['dispersion (deg)'],
+        q=q, mu=mu)
+    return result
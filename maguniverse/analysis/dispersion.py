@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+dispersion.py
+-----------
+
+Polarization angle dispersion and angular structure functions.
+
+Polarization angles are axial: 10 deg and 190 deg describe the same
+orientation, so every difference is folded into [-90, 90) deg and mean
+angles are computed from the doubled angles. All statistics are batched
+over every object of a catalog at once. Pairs of vectors within the
+largest lag are enumerated with a :class:`~maguniverse.utils.spatial.GridIndex`
+over (x, y, object) in one vectorized query, and binned with
+``np.bincount`` on (object, lag bin) codes.
+
+The structure function follows Hildebrand et al. (2009),
+``<dphi^2>(l) = b^2 + m^2 l^2`` at small lags, whose intercept `b` gives
+the turbulent-to-ordered field ratio used by the DCF method (see
+:mod:`maguniverse.analysis.dcf`).
+"""
+
+import numpy as np
+import pandas as pd
+
+from maguniverse.utils.spatial import GridIndex
+
+# Column keyword arguments of the analysis functions for each catalog
+CATALOG_COLUMNS = {
+    'Dotson2010': {
+        'group_col': 'ID',
+        'x_col'    : 'ΔR.A.',
+        'y_col'    : 'ΔDecl.',
+        'angle_col': 'theta',
+        'error_col': 'sigma(theta)',
+    },
+    'Matthews2009': {
+        'group_col': 'ID',
+        'x_col'    : 'RAOff',
+        'y_col'    : 'DEOff',
+        'angle_col': 'theta',
+        'error_col': 'e_theta',
+    },
+}
+
+
+def angle_difference(a, b):
+    """
+    Difference ``a - b`` of axial angles in degrees, folded into [-90, 90).
+    """
+    return (np.asarray(a, dtype=np.float64) - np.asarray(b, dtype=np.float64) + 90.0) % 180.0 - 90.0
+
+
+def _group_codes(groups):
+    """Integer codes of `groups` and the distinct labels, missing labels dropped."""
+    codes, labels = pd.factorize(pd.Series(groups), sort=True)
+    return codes, pd.Index(labels, name=getattr(groups, 'name', None))
+
+
+def _valid(*arrays):
+    keep = np.ones(len(arrays[0]), dtype=bool)
+    for a in arrays:
+        keep &= np.isfinite(a)
+    return keep
+
+
+def angle_dispersion(df, group_col='ID', angle_col='theta', error_col='sigma(theta)', **_):
+    """
+    Per-object mean orientation and dispersion of polarization angles.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Polarization vectors of one or more objects.
+    group_col, angle_col : str, optional
+        Object label and position angle (degrees) columns.
+    error_col : str or None, optional
+        Angle uncertainty column (degrees), used to remove the measurement
+        contribution from the dispersion. None skips the correction.
+    **_
+        Ignored, so that an entry of ``CATALOG_COLUMNS`` can be passed as is.
+
+    Returns
+    -------
+    DataFrame
+        Indexed by object, with columns 'n', 'mean_angle (deg)',
+        'dispersion (deg)' (RMS deviation from the mean orientation) and
+        'dispersion_corr (deg)', the dispersion with the mean squared
+        angle error subtracted in quadrature (NaN when the errors exceed
+        the observed scatter).
+    """
+    theta = df[angle_col].to_numpy(dtype=np.float64)
+    err = df[error_col].to_numpy(dtype=np.float64) if error_col else np.zeros(len(df))
+    codes, labels = _group_codes(df[group_col])
+    keep = (codes >= 0) & _valid(theta, err)
+    codes, theta, err = codes[keep], theta[keep], err[keep]
+    ngroups = len(labels)
+
+    n = np.bincount(codes, minlength=ngroups)
+    doubled = np.radians(2.0 * theta)
+    mean = np.degrees(0.5 * np.arctan2(np.bincount(codes, np.sin(doubled), ngroups),
+                                       np.bincount(codes, np.cos(doubled), ngroups))) % 180.0
+    dev = angle_difference(theta, mean[codes])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var = np.bincount(codes, dev ** 2, ngroups) / n
+        noise = np.bincount(codes, err ** 2, ngroups) / n
+        corr = np.sqrt(np.where(var > noise, var - noise, np.nan))
+    return pd.DataFrame({
+        'n'                    : n,
+        'mean_angle (deg)'     : np.where(n > 0, mean, np.nan),
+        'dispersion (deg)'     : np.sqrt(var),
+        'dispersion_corr (deg)': corr,
+    }, index=labels)
+
+
+def structure_function(df, bins, group_col='ID', x_col='ΔR.A.', y_col='ΔDecl.',
+                       angle_col='theta', error_col='sigma(theta)', chunk=65536):
+    """
+    Binned second-order angular structure function of every object.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Polarization vectors of one or more objects.
+    bins : array_like
+        Increasing lag bin edges, in the units of `x_col`/`y_col`. Only
+        pairs closer than the last edge are enumerated.
+    group_col, x_col, y_col, angle_col : str, optional
+        Object label, map positions and position angle (degrees) columns.
+        Positions are offsets within each object, so pairs never span two
+        objects.
+    error_col : str or None, optional
+        Angle uncertainty column (degrees). The mean of
+        ``sigma_i**2 + sigma_j**2`` over the pairs of a bin is subtracted
+        to give 'S2_corr (deg^2)'.
+    chunk : int, optional
+        Query points per vectorized pass of the pair search.
+
+    Returns
+    -------
+    DataFrame
+        One row per (object, bin) with at least one pair, with columns
+        `group_col`, 'lag_lo', 'lag_hi', 'lag' (mean pair separation),
+        'npairs', 'S2 (deg^2)' (mean squared angle difference) and
+        'S2_corr (deg^2)'.
+    """
+    bins = np.asarray(bins, dtype=np.float64)
+    if bins.ndim != 1 or len(bins) < 2 or np.any(np.diff(bins) <= 0):
+        raise ValueError("bins must be at least two increasing lag edges.")
+    nbins = len(bins) - 1
+    max_lag = float(bins[-1])
+
+    x = df[x_col].to_numpy(dtype=np.float64)
+    y = df[y_col].to_numpy(dtype=np.float64)
+    theta = df[angle_col].to_numpy(dtype=np.float64)
+    err = df[error_col].to_numpy(dtype=np.float64) if error_col else np.zeros(len(df))
+    codes, labels = _group_codes(df[group_col])
+    keep = (codes >= 0) & _valid(x, y, theta, err)
+    codes, x, y, theta, err = codes[keep], x[keep], y[keep], theta[keep], err[keep]
+
+    # objects are stacked along a third axis, further apart than the
+    # largest lag, so one radius query finds the pairs of every object
+    points = np.column_stack((x, y, codes * (2.0 * max_lag)))
+    i, j, lag = GridIndex(points, max_lag).query_pairs(max_lag, chunk=chunk)
+
+    b = np.searchsorted(bins, lag, side='right') - 1
+    inside = (b >= 0) & (b < nbins)
+    i, j, lag, b = i[inside], j[inside], lag[inside], b[inside]
+
+    key = codes[i] * nbins + b
+    size = len(labels) * nbins
+    npairs = np.bincount(key, minlength=size)
+    sq = np.bincount(key, angle_difference(theta[i], theta[j]) ** 2, size)
+    lag_sum = np.bincount(key, lag, size)
+    noise = np.bincount(key, err[i] ** 2 + err[j] ** 2, size)
+
+    occupied = np.flatnonzero(npairs)
+    counts = npairs[occupied]
+    s2 = sq[occupied] / counts
+    bin_idx = occupied % nbins
+    return pd.DataFrame({
+        group_col        : labels.take(occupied // nbins),
+        'lag_lo'         : bins[bin_idx],
+        'lag_hi'         : bins[bin_idx + 1],
+        'lag'            : lag_sum[occupied] / counts,
+        'npairs'         : counts,
+        'S2 (deg^2)'     : s2,
+        'S2_corr (deg^2)': s2 - noise[occupied] / counts,
+    })
+
+
+def hildebrand_fit(sf, max_lag=None, group_col='ID', min_bins=2):
+    """
+    Fit ``<dphi^2>(l) = b^2 + m^2 l^2`` to each object's structure function.
+
+    Parameters
+    ----------
+    sf : DataFrame
+        Output of :func:`structure_function`.
+    max_lag : float, optional
+        Only bins with a mean lag up to this value enter the fit (the
+        relation holds for lags well below the large-scale field
+        curvature). All bins by default.
+    group_col : str, optional
+        Object column of `sf`.
+    min_bins : int, optional
+        Objects with fewer usable bins get NaN results.
+
+    Returns
+    -------
+    DataFrame
+        Indexed by object, with 'nbins', 'b (deg)' (turbulent dispersion
+        intercept), 'm^2 (deg^2/lag^2)' and 'turbulent_ratio', the
+        turbulent-to-ordered field strength ratio ``b / sqrt(2 - b**2)``
+        (b in radians). Bins are weighted by their pair counts; the
+        noise-corrected 'S2_corr (deg^2)' is fitted.
+    """
+    if max_lag is not None:
+        sf = sf[sf['lag'] <= max_lag]
+    codes, labels = _group_codes(sf[group_col])
+    n = len(labels)
+    w = sf['npairs'].to_numpy(dtype=np.float64)
+    u = sf['lag'].to_numpy(dtype=np.float64) ** 2
+    s = sf['S2_corr (deg^2)'].to_numpy(dtype=np.float64)
+
+    # weighted least squares of s on u, solved for all objects at once
+    sw = np.bincount(codes, w, n)
+    su = np.bincount(codes, w * u, n)
+    ss = np.bincount(codes, w * s, n)
+    suu = np.bincount(codes, w * u * u, n)
+    sus = np.bincount(codes, w * u * s, n)
+    nbins = np.bincount(codes, minlength=n)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        det = sw * suu - su ** 2
+        slope = (sw * sus - su * ss) / det
+        intercept = (ss - slope * su) / sw
+        ok = (nbins >= min_bins) & (det > 0)
+        b2 = np.where(ok & (intercept > 0), intercept, np.nan)
+        b_rad = np.radians(np.sqrt(b2))
+        ratio = b_rad / np.sqrt(2.0 - b_rad ** 2)
+    return pd.DataFrame({
+        'nbins'             : nbins,
+        'b (deg)'           : np.sqrt(b2),
+        'm^2 (deg^2/lag^2)' : np.where(ok, slope, np.nan),
+        'turbulent_ratio'   : ratio,
+    }, index=labels)
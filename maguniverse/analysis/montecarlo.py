@@ -0,0 +1,372 @@
+# -*- coding: utf-8 -*-
+"""
+montecarlo.py
+-----------
+
+Monte Carlo propagation of measurement uncertainties into derived
+quantities.
+
+:func:`propagate` draws `draws` Gaussian samples of every uncertain input
+of every source, evaluates a vectorized function on the
+``(sources, draws)`` sample arrays and summarizes each output by its
+mean, standard deviation and percentiles. Sources are processed in
+chunks whose sample arrays fit in ``chunk_bytes``, so memory stays bounded
+whatever the catalog size and number of draws. The chunks can be spread
+over a process pool.
+
+Each source draws from its own generator: source ``i`` uses the child of
+``np.random.SeedSequence(seed)`` with spawn key ``(i,)``, and takes the
+samples of its uncertain inputs in the order of `values`. A given seed and
+number of draws therefore give the same numbers for a source whatever the
+chunk size, the number of inputs and the number of workers.
+
+Two applications are provided:
+
+- :func:`dcf_propagation`: DCF plane-of-sky field strengths
+  (:mod:`maguniverse.analysis.dcf`) with uncertain angle dispersion,
+  density and line width;
+- :func:`mass_to_flux_propagation`: the mass-to-flux ratio of Zeeman
+  sources (Crutcher2010 'B_Z (muG)' +- 'sigma (muG)') with the H2 column
+  density of a gas catalog (Jijina1999 'logNNH3 ([cm-2])' and an NH3
+  abundance).
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from maguniverse.analysis.dcf import DEFAULT_MU, DEFAULT_Q, dcf_field_strength
+from maguniverse.analysis.zeeman import ZEEMAN_COLUMNS
+from maguniverse.utils.names import normalize_names
+
+DEFAULT_DRAWS = 10000
+DEFAULT_PERCENTILES = (2.5, 16.0, 50.0, 84.0, 97.5)
+DEFAULT_CHUNK_BYTES = 64 * 1024 ** 2     # sample arrays per chunk
+
+# Sample arrays alive per input while a chunk is evaluated (draws and
+# the function's temporaries), used to size the chunks
+_ARRAYS_PER_INPUT = 3
+
+# Crutcher (2004): lambda = 7.6e-21 N(H2) / B, N in cm^-2 and B in muG,
+# in units of the critical mass-to-flux ratio
+MASS_TO_FLUX_COEFF = 7.6e-21
+
+# NH3/H2 abundance ratio of dense cores and its scatter (dex)
+DEFAULT_NH3_ABUNDANCE = 1e-8
+DEFAULT_ABUNDANCE_DEX = 0.3
+
+# Column keyword arguments of mass_to_flux_propagation for each gas catalog
+COLUMN_DENSITY_COLUMNS = {
+    'Jijina1999': {
+        'name_col'  : 'Name',
+        'column_col': 'logNNH3 ([cm-2])',
+        'log_column': True,
+    },
+}
+
+
+def _statistic_names(percentiles):
+    return ['mean', 'std'] + ['p%g' % p for p in percentiles]
+
+
+def _summarize(samples, percentiles):
+    """(rows, 2 + len(percentiles)) mean, std and percentiles over the draws."""
+    samples = np.asarray(samples, dtype=np.float64)
+    with np.errstate(invalid='ignore'):
+        if np.isnan(samples).any():
+            mean = np.nanmean(samples, axis=1)
+            std = np.nanstd(samples, axis=1)
+            q = np.nanpercentile(samples, percentiles, axis=1)
+        else:
+            mean = samples.mean(axis=1)
+            std = samples.std(axis=1)
+            q = np.percentile(samples, percentiles, axis=1)
+    return np.column_stack([mean, std] + list(q))
+
+
+def _source_seed(root, row):
+    """Child of `root` owning the random stream of source `row`."""
+    return np.random.SeedSequence(root.entropy, spawn_key=root.spawn_key + (row,),
+                                  pool_size=root.pool_size)
+
+
+def _run_chunk(func, values, errors, draws, root, start, percentiles):
+    """
+    Draw the samples of the sources ``start, start + 1, ...`` of a chunk
+    and summarize `func` on them.
+    """
+    rows = len(next(iter(values.values()))) if values else 0
+    samples = {name: (value[:, None] if errors.get(name) is None
+                      else np.empty((rows, draws)))
+               for name, value in values.items()}
+    drawn = [samples[name] for name in values if errors.get(name) is not None]
+    if drawn:
+        for row in range(rows):
+            rng = np.random.default_rng(_source_seed(root, start + row))
+            for draw in drawn:
+                rng.standard_normal(out=draw[row])
+    for name, value in values.items():
+        sigma = errors.get(name)
+        if sigma is not None:
+            samples[name] *= sigma[:, None]
+            samples[name] += value[:, None]
+    out = func(**samples)
+    if not isinstance(out, dict):
+        out = {None: out}
+    return {name: _summarize(np.broadcast_to(result, (rows, draws)), percentiles)
+            for name, result in out.items()}
+
+
+def _run_chunk_worker(args):
+    return _run_chunk(*args)
+
+
+def propagate(func, values, errors=None, draws=DEFAULT_DRAWS, percentiles=DEFAULT_PERCENTILES,
+              seed=None, chunk_bytes=DEFAULT_CHUNK_BYTES, processes=None, index=None):
+    """
+    Propagate Gaussian input uncertainties through `func` by Monte Carlo.
+
+    Parameters
+    ----------
+    func : callable
+        Called as ``func(**samples)`` with one array per input, of shape
+        ``(sources, draws)`` (or ``(sources, 1)`` for an exact input), and
+        returning an array broadcastable to ``(sources, draws)``, or a
+        dict of such arrays keyed by output name. Must be picklable (a
+        module-level function or a ``functools.partial`` of one) when
+        `processes` is used.
+    values : dict
+        Central value of each input, ``{name: array_like}`` with one value
+        per source.
+    errors : dict, optional
+        One-sigma Gaussian uncertainty of the inputs, ``{name: array_like
+        or float}``. Inputs without an entry are exact.
+    draws : int, optional
+        Samples per source.
+    percentiles : sequence of float, optional
+        Percentiles of each output to report.
+    seed : int or SeedSequence, optional
+        Root seed; source ``i`` draws from its child with spawn key
+        ``(i,)``, so its samples do not depend on `chunk_bytes` or
+        `processes`. None draws fresh entropy.
+    chunk_bytes : int, optional
+        Approximate memory of the sample arrays of one chunk.
+    processes : int, optional
+        Spread the chunks over a pool of this many worker processes. 0 uses
+        one per CPU; None (default) evaluates in this process.
+    index : array_like, optional
+        Index of the returned frame, one label per source.
+
+    Returns
+    -------
+    DataFrame
+        One row per source, with two column levels: the output name (the
+        dict key of `func`'s result, or 'value') and the statistic:
+        'mean', 'std' and 'p<percentile>' (e.g. 'p16', 'p50', 'p84').
+        NaN samples are ignored in the statistics.
+    """
+    errors = errors or {}
+    unknown = set(errors) - set(values)
+    if unknown:
+        raise KeyError("Errors given for unknown inputs: %s" % ', '.join(sorted(unknown)))
+    values = {name: np.atleast_1d(np.asarray(v, dtype=np.float64)) for name, v in values.items()}
+    nrows = max((len(v) for v in values.values()), default=0)
+    values = {name: np.broadcast_to(v, (nrows,)) for name, v in values.items()}
+    errors = {name: np.broadcast_to(np.asarray(e, dtype=np.float64), (nrows,))
+              for name, e in errors.items() if e is not None}
+    percentiles = [float(p) for p in percentiles]
+
+    per_row = draws * 8 * _ARRAYS_PER_INPUT * max(len(values), 1)
+    rows = max(1, int(chunk_bytes // per_row))
+    bounds = [(start, min(start + rows, nrows)) for start in range(0, nrows, rows)]
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    tasks = [(func,
+              {name: v[start:stop] for name, v in values.items()},
+              {name: e[start:stop] for name, e in errors.items()},
+              draws, root, start, percentiles)
+             for start, stop in bounds]
+
+    if processes is None:
+        parts = [_run_chunk(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=processes or os.cpu_count()) as pool:
+            parts = list(pool.map(_run_chunk_worker, tasks))
+
+    stats = _statistic_names(percentiles)
+    frames = {}
+    for name in (parts[0] if parts else {}):
+        frames['value' if name is None else name] = pd.DataFrame(
+            np.concatenate([part[name] for part in parts]), columns=stats)
+    if not frames:
+        return pd.DataFrame(index=index)
+    result = pd.concat(frames, axis=1)
+    if index is not None:
+        result.index = index
+    return result
+
+
+def _dcf_samples(log_density, ln_sigma_v, ln_dispersion, q, mu):
+    return dcf_field_strength(10.0 ** log_density, np.exp(ln_sigma_v), np.exp(ln_dispersion),
+                              q=q, mu=mu)
+
+
+def dcf_propagation(estimates, dispersion_error=None, density_dex=0.0, sigma_v_error=0.0,
+                    q=DEFAULT_Q, mu=DEFAULT_MU, **kwargs):
+    """
+    Uncertainty of DCF field strengths by Monte Carlo.
+
+    Parameters
+    ----------
+    estimates : DataFrame
+        Output of :func:`maguniverse.analysis.dcf.dcf_estimates`.
+    dispersion_error : array_like or float, optional
+        Relative uncertainty of 'dispersion (deg)'. By default the
+        sampling error of a standard deviation, ``1 / sqrt(2 (n - 1))``.
+    density_dex : array_like or float, optional
+        Uncertainty of the density in dex.
+    sigma_v_error : array_like or float, optional
+        Relative uncertainty of 'sigma_v (km/s)'.
+    q, mu : float, optional
+        See :func:`maguniverse.analysis.dcf.dcf_field_strength`.
+    **kwargs
+        Forwarded to :func:`propagate` (draws, percentiles, seed,
+        chunk_bytes, processes).
+
+    Returns
+    -------
+    DataFrame
+        Indexed like `estimates`, with the 'B_pos (muG)' statistics of
+        :func:`propagate`.
+
+    Notes
+    -----
+    Dispersion and line width are drawn log-normally with the given
+    relative widths, and the density log-normally in dex, so every
+    sample stays positive.
+    """
+    if dispersion_error is None:
+        n = estimates['n'].to_numpy(dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dispersion_error = np.where(n > 1, 1.0 / np.sqrt(2.0 * (n - 1.0)), np.nan)
+    values = {
+        'log_density'  : np.log10(estimates['density (cm^-3)'].to_numpy(dtype=np.float64)),
+        'ln_sigma_v'   : np.log(estimates['sigma_v (km/s)'].to_numpy(dtype=np.float64)),
+        'ln_dispersion': np.log(estimates['dispersion (deg)'].to_numpy(dtype=np.float64)),
+    }
+    errors = {
+        'log_density'  : density_dex if np.any(density_dex) else None,
+        'ln_sigma_v'   : sigma_v_error if np.any(sigma_v_error) else None,
+        'ln_dispersion': dispersion_error,
+    }
+    func = partial(_mapped_outputs, partial(_dcf_samples, q=q, mu=mu), 'B_pos (muG)')
+    return propagate(func, values, errors, index=estimates.index, **kwargs)
+
+
+def _mapped_outputs(func, name, **samples):
+    return {name: func(**samples)}
+
+
+def mass_to_flux(column_density, field):
+    """
+    Mass-to-flux ratio in units of the critical value.
+
+    Parameters
+    ----------
+    column_density : array_like
+        H2 column density (cm^-2).
+    field : array_like
+        Field strength (muG); its absolute value is used.
+
+    Returns
+    -------
+    ndarray
+        ``7.6e-21 N(H2) / |B|`` (Crutcher 2004). Zero fields give inf.
+    """
+    with np.errstate(divide='ignore'):
+        return MASS_TO_FLUX_COEFF * np.asarray(column_density, dtype=np.float64) \
+            / np.abs(np.asarray(field, dtype=np.float64))
+
+
+def _mass_to_flux_samples(log_column, field):
+    return {'lambda': mass_to_flux(10.0 ** log_column, field)}
+
+
+def mass_to_flux_propagation(zeeman, gas, abundance=DEFAULT_NH3_ABUNDANCE,
+                             abundance_dex=DEFAULT_ABUNDANCE_DEX, column_dex=0.0,
+                             columns=None, gas_columns=None, name_col='Name', **kwargs):
+    """
+    Mass-to-flux ratios of Zeeman sources with Monte Carlo uncertainties.
+
+    Parameters
+    ----------
+    zeeman : DataFrame
+        Zeeman measurements, e.g. Crutcher2010.
+    gas : DataFrame
+        Column densities per region, e.g. Jijina1999 table 2.
+    abundance : float, optional
+        Abundance of the tracer relative to H2, converting the tracer
+        column of `gas` into N(H2). Use 1 when the column is already
+        N(H2).
+    abundance_dex : float, optional
+        Uncertainty of the abundance in dex.
+    column_dex : array_like or float, optional
+        Uncertainty of the tracer column density in dex.
+    columns : dict or str, optional
+        'field_col' and 'error_col' of `zeeman` (see ``ZEEMAN_COLUMNS`` of
+        :mod:`maguniverse.analysis.zeeman`), or a catalog name.
+        Crutcher2010 by default.
+    gas_columns : dict or str, optional
+        'name_col', 'column_col' and 'log_column' of `gas` (see
+        ``COLUMN_DENSITY_COLUMNS``), or a catalog name. Jijina1999 by
+        default.
+    name_col : str, optional
+        Source name column of `zeeman`.
+    **kwargs
+        Forwarded to :func:`propagate` (draws, percentiles, seed,
+        chunk_bytes, processes).
+
+    Returns
+    -------
+    DataFrame
+        One row per Zeeman measurement whose source is found in `gas`
+        (matched on normalized names, first gas row wins), indexed by
+        source name, with 'log N(H2) (cm^-2)', 'B_Z (muG)' and
+        'sigma (muG)' and the 'lambda' statistics of :func:`propagate`
+        (second column level 'value').
+    """
+    if columns is None or isinstance(columns, str):
+        columns = ZEEMAN_COLUMNS[columns or 'Crutcher2010']
+    if gas_columns is None or isinstance(gas_columns, str):
+        gas_columns = COLUMN_DENSITY_COLUMNS[gas_columns or 'Jijina1999']
+
+    column = gas[gas_columns['column_col']].to_numpy(dtype=np.float64)
+    if not gas_columns['log_column']:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            column = np.log10(column)
+    table = pd.Series(column, index=pd.Index(normalize_names(gas[gas_columns['name_col']]).array))
+    table = table[table.index.notna() & np.isfinite(table.to_numpy())]
+    table = table[~table.index.duplicated()]
+
+    keys = normalize_names(zeeman[name_col]).array
+    log_column = table.reindex(keys).to_numpy() - np.log10(abundance)
+    field = zeeman[columns['field_col']].to_numpy(dtype=np.float64)
+    sigma = zeeman[columns['error_col']].to_numpy(dtype=np.float64)
+    keep = np.isfinite(log_column) & np.isfinite(field) & np.isfinite(sigma)
+
+    log_error = np.hypot(np.broadcast_to(np.asarray(column_dex, dtype=np.float64), keep.shape),
+                         abundance_dex)[keep]
+    base = pd.DataFrame({
+        'log N(H2) (cm^-2)': log_column[keep],
+        'B_Z (muG)'        : field[keep],
+        'sigma (muG)'      : sigma[keep],
+    }, index=pd.Index(zeeman[name_col].to_numpy()[keep], name=name_col))
+    stats = propagate(_mass_to_flux_samples,
+                      {'log_column': base['log N(H2) (cm^-2)'], 'field': base['B_Z (muG)']},
+                      {'log_column': log_error if log_error.any() else None,
+                       'field': base['sigma (muG)']},
+                      index=base.index, **kwargs)
+    base.columns = pd.MultiIndex.from_product([base.columns, ['value']])
+    return pd.concat([base, stats], axis=1)
@@ -0,0 +1,382 @@
+# -*- coding: utf-8 -*-
+"""
+zeeman.py
+-----------
+
+Grid-based Bayesian analysis of the Zeeman B-n relation (Crutcher et al.
+2010).
+
+The model has four parameters. The maximum total field strength
+
+    B_max(n) = B0                  for n <= n0
+             = B0 (n / n0)**alpha  for n > n0
+
+sets the upper envelope, and the total field of each cloud is uniformly
+distributed between ``f B_max`` and ``B_max``. With random orientations
+the line-of-sight component has the density ``g(B_z / B_max) / B_max``, where
+
+    g(u) = ln(1 / max(f, |u|)) / (2 (1 - f)),    |u| <= 1.
+
+Each measurement ``B_z`` has Gaussian noise `sigma`. Its likelihood is
+``integral g(u) N(B_z; B_max u, sigma) du``. This is evaluated exactly for a
+piecewise-linear `g` on geometric nodes, so narrow and broad noise are
+handled alike.
+
+Evaluating a parameter grid costs one likelihood per (grid point, source).
+The per-source log-likelihood is therefore tabulated once on a fine
+log(B_max) grid for every `f`. Each chunk of grid points then computes
+its B_max values, interpolates the table and sums over sources, all
+broadcast as (grid points x sources x f). The chunks can be spread over a
+process pool.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Grid axes, in the order of the log-likelihood array dimensions
+PARAMETERS = ('B0', 'n0', 'alpha', 'f')
+
+# Column keyword arguments of log_likelihood_grid for each catalog
+ZEEMAN_COLUMNS = {
+    'Crutcher2010': {
+        'density_col': 'n_H (cm^-3)',
+        'field_col'  : 'B_Z (muG)',
+        'error_col'  : 'sigma (muG)',
+    },
+}
+
+DEFAULT_NODES = 32          # geometric pieces of g(u) between f and 1
+DEFAULT_TABLE_SIZE = 1024   # log(B_max) samples of the likelihood table
+DEFAULT_CHUNK = 1024        # grid points per vectorized pass
+
+# Floor of the per-source log-likelihood, so underflowed tails stay finite
+LOG_FLOOR = -700.0
+
+_SQRT_HALF = np.sqrt(0.5)
+_INV_SQRT_2PI = 1.0 / np.sqrt(2.0 * np.pi)
+
+
+def bmax_model(n, b0, n0, alpha):
+    """Upper envelope ``B_max(n)`` of the total field, broadcast over all arguments."""
+    n = np.asarray(n, dtype=np.float64)
+    return b0 * np.maximum(n / n0, 1.0) ** alpha
+
+
+def los_pdf(u, f):
+    """
+    Density ``g(u)`` of ``u = B_z / B_max`` for total fields uniform in
+    ``[f B_max, B_max]`` with random orientation.
+    """
+    u = np.abs(np.asarray(u, dtype=np.float64))
+    f = np.asarray(f, dtype=np.float64)
+    with np.errstate(divide='ignore'):
+        g = -np.log(np.maximum(f, u)) / (2.0 * (1.0 - f))
+    return np.where(u <= 1.0, g, 0.0)
+
+
+def _erfc(x):
+    """Complementary error function for ``x >= 0`` (relative error < 1.2e-7)."""
+    t = 1.0 / (1.0 + 0.5 * x)
+    poly = -1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (
+        -0.18628806 + t * (0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (
+            -0.82215223 + t * 0.17087277))))))))
+    return t * np.exp(-x * x + poly)
+
+
+def _normal_masses(t):
+    """
+    ``Phi(t[..., 1:]) - Phi(t[..., :-1])`` for increasing `t` along the last
+    axis, computed from the smaller tails to avoid cancellation.
+    """
+    tail = 0.5 * _erfc(np.abs(t) * _SQRT_HALF)
+    ta, tb = t[..., :-1], t[..., 1:]
+    ea, eb = tail[..., :-1], tail[..., 1:]
+    return np.where(ta >= 0.0, ea - eb, np.where(tb <= 0.0, eb - ea, 1.0 - ea - eb))
+
+
+def los_likelihood(bz, sigma, bmax, f, nodes=DEFAULT_NODES):
+    """
+    Likelihood of a measured line-of-sight field given ``B_max`` and `f`.
+
+    ``-ln u`` is interpolated linearly between geometric nodes from the
+    smallest `f` to 1, merged with every value of `f`. For each `f` the
+    integral is then a cumulative sum over the same pieces, so a vector of
+    `f` values costs little more than a single one.
+
+    Parameters
+    ----------
+    bz, sigma : array_like
+        Measured field and its Gaussian uncertainty.
+    bmax : array_like
+        Maximum total field strength, in the units of `bz`.
+    f : float or array_like
+        Lower bound(s) of the total field as a fraction of `bmax`, in (0, 1).
+    nodes : int, optional
+        Geometric pieces of ``g(u)`` between the smallest `f` and 1.
+
+    Returns
+    -------
+    ndarray
+        Probability density of `bz`, with shape
+        ``broadcast(bz, sigma, bmax).shape + np.shape(f)``.
+    """
+    f = np.asarray(f, dtype=np.float64)
+    fv = f.ravel()
+    if not len(fv) or np.any((fv <= 0) | (fv >= 1)):
+        raise ValueError("f must lie strictly between 0 and 1.")
+    bz, sigma, bmax = np.broadcast_arrays(
+        *(np.asarray(a, dtype=np.float64) for a in (bz, sigma, bmax)))
+
+    # nodes 0 < f_min ... 1; -ln u is linear on each piece above f_min
+    u = np.union1d(fv.min() ** (1.0 - np.arange(nodes + 1) / nodes), fv)
+    u[-1] = 1.0
+    h = -np.log(u)
+    slope = np.diff(h) / np.diff(u)
+    intercept = h[:-1] - slope * u[:-1]
+    u = np.concatenate(([0.0], u))
+    b, s = bmax[..., None], sigma[..., None]
+
+    pieces = mass = 0.0
+    for z in (bz[..., None], -bz[..., None]):   # g is even: both signs of u
+        # integral of (a + c u) N(z; B u, s) over each piece, with t = (B u - z) / s
+        t = (b * u - z) / s
+        m = _normal_masses(t)
+        density = np.exp(-0.5 * t * t) * _INV_SQRT_2PI
+        pieces = pieces + (intercept + slope * z / b) * m[..., 1:] \
+            + slope * s / b * (density[..., 1:-1] - density[..., 2:])
+        mass = mass + m
+
+    # g = -ln u / (2 (1 - f)) above f and -ln f / (2 (1 - f)) below
+    k = np.searchsorted(u, fv)
+    above = np.cumsum(pieces[..., ::-1], axis=-1)[..., ::-1][..., k - 1]
+    below = np.cumsum(mass, axis=-1)[..., k - 1]
+    like = (above - np.log(fv) * below) / (2.0 * (1.0 - fv)) / b
+    return np.maximum(like, 0.0).reshape(bz.shape + f.shape)
+
+
+class LikelihoodTable:
+    """
+    Per-source log-likelihood tabulated on a log(B_max) grid for each `f`.
+
+    Parameters
+    ----------
+    bz, sigma : array_like
+        Measured fields and uncertainties, one per source.
+    f : array_like
+        Values of the `f` parameter.
+    bmax_range : tuple of float
+        Smallest and largest ``B_max`` to tabulate.
+    size : int, optional
+        Number of log-spaced ``B_max`` samples.
+    nodes : int, optional
+        See :func:`los_likelihood`.
+    """
+
+    def __init__(self, bz, sigma, f, bmax_range, size=DEFAULT_TABLE_SIZE, nodes=DEFAULT_NODES):
+        self.f = np.atleast_1d(np.asarray(f, dtype=np.float64))
+        self.lo, hi = np.log(bmax_range[0]), np.log(bmax_range[1])
+        self.step = max(hi - self.lo, 1e-12) / (size - 1)
+        bmax = np.exp(self.lo + self.step * np.arange(size))
+        bz = np.asarray(bz, dtype=np.float64)
+        sigma = np.asarray(sigma, dtype=np.float64)
+
+        # values[source, sample, f]; one source per pass keeps the
+        # (sample x node) temporaries in cache
+        self.values = np.empty((len(bz), size, len(self.f)))
+        with np.errstate(divide='ignore'):
+            for i in range(len(bz)):
+                self.values[i] = np.log(los_likelihood(bz[i], sigma[i], bmax, self.f, nodes))
+        np.maximum(self.values, LOG_FLOOR, out=self.values)
+
+    def log_likelihood(self, log_bmax):
+        """
+        Summed log-likelihood of all sources.
+
+        Parameters
+        ----------
+        log_bmax : ndarray, shape (M, sources)
+            Natural log of ``B_max`` of every source for M parameter sets.
+
+        Returns
+        -------
+        ndarray, shape (M, len(f))
+        """
+        nsrc, size, nf = self.values.shape
+        x = np.clip((log_bmax - self.lo) / self.step, 0.0, size - 1.0)
+        k = np.minimum(x.astype(np.int64), size - 2)
+        w = (x - k)[..., None]
+        flat = self.values.reshape(nsrc * size, nf)
+        k += np.arange(nsrc) * size
+        lower = flat.take(k, axis=0)
+        values = lower + w * (flat.take(k + 1, axis=0) - lower)
+        return values.sum(axis=1)
+
+
+def _check_grid(b0, n0, alpha, f):
+    axes = [np.atleast_1d(np.asarray(a, dtype=np.float64)) for a in (b0, n0, alpha, f)]
+    for name, values in zip(PARAMETERS, axes):
+        if values.ndim != 1 or not len(values):
+            raise ValueError("Grid axis %r must be a non-empty 1-D array." % name)
+    if np.any(axes[0] <= 0) or np.any(axes[1] <= 0):
+        raise ValueError("B0 and n0 must be positive.")
+    if np.any((axes[3] <= 0) | (axes[3] >= 1)):
+        raise ValueError("f must lie strictly between 0 and 1.")
+    return axes
+
+
+def _bmax_range(log_n, log_b0, log_n0, alpha):
+    """Extreme B_max over the grid (the model is monotonic in each parameter)."""
+    excess = np.maximum(np.array([log_n.min(), log_n.max()])[:, None]
+                        - np.array([log_n0.min(), log_n0.max()])[None, :], 0.0).ravel()
+    corners = (np.array([log_b0.min(), log_b0.max()])[:, None, None]
+               + np.array([alpha.min(), alpha.max()])[None, :, None] * excess[None, None, :])
+    return np.exp(corners.min()) * 0.999, np.exp(corners.max()) * 1.001
+
+
+# Worker state of the process pool, set once per worker by _init_worker
+_worker = {}
+
+
+def _init_worker(table, log_n, log_b0, log_n0, alpha):
+    _worker.update(table=table, args=(log_n, log_b0, log_n0, alpha))
+
+
+def _evaluate(table, log_n, log_b0, log_n0, alpha, start, stop):
+    """Log-likelihood of the flattened (B0, n0, alpha) grid points start:stop."""
+    ib, i0, ia = np.unravel_index(np.arange(start, stop), (len(log_b0), len(log_n0), len(alpha)))
+    excess = np.maximum(log_n[None, :] - log_n0[i0][:, None], 0.0)
+    return table.log_likelihood(log_b0[ib][:, None] + alpha[ia][:, None] * excess)
+
+
+def _evaluate_worker(bounds):
+    return _evaluate(_worker['table'], *_worker['args'], *bounds)
+
+
+def log_likelihood_grid(data, b0, n0, alpha, f, columns=None, chunk=DEFAULT_CHUNK,
+                        processes=None, table_size=DEFAULT_TABLE_SIZE, nodes=DEFAULT_NODES):
+    """
+    Log-likelihood of the B_max(n) model over a parameter grid.
+
+    Parameters
+    ----------
+    data : DataFrame
+        Zeeman measurements, e.g. from
+        :func:`~maguniverse.data.zeeman.crutcher2010.get_crutcher2010`.
+        Rows with missing values are ignored.
+    b0, n0, alpha, f : array_like
+        Grid axis values. `b0` is in the field units of `data`, `n0` in its
+        density units and `f` lies in (0, 1).
+    columns : dict or str, optional
+        'density_col', 'field_col' and 'error_col' of `data`, or a key of
+        ``ZEEMAN_COLUMNS``. Crutcher2010 by default.
+    chunk : int, optional
+        (B0, n0, alpha) grid points per vectorized pass; memory grows as
+        ``chunk x sources x len(f)``.
+    processes : int, optional
+        Spread the chunks over a pool of this many worker processes. 0 uses
+        one per CPU; None (default) evaluates in this process.
+    table_size, nodes : int, optional
+        Resolution of the likelihood table and of ``g(u)``, see
+        :class:`LikelihoodTable`.
+
+    Returns
+    -------
+    ndarray, shape (len(b0), len(n0), len(alpha), len(f))
+        Total log-likelihood, with axes in the order of ``PARAMETERS``.
+
+    Raises
+    ------
+    ValueError
+        If a grid axis is empty or out of its domain, or no usable rows
+        remain in `data`.
+    """
+    if columns is None or isinstance(columns, str):
+        columns = ZEEMAN_COLUMNS[columns or 'Crutcher2010']
+    b0, n0, alpha, f = _check_grid(b0, n0, alpha, f)
+
+    n = data[columns['density_col']].to_numpy(dtype=np.float64)
+    bz = data[columns['field_col']].to_numpy(dtype=np.float64)
+    sigma = data[columns['error_col']].to_numpy(dtype=np.float64)
+    keep = np.isfinite(n) & np.isfinite(bz) & np.isfinite(sigma) & (n > 0) & (sigma > 0)
+    if not keep.any():
+        raise ValueError("No rows with a positive density and uncertainty.")
+    n, bz, sigma = n[keep], bz[keep], sigma[keep]
+
+    log_n, log_b0, log_n0 = np.log(n), np.log(b0), np.log(n0)
+    table = LikelihoodTable(bz, sigma, f, _bmax_range(log_n, log_b0, log_n0, alpha),
+                            size=table_size, nodes=nodes)
+    args = (log_n, log_b0, log_n0, alpha)
+    total = len(b0) * len(n0) * len(alpha)
+    bounds = [(start, min(start + chunk, total)) for start in range(0, total, chunk)]
+
+    if processes is None:
+        parts = [_evaluate(table, *args, *b) for b in bounds]
+    else:
+        with ProcessPoolExecutor(max_workers=processes or os.cpu_count(),
+                                 initializer=_init_worker, initargs=(table,) + args) as pool:
+            parts = list(pool.map(_evaluate_worker, bounds))
+    return np.concatenate(parts).reshape(len(b0), len(n0), len(alpha), len(f))
+
+
+def grid_posterior(log_like, log_prior=None):
+    """
+    Normalized posterior over the grid.
+
+    Parameters
+    ----------
+    log_like : ndarray
+        Output of :func:`log_likelihood_grid`.
+    log_prior : array_like, optional
+        Log prior broadcastable to `log_like`, e.g.
+        ``-np.log(b0)[:, None, None, None]`` for a log-uniform prior on B0.
+        Uniform over the grid points by default.
+
+    Returns
+    -------
+    ndarray
+        Posterior probabilities of the grid points, summing to 1.
+    """
+    log_post = np.asarray(log_like, dtype=np.float64)
+    if log_prior is not None:
+        log_post = log_post + log_prior
+    post = np.exp(log_post - np.max(log_post))
+    return post / post.sum()
+
+
+def posterior_summary(posterior, b0, n0, alpha, f, level=0.68):
+    """
+    Marginal posterior statistics of each parameter.
+
+    Parameters
+    ----------
+    posterior : ndarray
+        Output of :func:`grid_posterior`.
+    b0, n0, alpha, f : array_like
+        Grid axis values, as passed to :func:`log_likelihood_grid`.
+    level : float, optional
+        Probability enclosed by the central credible interval.
+
+    Returns
+    -------
+    DataFrame
+        Indexed by parameter, with 'mode', 'median', 'lower' and 'upper'
+        (interval bounds) and 'marginal' (the 1-D marginal distribution
+        over the axis values).
+    """
+    axes = _check_grid(b0, n0, alpha, f)
+    rows = {}
+    for i, (name, values) in enumerate(zip(PARAMETERS, axes)):
+        marginal = posterior.sum(axis=tuple(j for j in range(posterior.ndim) if j != i))
+        cdf = np.cumsum(marginal)
+        q = np.interp([(1.0 - level) / 2.0, 0.5, (1.0 + level) / 2.0], cdf, values)
+        rows[name] = {
+            'mode'    : values[np.argmax(marginal)],
+            'median'  : q[1],
+            'lower'   : q[0],
+            'upper'   : q[2],
+            'marginal': marginal,
+        }
+    return pd.DataFrame.from_dict(rows, orient='index')
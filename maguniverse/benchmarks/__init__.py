@@ -0,0 +1,7 @@
+"""
+Benchmarks guarding the performance of maguniverse.
+
+Run a benchmark module directly, e.g. ``python -m maguniverse.benchmarks.imports``,
+or the whole suite with regression gating via
+``python -m maguniverse.benchmarks.suite --baseline previous.json``.
+"""
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+concurrency.py
+-----------
+
+Multi-process stress test of the shared download cache, parsed-table
+cache and data directory.
+
+Several processes load the same remote table at the same moment, sharing
+one cache directory and one ``save_path``. The run checks that the
+single-flight locks of :mod:`maguniverse.utils.locking` hold:
+
+- the server sees exactly one GET for the table;
+- the table is parsed once, the other processes reuse the stored parse;
+- every process gets the same rows, and the saved CSV is complete;
+- no temporary files are left behind.
+
+Record names read ``concurrency.x<factor>.p<processes>``; each record
+also holds the observed 'downloads', 'parses' and the longest 'lock_wait'.
+A violated check raises :class:`RuntimeError`::
+
+    python -m maguniverse.benchmarks.concurrency --processes 8 --factor 10
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from maguniverse.benchmarks import synthetic
+
+DEFAULT_FACTORS = (10,)
+DEFAULT_PROCESSES = 8
+
+# Seconds between submitting the workers and their common start
+START_DELAY = 2.0
+
+
+class _CountingHandler(SimpleHTTPRequestHandler):
+    counts = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        with self.counts_lock:
+            self.counts[self.path] = self.counts.get(self.path, 0) + 1
+        super().do_GET()
+
+
+@contextmanager
+def serve_counting(directory):
+    """
+    Serve `directory` over HTTP and count the GET requests per path.
+
+    Yields
+    ------
+    tuple
+        (base URL ending with '/', dict of path -> number of GETs).
+    """
+    counts = {}
+    handler = type('CountingHandler', (_CountingHandler,),
+                   {'counts': counts, 'counts_lock': threading.Lock()})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(handler, directory=directory))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield 'http://127.0.0.1:%d/' % server.server_address[1], counts
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def _frame_digest(df):
+    return hashlib.sha256(df.to_csv(index=False).encode('utf-8')).hexdigest()
+
+
+def _worker(url, cache_dir, save_path, start_at):
+    """Load `url` at `start_at`; return the outcome seen by this process."""
+    from maguniverse.data.polarization.dotson2010 import get_dotson2010
+    from maguniverse.utils.cache import DownloadCache
+    from maguniverse.utils.metrics import collect_metrics
+    from maguniverse.utils.table_cache import TableCache
+
+    cache = DownloadCache(os.path.join(cache_dir, 'downloads'))
+    table_cache = TableCache(os.path.join(cache_dir, 'tables'))
+    time.sleep(max(0.0, start_at - time.time()))
+    with collect_metrics() as collector:
+        df = get_dotson2010(file_url=url, save_path=save_path, cache=cache,
+                            table_cache=table_cache)
+    events = {e.name: e.fields for e in collector.events}
+    return {
+        'pid'      : os.getpid(),
+        'rows'     : len(df),
+        'digest'   : _frame_digest(df),
+        'fetch'    : events['fetch'].get('cache'),
+        'parse'    : events['parse'].get('cache'),
+        'lock_wait': max(events['fetch'].get('lock_wait', 0.0),
+                         events['parse'].get('lock_wait', 0.0)),
+    }
+
+
+def _leftovers(directory):
+    return [os.path.join(root, name)
+            for root, _, names in os.walk(directory)
+            for name in names if name.endswith('.tmp')]
+
+
+def stress(processes=DEFAULT_PROCESSES, factor=10, workdir=None):
+    """
+    Load one table from `processes` processes at once and check the outcome.
+
+    Parameters
+    ----------
+    processes : int, optional
+        Number of concurrent processes.
+    factor : int, optional
+        Scale factor of the served Dotson2010 table.
+    workdir : str, optional
+        Directory for the served file, caches and saved copy; a temporary
+        directory (removed afterwards) by default.
+
+    Returns
+    -------
+    dict
+        'seconds' from the common start to the last result, 'downloads'
+        (GETs seen by the server), 'parses' (processes that parsed the
+        table), 'lock_wait' (longest wait of a process) and 'workers' (the
+        per-process outcomes).
+
+    Raises
+    ------
+    RuntimeError
+        If a single-flight or integrity check fails.
+    """
+    import pandas as pd
+
+    own_dir = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix='maguniverse-stress-')
+    served = os.path.join(workdir, 'served')
+    os.makedirs(served, exist_ok=True)
+    cache_dir = os.path.join(workdir, 'cache')
+    save_path = os.path.join(workdir, 'data', 'dotson2010.csv')
+    os.makedirs(os.path.dirname(save_path), exist_ok=True)
+    name = 'dotson_x%d.txt' % factor
+    synthetic.write_table(synthetic.scale_mrt(synthetic.read_bytes(synthetic.DOTSON_PATH),
+                                              factor), served, name)
+    try:
+        with serve_counting(served) as (base_url, counts), \
+                ProcessPoolExecutor(max_workers=processes) as pool:
+            start_at = time.time() + START_DELAY
+            futures = [pool.submit(_worker, base_url + name, cache_dir, save_path, start_at)
+                       for _ in range(processes)]
+            workers = [f.result() for f in futures]
+            seconds = time.time() - start_at
+            downloads = counts.get('/' + name, 0)
+
+        parses = sum(w['parse'] == 'miss' for w in workers)
+        problems = []
+        if downloads != 1:
+            problems.append('%d downloads instead of 1' % downloads)
+        if parses != 1:
+            problems.append('%d parses instead of 1' % parses)
+        if len({(w['rows'], w['digest']) for w in workers}) != 1:
+            problems.append('processes returned different tables')
+        saved = pd.read_csv(save_path)
+        if len(saved) != workers[0]['rows']:
+            problems.append('saved copy has %d rows instead of %d'
+                            % (len(saved), workers[0]['rows']))
+        leftovers = _leftovers(workdir)
+        if leftovers:
+            problems.append('temporary files left behind: %s' % ', '.join(leftovers))
+        if problems:
+            raise RuntimeError('Concurrency stress test failed: ' + '; '.join(problems))
+    finally:
+        if own_dir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        'seconds'  : seconds,
+        'downloads': downloads,
+        'parses'   : parses,
+        'lock_wait': max(w['lock_wait'] for w in workers),
+        'workers'  : workers,
+    }
+
+
+def run(factors=DEFAULT_FACTORS, repeat=1, memory=False, processes=DEFAULT_PROCESSES):
+    """
+    Run the stress test at each scale factor.
+
+    `repeat` and `memory` are accepted for the suite runner; every run
+    starts from empty caches, so only one run per factor is made and peak
+    memory (spread over processes) is not recorded.
+
+    Returns
+    -------
+    dict
+        Benchmark records keyed by name.
+    """
+    results = {}
+    for factor in factors:
+        outcome = stress(processes=processes, factor=factor)
+        results['concurrency.x%d.p%d' % (factor, processes)] = {
+            'seconds'  : outcome['seconds'],
+            'downloads': outcome['downloads'],
+            'parses'   : outcome['parses'],
+            'lock_wait': outcome['lock_wait'],
+        }
+    return results
+
+
+def main(argv=None):
+    """Command-line entry point; returns the process exit status."""
+    parser = argparse.ArgumentParser(
+        prog='python -m maguniverse.benchmarks.concurrency',
+        description='Stress the shared caches from several processes at once.')
+    parser.add_argument('--processes', type=int, default=DEFAULT_PROCESSES)
+    parser.add_argument('--factor', type=int, default=DEFAULT_FACTORS[0])
+    args = parser.parse_args(argv)
+    outcome = stress(processes=args.processes, factor=args.factor)
+    print(json.dumps(outcome, indent=1))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
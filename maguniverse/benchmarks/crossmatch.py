@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+crossmatch.py
+-----------
+
+Cross-match scaling benchmark.
+
+Matches two synthetic catalogs of N random positions in a fixed sky patch
+(so the source density grows with N, as for deeper surveys) with the
+grid-indexed :func:`maguniverse.utils.crossmatch.match_indices` and with
+the naive approach that evaluates all N x M separations. The naive
+timings are only measured up to `naive_max` rows; beyond that they are
+extrapolated from its quadratic scaling.
+"""
+
+import json
+import sys
+
+import numpy as np
+
+from maguniverse.benchmarks.timing import best_time
+from maguniverse.utils.coords import angular_separation
+from maguniverse.utils.crossmatch import match_indices
+
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+
+# Largest catalog size for which the naive all-pairs match is actually run
+DEFAULT_NAIVE_MAX = 10000
+
+# Sky patch (degrees) holding the synthetic positions
+_PATCH = (80.0, 85.0, -5.0, 0.0)
+
+
+def random_positions(n, seed=0, patch=_PATCH):
+    """Uniformly distributed (ra, dec) in degrees inside an RA/Dec box."""
+    rng = np.random.default_rng(seed)
+    ra_min, ra_max, dec_min, dec_max = patch
+    ra = rng.uniform(ra_min, ra_max, n)
+    sin_dec = rng.uniform(np.sin(np.radians(dec_min)), np.sin(np.radians(dec_max)), n)
+    return ra, np.degrees(np.arcsin(sin_dec))
+
+
+def naive_match(ra1, dec1, ra2, dec2, radius_arcsec, block=1000):
+    """
+    Nearest-neighbour match by computing every separation (O(N x M)).
+
+    Rows of the first catalog are processed in blocks of `block` to bound
+    memory; the work is still quadratic.
+    """
+    idx1, idx2, seps = [], [], []
+    for start in range(0, len(ra1), block):
+        sep = angular_separation(ra1[start:start + block, None], dec1[start:start + block, None],
+                                 ra2[None, :], dec2[None, :]) * 3600.0
+        best = sep.argmin(axis=1)
+        best_sep = sep[np.arange(len(best)), best]
+        hit = best_sep <= radius_arcsec
+        idx1.append(np.flatnonzero(hit) + start)
+        idx2.append(best[hit])
+        seps.append(best_sep[hit])
+    return np.concatenate(idx1), np.concatenate(idx2), np.concatenate(seps)
+
+
+def run_scaling(sizes=DEFAULT_SIZES, radius_arcsec=10.0, naive_max=DEFAULT_NAIVE_MAX, repeat=3):
+    """
+    Time indexed and naive nearest-neighbour matching for each size.
+
+    Parameters
+    ----------
+    sizes : iterable of int, optional
+        Number of rows in each of the two catalogs.
+    radius_arcsec : float, optional
+        Match radius.
+    naive_max : int, optional
+        Run the naive match only up to this size.
+    repeat : int, optional
+        Best-of-`repeat` timing.
+
+    Returns
+    -------
+    list of dict
+        Per size: 'rows', 'matches', 'indexed' seconds, 'naive' seconds
+        (measured or extrapolated, see 'naive_measured'), 'speedup' and
+        'agree', whether both methods found the same matches (None when
+        the naive match was not run).
+    """
+    results = []
+    reference = None
+    for n in sizes:
+        ra1, dec1 = random_positions(n, seed=1)
+        ra2, dec2 = random_positions(n, seed=2)
+        indexed, (i1, i2, _) = best_time(
+            lambda: match_indices(ra1, dec1, ra2, dec2, radius_arcsec), repeat)
+
+        agree = None
+        if n <= naive_max:
+            naive, (n1, n2, _) = best_time(
+                lambda: naive_match(ra1, dec1, ra2, dec2, radius_arcsec), repeat)
+            agree = bool(np.array_equal(i1, n1) and np.array_equal(i2, n2))
+            reference = (n, naive)
+            measured = True
+        else:
+            naive = reference[1] * (n / reference[0]) ** 2 if reference else float('nan')
+            measured = False
+
+        results.append({
+            'rows'          : n,
+            'matches'       : int(len(i1)),
+            'indexed'       : indexed,
+            'naive'         : naive,
+            'naive_measured': measured,
+            'speedup'       : naive / indexed,
+            'agree'         : agree,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    results = run_scaling()
+    print(json.dumps(results, indent=1))
+    sys.exit(0 if all(r['agree'] is not False for r in results) else 1)
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+derived.py
+-----------
+
+Benchmarks of the derived-quantity hot paths run after loading: ICRS
+coordinate conversion, dtype compaction, Stokes Q/U conversion and
+debiasing, name normalization and indexing, positional cross-matching,
+polarization structure functions, map gridding, the Zeeman B-n
+likelihood grid and Monte Carlo uncertainty propagation, on the scaled
+tables of :mod:`maguniverse.benchmarks.loaders`.
+
+Record names read ``derived.<operation>.x<factor>``.
+"""
+
+import numpy as np
+import pandas as pd
+
+from maguniverse.analysis.dispersion import CATALOG_COLUMNS, structure_function
+from maguniverse.analysis.montecarlo import mass_to_flux, propagate
+from maguniverse.analysis.stokes import STOKES_COLUMNS, stokes_columns
+from maguniverse.analysis.zeeman import log_likelihood_grid
+from maguniverse.benchmarks import loaders, synthetic
+from maguniverse.benchmarks.crossmatch import random_positions
+from maguniverse.benchmarks.timing import measure
+from maguniverse.data.zeeman.crutcher2010 import get_crutcher2010
+from maguniverse.utils.compact import compact_frame
+from maguniverse.utils.coords import parse_sexagesimal, sexagesimal_to_deg
+from maguniverse.utils.crossmatch import match_indices
+from maguniverse.utils.mapgrid import grid_maps
+from maguniverse.utils.mrt import read_mrt
+from maguniverse.utils.names import NameIndex, normalize_names
+
+DEFAULT_FACTORS = loaders.DEFAULT_FACTORS
+
+# Rows per catalog of the cross-match benchmark at factor 1
+CROSSMATCH_ROWS = 10000
+
+# Objects per scale factor and vectors per object of the structure-function
+# benchmark; lag bin edges in arcsec
+SF_OBJECTS = 100
+SF_VECTORS = 100
+SF_BINS = np.arange(0.0, 101.0, 10.0)
+
+# Map side (pixels) of the gridding benchmark, SF_OBJECTS maps per factor
+GRID_SIDE = 20
+
+# (n0, alpha, f) axes of the Zeeman likelihood benchmark; the B0 axis has
+# ZEEMAN_B0 points per scale factor
+ZEEMAN_AXES = (np.logspace(1.5, 3.5, 20), np.linspace(0.4, 0.9, 10), np.linspace(0.01, 0.5, 5))
+ZEEMAN_B0 = 10
+
+# Draws per source and scale factor of the Monte Carlo benchmark, over the
+# Crutcher2010 sources
+MC_DRAWS = 10000
+
+
+def polarization_maps(nobjects, nvectors=SF_VECTORS, seed=0, half_width=150.0):
+    """Random polarization maps in the Dotson2010 layout, `nvectors` per object."""
+    rng = np.random.default_rng(seed)
+    n = nobjects * nvectors
+    return pd.DataFrame({
+        'ID'          : np.repeat(['OBJ%05d' % i for i in range(nobjects)], nvectors),
+        'ΔR.A.'       : rng.uniform(-half_width, half_width, n),
+        'ΔDecl.'      : rng.uniform(-half_width, half_width, n),
+        'theta'       : rng.uniform(0.0, 180.0, n),
+        'sigma(theta)': rng.uniform(1.0, 10.0, n),
+    })
+
+
+def pixel_table(nobjects, side=GRID_SIDE, seed=0):
+    """Random `side` x `side` pixel maps in the Dotson2010 layout, one per object."""
+    rng = np.random.default_rng(seed)
+    n = nobjects * side * side
+    x, y = np.meshgrid(np.arange(side) - side // 2, np.arange(side) - side // 2)
+    return pd.DataFrame({
+        'ID'          : np.repeat(['OBJ%05d' % i for i in range(nobjects)], side * side),
+        'Δx'          : np.tile(x.ravel(), nobjects).astype(np.float64),
+        'Δy'          : np.tile(y.ravel(), nobjects).astype(np.float64),
+        'P'           : rng.uniform(0.0, 10.0, n),
+        'theta'       : rng.uniform(0.0, 180.0, n),
+        'Intensity'   : rng.uniform(1.0, 100.0, n),
+    })
+
+
+def run(factors=DEFAULT_FACTORS, repeat=3, memory=True):
+    """
+    Benchmark the derived-quantity computations.
+
+    Parameters
+    ----------
+    factors : iterable of int, optional
+        Scale factors of the input tables.
+    repeat : int, optional
+        Best-of-`repeat` timing.
+    memory : bool, optional
+        Record the peak memory of each run.
+
+    Returns
+    -------
+    dict
+        Benchmark records keyed by name.
+    """
+    results = {}
+    for factor in factors:
+        dotson = read_mrt(synthetic.scale_mrt(synthetic.read_bytes(synthetic.DOTSON_PATH), factor))
+        matthews = read_mrt(loaders._matthews(factor))
+        rows = {'rows': len(matthews)}
+
+        results['derived.icrs_split.x%d' % factor] = measure(
+            lambda: (sexagesimal_to_deg(matthews['RAh'], matthews['RAm'], matthews['RAs'],
+                                        hours=True),
+                     sexagesimal_to_deg(matthews['DEd'], matthews['DEm'], matthews['DEs'],
+                                        sign=matthews['DE-'])),
+            repeat=repeat, memory=memory, **rows)
+
+        ra_text = np.array(['%02d %02d %05.2f' % (h, m, s) for h, m, s in
+                            zip(matthews['RAh'], matthews['RAm'], matthews['RAs'])], dtype=object)
+        results['derived.icrs_text.x%d' % factor] = measure(
+            lambda: parse_sexagesimal(ra_text, hours=True),
+            repeat=repeat, memory=memory, **rows)
+
+        results['derived.compact.x%d' % factor] = measure(
+            lambda: compact_frame(dotson), repeat=repeat, memory=memory, rows=len(dotson))
+
+        results['derived.stokes.x%d' % factor] = measure(
+            lambda: stokes_columns(matthews, 'mas', **STOKES_COLUMNS['Matthews2009']),
+            repeat=repeat, memory=memory, **rows)
+
+        results['derived.normalize_names.x%d' % factor] = measure(
+            lambda: normalize_names(dotson['Name']), repeat=repeat, memory=memory,
+            rows=len(dotson))
+
+        results['derived.name_index.x%d' % factor] = measure(
+            lambda: NameIndex().update('Dotson2010', dotson, column='Name'),
+            repeat=repeat, memory=memory, rows=len(dotson))
+
+        n = CROSSMATCH_ROWS * factor
+        ra1, dec1 = random_positions(n, seed=1)
+        ra2, dec2 = random_positions(n, seed=2)
+        results['derived.crossmatch.x%d' % factor] = measure(
+            lambda: match_indices(ra1, dec1, ra2, dec2, 10.0),
+            repeat=repeat, memory=memory, rows=n)
+
+        maps = polarization_maps(SF_OBJECTS * factor)
+        results['derived.structure_function.x%d' % factor] = measure(
+            lambda: structure_function(maps, SF_BINS, **CATALOG_COLUMNS['Dotson2010']),
+            repeat=repeat, memory=memory, rows=len(maps))
+
+        pixels = pixel_table(SF_OBJECTS * factor)
+        results['derived.grid_maps.x%d' % factor] = measure(
+            lambda: grid_maps(pixels, ['P', 'theta', 'Intensity'], pixel_scale=17.8),
+            repeat=repeat, memory=memory, rows=len(pixels))
+
+        crutcher = get_crutcher2010(table_cache=False)
+        b0 = np.linspace(1.0, 30.0, ZEEMAN_B0 * factor)
+        results['derived.zeeman_grid.x%d' % factor] = measure(
+            lambda: log_likelihood_grid(crutcher, b0, *ZEEMAN_AXES),
+            repeat=repeat, memory=memory, rows=len(b0) * int(np.prod([len(a) for a in ZEEMAN_AXES])))
+
+        draws = MC_DRAWS * factor
+        results['derived.montecarlo.x%d' % factor] = measure(
+            lambda: propagate(mass_to_flux,
+                              {'column_density': np.full(len(crutcher), 1e22),
+                               'field': crutcher['B_Z (muG)']},
+                              {'column_density': 3e21, 'field': crutcher['sigma (muG)']},
+                              draws=draws, seed=0),
+            repeat=repeat, memory=memory, rows=len(crutcher) * draws)
+    return results
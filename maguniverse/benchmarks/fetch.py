@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+fetch.py
+-----------
+
+Download benchmarks against a local HTTP server.
+
+A threaded ``http.server`` on 127.0.0.1 serves scaled copies of the
+bundled Dotson2010 table, so the numbers reflect the client side
+(streaming, hashing, cache bookkeeping) rather than the network. The
+standard handler answers ``If-Modified-Since`` with 304, which exercises
+the conditional revalidation path of the download cache.
+
+Record names read ``fetch.x<factor>.<mode>`` with modes 'download'
+(no cache), 'miss' (first download into the cache), 'hit' (fresh cache
+entry) and 'revalidate' (stale entry, 304 response), plus
+``fetch.bulk.<n>`` for :func:`maguniverse.utils.fetch_all` over `n` tables.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from maguniverse.benchmarks import synthetic
+from maguniverse.benchmarks.timing import measure
+from maguniverse.utils.cache import DownloadCache
+from maguniverse.utils.fetch_ascii import get_ascii
+from maguniverse.utils.fetch_bulk import fetch_all
+
+DEFAULT_FACTORS = (1, 10, 100)
+
+# Number of tables downloaded concurrently by the bulk benchmark
+BULK_TABLES = 16
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def serve_directory(directory):
+    """
+    Serve `directory` over HTTP on a free local port.
+
+    Yields
+    ------
+    str
+        Base URL, ending with '/'.
+    """
+    handler = partial(_QuietHandler, directory=directory)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield 'http://127.0.0.1:%d/' % server.server_address[1]
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def run(factors=DEFAULT_FACTORS, repeat=3, memory=True, bulk=BULK_TABLES):
+    """
+    Benchmark downloads of scaled tables from a local server.
+
+    Parameters
+    ----------
+    factors : iterable of int, optional
+        Scale factors of the served Dotson2010 table.
+    repeat : int, optional
+        Best-of-`repeat` timing.
+    memory : bool, optional
+        Record the peak memory of each run.
+    bulk : int, optional
+        Number of tables for the concurrent bulk benchmark; 0 skips it.
+
+    Returns
+    -------
+    dict
+        Benchmark records keyed by name.
+    """
+    results = {}
+    workdir = tempfile.mkdtemp(prefix='maguniverse-bench-')
+    served = os.path.join(workdir, 'served')
+    os.makedirs(served)
+    base_raw = synthetic.read_bytes(synthetic.DOTSON_PATH)
+    try:
+        with serve_directory(served) as base_url:
+            for factor in factors:
+                raw = synthetic.scale_mrt(base_raw, factor)
+                name = 'dotson_x%d.txt' % factor
+                synthetic.write_table(raw, served, name)
+                url = base_url + name
+                info = {'nbytes': len(raw)}
+                prefix = 'fetch.x%d.' % factor
+
+                results[prefix + 'download'] = measure(
+                    lambda: get_ascii(file_url=url, cache=False),
+                    repeat=repeat, memory=memory, **info)
+
+                def miss():
+                    cache = DownloadCache(tempfile.mkdtemp(dir=workdir))
+                    return get_ascii(file_url=url, cache=cache)
+                results[prefix + 'miss'] = measure(miss, repeat=repeat, memory=memory, **info)
+
+                fresh = DownloadCache(tempfile.mkdtemp(dir=workdir))
+                get_ascii(file_url=url, cache=fresh)
+                results[prefix + 'hit'] = measure(
+                    lambda: get_ascii(file_url=url, cache=fresh),
+                    repeat=repeat, memory=memory, **info)
+
+                stale = DownloadCache(tempfile.mkdtemp(dir=workdir), ttl=0)
+                get_ascii(file_url=url, cache=stale)
+                results[prefix + 'revalidate'] = measure(
+                    lambda: get_ascii(file_url=url, cache=stale),
+                    repeat=repeat, memory=memory, **info)
+
+            if bulk:
+                links = {}
+                for i in range(bulk):
+                    name = 'bulk_%02d.txt' % i
+                    synthetic.write_table(base_raw, served, name)
+                    links['t%02d' % i] = base_url + name
+                sources = {'Benchmark': {'data_link': links}}
+
+                def fetch_bulk():
+                    cache = DownloadCache(tempfile.mkdtemp(dir=workdir))
+                    fetched = fetch_all(sources, cache=cache, per_host=8)
+                    if any(r.status != 'ok' for r in fetched.values()):
+                        raise RuntimeError('bulk benchmark download failed')
+                    return fetched
+                results['fetch.bulk.%d' % bulk] = measure(
+                    fetch_bulk, repeat=repeat, memory=memory, nbytes=bulk * len(base_raw))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+imports.py
+-----------
+
+Import-time benchmark.
+
+Each measurement runs in a fresh interpreter so module caching does not
+hide the cost. Besides the wall time, it reports which heavy third-party
+packages were pulled in, since ``import maguniverse`` must stay free of
+pandas, numpy and requests for short-lived workers and CLI calls.
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+
+# Packages that must not be imported by `import maguniverse`
+HEAVY_MODULES = ('pandas', 'numpy', 'requests')
+
+# Default budget for `import maguniverse` in a fresh interpreter (seconds)
+DEFAULT_LIMIT = 0.05
+
+_PROBE = """
+import sys, time, json
+t0 = time.perf_counter()
+import {module}
+{statement}
+elapsed = time.perf_counter() - t0
+print(json.dumps({{'elapsed': elapsed, 'modules': sorted(sys.modules)}}))
+"""
+
+
+def time_import(module='maguniverse', statement='', repeat=5):
+    """
+    Time importing `module` (and running `statement`) in fresh interpreters.
+
+    Parameters
+    ----------
+    module : str, optional
+        Module to import.
+    statement : str, optional
+        Extra code run after the import and included in the timing,
+        e.g. ``"maguniverse.list_catalogs()"``.
+    repeat : int, optional
+        Number of fresh interpreters to measure.
+
+    Returns
+    -------
+    dict
+        'median' and 'min' import time in seconds, the raw 'samples', and
+        'heavy_modules', the entries of ``HEAVY_MODULES`` that were loaded.
+    """
+    code = _PROBE.format(module=module, statement=statement)
+    samples = []
+    modules = set()
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', code], check=True,
+                             capture_output=True, text=True).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        samples.append(result['elapsed'])
+        modules.update(result['modules'])
+    return {
+        'module'       : module,
+        'statement'    : statement,
+        'median'       : statistics.median(samples),
+        'min'          : min(samples),
+        'samples'      : samples,
+        'heavy_modules': sorted(m for m in HEAVY_MODULES if m in modules),
+    }
+
+
+def check_import(limit=DEFAULT_LIMIT, repeat=5):
+    """
+    Check that ``import maguniverse`` and listing catalogs stay cheap.
+
+    Returns
+    -------
+    tuple
+        (ok, result) where `ok` is False if the median time exceeds `limit`
+        or a heavy module was imported.
+    """
+    result = time_import('maguniverse', 'maguniverse.list_catalogs()', repeat=repeat)
+    ok = result['median'] <= limit and not result['heavy_modules']
+    return ok, result
+
+
+if __name__ == "__main__":
+    ok, result = check_import()
+    print(json.dumps(result, indent=1))
+    sys.exit(0 if ok else 1)
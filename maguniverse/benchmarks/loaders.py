@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+loaders.py
+-----------
+
+Loader benchmarks on bundled and scaled synthetic tables.
+
+Every ``get_*`` loader is run on its table at each scale factor, in three
+modes:
+
+- 'parse': raw text to DataFrame, parsed-table cache disabled;
+- 'cached': warm load from the parsed-table cache;
+- 'chunked': iterating over ``chunksize`` batches (streaming path).
+
+Record names read ``load.<loader>.x<factor>.<mode>``.
+"""
+
+import shutil
+import tempfile
+
+from maguniverse.benchmarks import synthetic
+from maguniverse.benchmarks.timing import measure
+from maguniverse.registry import get_loader
+from maguniverse.utils.table_cache import TableCache
+
+DEFAULT_FACTORS = (1, 10, 100)
+
+# Rows of the generated base tables that are not bundled
+MATTHEWS_ROWS = 2000
+JIJINA_ROWS = 300
+
+CHUNKSIZE = 100000
+
+
+def _matthews(factor):
+    return synthetic.scale_mrt(synthetic.make_mrt(synthetic.MATTHEWS_SPEC, MATTHEWS_ROWS), factor)
+
+
+def _dotson(factor):
+    return synthetic.scale_mrt(synthetic.read_bytes(synthetic.DOTSON_PATH), factor)
+
+
+def _crutcher(factor):
+    return synthetic.scale_lines(synthetic.read_bytes(synthetic.CRUTCHER_PATH),
+                                 synthetic.CRUTCHER_HEADER, synthetic.CRUTCHER_FOOTER, factor)
+
+
+def _jijina(factor):
+    from maguniverse.data.gas.jijina1999 import FORMATS, SKIPROWS
+
+    raw = synthetic.make_vizier_fwf(list(FORMATS.values()), JIJINA_ROWS, SKIPROWS)
+    return synthetic.scale_lines(raw, SKIPROWS, 0, factor)
+
+
+def _jijina_targets(factor):
+    spec = synthetic.JIJINA_TARGETS_SPEC
+    raw = synthetic.make_vizier_asu(spec, JIJINA_ROWS)
+    # #Column lines, leading '#', label, unit and dash lines; '#END#' footer
+    return synthetic.scale_lines(raw, len(spec) + 4, 2, factor)
+
+
+# benchmark name -> ((catalog, table), table generator, supports chunksize)
+LOADERS = {
+    'dotson2010'        : (('Dotson2010', 't2'), _dotson, True),
+    'matthews2009'      : (('Matthews2009', 't6'), _matthews, True),
+    'crutcher2010'      : (('Crutcher2010', 't1'), _crutcher, True),
+    'jijina1999'        : (('Jijina1999', 't2'), _jijina, True),
+    'jijina1999_targets': (('Jijina1999', 't1'), _jijina_targets, False),
+}
+
+
+def run(factors=DEFAULT_FACTORS, repeat=3, memory=True, loaders=None):
+    """
+    Benchmark the loaders.
+
+    Parameters
+    ----------
+    factors : iterable of int, optional
+        Table scale factors relative to the bundled (or generated base)
+        table. Factors up to 1000 are supported; the largest tables need
+        several GB of memory.
+    repeat : int, optional
+        Best-of-`repeat` timing.
+    memory : bool, optional
+        Record the peak memory of each run.
+    loaders : iterable of str, optional
+        Subset of ``LOADERS``.
+
+    Returns
+    -------
+    dict
+        Benchmark records keyed by name.
+    """
+    results = {}
+    workdir = tempfile.mkdtemp(prefix='maguniverse-bench-')
+    try:
+        for name in loaders or LOADERS:
+            (catalog, table), generate, chunked = LOADERS[name]
+            loader = get_loader(catalog, table)
+            for factor in factors:
+                raw = generate(factor)
+                path = synthetic.write_table(raw, workdir, '%s_x%d.txt' % (name, factor))
+                df = loader(file_path=path, table_cache=False)
+                info = {'rows': len(df), 'nbytes': len(raw)}
+                prefix = 'load.%s.x%d.' % (name, factor)
+
+                results[prefix + 'parse'] = measure(
+                    lambda: loader(file_path=path, table_cache=False),
+                    repeat=repeat, memory=memory, **info)
+
+                table_cache = TableCache(tempfile.mkdtemp(dir=workdir))
+                loader(file_path=path, table_cache=table_cache)
+                results[prefix + 'cached'] = measure(
+                    lambda: loader(file_path=path, table_cache=table_cache),
+                    repeat=repeat, memory=memory, **info)
+
+                if chunked:
+                    results[prefix + 'chunked'] = measure(
+                        lambda: sum(len(c) for c in loader(file_path=path, chunksize=CHUNKSIZE,
+                                                           table_cache=False)),
+                        repeat=repeat, memory=memory, **info)
+                del df, raw
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
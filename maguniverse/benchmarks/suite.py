@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+suite.py
+-----------
+
+Benchmark suite runner with regression gating.
+
+Runs the benchmark groups, writes the records as JSON and, given a
+baseline file from an earlier run, fails when a benchmark became slower
+(or used more memory) than the configured thresholds::
+
+    python -m maguniverse.benchmarks.suite --output base.json
+    # ... upgrade pandas, edit a loader ...
+    python -m maguniverse.benchmarks.suite --baseline base.json --threshold 1.5
+
+The exit status is 1 if any regression was found.
+"""
+
+import argparse
+import datetime
+import importlib
+import json
+import platform
+import sys
+
+# group name -> module providing run(factors=..., repeat=..., memory=...)
+GROUPS = {
+    'loaders': 'maguniverse.benchmarks.loaders',
+    'fetch'  : 'maguniverse.benchmarks.fetch',
+    'derived': 'maguniverse.benchmarks.derived',
+    'imports': 'maguniverse.benchmarks.imports',
+    'concurrency': 'maguniverse.benchmarks.concurrency',
+}
+
+DEFAULT_THRESHOLD = 1.5          # allowed slowdown ratio
+DEFAULT_MEMORY_THRESHOLD = 1.25  # allowed peak-memory growth ratio
+MIN_SECONDS = 0.02               # timings below this are too noisy to gate on
+
+
+def _environment():
+    versions = {}
+    for name in ('numpy', 'pandas', 'requests'):
+        try:
+            versions[name] = importlib.import_module(name).__version__
+        except ImportError:
+            versions[name] = None
+    return {
+        'python'   : platform.python_version(),
+        'platform' : platform.platform(),
+        'machine'  : platform.machine(),
+        'packages' : versions,
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+
+
+def _run_imports(repeat, **_):
+    from maguniverse.benchmarks.imports import time_import
+
+    result = time_import('maguniverse', 'maguniverse.list_catalogs()', repeat=max(repeat, 3))
+    return {'import.maguniverse': {'seconds': result['median'],
+                                   'heavy_modules': result['heavy_modules']}}
+
+
+def run_suite(groups=None, factors=None, repeat=3, memory=True):
+    """
+    Run benchmark groups.
+
+    Parameters
+    ----------
+    groups : iterable of str, optional
+        Names from ``GROUPS``. All groups by default.
+    factors : iterable of int, optional
+        Table scale factors; each group's default when None.
+    repeat : int, optional
+        Best-of-`repeat` timing.
+    memory : bool, optional
+        Record peak memory with tracemalloc.
+
+    Returns
+    -------
+    dict
+        ``{'environment': {...}, 'results': {name: record}}`` where each
+        record holds 'seconds' and optionally 'peak_bytes', 'rows' and
+        'nbytes'.
+    """
+    results = {}
+    for group in groups or GROUPS:
+        if group not in GROUPS:
+            raise KeyError("Unknown benchmark group %r; available: %s"
+                           % (group, ', '.join(GROUPS)))
+        if group == 'imports':
+            results.update(_run_imports(repeat))
+            continue
+        kwargs = {'repeat': repeat, 'memory': memory}
+        if factors is not None:
+            kwargs['factors'] = tuple(factors)
+        results.update(importlib.import_module(GROUPS[group]).run(**kwargs))
+    return {'environment': _environment(), 'results': results}
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD,
+            memory_threshold=DEFAULT_MEMORY_THRESHOLD, min_seconds=MIN_SECONDS):
+    """
+    Find benchmarks that regressed relative to a baseline run.
+
+    Parameters
+    ----------
+    current, baseline : dict
+        Outputs of :func:`run_suite` (or their 'results' entries).
+    threshold : float, optional
+        Maximum allowed ratio of current to baseline time.
+    memory_threshold : float or None, optional
+        Maximum allowed ratio of current to baseline peak memory. None
+        disables the memory check.
+    min_seconds : float, optional
+        Benchmarks faster than this in both runs are not timed-gated.
+
+    Returns
+    -------
+    list of dict
+        One entry per regression with 'name', 'metric', 'baseline',
+        'current' and 'ratio'. Benchmarks present in only one run are
+        ignored.
+    """
+    current = current.get('results', current)
+    baseline = baseline.get('results', baseline)
+    regressions = []
+    for name in sorted(set(current) & set(baseline)):
+        new, old = current[name], baseline[name]
+        checks = [('seconds', threshold)]
+        if memory_threshold is not None:
+            checks.append(('peak_bytes', memory_threshold))
+        for metric, limit in checks:
+            if metric not in new or metric not in old or not old[metric]:
+                continue
+            if metric == 'seconds' and max(new[metric], old[metric]) < min_seconds:
+                continue
+            ratio = new[metric] / old[metric]
+            if ratio > limit:
+                regressions.append({'name': name, 'metric': metric, 'baseline': old[metric],
+                                    'current': new[metric], 'ratio': ratio})
+    return regressions
+
+
+def _parse_ints(text):
+    return tuple(int(v) for v in text.split(',') if v)
+
+
+def add_arguments(parser):
+    """Add the suite options to an ``argparse`` parser."""
+    parser.add_argument('--groups', default=','.join(GROUPS),
+                        help='comma-separated groups (default: %(default)s)')
+    parser.add_argument('--factors', type=_parse_ints, default=None,
+                        help='comma-separated table scale factors, e.g. 1,10,100,1000')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true', help='skip memory profiling')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='allowed slowdown ratio (default: %(default)s)')
+    parser.add_argument('--memory-threshold', type=float, default=DEFAULT_MEMORY_THRESHOLD,
+                        help='allowed peak-memory growth ratio (default: %(default)s)')
+
+
+def run_args(args):
+    """
+    Run the suite with parsed :func:`add_arguments` options.
+
+    Returns
+    -------
+    tuple
+        (report, exit status): the :func:`run_suite` output, with a
+        'regressions' list when a baseline was given, and 1 if any
+        regression was found, else 0.
+    """
+    report = run_suite(groups=[g for g in args.groups.split(',') if g], factors=args.factors,
+                       repeat=args.repeat, memory=not args.no_memory)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        report['regressions'] = compare(
+            report, baseline, threshold=args.threshold,
+            memory_threshold=None if args.no_memory else args.memory_threshold)
+        status = 1 if report['regressions'] else 0
+    return report, status
+
+
+def print_regressions(report, file=None):
+    """Print one line per regression of a :func:`run_args` report (to stderr)."""
+    for r in report.get('regressions', []):
+        print('REGRESSION %s %s: %.4g -> %.4g (x%.2f)'
+              % (r['name'], r['metric'], r['baseline'], r['current'], r['ratio']),
+              file=file or sys.stderr)
+
+
+def main(argv=None):
+    """Command-line entry point; returns the process exit status."""
+    parser = argparse.ArgumentParser(
+        prog='python -m maguniverse.benchmarks.suite',
+        description='Run the maguniverse benchmark suite.')
+    add_arguments(parser)
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    args = parser.parse_args(argv)
+
+    report, status = run_args(args)
+    text = json.dumps(report, indent=1)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+    print_regressions(report)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
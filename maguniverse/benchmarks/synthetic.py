@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+synthetic.py
+-----------
+
+Synthetic catalog tables for the benchmarks.
+
+Bundled tables (``datafiles/``) are scaled by repeating their data
+records under the original header, so the layout the loaders see is
+exactly the published one. Tables that are not bundled (Matthews2009,
+Jijina1999) are generated from a column specification in the same MRT or
+VizieR ``asu-txt`` layout, with random values that fit the declared
+formats.
+"""
+
+import os
+
+import numpy as np
+
+from maguniverse import __parent_dir__
+from maguniverse.utils.mrt import parse_mrt_header
+
+DOTSON_PATH = os.path.join(__parent_dir__, 'datafiles/polarization/dotson2010_t2.txt')
+CRUTCHER_PATH = os.path.join(__parent_dir__, 'datafiles/zeeman/crutcher2010.txt')
+
+# Header and footer lines around the records of the Crutcher2010 table
+CRUTCHER_HEADER = 5
+CRUTCHER_FOOTER = 3
+
+# (label, format, units) of the Matthews et al. (2009) table 6 columns
+MATTHEWS_SPEC = [
+    ('ID',      'A12',  '---'),
+    ('f_ID',    'A1',   '---'),
+    ('RAOff',   'F6.1', 'arcsec'),
+    ('DEOff',   'F6.1', 'arcsec'),
+    ('RAh',     'I2',   'h'),
+    ('RAm',     'I2',   'min'),
+    ('RAs',     'F5.2', 's'),
+    ('DE-',     'A1',   '---'),
+    ('DEd',     'I2',   'deg'),
+    ('DEm',     'I2',   'arcmin'),
+    ('DEs',     'F4.1', 'arcsec'),
+    ('Int',     'F7.3', 'Jy/beam'),
+    ('e_Int',   'F6.3', 'Jy/beam'),
+    ('Pol',     'F5.2', '%'),
+    ('e_Pol',   'F5.2', '%'),
+    ('theta',   'F6.1', 'deg'),
+    ('e_theta', 'F5.1', 'deg'),
+]
+
+# (label, format) of the Jijina et al. (1999) table A1 VizieR output
+JIJINA_TARGETS_SPEC = [
+    ('Seq',      'I4'),
+    ('n_Seq',    'A1'),
+    ('Name',     'A16'),
+    ('RA1950',   'S10'),
+    ('DE1950',   'S9'),
+    ('Tel',      'A1'),
+    ('SFR',      'A5'),
+    ('_RA.icrs', 'S10'),
+    ('_DE.icrs', 'S9'),
+]
+
+
+def read_bytes(path):
+    """Return the contents of `path` as bytes."""
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _repeat(head, body, tail, factor):
+    if body and not body.endswith(b'\n'):
+        body += b'\n'
+    return head + body * factor + tail
+
+
+def scale_mrt(raw, factor):
+    """Repeat the data records of an MRT table `factor` times."""
+    _, data_start = parse_mrt_header(raw)
+    return _repeat(raw[:data_start], raw[data_start:], b'', factor)
+
+
+def scale_lines(raw, header, footer, factor):
+    """Repeat the lines between `header` and `footer` lines `factor` times."""
+    lines = raw.splitlines(keepends=True)
+    end = len(lines) - footer
+    return _repeat(b''.join(lines[:header]), b''.join(lines[header:end]),
+                   b''.join(lines[end:]), factor)
+
+
+def _format_values(fmt, n, rng, sign=False):
+    """Return `n` random strings written with Fortran format `fmt`."""
+    letter = fmt[0].upper()
+    width, _, decimals = fmt[1:].partition('.')
+    width = int(width)
+    if letter == 'A' and sign:
+        return np.where(rng.random(n) < 0.5, '-', '+').astype(object)
+    if letter == 'A':
+        # a few hundred distinct names, each repeated as in the real tables
+        names = np.array(['SRC_%d' % i for i in range(max(n // 50, 1))], dtype=object)
+        values = names[rng.integers(0, len(names), n)]
+        return np.array([v[:width].ljust(width) for v in values], dtype=object)
+    if letter == 'S':
+        # sexagesimal field as in VizieR -oc.form=sexa output:
+        # "hh mm ss.s" (S10) or "+dd mm ss" (S9)
+        a, b, c = rng.integers(0, 24, n), rng.integers(0, 60, n), rng.uniform(0, 59.9, n)
+        if width == 10:
+            return np.array(['%02d %02d %04.1f' % v for v in zip(a, b, c)], dtype=object)
+        signs = np.where(rng.random(n) < 0.5, '-', '+')
+        return np.array(['%s%02d %02d %02d' % v for v in zip(signs, a, b, c.astype(int))],
+                        dtype=object)
+    if letter == 'I':
+        values = rng.integers(0, 10 ** (width - 1), n)
+        return np.array(['%*d' % (width, v) for v in values], dtype=object)
+    decimals = int(decimals or 0)
+    top = 10.0 ** (width - decimals - 2) - 1
+    values = rng.uniform(-top, top, n)
+    return np.array(['%*.*f' % (width, decimals, v) for v in values], dtype=object)
+
+
+def _records(columns, nrows, seed):
+    rng = np.random.default_rng(seed)
+    cells = [_format_values(fmt, nrows, rng, sign=label.endswith('-'))
+             for label, fmt in columns]
+    return ''.join(' '.join(row) + '\n' for row in zip(*cells)).encode('ascii')
+
+
+def make_mrt(spec, nrows, seed=0, title='Synthetic table'):
+    """
+    Generate an MRT table with a byte-by-byte header.
+
+    Parameters
+    ----------
+    spec : list of tuple
+        (label, format, units) per column.
+    nrows : int
+        Number of records.
+    seed : int, optional
+        Random seed of the values.
+
+    Returns
+    -------
+    bytes
+    """
+    sep = '-' * 80 + '\n'
+    lines = ['Title: %s\n' % title, '=' * 80 + '\n',
+             'Byte-by-byte Description of file: synthetic.txt\n', sep,
+             '   Bytes Format Units   Label     Explanations\n', sep]
+    start = 1
+    for label, fmt, units in spec:
+        width = int(fmt[1:].partition('.')[0])
+        end = start + width - 1
+        span = '%4d-%3d' % (start, end) if width > 1 else '%8d' % start
+        lines.append('%s %-6s %-7s %-9s %s\n' % (span, fmt, units, label, label))
+        start = end + 2
+    lines.append(sep)
+    return ''.join(lines).encode('ascii') + _records([(s[0], s[1]) for s in spec], nrows, seed)
+
+
+def make_vizier_fwf(formats, nrows, skiprows, seed=0):
+    """
+    Generate a fixed-width VizieR-style table behind `skiprows` header lines.
+
+    Parameters
+    ----------
+    formats : list of str
+        Fortran format of every column; columns are separated by one blank.
+    nrows : int
+        Number of records.
+    skiprows : int
+        Number of header lines.
+
+    Returns
+    -------
+    bytes
+    """
+    header = ('#\n' * skiprows).encode('ascii')
+    return header + _records([('', fmt) for fmt in formats], nrows, seed)
+
+
+def make_vizier_asu(spec, nrows, seed=0):
+    """
+    Generate a VizieR ``asu-txt`` response with ``#Column`` header lines.
+
+    Parameters
+    ----------
+    spec : list of tuple
+        (label, format) per column; ``S<w>`` denotes a sexagesimal field.
+    nrows : int
+        Number of records.
+
+    Returns
+    -------
+    bytes
+    """
+    lines = ['#\n']
+    for label, fmt in spec:
+        lines.append('#Column\t%s\t(%s)\t%s\t[ucd=meta]\n'
+                     % (label, 'A' + fmt[1:] if fmt[0] == 'S' else fmt, label))
+    widths = [int(fmt[1:].partition('.')[0]) for _, fmt in spec]
+    lines.append(' '.join(label[:w].ljust(w) for (label, _), w in zip(spec, widths)) + '\n')
+    lines.append(' '.join(' ' * w for w in widths) + '\n')
+    lines.append(' '.join('-' * w for w in widths) + '\n')
+    return ''.join(lines).encode('ascii') + _records(spec, nrows, seed) + b'\n#END#\n'
+
+
+def write_table(raw, directory, name):
+    """Write `raw` to ``directory/name`` and return the path."""
+    path = os.path.join(directory, name)
+    with open(path, 'wb') as f:
+        f.write(raw)
+    return path
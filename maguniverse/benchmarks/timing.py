@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+timing.py
+-----------
+
+Measurement helpers shared by the benchmark modules.
+"""
+
+import gc
+import time
+import tracemalloc
+
+
+def best_time(func, repeat=3):
+    """
+    Best wall time of `repeat` calls of `func`.
+
+    Returns
+    -------
+    tuple
+        (seconds, result of the last call).
+    """
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def peak_memory(func):
+    """
+    Peak Python/numpy heap allocation during one call of `func`.
+
+    Measured with :mod:`tracemalloc`, which numpy reports its buffers to;
+    memory-mapped files are not counted.
+
+    Returns
+    -------
+    tuple
+        (peak bytes, result).
+    """
+    gc.collect()
+    already = tracemalloc.is_tracing()
+    if not already:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    try:
+        result = func()
+        peak = tracemalloc.get_traced_memory()[1] - base
+    finally:
+        if not already:
+            tracemalloc.stop()
+    return max(int(peak), 0), result
+
+
+def measure(func, repeat=3, memory=True, **info):
+    """
+    Time `func` and optionally profile its peak memory.
+
+    The memory run is separate from the timed runs, since tracing slows
+    allocations down.
+
+    Parameters
+    ----------
+    func : callable
+        Zero-argument callable to benchmark.
+    repeat : int, optional
+        Best-of-`repeat` timing.
+    memory : bool, optional
+        Also record 'peak_bytes'.
+    **info
+        Extra fields stored in the record (e.g. 'rows', 'nbytes').
+
+    Returns
+    -------
+    dict
+        Benchmark record with 'seconds' and, if requested, 'peak_bytes'.
+    """
+    seconds, _ = best_time(func, repeat)
+    record = {'seconds': seconds}
+    if memory:
+        record['peak_bytes'] = peak_memory(func)[0]
+    record.update(info)
+    return record
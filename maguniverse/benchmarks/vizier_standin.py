@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+vizier_standin.py
+-----------
+
+Local stand-in for the VizieR ``asu-txt`` service.
+
+It serves full ``asu-txt`` tables (bundled, downloaded once or
+synthetic) keyed by their ``-source`` and answers queries the way VizieR
+does for the parameters that :func:`maguniverse.utils.vizier.vizier_query_url`
+emits: ``-out`` column selection, ``-out.max``, column constraints and
+``-c``/``-c.r``/``-c.u`` cones. Responses are cut from the original
+fixed-width records, so the loaders parse exactly the layout they would
+get from VizieR. This makes query pushdown testable and measurable
+without network access::
+
+    with serve_vizier({'J/ApJS/125/161/tablea1': raw}) as base:
+        url = vizier_query_url(local_url(link, base), where={'Seq': (1, 50)})
+        df = get_jijina1999_targets(file_url=url, cache=False)
+"""
+
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit, urlunsplit
+
+import numpy as np
+
+from maguniverse.utils.coords import parse_sexagesimal
+from maguniverse.utils.vizier import apply_constraints, parse_vizier_header, read_vizier_asu
+
+# Radius units of the -c.u parameter, in arcmin
+_RADIUS_UNITS = {'arcmin': 1.0, 'arcsec': 1.0 / 60.0, 'deg': 60.0}
+
+# (RA, Dec) label pairs searched for the positions of a cone query
+_POSITION_LABELS = [('_RA.icrs', '_DE.icrs'), ('RAJ2000', 'DEJ2000'), ('_RAJ2000', '_DEJ2000')]
+
+
+def local_url(url, base):
+    """Point a VizieR query `url` at the stand-in served at `base`."""
+    parts, local = urlsplit(url), urlsplit(base)
+    return urlunsplit(parts._replace(scheme=local.scheme, netloc=local.netloc))
+
+
+class _Table:
+    """A full asu-txt table split into header, column layout and records."""
+
+    def __init__(self, raw):
+        if isinstance(raw, bytes):
+            raw = raw.decode('utf-8')
+        self.columns, self.colspecs, start = parse_vizier_header(raw)
+        self.frame = read_vizier_asu(raw)
+        self.records = raw.splitlines()[start:start + len(self.frame)]
+
+    def positions(self):
+        for ra, dec in _POSITION_LABELS:
+            if ra in self.frame.columns and dec in self.frame.columns:
+                ra, dec = self.frame[ra], self.frame[dec]
+                if ra.dtype.kind in 'fi':
+                    return ra.to_numpy(np.float64), dec.to_numpy(np.float64)
+                return parse_sexagesimal(ra, hours=True), parse_sexagesimal(dec)
+        raise ValueError("Table has no positions for a cone query.")
+
+    def query(self, params):
+        """Render the asu-txt response for the query parameters."""
+        labels = [c[0] for c in self.columns]
+        where = {k: v for k, v in params if not k.startswith('-') and k in labels}
+        options = dict(params)
+        cone = positions = None
+        if '-c' in options:
+            ra, dec = (float(v) for v in options['-c'].split())
+            radius = float(options.get('-c.r', 2.0)) \
+                * _RADIUS_UNITS[options.get('-c.u', 'arcmin')]
+            cone, positions = (ra, dec, radius), self.positions()
+
+        frame = self.frame.assign(_row=np.arange(len(self.frame)))
+        rows = apply_constraints(frame, where, cone, positions)['_row'].to_numpy()
+        limit = options.get('-out.max', '50')
+        if limit != 'unlimited':
+            rows = rows[:int(limit)]
+        out = [label for k, label in params if k == '-out' and label in labels]
+        keep = [labels.index(label) for label in out] if out else list(range(len(labels)))
+
+        spans = [self.colspecs[k] for k in keep]
+        widths = [b - a for a, b in spans]
+        lines = ['#', '#   VizieR Astronomical Server (stand-in)', '#']
+        lines += ['#%s\t%s' % item for item in params if not item[0].startswith('-out')]
+        lines.append('#')
+        lines += ['#Column\t%s\t(%s)\t%s' % self.columns[k] for k in keep]
+        lines.append(' '.join(self.columns[k][0][:w].ljust(w) for k, w in zip(keep, widths)))
+        lines.append(' '.join(' ' * w for w in widths))
+        lines.append(' '.join('-' * w for w in widths))
+        for r in rows:
+            record = self.records[r]
+            lines.append(' '.join(record[a:b].ljust(b - a) for a, b in spans))
+        lines += ['', '#END#', '']
+        return '\n'.join(lines).encode('utf-8')
+
+
+class _VizierHandler(BaseHTTPRequestHandler):
+    tables = {}
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        params = [(k, v.strip()) for k, v in parse_qsl(parts.query, keep_blank_values=True)]
+        table = self.tables.get(dict(params).get('-source'))
+        if not parts.path.startswith('/viz-bin/asu-') or table is None:
+            self.send_error(404)
+            return
+        try:
+            body = table.query(params)
+        except (KeyError, ValueError) as exc:
+            self.send_error(400, str(exc))
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@contextmanager
+def serve_vizier(tables):
+    """
+    Serve VizieR ``asu-txt`` queries on a free local port.
+
+    Parameters
+    ----------
+    tables : dict
+        Full ``asu-txt`` responses (str or bytes, every column and row)
+        keyed by ``-source``, e.g. ``'J/ApJS/125/161/tablea1'``.
+
+    Yields
+    ------
+    str
+        Base URL, ending with '/'.
+    """
+    handler = type('VizierHandler', (_VizierHandler,),
+                   {'tables': {source: _Table(raw) for source, raw in tables.items()}})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield 'http://127.0.0.1:%d/' % server.server_address[1]
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
@@ -0,0 +1,447 @@
+# -*- coding: utf-8 -*-
+"""
+cli.py
+-----------
+
+The ``maguniverse`` command, for driving refreshes from cron or a job
+scheduler without Python glue::
+
+    maguniverse list
+    maguniverse fetch --jobs 8
+    maguniverse convert Dotson2010 Jijina1999/t2 --format parquet --output-dir data --jobs 4
+    maguniverse verify --jobs 4 --baseline last_night.json --summary tonight.json
+    maguniverse benchmark --groups loaders,fetch --baseline base.json
+
+Tables are selected as ``CATALOG`` (all its tables) or ``CATALOG/TABLE``;
+every registered table is used when none is given. ``--jobs N`` runs N
+downloads at once (fetch) or N worker processes (convert, verify; see
+:func:`maguniverse.utils.ingest.ingest_all`).
+
+Every command prints a JSON summary on stdout, and ``--summary PATH``
+also writes it to a file. It holds the command, 'jobs', the wall-clock
+'seconds', the overall 'status' and one record per table with its
+status, timings and, for convert and verify, the metrics phases of its
+loader. Progress lines go to stderr. The exit status is 1 if any table
+failed (or a benchmark regressed) and 2 on a usage error (unknown
+catalog, table or benchmark group, unavailable output format). A run
+that fails as a whole still prints a summary, with status 'error' and the
+'error' message, and exits with 1.
+"""
+
+import argparse
+import datetime
+import inspect
+import json
+import os
+import sys
+import time
+import traceback
+
+FORMATS = ('csv', 'csv.gz', 'csv.xz', 'csv.zst', 'parquet')
+
+
+class UsageError(Exception):
+    """Invalid command-line arguments; reported with exit status 2."""
+
+
+def _selection(select, names):
+    """Call a table selector, reporting unknown names as a usage error."""
+    try:
+        return select(names)
+    except KeyError as exc:
+        raise UsageError(exc.args[0] if exc.args else str(exc)) from exc
+
+
+def resolve_tables(names=None):
+    """
+    Expand table selections into ``(catalog, table)`` pairs.
+
+    Parameters
+    ----------
+    names : iterable of str, optional
+        ``CATALOG`` or ``CATALOG/TABLE`` names. Every registered table by
+        default.
+
+    Returns
+    -------
+    list of (str, str)
+        Registered tables, in the order given, without repetitions.
+
+    Raises
+    ------
+    KeyError
+        If a catalog or table is not registered.
+    """
+    from maguniverse.registry import registered_sources
+
+    sources = registered_sources()
+    if not names:
+        names = list(sources)
+    pairs = []
+    for name in names:
+        catalog, _, table = name.partition('/')
+        if catalog not in sources:
+            raise KeyError("Unknown catalog %r; available: %s"
+                           % (catalog, ', '.join(sorted(sources))))
+        loaders = sources[catalog].get('loaders', {})
+        if table and table not in loaders:
+            raise KeyError("Unknown table %r for %s; available: %s"
+                           % (table, catalog, ', '.join(sorted(loaders))))
+        for t in [table] if table else loaders:
+            if (catalog, t) not in pairs:
+                pairs.append((catalog, t))
+    return pairs
+
+
+def _fetch_sources(names):
+    """Registered sources restricted to ``CATALOG[/LINK-PREFIX]`` names."""
+    from maguniverse.registry import registered_sources
+
+    sources = registered_sources()
+    if not names:
+        return sources
+    selected = {}
+    for name in names:
+        catalog, _, prefix = name.partition('/')
+        if catalog not in sources:
+            raise KeyError("Unknown catalog %r; available: %s"
+                           % (catalog, ', '.join(sorted(sources))))
+        info = selected.setdefault(catalog, dict(sources[catalog], data_link={}))
+        links = {link: url for link, url in sources[catalog].get('data_link', {}).items()
+                 if link.startswith(prefix)}
+        if not links:
+            raise KeyError("No data link of %s starts with %r" % (catalog, prefix))
+        info['data_link'].update(links)
+    return selected
+
+
+def loader_options(catalog, table, **options):
+    """
+    Keep the `options` that the loader of a table accepts.
+
+    Loaders that need object centers for ICRS positions (they take a
+    `centers` argument, e.g. Dotson2010 t2, which stores offsets only) do
+    not get `icrs` unless `centers` is given as well.
+    """
+    from maguniverse.registry import get_loader
+
+    parameters = inspect.signature(get_loader(catalog, table)).parameters
+    options = {key: value for key, value in options.items() if key in parameters}
+    if options.get('icrs') and 'centers' in parameters and options.get('centers') is None:
+        del options['icrs']
+    return options
+
+
+def _progress(quiet):
+    def callback(result, done, total):
+        if quiet:
+            return
+        seconds = getattr(result, 'elapsed', None)
+        print('[%d/%d] %s/%s %s%s%s' % (
+            done, total, result.catalog, result.table, result.status,
+            '' if seconds is None else ' %.3f s' % seconds,
+            ' (%s)' % result.error if result.error else ''), file=sys.stderr)
+    return callback
+
+
+def _ingest_record(result, **extra):
+    record = {
+        'catalog': result.catalog,
+        'table'  : result.table,
+        'status' : result.status,
+        'rows'   : result.rows,
+        'seconds': result.elapsed,
+        'pid'    : result.pid,
+        'phases' : result.phases,
+        'error'  : result.error,
+    }
+    record.update(extra)
+    return record
+
+
+def _write_parquet(df, path):
+    from maguniverse.utils.locking import atomic_path
+    from maguniverse.utils.metrics import phase
+
+    with phase('save', path=path, rows=len(df)), atomic_path(path) as tmp_path:
+        df.to_parquet(tmp_path, index=False)
+
+
+def _parquet_available():
+    import importlib.util
+
+    return any(importlib.util.find_spec(engine) is not None
+               for engine in ('pyarrow', 'fastparquet'))
+
+
+# ----------------------------------------------------------------------
+# subcommands; each returns a list of table records, or (report, status)
+# ----------------------------------------------------------------------
+def cmd_list(args):
+    """Print the registered catalogs and their tables."""
+    from maguniverse.registry import list_catalogs
+
+    for name, info in list_catalogs(with_info=True).items():
+        print('%-14s %-12s %s' % (name, ' '.join(info['tables']), info['title'] or ''))
+    return None
+
+
+def cmd_fetch(args):
+    """Download the tables into the download cache."""
+    from maguniverse.utils.cache import DownloadCache
+    from maguniverse.utils.fetch_bulk import fetch_all
+
+    kwargs = {'per_host': args.per_host, 'retries': args.retries, 'timeout': args.timeout}
+    if args.jobs:
+        kwargs['max_workers'] = args.jobs
+    if args.cache_dir:
+        kwargs['cache'] = DownloadCache(args.cache_dir)
+    results = fetch_all(_selection(_fetch_sources, args.tables), callback=_progress(args.quiet), **kwargs)
+    return [{
+        'catalog' : r.catalog,
+        'link'    : r.table,
+        'url'     : r.url,
+        'status'  : r.status,
+        'bytes'   : r.nbytes,
+        'seconds' : r.elapsed,
+        'attempts': r.attempts,
+        'error'   : r.error,
+    } for r in results.values()]
+
+
+def _ingest_tables(args, extra=None):
+    """Per-table loader options for ingest_all, from the shared flags."""
+    options = {}
+    if args.compact:
+        options['compact'] = True
+    if args.icrs:
+        options['icrs'] = True
+    if args.no_cache:
+        options['cache'] = False
+        options['table_cache'] = False
+    tables = {}
+    for catalog, table in _selection(resolve_tables, args.tables):
+        kwargs = loader_options(catalog, table, **options)
+        kwargs.update((extra or {}).get((catalog, table), {}))
+        tables[(catalog, table)] = kwargs
+    return tables
+
+
+def cmd_convert(args):
+    """Load the tables and write them as CSV or Parquet files."""
+    from maguniverse.utils.ingest import ingest_all
+
+    parquet = args.format == 'parquet'
+    if parquet and not _parquet_available():
+        raise UsageError('Parquet output needs pyarrow or fastparquet.')
+    os.makedirs(args.output_dir, exist_ok=True)
+    outputs = {pair: os.path.join(args.output_dir, '%s_%s.%s' % (pair + (args.format,)))
+               for pair in _selection(resolve_tables, args.tables)}
+    # CSV files are written by the loaders, inside the workers
+    extra = {} if parquet else {pair: {'save_path': path} for pair, path in outputs.items()}
+    results = ingest_all(_ingest_tables(args, extra), processes=args.jobs,
+                         callback=_progress(args.quiet), frames=parquet)
+
+    records = []
+    for pair, result in results.items():
+        if parquet and result.status == 'ok':
+            start = time.perf_counter()
+            try:
+                _write_parquet(result.frame, outputs[pair])
+            except Exception as exc:
+                result = result._replace(status='error',
+                                         error='%s: %s' % (type(exc).__name__, exc))
+            result = result._replace(elapsed=(result.elapsed or 0.0)
+                                     + time.perf_counter() - start)
+        records.append(_ingest_record(
+            result, output=outputs[pair] if result.status == 'ok' else None))
+    return records
+
+
+def check_table(df, baseline_rows=None):
+    """
+    Sanity checks of a loaded table.
+
+    Returns
+    -------
+    list of str
+        Problems found: no rows, no or duplicated column names, or fewer
+        rows than `baseline_rows` (from an earlier run).
+    """
+    problems = []
+    if not len(df):
+        problems.append('no rows')
+    if not len(df.columns):
+        problems.append('no columns')
+    duplicated = df.columns[df.columns.duplicated()]
+    if len(duplicated):
+        problems.append('duplicated columns: %s' % ', '.join(map(str, duplicated)))
+    if baseline_rows is not None and len(df) < baseline_rows:
+        problems.append('%d rows, %d in the baseline' % (len(df), baseline_rows))
+    return problems
+
+
+def _baseline_rows(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        summary = json.load(f)
+    return {(r['catalog'], r['table']): r['rows'] for r in summary.get('tables', [])
+            if r.get('table') is not None and r.get('status') == 'ok'}
+
+
+def cmd_verify(args):
+    """Load the tables and check that they are usable."""
+    from maguniverse.utils.ingest import ingest_all
+
+    baseline = _baseline_rows(args.baseline) if args.baseline else {}
+    results = ingest_all(_ingest_tables(args), processes=args.jobs,
+                         callback=_progress(args.quiet))
+    records = []
+    for pair, result in results.items():
+        problems = [] if result.status != 'ok' else check_table(result.frame, baseline.get(pair))
+        if problems:
+            result = result._replace(status='error', error='; '.join(problems))
+        records.append(_ingest_record(
+            result, columns=None if result.frame is None else len(result.frame.columns)))
+    return records
+
+
+def cmd_benchmark(args):
+    """Run the benchmark suite."""
+    from maguniverse.benchmarks.suite import GROUPS, print_regressions, run_args
+
+    unknown = [g for g in args.groups.split(',') if g and g not in GROUPS]
+    if unknown:
+        raise UsageError("Unknown benchmark group %s; available: %s"
+                         % (', '.join(map(repr, unknown)), ', '.join(GROUPS)))
+
+    report, status = run_args(args)
+    print_regressions(report)
+    return report, status
+
+
+# ----------------------------------------------------------------------
+# argument parsing
+# ----------------------------------------------------------------------
+def _add_common(parser, tables_help):
+    parser.add_argument('tables', nargs='*', metavar='CATALOG[/TABLE]', help=tables_help)
+    parser.add_argument('--summary', metavar='PATH',
+                        help='also write the JSON summary to this file')
+    parser.add_argument('--quiet', action='store_true', help='no progress lines on stderr')
+
+
+def _add_jobs(parser, default_help):
+    parser.add_argument('-j', '--jobs', type=int, default=None, metavar='N',
+                        help='run N jobs in parallel (default: %s)' % default_help)
+
+
+def _add_loader_flags(parser):
+    parser.add_argument('--compact', action='store_true', help='memory-compact dtypes')
+    parser.add_argument('--icrs', action='store_true',
+                        help='add ICRS columns where the loader supports it (not '
+                             'Dotson2010 t2, which stores offsets from unlisted centers)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='bypass the download and parsed-table caches')
+
+
+def build_parser():
+    """Return the ``argparse`` parser of the ``maguniverse`` command."""
+    from maguniverse.benchmarks.suite import add_arguments
+
+    parser = argparse.ArgumentParser(
+        prog='maguniverse',
+        description='Fetch, convert, verify and benchmark magnetic-field catalogs.')
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND')
+    commands.required = True
+
+    sub = commands.add_parser('list', help='list the registered catalogs and tables')
+    sub.set_defaults(func=cmd_list)
+
+    sub = commands.add_parser('fetch', help='download tables into the cache')
+    _add_common(sub, 'catalogs to fetch; /TABLE selects the data links starting '
+                     'with TABLE (default: all)')
+    _add_jobs(sub, '8 downloads')
+    sub.add_argument('--per-host', type=int, default=2,
+                     help='concurrent requests per host (default: %(default)s)')
+    sub.add_argument('--retries', type=int, default=3)
+    sub.add_argument('--timeout', type=float, default=30, help='seconds per request')
+    sub.add_argument('--cache-dir', help='download cache directory')
+    sub.set_defaults(func=cmd_fetch)
+
+    sub = commands.add_parser('convert', help='load tables and write CSV or Parquet files')
+    _add_common(sub, 'tables to convert (default: all)')
+    _add_jobs(sub, 'one process per table up to the CPU count')
+    sub.add_argument('-f', '--format', choices=FORMATS, default='csv')
+    sub.add_argument('-o', '--output-dir', default='.',
+                     help='directory of the <catalog>_<table>.<format> files')
+    _add_loader_flags(sub)
+    sub.set_defaults(func=cmd_convert)
+
+    sub = commands.add_parser('verify', help='load tables and check that they are usable')
+    _add_common(sub, 'tables to verify (default: all)')
+    _add_jobs(sub, 'one process per table up to the CPU count')
+    sub.add_argument('--baseline', metavar='PATH',
+                     help='summary of an earlier convert or verify run; '
+                          'fail tables that lost rows')
+    _add_loader_flags(sub)
+    sub.set_defaults(func=cmd_verify)
+
+    sub = commands.add_parser('benchmark', help='run the benchmark suite')
+    add_arguments(sub)
+    sub.add_argument('--summary', metavar='PATH',
+                     help='also write the JSON results to this file')
+    sub.set_defaults(func=cmd_benchmark)
+    return parser
+
+
+def main(argv=None):
+    """Command-line entry point; returns the process exit status."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, 'jobs', None) is not None and args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+
+    started = datetime.datetime.now(datetime.timezone.utc)
+    start = time.perf_counter()
+    try:
+        outcome = args.func(args)
+    except UsageError as exc:
+        parser.error(str(exc))
+    except Exception as exc:
+        # keep the summary contract for schedulers: status 'error', exit 1
+        traceback.print_exc()
+        outcome = {
+            'jobs'   : getattr(args, 'jobs', None),
+            'started': started.isoformat(),
+            'seconds': time.perf_counter() - start,
+            'status' : 'error',
+            'error'  : '%s: %s' % (type(exc).__name__, exc),
+            'tables' : [],
+        }, 1
+    if outcome is None:
+        return 0
+
+    if isinstance(outcome, tuple):
+        summary, status = outcome
+        summary = dict(summary, command=args.command)
+    else:
+        status = 0 if all(r['status'] == 'ok' for r in outcome) else 1
+        summary = {
+            'command': args.command,
+            'jobs'   : args.jobs,
+            'started': started.isoformat(),
+            'seconds': time.perf_counter() - start,
+            'status' : 'ok' if status == 0 else 'error',
+            'tables' : outcome,
+        }
+    text = json.dumps(summary, indent=1, default=str)
+    if args.summary:
+        from maguniverse.utils.locking import atomic_write
+
+        with atomic_write(args.summary, 'wt', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,11 +12,169 @@ from io import StringIO
 import pandas as pd
 
 from maguniverse.data.gas import gas_sources
-from maguniverse.utils import get_ascii, get_default_data_paths
+from maguniverse.utils import (
+    compact_frame, get_ascii, get_ascii_file, get_default_data_paths, parse_cached,
+    save_chunks, save_frame,
+)
+from maguniverse.utils.compression import detect_compression
+from maguniverse.utils.coords import DEC_COL, RA_COL, add_icrs_columns, parse_sexagesimal
+from maguniverse.utils.metrics import timed
+from maguniverse.utils.multitable import index_join, load_tables
+from maguniverse.utils.vizier import (
+    apply_selection, constraint_mask, format_constraint, has_selection, is_vizier_query,
+    read_vizier_asu, vizier_label, vizier_query_url,
+)
 
-def get_jijina1999(file_path=None, file_url=None, save_path=None, save_src_data_path=None):
+
+# Column names of the parsed table, in file order
+COLUMN_NAMES = [
+    'Seq',              # Database reference number
+    'n_Seq',            # Note on Seq
+    'Name',             # Name of the NH_3_(1,1) source
+    'logNNH3 ([cm-2])', # Logarithm (log_10_) of the total NH_3_ column density
+    'u_logNNH3',        # Uncertainty
+    'DVint (km/s)',     # Intrinsic line widths
+    'u_DVint',          # Uncertainty
+    'Tkin (K)',         # Kinetic temperature
+    'u_Tkin',           # Uncertainty
+    'logNtot ([cm-3])', # Logarithm of the total volume density of the molecule of mean mass
+    'u_logNtot',        # Uncertainty
+    'R (pc)',           # Core size
+    'u_R',              # Uncertainty
+    'a/b'               # Projected aspect ratio
+]
+
+# Byte ranges of the columns in the VizieR asu-txt output
+COLSPECS = [
+    (0,  3),  # Seq (I3)
+    (4,  5),  # n_Seq (A1)
+    (6, 22),  # Name (a16)
+    (23, 27), # logNNH3 ([cm-2]) (F4.1)
+    (28, 29), # u_logNNH3 (A1)
+    (30, 35), # DVint (km/s) (F5.2)
+    (36, 37), # u_DVint (A1)
+    (38, 43), # Tkin (K) (F5.1)
+    (44, 45), # u_Tkin (A1)
+    (46, 50), # logNtot ([cm-3]) (F4.1)
+    (51, 52), # u_logNtot (A1)
+    (53, 58), # R (pc) (F5.2)
+    (59, 60), # u_R (A1)
+    (61, 65)  # a/b (F4.1)
+]
+
+# Fortran formats of the columns, as declared by VizieR
+FORMATS = {
+    'Seq'             : 'I3',
+    'n_Seq'           : 'A1',
+    'Name'            : 'A16',
+    'logNNH3 ([cm-2])': 'F4.1',
+    'u_logNNH3'       : 'A1',
+    'DVint (km/s)'    : 'F5.2',
+    'u_DVint'         : 'A1',
+    'Tkin (K)'        : 'F5.1',
+    'u_Tkin'          : 'A1',
+    'logNtot ([cm-3])': 'F4.1',
+    'u_logNtot'       : 'A1',
+    'R (pc)'          : 'F5.2',
+    'u_R'             : 'A1',
+    'a/b'             : 'F4.1',
+}
+
+# Header lines preceding the data in the VizieR asu-txt output
+SKIPROWS = 55
+
+# VizieR labels of the associated YSO table A3, in query order
+YSO_COLUMNS = [
+    'Seq', 'n_Seq', 'Name', 'IRAS', 'l_log(Liras)', 'log(Liras)', 'u_log(Liras)',
+    'Dist', 'n_Dist', 'Vout', 'n_Vout', 'NIRAS', 'n_NIRAS',
+]
+
+
+def _parse_jijina1999(raw):
+    """Parse the raw Jijina et al. (1999) table A2 text into a DataFrame."""
+    df = pd.read_fwf(
+        StringIO(raw),
+        names=COLUMN_NAMES,
+        skiprows=SKIPROWS,
+        colspecs=COLSPECS
+    )
+
+    return df
+
+
+def _parse_jijina1999_targets(raw):
+    """Parse the raw Jijina et al. (1999) table A1 text into a DataFrame."""
+    # Column layout is taken from the VizieR #Column header
+    df = read_vizier_asu(raw)
+
+    return df
+
+
+def _parse_jijina1999_ysos(raw):
+    """Parse the raw Jijina et al. (1999) table A3 text into a DataFrame."""
+    # Column layout is taken from the VizieR #Column header
+    df = read_vizier_asu(raw)
+
+    return df
+
+
+def _parse_jijina1999_query(raw):
+    """Parse a VizieR query of table A2 with any column selection."""
+    df = read_vizier_asu(raw)
+    names = {vizier_label(name): name for name in COLUMN_NAMES}
+    return df.rename(columns=names)
+
+
+def _target_positions(df):
+    """Decimal-degree ICRS positions of the target list rows."""
+    return (parse_sexagesimal(df['_RA.icrs'], hours=True),
+            parse_sexagesimal(df['_DE.icrs']))
+
+
+def _push_selection(file_path, file_url, columns, where, cone, max_rows):
     """
-    Load the Jijina et al. (1999) Ammonia gas properties data table into a DataFrame.
+    Move a row/column selection into the VizieR query when the table is
+    fetched from VizieR. Returns the URL to fetch and whether the selection
+    still has to be applied to the parsed table.
+    """
+    if not has_selection(columns, where, cone, max_rows):
+        return file_url, False
+    if file_path is None and is_vizier_query(file_url):
+        return vizier_query_url(file_url, columns, where, cone, max_rows), False
+    return file_url, True
+
+
+def _seq_constraint(targets, where):
+    """
+    Turn the rows of a cone-selected target list into a 'Seq' constraint
+    combined with `where`, for the tables without positions. Returns None
+    when no target is left.
+    """
+    seqs = targets['Seq'].dropna().drop_duplicates()
+    if where and 'Seq' in where:
+        seqs = seqs[constraint_mask(seqs, format_constraint(where['Seq']))]
+    if not len(seqs):
+        return None
+    return dict(where or {}, Seq=sorted(int(s) for s in seqs))
+
+
+def _add_target_icrs(df):
+    """Attach decimal-degree ICRS columns from the sexagesimal VizieR fields."""
+    return add_icrs_columns(df, *_target_positions(df))
+
+
+def _join_positions(df, positions):
+    """Left-join target positions on 'Seq' (first position per Seq)."""
+    return df.join(positions, on='Seq')
+
+
+@timed('load.jijina1999_targets')
+def get_jijina1999_targets(file_path=None, file_url=None, save_path=None,
+                           save_src_data_path=None, cache=None, table_cache=None,
+                           icrs=False, compact=False, columns=None, where=None,
+                           cone=None, max_rows=None):
+    """
+    Load the Jijina et al. (1999) target list (table A1) into a DataFrame.
 
     Parameters
     ----------
@@ -28,7 +186,38 @@ def get_jijina1999(file_path=None, file_url=None, save_path=None, save_src_data_
         If provided, the resulting DataFrame is written to this CSV path.
     save_src_data_path : str, optional
         If provided, the raw ASCII data is saved to this path.
-        
+    cache : DownloadCache, bool or None, optional
+        Download cache used for remote fetches. None uses the default
+        cache, False always downloads.
+    table_cache : TableCache, bool or None, optional
+        Parsed-table cache. None uses the default cache, False always
+        re-parses the raw ASCII.
+    icrs : bool, optional
+        If True, append decimal-degree 'RA_ICRS (deg)' and 'DE_ICRS (deg)'
+        columns converted from the sexagesimal ICRS fields.
+    compact : bool, optional
+        If True, return memory-compact dtypes: categoricals for repetitive
+        text columns, and float32 or small integer types chosen from the
+        declared column formats (see :func:`maguniverse.utils.compact_frame`).
+    columns : list of str, optional
+        Columns to return, as VizieR labels or the loader names listed
+        below. All columns by default.
+    where : dict, optional
+        Row constraints keyed by column, combined with AND: a VizieR
+        constraint string (``'>10'``, ``'1..50'``, ``'L1551*'``), a
+        ``(low, high)`` range with None for an open side, a list of
+        accepted values or a single value.
+    cone : tuple, optional
+        ``(ra, dec, radius)``: only targets within `radius` arcmin of the
+        ICRS position (degrees).
+    max_rows : int, optional
+        Return at most this many rows.
+
+    When the table comes from VizieR, the selection is pushed into the
+    query (see :func:`maguniverse.utils.vizier.vizier_query_url`), so only
+    the selected rows and columns are downloaded; a local copy is parsed
+    in full and filtered with the same semantics.
+
     Returns
     -------
     DataFrame
@@ -36,29 +225,185 @@ def get_jijina1999(file_path=None, file_url=None, save_path=None, save_src_data_
         'Seq',              # Database reference number
         'n_Seq',            # Note on Seq
         'Name',             # Name of the NH_3_(1,1) source
-        'logNNH3 ([cm-2])', # Logarithm (log_10_) of the total NH_3_ column density
-        'u_logNNH3',        # Uncertainty
-        'DVint (km/s)',     # Intrinsic line widths
-        'u_DVint',          # Uncertainty
-        'Tkin (K)',         # Kinetic temperature
-        'u_Tkin',           # Uncertainty
-        'logNtot ([cm-3])', # Logarithm of the total volume density of the molecule of mean mass
-        'u_logNtot',        # Uncertainty
-        'R (pc)',           # Core size
-        'u_R',              # Uncertainty
-        'a/b'               # Projected aspect ratio
+        'RA1950',           # Right ascension (B1950, sexagesimal)
+        'DE1950',           # Declination (B1950, sexagesimal)
+        'Tel',              # Telescope
+        'SFR',              # Star-forming region
+        '_RA.icrs',         # Right ascension (ICRS, sexagesimal)
+        '_DE.icrs',         # Declination (ICRS, sexagesimal)
+        plus 'RA_ICRS (deg)' and 'DE_ICRS (deg)' if `icrs` is True.
     """
     if file_path is None and file_url is None:
         file_path, file_url = get_default_data_paths(
             file_path,
-            gas_sources['Jijina1999']['data_link']['t2_gas_properties']
+            gas_sources['Jijina1999']['data_link']['t1_targets']
         )
+    if icrs and columns is not None:
+        columns = list(columns) + [c for c in ('_RA.icrs', '_DE.icrs') if c not in columns]
+    file_url, local = _push_selection(file_path, file_url, columns, where, cone, max_rows)
 
     # Fetch raw ASCII (prefers local copy to avoid CAPTCHA)
-    raw = get_ascii(file_path, file_url, save_src_data_path, fmt='txt')
+    raw = get_ascii(file_path, file_url, save_src_data_path, fmt='txt', cache=cache)
+
+    df = parse_cached(raw, _parse_jijina1999_targets, cache=table_cache)
+    if local:
+        positions = _target_positions(df) if cone is not None else None
+        df = apply_selection(df, columns, where, cone, max_rows, positions)
+    if icrs:
+        _add_target_icrs(df)
+    if compact:
+        df = compact_frame(df)
 
-    # Define column names and read into DataFrame
-    column_names = [
+    if save_path:
+        save_frame(df, save_path)
+
+    return df
+
+
+@timed('load.jijina1999_ysos')
+def get_jijina1999_ysos(file_path=None, file_url=None, save_path=None,
+                        save_src_data_path=None, cache=None, table_cache=None,
+                        compact=False, columns=None, where=None, cone=None, max_rows=None):
+    """
+    Load the Jijina et al. (1999) associated YSOs (table A3) into a DataFrame.
+
+    Parameters
+    ----------
+    file_path : str, optional
+        Local filesystem path to the ASCII data. If None, defaults are used.
+    file_url : str, optional
+        URL to download the ASCII data. If None, defaults are used.
+    save_path : str, optional
+        If provided, the resulting DataFrame is written to this CSV path.
+    save_src_data_path : str, optional
+        If provided, the raw ASCII data is saved to this path.
+    cache : DownloadCache, bool or None, optional
+        Download cache used for remote fetches. None uses the default
+        cache, False always downloads.
+    table_cache : TableCache, bool or None, optional
+        Parsed-table cache. None uses the default cache, False always
+        re-parses the raw ASCII.
+    compact : bool, optional
+        If True, return memory-compact dtypes: categoricals for repetitive
+        text columns, and float32 or small integer types chosen from the
+        declared column formats (see :func:`maguniverse.utils.compact_frame`).
+    columns : list of str, optional
+        Columns to return, as VizieR labels. All columns by default.
+    where : dict, optional
+        Row constraints keyed by column, combined with AND, as for
+        :func:`get_jijina1999`.
+    cone : tuple, optional
+        ``(ra, dec, radius)``: only associations of cores within `radius`
+        arcmin of the ICRS position (degrees). Table A3 has no positions,
+        so the cone is run on the target list and turned into a 'Seq'
+        constraint.
+    max_rows : int, optional
+        Return at most this many rows. The whole table by default,
+        whatever limit `file_url` carries.
+
+    When the table comes from VizieR, the selection is pushed into the
+    query (see :func:`maguniverse.utils.vizier.vizier_query_url`); a local
+    copy is parsed in full and filtered with the same semantics.
+
+    Returns
+    -------
+    DataFrame
+        One row per core/YSO association, with the VizieR labels of the
+        query as columns: 'Seq', 'n_Seq', 'Name', 'IRAS', 'l_log(Liras)',
+        'log(Liras)', 'u_log(Liras)', 'Dist', 'n_Dist', 'Vout', 'n_Vout',
+        'NIRAS' and 'n_NIRAS' (see the VizieR ReadMe of J/ApJS/125/161).
+    """
+    if file_path is None and file_url is None:
+        file_path, file_url = get_default_data_paths(
+            file_path,
+            gas_sources['Jijina1999']['data_link']['t3_yso_properties']
+        )
+    if cone is not None:
+        targets = get_jijina1999_targets(cache=cache, table_cache=table_cache, cone=cone)
+        where, cone = _seq_constraint(targets, where), None
+        if where is None:
+            return pd.DataFrame(columns=YSO_COLUMNS if columns is None else list(columns))
+    if file_path is None and is_vizier_query(file_url) and max_rows is None:
+        # the catalog join needs every association, not the first page
+        file_url = vizier_query_url(file_url, max_rows='unlimited')
+    file_url, local = _push_selection(file_path, file_url, columns, where, cone, max_rows)
+
+    # Fetch raw ASCII (prefers local copy to avoid CAPTCHA)
+    raw = get_ascii(file_path, file_url, save_src_data_path, fmt='txt', cache=cache)
+
+    df = parse_cached(raw, _parse_jijina1999_ysos, cache=table_cache)
+    if local:
+        df = apply_selection(df, columns, where, None, max_rows)
+    if compact:
+        df = compact_frame(df)
+
+    if save_path:
+        save_frame(df, save_path)
+
+    return df
+
+
+@timed('load.jijina1999')
+def get_jijina1999(file_path=None, file_url=None, save_path=None, save_src_data_path=None,
+                   cache=None, table_cache=None, chunksize=None, icrs=False,
+                   compact=False, columns=None, where=None, cone=None, max_rows=None):
+    """
+    Load the Jijina et al. (1999) Ammonia gas properties data table into a DataFrame.
+
+    Parameters
+    ----------
+    file_path : str, optional
+        Local filesystem path to the ASCII data. If None, defaults are used.
+    file_url : str, optional
+        URL to download the ASCII data. If None, defaults are used.
+    save_path : str, optional
+        If provided, the resulting DataFrame is written to this CSV path.
+    save_src_data_path : str, optional
+        If provided, the raw ASCII data is saved to this path.
+    cache : DownloadCache, bool or None, optional
+        Download cache used for remote fetches. None uses the default
+        cache, False always downloads.
+    table_cache : TableCache, bool or None, optional
+        Parsed-table cache. None uses the default cache, False always
+        re-parses the raw ASCII.
+    chunksize : int, optional
+        If given, return an iterator of DataFrame batches of this many rows
+        instead of a single DataFrame. The raw file is streamed from disk,
+        so memory use is bounded by the batch size; `save_path` is then
+        written incrementally and the parsed-table cache is not used.
+    icrs : bool, optional
+        If True, append decimal-degree 'RA_ICRS (deg)' and 'DE_ICRS (deg)'
+        columns. Table A2 has no positions, so they are taken from the
+        target list (table A1, see :func:`get_jijina1999_targets`) by 'Seq'.
+    compact : bool, optional
+        If True, return memory-compact dtypes: categoricals for repetitive
+        text columns, and float32 or small integer types chosen from the
+        declared column formats (see :func:`maguniverse.utils.compact_frame`).
+    columns : list of str, optional
+        Columns to return, as VizieR labels or the loader names listed
+        below. All columns by default.
+    where : dict, optional
+        Row constraints keyed by column, combined with AND: a VizieR
+        constraint string (``'>10'``, ``'1..50'``, ``'L1551*'``), a
+        ``(low, high)`` range with None for an open side, a list of
+        accepted values or a single value.
+    cone : tuple, optional
+        ``(ra, dec, radius)``: only cores within `radius` arcmin of the
+        ICRS position (degrees). Table A2 has no positions, so the cone is
+        run on the target list and turned into a 'Seq' constraint.
+    max_rows : int, optional
+        Return at most this many rows.
+
+    When the table comes from VizieR, the selection is pushed into the
+    query (see :func:`maguniverse.utils.vizier.vizier_query_url`), so only
+    the selected rows and columns are downloaded; a local copy is parsed
+    in full and filtered with the same semantics.
+    A selection cannot be combined with `chunksize`.
+
+    Returns
+    -------
+    DataFrame or iterator of DataFrame
+        Columns are:
         'Seq',              # Database reference number
         'n_Seq',            # Note on Seq
         'Name',             # Name of the NH_3_(1,1) source
@@ -73,35 +418,117 @@ def get_jijina1999(file_path=None, file_url=None, save_path=None, save_src_data_
         'R (pc)',           # Core size
         'u_R',              # Uncertainty
         'a/b'               # Projected aspect ratio
-    ]
-    colspecs = [
-        (0,  3),  # Seq (I3)
-        (4,  5),  # n_Seq (A1)
-        (6, 22),  # Name (a16)
-        (23, 27), # logNNH3 ([cm-2]) (F4.1)
-        (28, 29), # u_logNNH3 (A1)
-        (30, 35), # DVint (km/s) (F5.2)
-        (36, 37), # u_DVint (A1)
-        (38, 43), # Tkin (K) (F5.1)
-        (44, 45), # u_Tkin (A1)
-        (46, 50), # logNtot ([cm-3]) (F4.1)
-        (51, 52), # u_logNtot (A1)
-        (53, 58), # R (pc) (F5.2)
-        (59, 60), # u_R (A1)
-        (61, 65)  # a/b (F4.1)
-    ]      
-    df = pd.read_fwf(
-        StringIO(raw),
-        names=column_names,
-        skiprows=55,
-        colspecs=colspecs
-    )
+        plus 'RA_ICRS (deg)' and 'DE_ICRS (deg)' if `icrs` is True.
+    """
+    selection = has_selection(columns, where, cone, max_rows)
+    if selection and chunksize:
+        raise ValueError("A row/column selection cannot be combined with chunksize.")
+
+    positions = targets = None
+    if icrs or cone is not None:
+        targets = get_jijina1999_targets(cache=cache, table_cache=table_cache, icrs=icrs,
+                                         cone=cone)
+    if icrs:
+        positions = targets.drop_duplicates('Seq').set_index('Seq')[[RA_COL, DEC_COL]]
+    if cone is not None:
+        where, cone = _seq_constraint(targets, where), None
+        if where is None:
+            empty = pd.DataFrame(columns=COLUMN_NAMES if columns is None else list(columns))
+            return _join_positions(empty, positions) if icrs else empty
+    if icrs and columns is not None and 'Seq' not in columns:
+        columns = ['Seq'] + list(columns)
+
+    if file_path is None and file_url is None:
+        file_path, file_url = get_default_data_paths(
+            file_path,
+            gas_sources['Jijina1999']['data_link']['t2_gas_properties']
+        )
+    file_url, local = _push_selection(file_path, file_url, columns, where, cone, max_rows)
+
+    if chunksize:
+        # Stream the raw file from disk and parse it batch by batch
+        path = get_ascii_file(file_path, file_url, save_src_data_path, cache=cache)
+        chunks = pd.read_fwf(
+            path,
+            names=COLUMN_NAMES,
+            skiprows=SKIPROWS,
+            colspecs=COLSPECS,
+            chunksize=chunksize,
+            compression=detect_compression(path)
+        )
+        if positions is not None:
+            chunks = (_join_positions(chunk, positions) for chunk in chunks)
+        if compact:
+            chunks = (compact_frame(chunk, FORMATS) for chunk in chunks)
+        return save_chunks(chunks, save_path)
+
+    # Fetch raw ASCII (prefers local copy to avoid CAPTCHA)
+    raw = get_ascii(file_path, file_url, save_src_data_path, fmt='txt', cache=cache)
+
+    parser = _parse_jijina1999_query if selection and not local else _parse_jijina1999
+    df = parse_cached(raw, parser, cache=table_cache)
+    if local:
+        df = apply_selection(df, columns, where, None, max_rows)
+    if positions is not None:
+        df = _join_positions(df, positions)
+    if compact:
+        df = compact_frame(df, FORMATS)
 
     if save_path:
-        df.to_csv(save_path, index=False)
+        save_frame(df, save_path)
 
     return df
 
+
+@timed('load.jijina1999_catalog')
+def get_jijina1999_catalog(save_path=None, file_paths=None, file_urls=None, cache=None,
+                           table_cache=None, icrs=False, compact=False, max_workers=None):
+    """
+    Load Jijina et al. (1999) tables A1-A3 concurrently and join them on 'Seq'.
+
+    Parameters
+    ----------
+    save_path : str, optional
+        If provided, the joined DataFrame is written to this CSV path.
+    file_paths, file_urls : dict, optional
+        Local paths and URLs of the tables keyed by table name ('t1', 't2', 't3'),
+        as the `file_path` and `file_url` of their loaders. Tables not
+        listed use the defaults.
+    cache, table_cache, compact
+        As for :func:`get_jijina1999`; forwarded to the table loaders.
+    icrs : bool, optional
+        If True, include decimal-degree 'RA_ICRS (deg)' and
+        'DE_ICRS (deg)' columns from the target list.
+    max_workers : int, optional
+        Number of tables loaded at once; all of them by default.
+
+    Returns
+    -------
+    DataFrame
+        One row per core of table A2 (gas properties), in table order,
+        with the target list columns (table A1: positions, telescope,
+        star-forming region) and the first associated YSO (table A3)
+        attached. Rows are matched on ('Seq', 'n_Seq') when the note
+        agrees and on 'Seq' otherwise (see
+        :func:`maguniverse.utils.multitable.index_join`). 'N_YSO' counts
+        the table A3 rows of each core. Columns repeated across the
+        tables, such as 'Name', are taken from table A2.
+    """
+    options = {'cache': cache, 'table_cache': table_cache, 'compact': compact}
+    tables = load_tables({
+        't1': (get_jijina1999_targets, dict(options, icrs=icrs)),
+        't2': (get_jijina1999, options),
+        't3': (get_jijina1999_ysos, options),
+    }, max_workers, file_paths, file_urls)
+    df = index_join(tables['t2'], tables['t1'], 'Seq', note='n_Seq')
+    df = index_join(df, tables['t3'], 'Seq', note='n_Seq', count='N_YSO')
+
+    if save_path:
+        save_frame(df, save_path)
+
+    return df
+
+
 if __name__ == "__main__":
     # Example usage
     import os
@@ -111,10 +538,11 @@ if __name__ == "__main__":
     # and save the raw file and processed dataframe locally
 
     output_path = os.path.join(
-        __parent_dir__, 'datafiles/polarization/jijina1999_processed.txt'
+        __parent_dir__, 'datafiles/gas/jijina1999_processed.txt'
     )
     src_data_path = os.path.join(
-        __parent_dir__, 'datafiles/polarization/jijina1999.txt'
+        __parent_dir__, 'datafiles/gas/jijina1999.txt'
     )
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
     df = get_jijina1999(save_path=output_path, save_src_data_path=src_data_path)
     print(df.head())
\ No newline at end of file
@@ -13,6 +13,10 @@ polarization_source = {
             "t1_object_list_local": "datafiles/polarization/dotson2010_t1.txt",
             "t2_data_table_local" : "datafiles/polarization/dotson2010_t2.txt",
             },
+        "loaders"   : {
+            "t1": "maguniverse.data.polarization.dotson2010:get_dotson2010_objects",
+            "t2": "maguniverse.data.polarization.dotson2010:get_dotson2010",
+        },
     },
     "Matthews2009": {
         "title"     : "The Legacy of SCUPOL: 850 μm Imaging Polarimetry from 1997 to 2005",
@@ -27,5 +31,10 @@ polarization_source = {
             "t5_results_summary": "https://iopscience.iop.org/0067-0049/182/1/143/suppdata/apjs300733t5_ascii.txt?doi=10.1088/0067-0049/182/1/143",
             "t6_polarization"   : "https://content.cld.iop.org/journals/0067-0049/182/1/143/revision1/apjs300733t6_mrt.txt",
         },
+        "loaders"   : {
+            "t1": "maguniverse.data.polarization.matthews2009:get_matthews2009_targets",
+            "t5": "maguniverse.data.polarization.matthews2009:get_matthews2009_summary",
+            "t6": "maguniverse.data.polarization.matthews2009:get_matthews2009",
+        },
     },
 }
\ No newline at end of file
@@ -9,13 +9,94 @@ Due to potential CAPTCHA protection on the publisher's website, this module pref
 a local copy of the ASCII data file.
 """
 
-from io import StringIO
-import pandas as pd
+import numpy as np
 
+from maguniverse.analysis.stokes import add_stokes_columns
 from maguniverse.data.polarization import polarization_source
-from maguniverse.utils import get_ascii, get_default_data_paths
+from maguniverse.utils import (
+    compact_frame, get_ascii, get_ascii_file, get_default_data_paths, iter_mrt,
+    parse_cached, read_mrt, save_chunks, save_frame,
+)
+from maguniverse.utils.block_index import read_mrt_objects
+from maguniverse.utils.cache import sha256_bytes
+from maguniverse.utils.coords import DEC_COL, RA_COL, add_icrs_columns, offsets_to_radec
+from maguniverse.utils.iop_ascii import read_iop_ascii
+from maguniverse.utils.locking import file_lock
+from maguniverse.utils.mapgrid import grid_maps, open_maps, read_maps_meta, write_maps
+from maguniverse.utils.metrics import phase, timed
+from maguniverse.utils.multitable import index_join, load_tables
+from maguniverse.utils.names import normalize_names
+from maguniverse.utils.table_cache import parser_fingerprint
 
-def get_dotson2010(file_path=None, file_url=None, save_path=None, save_src_data_path=None):
+
+# Column names of the parsed table, in file order
+COLUMN_NAMES = [
+    'ID',
+    'ΔR.A.',
+    'ΔDecl.',
+    'Δx',
+    'Δy',
+    'P',
+    'sigma(P)',
+    'theta',
+    'sigma(theta)',
+    'Intensity',
+    'sigma(Intensity)',
+    'Number of Observations'
+]
+
+# Quantities gridded by get_dotson2010_maps
+MAP_COLUMNS = [
+    'P',
+    'sigma(P)',
+    'theta',
+    'sigma(theta)',
+    'Intensity',
+    'sigma(Intensity)',
+    'Number of Observations'
+]
+
+# Hertz pixel center-to-center spacing (arcsec), and the objects whose
+# pixel x axis is rotated clockwise from R.A. (deg); see table 2, note 1
+PIXEL_SCALE = 17.8
+GRID_ROTATIONS = {'M17': 16.0, 'M82': 24.0}
+
+# Sub-pixel tolerance (pixels) of the map grid; see grid_maps
+GRID_RESOLUTION = 0.1
+
+
+def _parse_dotson2010(raw):
+    """Parse the raw Dotson et al. (2010) table 2 text into a DataFrame."""
+    # Column layout is taken from the MRT byte-by-byte header
+    df = read_mrt(raw, names=COLUMN_NAMES)
+
+    return df
+
+
+def _parse_dotson2010_objects(raw):
+    """Parse the raw Dotson et al. (2010) table 1 text into a DataFrame."""
+    # Tab-separated IOP table; column names are taken from its header row
+    df = read_iop_ascii(raw)
+
+    return df
+
+
+def _add_icrs(df, centers):
+    """Attach ICRS columns from the per-object offsets and object centers."""
+    if isinstance(centers, dict):
+        ra0 = df['ID'].map({k: v[0] for k, v in centers.items()})
+        dec0 = df['ID'].map({k: v[1] for k, v in centers.items()})
+    else:
+        ra0 = df['ID'].map(centers[RA_COL])
+        dec0 = df['ID'].map(centers[DEC_COL])
+    ra, dec = offsets_to_radec(ra0, dec0, df['ΔR.A.'], df['ΔDecl.'])
+    return add_icrs_columns(df, ra, dec)
+
+
+@timed('load.dotson2010')
+def get_dotson2010(file_path=None, file_url=None, save_path=None, save_src_data_path=None,
+                   cache=None, table_cache=None, chunksize=None, icrs=False, centers=None,
+                   compact=False, objects=None, stokes=None):
     """
     Load the Dotson et al. (2010) polarization measurements into a DataFrame.
 
@@ -29,10 +110,46 @@ def get_dotson2010(file_path=None, file_url=None, save_path=None, save_src_data_
         If provided, the resulting DataFrame is written to this CSV path.
     save_src_data_path : str, optional
         If provided, the raw ASCII data is saved to this path.
+    cache : DownloadCache, bool or None, optional
+        Download cache used for remote fetches. None uses the default
+        cache, False always downloads.
+    table_cache : TableCache, bool or None, optional
+        Parsed-table cache. None uses the default cache, False always
+        re-parses the raw ASCII.
+    chunksize : int, optional
+        If given, return an iterator of DataFrame batches of this many rows
+        instead of a single DataFrame. The raw file is streamed from disk,
+        so memory use is bounded by the batch size; `save_path` is then
+        written incrementally and the parsed-table cache is not used.
+    icrs : bool, optional
+        If True, append decimal-degree 'RA_ICRS (deg)' and 'DE_ICRS (deg)'
+        columns. Table 2 only stores offsets from the object centers, so
+        `centers` is required.
+    centers : dict or DataFrame, optional
+        Object centers (ICRS, degrees) keyed by object name, either as
+        ``{name: (ra, dec)}`` or a DataFrame indexed by name with
+        'RA_ICRS (deg)'/'DE_ICRS (deg)' columns. Objects without a center
+        get NaN positions.
+    compact : bool, optional
+        If True, return memory-compact dtypes: categoricals for repetitive
+        text columns, and float32 or small integer types chosen from the
+        declared column formats (see :func:`maguniverse.utils.compact_frame`).
+    objects : list of str, optional
+        Only return the vectors of these objects ('ID' values, matched on
+        normalized names, so "OMC1" selects 'OMC-1'; names matching nothing
+        are skipped with a warning). The raw file is indexed once by object block (see
+        :func:`maguniverse.utils.block_index.read_mrt_objects`); later
+        calls, in any process, seek to the requested blocks and decode only
+        those bytes. Cannot be combined with `chunksize`.
+    stokes : {'mas', 'ricean'}, optional
+        If given, append the Stokes q/u columns and the polarization
+        fraction debiased with this estimator (see
+        :func:`maguniverse.analysis.stokes.stokes_columns`). On a full load
+        the derived columns are cached next to the parsed table.
 
     Returns
     -------
-    DataFrame
+    DataFrame or iterator of DataFrame
         Columns are:
         'ID',
         'ΔR.A.',
@@ -46,43 +163,256 @@ def get_dotson2010(file_path=None, file_url=None, save_path=None, save_src_data_
         'Intensity',
         'sigma(Intensity)',
         'Number of Observations'
+        plus 'RA_ICRS (deg)' and 'DE_ICRS (deg)' if `icrs` is True, and
+        the columns of :func:`maguniverse.analysis.stokes.stokes_columns`
+        if `stokes` is given.
+
+    Raises
+    ------
+    ValueError
+        If `icrs` is True and no `centers` are given.
     """
+    if icrs and centers is None:
+        raise ValueError(
+            "Dotson2010 table 2 stores offsets only; pass the object centers "
+            "via centers= to compute ICRS positions."
+        )
+
     if file_path is None and file_url is None:
         file_path, file_url = get_default_data_paths(
             polarization_source['Dotson2010']['data_link']['t2_data_table_local'],
             polarization_source['Dotson2010']['data_link']['t2_data_table_ascii']
         )
 
+    if chunksize and objects is not None:
+        raise ValueError("objects= cannot be combined with chunksize.")
+
+    if chunksize:
+        # Stream the raw file from disk and decode it batch by batch
+        path = get_ascii_file(file_path, file_url, save_src_data_path, cache=cache)
+        chunks = iter_mrt(path, chunksize, names=COLUMN_NAMES)
+        if icrs:
+            chunks = (_add_icrs(chunk, centers) for chunk in chunks)
+        if stokes:
+            chunks = (add_stokes_columns(chunk, 'Dotson2010', stokes) for chunk in chunks)
+        if compact:
+            chunks = (compact_frame(chunk) for chunk in chunks)
+        return save_chunks(chunks, save_path)
+
+    raw = None
+    if objects is not None:
+        # Decode only the byte blocks of the requested objects
+        path = get_ascii_file(file_path, file_url, save_src_data_path, cache=cache)
+        df = read_mrt_objects(path, objects, names=COLUMN_NAMES)
+    else:
+        # Fetch raw ASCII (prefers local copy to avoid CAPTCHA)
+        raw = get_ascii(file_path, file_url, save_src_data_path, fmt='txt', cache=cache)
+        df = parse_cached(raw, _parse_dotson2010, cache=table_cache)
+    if stokes:
+        df = add_stokes_columns(df, 'Dotson2010', stokes, raw=raw, parser=_parse_dotson2010,
+                                cache=table_cache)
+    if icrs:
+        _add_icrs(df, centers)
+    if compact:
+        df = compact_frame(df)
+
+    if save_path:
+        save_frame(df, save_path)
+
+    return df
+
+
+@timed('load.dotson2010_objects')
+def get_dotson2010_objects(file_path=None, file_url=None, save_path=None,
+                           save_src_data_path=None, cache=None, table_cache=None,
+                           compact=False):
+    """
+    Load the Dotson et al. (2010) object list (table 1) into a DataFrame.
+
+    Parameters
+    ----------
+    file_path : str, optional
+        Local filesystem path to the ASCII data. If None, defaults are used.
+    file_url : str, optional
+        URL to download the ASCII data. If None, defaults are used.
+    save_path : str, optional
+        If provided, the resulting DataFrame is written to this CSV path.
+    save_src_data_path : str, optional
+        If provided, the raw ASCII data is saved to this path.
+    cache : DownloadCache, bool or None, optional
+        Download cache used for remote fetches. None uses the default
+        cache, False always downloads.
+    table_cache : TableCache, bool or None, optional
+        Parsed-table cache. None uses the default cache, False always
+        re-parses the raw ASCII.
+    compact : bool, optional
+        If True, return memory-compact dtypes (see
+        :func:`maguniverse.utils.compact_frame`).
+
+    Returns
+    -------
+    DataFrame
+        One row per object, with the columns of the published table
+        (see :func:`maguniverse.utils.iop_ascii.read_iop_ascii`); the
+        first column holds the object names.
+    """
+    if file_path is None and file_url is None:
+        file_path, file_url = get_default_data_paths(
+            polarization_source['Dotson2010']['data_link']['t1_object_list_local'],
+            polarization_source['Dotson2010']['data_link']['t1_object_list_ascii']
+        )
+
     # Fetch raw ASCII (prefers local copy to avoid CAPTCHA)
-    raw = get_ascii(file_path, file_url, save_src_data_path, fmt='txt')
+    raw = get_ascii(file_path, file_url, save_src_data_path, fmt='txt', cache=cache)
+    df = parse_cached(raw, _parse_dotson2010_objects, cache=table_cache)
+    if compact:
+        df = compact_frame(df)
+
+    if save_path:
+        save_frame(df, save_path)
+
+    return df
 
-    # Define column names and read into DataFrame
-    column_names = [
-        'ID',
-        'ΔR.A.',
-        'ΔDecl.',
-        'Δx',
-        'Δy',
-        'P',
-        'sigma(P)',
-        'theta',
-        'sigma(theta)',
-        'Intensity',
-        'sigma(Intensity)',
-        'Number of Observations'
-    ]
-    df = pd.read_csv(
-        StringIO(raw),
-        sep=r'\s+',         # Use regex to match whitespace
-        names=column_names,
-        skiprows=31,        # Skip the header
-    )
+
+@timed('load.dotson2010_catalog')
+def get_dotson2010_catalog(save_path=None, file_paths=None, file_urls=None, cache=None,
+                           table_cache=None, compact=False, stokes=None, max_workers=None):
+    """
+    Load Dotson et al. (2010) tables 1 and 2 concurrently and join them.
+
+    Parameters
+    ----------
+    save_path : str, optional
+        If provided, the joined DataFrame is written to this CSV path.
+    file_paths, file_urls : dict, optional
+        Local paths and URLs of the tables keyed by table name ('t1', 't2'),
+        as the `file_path` and `file_url` of their loaders. Tables not
+        listed use the defaults.
+    cache, table_cache, compact, stokes
+        As for :func:`get_dotson2010`; forwarded to the table loaders.
+    max_workers : int, optional
+        Number of tables loaded at once; all of them by default.
+
+    Returns
+    -------
+    DataFrame
+        The vectors of table 2, each with the table 1 columns of its
+        object attached (matched on normalized names, see
+        :func:`maguniverse.utils.names.normalize_names`; names already
+        used get a ' (t1)' suffix).
+    """
+    options = {'cache': cache, 'table_cache': table_cache, 'compact': compact}
+    tables = load_tables({
+        't1': (get_dotson2010_objects, options),
+        't2': (get_dotson2010, dict(options, stokes=stokes)),
+    }, max_workers, file_paths, file_urls)
+    objects = tables['t1']
+    df = index_join(tables['t2'], objects, 'ID', right_key=objects.columns[0],
+                    columns=list(objects.columns[1:]), suffix=' (t1)',
+                    normalize=normalize_names)
 
     if save_path:
-        df.to_csv(save_path, index=False)
+        save_frame(df, save_path)
 
     return df
 
+
+@timed('load.dotson2010_maps')
+def get_dotson2010_maps(file_path=None, file_url=None, save_path=None,
+                        save_src_data_path=None, cache=None, table_cache=None,
+                        columns=None, centers=None, dtype='float64'):
+    """
+    Grid the Dotson et al. (2010) polarization vectors into per-object maps.
+
+    Parameters
+    ----------
+    file_path : str, optional
+        Local filesystem path to the ASCII data. If None, defaults are used.
+    file_url : str, optional
+        URL to download the ASCII data. If None, defaults are used.
+    save_path : str, optional
+        Directory of the memory-mapped map set (see
+        :func:`maguniverse.utils.mapgrid.write_maps`). A set already there,
+        gridded from the same data with the same `columns`, `dtype`, grid
+        geometry and gridding and parsing code, is opened as is; otherwise
+        it is (re)built. If None, the maps are kept in memory.
+    save_src_data_path : str, optional
+        If provided, the raw ASCII data is saved to this path.
+    cache : DownloadCache, bool or None, optional
+        Download cache used for remote fetches. None uses the default
+        cache, False always downloads.
+    table_cache : TableCache, bool or None, optional
+        Parsed-table cache. None uses the default cache, False always
+        re-parses the raw ASCII.
+    columns : list of str, optional
+        Quantities to grid; ``MAP_COLUMNS`` by default.
+    centers : dict or DataFrame, optional
+        Object centers (ICRS, degrees), as for :func:`get_dotson2010`;
+        they fill the 'crval' of the returned maps.
+    dtype : str or dtype, optional
+        Data type of the cubes.
+
+    Returns
+    -------
+    MapSet
+        One map per object and pointing field, with cubes of shape
+        ``(maps, ny, nx)`` for each quantity, NaN outside the observed
+        pixels, and a 'mask' cube of the observed ones (see
+        :mod:`maguniverse.utils.mapgrid`). Pixel x runs east along R.A.
+        and y north along Dec (rotated by 'crota' for M17 and M82), with
+        a spacing 'cdelt' of 17.8 arcsec.
+
+    Notes
+    -----
+    Gridding is reported as a 'grid' phase to the metrics hooks, with
+    'cache' 'hit' when a stored set was reused.
+    """
+    if file_path is None and file_url is None:
+        file_path, file_url = get_default_data_paths(
+            polarization_source['Dotson2010']['data_link']['t2_data_table_local'],
+            polarization_source['Dotson2010']['data_link']['t2_data_table_ascii']
+        )
+    columns = list(MAP_COLUMNS if columns is None else columns)
+
+    raw = get_ascii(file_path, file_url, save_src_data_path, fmt='txt', cache=cache)
+    key = {
+        'source'     : sha256_bytes(raw.encode('utf-8')),
+        'columns'    : columns,
+        'dtype'      : np.dtype(dtype).str,
+        'pixel_scale': PIXEL_SCALE,
+        'rotation'   : GRID_ROTATIONS,
+        'resolution' : GRID_RESOLUTION,
+        'parser'     : parser_fingerprint(_parse_dotson2010),
+        'grid'       : parser_fingerprint(grid_maps),
+    }
+
+    def build():
+        df = parse_cached(raw, _parse_dotson2010, cache=table_cache)
+        return grid_maps(df, columns, group_col='ID', x_col='Δx', y_col='Δy',
+                         resolution=GRID_RESOLUTION, dtype=dtype, pixel_scale=PIXEL_SCALE,
+                         rotation=GRID_ROTATIONS)
+
+    with phase('grid') as m:
+        if not save_path:
+            maps = build()
+            m['cache'] = 'off'
+        else:
+            with file_lock(save_path):
+                description = read_maps_meta(save_path)
+                stored = description['meta'] if description else {}
+                if all(stored.get(k) == v for k, v in key.items()):
+                    m['cache'] = 'hit'
+                else:
+                    write_maps(build(), save_path, extra=key)
+                    m['cache'] = 'miss'
+                maps = open_maps(save_path)
+        if centers is not None:
+            maps.set_centers(centers)
+        m['rows'] = sum(entry['npix'] for entry in maps.maps)
+
+    return maps
+
+
 if __name__ == "__main__":
     # Example usage
     df = get_dotson2010()
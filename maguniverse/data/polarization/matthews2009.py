@@ -7,13 +7,69 @@ Fetch and process the Matthews et al. (2009) polarization data.
 
 """
 
-from io import StringIO
-import pandas as pd
-
+from maguniverse.analysis.stokes import add_stokes_columns
 from maguniverse.data.polarization import polarization_source
-from maguniverse.utils import get_ascii, get_default_data_paths
+from maguniverse.utils import (
+    compact_frame, get_ascii, get_ascii_file, get_default_data_paths, iter_mrt,
+    parse_cached, read_mrt, save_chunks, save_frame,
+)
+from maguniverse.utils.block_index import read_mrt_objects
+from maguniverse.utils.coords import add_icrs_columns, sexagesimal_to_deg
+from maguniverse.utils.iop_ascii import read_iop_ascii
+from maguniverse.utils.metrics import timed
+from maguniverse.utils.multitable import index_join, load_tables
+from maguniverse.utils.names import normalize_names
+
+
+# Column names of the parsed table, in file order
+COLUMN_NAMES = [
+    "ID",      # Object/Region identification
+    "f_ID",    # [bc] Flag on ID (1)
+    "RAOff",   # Offset in Right Ascension (2)
+    "DEOff",   # Offset in Declination (2)
+    "RAh",     # Hour of Right Ascension (J2000) 
+    "RAm",     # Minute of Right Ascension (J2000) 
+    "RAs",     # Second of Right Ascension (J2000)
+    "DE-",     # Sign of the Declination (J2000)
+    "DEd",     # Degree of Declination (J2000)
+    "DEm",     # Arcminute of Declination (J2000)
+    "DEs",     # Arcsecond of Declination (J2000)
+    "Int",     # Intensity
+    "e_Int",   # Error in Int
+    "Pol",     # Polarization percentage
+    "e_Pol",   # Error in Pol
+    "theta",   # Polarization angle 
+    "e_theta", # Error in theta
+]
+
+
+def _parse_matthews2009(raw):
+    """Parse the raw Matthews et al. (2009) table 6 text into a DataFrame."""
+    # Column layout is taken from the MRT byte-by-byte header
+    df = read_mrt(raw, names=COLUMN_NAMES)
+
+    return df
+
+
+def _parse_matthews2009_ascii(raw):
+    """Parse a raw Matthews et al. (2009) table 1 or 5 text into a DataFrame."""
+    # Tab-separated IOP table; column names are taken from its header row
+    df = read_iop_ascii(raw)
+
+    return df
+
 
-def get_matthews2009(file_path=None, file_url=None, save_path=None, save_src_data_path=None):
+def _add_icrs(df):
+    """Attach decimal-degree ICRS columns computed from the J2000 fields."""
+    ra = sexagesimal_to_deg(df['RAh'], df['RAm'], df['RAs'], hours=True)
+    dec = sexagesimal_to_deg(df['DEd'], df['DEm'], df['DEs'], sign=df['DE-'])
+    return add_icrs_columns(df, ra, dec)
+
+
+@timed('load.matthews2009')
+def get_matthews2009(file_path=None, file_url=None, save_path=None, save_src_data_path=None,
+                     cache=None, table_cache=None, chunksize=None, icrs=False,
+                     compact=False, objects=None, stokes=None):
     """
     Load the Matthews et al. (2009) polarization data table into a DataFrame.
 
@@ -27,10 +83,40 @@ def get_matthews2009(file_path=None, file_url=None, save_path=None, save_src_dat
         If provided, the resulting DataFrame is written to this CSV path.
     save_src_data_path : str, optional
         If provided, the raw ASCII data is saved to this path.
-        
+    cache : DownloadCache, bool or None, optional
+        Download cache used for remote fetches. None uses the default
+        cache, False always downloads.
+    table_cache : TableCache, bool or None, optional
+        Parsed-table cache. None uses the default cache, False always
+        re-parses the raw ASCII.
+    chunksize : int, optional
+        If given, return an iterator of DataFrame batches of this many rows
+        instead of a single DataFrame. The raw file is streamed from disk,
+        so memory use is bounded by the batch size; `save_path` is then
+        written incrementally and the parsed-table cache is not used.
+    icrs : bool, optional
+        If True, append decimal-degree 'RA_ICRS (deg)' and 'DE_ICRS (deg)'
+        columns computed from the J2000 sexagesimal fields.
+    compact : bool, optional
+        If True, return memory-compact dtypes: categoricals for repetitive
+        text columns, and float32 or small integer types chosen from the
+        declared column formats (see :func:`maguniverse.utils.compact_frame`).
+    objects : list of str, optional
+        Only return the vectors of these objects ("ID" values, matched on
+        normalized names, so "OMC1" selects 'OMC-1'; names matching nothing
+        are skipped with a warning). The raw file is indexed once by object block (see
+        :func:`maguniverse.utils.block_index.read_mrt_objects`); later
+        calls, in any process, seek to the requested blocks and decode only
+        those bytes. Cannot be combined with `chunksize`.
+    stokes : {'mas', 'ricean'}, optional
+        If given, append the Stokes q/u columns and the polarization
+        fraction debiased with this estimator (see
+        :func:`maguniverse.analysis.stokes.stokes_columns`). On a full load
+        the derived columns are cached next to the parsed table.
+
     Returns
     -------
-    DataFrame
+    DataFrame or iterator of DataFrame
         Columns are:
         "ID",      # Object/Region identification
         "f_ID",    # [bc] Flag on ID (1)
@@ -49,6 +135,9 @@ def get_matthews2009(file_path=None, file_url=None, save_path=None, save_src_dat
         "e_Pol",   # Error in Pol
         "theta",   # Polarization angle 
         "e_theta", # Error in theta
+        plus 'RA_ICRS (deg)' and 'DE_ICRS (deg)' if `icrs` is True, and
+        the columns of :func:`maguniverse.analysis.stokes.stokes_columns`
+        if `stokes` is given.
     """
     if file_path is None and file_url is None:
         file_path, file_url = get_default_data_paths(
@@ -56,60 +145,169 @@ def get_matthews2009(file_path=None, file_url=None, save_path=None, save_src_dat
             polarization_source['Matthews2009']['data_link']['t6_polarization']
         )
 
+    if chunksize and objects is not None:
+        raise ValueError("objects= cannot be combined with chunksize.")
+
+    if chunksize:
+        # Stream the raw file from disk and decode it batch by batch
+        path = get_ascii_file(file_path, file_url, save_src_data_path, cache=cache)
+        chunks = iter_mrt(path, chunksize, names=COLUMN_NAMES)
+        if icrs:
+            chunks = map(_add_icrs, chunks)
+        if stokes:
+            chunks = (add_stokes_columns(chunk, 'Matthews2009', stokes) for chunk in chunks)
+        if compact:
+            chunks = map(compact_frame, chunks)
+        return save_chunks(chunks, save_path)
+
+    raw = None
+    if objects is not None:
+        # Decode only the byte blocks of the requested objects
+        path = get_ascii_file(file_path, file_url, save_src_data_path, cache=cache)
+        df = read_mrt_objects(path, objects, names=COLUMN_NAMES)
+    else:
+        # Fetch raw ASCII (prefers local copy to avoid CAPTCHA)
+        raw = get_ascii(file_path, file_url, save_src_data_path, fmt='txt', cache=cache)
+        df = parse_cached(raw, _parse_matthews2009, cache=table_cache)
+    if stokes:
+        df = add_stokes_columns(df, 'Matthews2009', stokes, raw=raw, parser=_parse_matthews2009,
+                                cache=table_cache)
+    if icrs:
+        _add_icrs(df)
+    if compact:
+        df = compact_frame(df)
+
+    if save_path:
+        save_frame(df, save_path)
+
+    return df
+
+
+def _get_ascii_table(link, file_path, file_url, save_path, save_src_data_path, cache,
+                     table_cache, compact):
+    """Load one of the tab-separated IOP tables (1 or 5)."""
+    if file_path is None and file_url is None:
+        file_path, file_url = get_default_data_paths(
+            file_path,
+            polarization_source['Matthews2009']['data_link'][link]
+        )
+
     # Fetch raw ASCII (prefers local copy to avoid CAPTCHA)
-    raw = get_ascii(file_path, file_url, save_src_data_path, fmt='txt')
+    raw = get_ascii(file_path, file_url, save_src_data_path, fmt='txt', cache=cache)
+    df = parse_cached(raw, _parse_matthews2009_ascii, cache=table_cache)
+    if compact:
+        df = compact_frame(df)
 
-    # Define column names and read into DataFrame
-    column_names = [
-        "ID",      # Object/Region identification
-        "f_ID",    # [bc] Flag on ID (1)
-        "RAOff",   # Offset in Right Ascension (2)
-        "DEOff",   # Offset in Declination (2)
-        "RAh",     # Hour of Right Ascension (J2000) 
-        "RAm",     # Minute of Right Ascension (J2000) 
-        "RAs",     # Second of Right Ascension (J2000)
-        "DE-",     # Sign of the Declination (J2000)
-        "DEd",     # Degree of Declination (J2000)
-        "DEm",     # Arcminute of Declination (J2000)
-        "DEs",     # Arcsecond of Declination (J2000)
-        "Int",     # Intensity
-        "e_Int",   # Error in Int
-        "Pol",     # Polarization percentage
-        "e_Pol",   # Error in Pol
-        "theta",   # Polarization angle 
-        "e_theta", # Error in theta
-    ]
-    colspecs = [
-        (0, 12),   # 1–12
-        (13, 14),  # 14
-        (15, 21),  # 16–21
-        (22, 28),  # bytes 23–28
-        (29, 31),  # bytes 30–31
-        (32, 34),  # bytes 33–34
-        (35, 40),  # bytes 36–40
-        (41, 42),  # byte    42
-        (42, 44),  # bytes 43–44
-        (45, 47),  # bytes 46–47
-        (48, 52),  # bytes 49–52
-        (53, 62),  # bytes 54–62
-        (63, 72),  # bytes 64–72
-        (73, 77),  # bytes 74–77
-        (78, 81),  # bytes 79–81
-        (82, 87),  # bytes 83–87
-        (88, 92),  # bytes 89–92
-    ]      
-    df = pd.read_fwf(
-        StringIO(raw),
-        names=column_names,
-        skiprows=31,
-        colspecs=colspecs
-    )
+    if save_path:
+        save_frame(df, save_path)
+
+    return df
+
+
+@timed('load.matthews2009_targets')
+def get_matthews2009_targets(file_path=None, file_url=None, save_path=None,
+                             save_src_data_path=None, cache=None, table_cache=None,
+                             compact=False):
+    """
+    Load the Matthews et al. (2009) target list (table 1) into a DataFrame.
+
+    Parameters
+    ----------
+    file_path : str, optional
+        Local filesystem path to the ASCII data. If None, defaults are used.
+    file_url : str, optional
+        URL to download the ASCII data. If None, defaults are used.
+    save_path : str, optional
+        If provided, the resulting DataFrame is written to this CSV path.
+    save_src_data_path : str, optional
+        If provided, the raw ASCII data is saved to this path.
+    cache : DownloadCache, bool or None, optional
+        Download cache used for remote fetches. None uses the default
+        cache, False always downloads.
+    table_cache : TableCache, bool or None, optional
+        Parsed-table cache. None uses the default cache, False always
+        re-parses the raw ASCII.
+    compact : bool, optional
+        If True, return memory-compact dtypes (see
+        :func:`maguniverse.utils.compact_frame`).
+
+    Returns
+    -------
+    DataFrame
+        One row per target, with the columns of the published table (see
+        :func:`maguniverse.utils.iop_ascii.read_iop_ascii`); the first
+        column holds the object names.
+    """
+    return _get_ascii_table('t1_targets', file_path, file_url, save_path,
+                            save_src_data_path, cache, table_cache, compact)
+
+
+@timed('load.matthews2009_summary')
+def get_matthews2009_summary(file_path=None, file_url=None, save_path=None,
+                             save_src_data_path=None, cache=None, table_cache=None,
+                             compact=False):
+    """
+    Load the Matthews et al. (2009) results summary (table 5) into a DataFrame.
+
+    Parameters are as for :func:`get_matthews2009_targets`.
+
+    Returns
+    -------
+    DataFrame
+        One row per object, with the columns of the published table; the
+        first column holds the object names.
+    """
+    return _get_ascii_table('t5_results_summary', file_path, file_url, save_path,
+                            save_src_data_path, cache, table_cache, compact)
+
+
+@timed('load.matthews2009_catalog')
+def get_matthews2009_catalog(save_path=None, file_paths=None, file_urls=None, cache=None,
+                             table_cache=None, icrs=False, compact=False, stokes=None,
+                             max_workers=None):
+    """
+    Load Matthews et al. (2009) tables 1, 5 and 6 concurrently and join them.
+
+    Parameters
+    ----------
+    save_path : str, optional
+        If provided, the joined DataFrame is written to this CSV path.
+    file_paths, file_urls : dict, optional
+        Local paths and URLs of the tables keyed by table name ('t1', 't5', 't6'),
+        as the `file_path` and `file_url` of their loaders. Tables not
+        listed use the defaults.
+    cache, table_cache, icrs, compact, stokes
+        As for :func:`get_matthews2009`; forwarded to the table loaders.
+    max_workers : int, optional
+        Number of tables loaded at once; all of them by default.
+
+    Returns
+    -------
+    DataFrame
+        The vectors of table 6, each with the table 1 and table 5 columns
+        of its object attached (matched on normalized names, see
+        :func:`maguniverse.utils.names.normalize_names`). Names already
+        used get a ' (t1)' or ' (t5)' suffix.
+    """
+    options = {'cache': cache, 'table_cache': table_cache, 'compact': compact}
+    tables = load_tables({
+        't1': (get_matthews2009_targets, options),
+        't5': (get_matthews2009_summary, options),
+        't6': (get_matthews2009, dict(options, icrs=icrs, stokes=stokes)),
+    }, max_workers, file_paths, file_urls)
+    df = tables['t6']
+    for name in ('t1', 't5'):
+        other = tables[name]
+        df = index_join(df, other, 'ID', right_key=other.columns[0],
+                        columns=list(other.columns[1:]), suffix=' (%s)' % name,
+                        normalize=normalize_names)
 
     if save_path:
-        df.to_csv(save_path, index=False)
+        save_frame(df, save_path)
 
     return df
 
+
 if __name__ == "__main__":
     # Example usage
     import os
@@ -12,5 +12,8 @@ zeeman_sources = {
             "table1_ascii": "https://iopscience.iop.org/0004-637X/725/1/466/suppdata/apj333303t1_ascii.txt?doi=10.1088/0004-637X/725/1/466",
             "table1_local": "datafiles/zeeman/crutcher2010.txt",
         },
+        "loaders"   : {
+            "t1": "maguniverse.data.zeeman.crutcher2010:get_crutcher2010",
+        },
     },
 }
\ No newline at end of file
@@ -13,10 +13,63 @@ from io import StringIO
 import pandas as pd
 
 from maguniverse.data.zeeman import zeeman_sources
-from maguniverse.utils import get_ascii, get_default_data_paths
+from maguniverse.utils import (
+    compact_frame, get_ascii, get_default_data_paths, parse_cached, save_chunks,
+    save_frame, slice_chunks,
+)
+from maguniverse.utils.metrics import phase, timed
+
+
+# Column names of the parsed table, in file order
+COLUMN_NAMES = [
+    'Name',
+    'Species',
+    'Ref',
+    'n_H (cm^-3)',
+    'B_Z (muG)',
+    'sigma (muG)'
+]
+
+# Fortran formats equivalent to the printed values (the table is
+# tab-separated and declares none)
+FORMATS = {
+    'Name'        : 'A16',
+    'Species'     : 'A4',
+    'Ref'         : 'I2',
+    'n_H (cm^-3)' : 'E7.1',
+    'B_Z (muG)'   : 'F7.1',
+    'sigma (muG)' : 'F6.1',
+}
+
+
+def _parse_crutcher2010(raw):
+    """Parse the raw Crutcher et al. (2010) table 1 text into a DataFrame."""
+    df = pd.read_csv(
+        StringIO(raw),
+        sep=r'\t+',
+        header=None,
+        names=COLUMN_NAMES,
+        skiprows=5,
+        skipfooter=3,
+        engine='python'
+    )
+
+    # Clean and coerce numeric columns
+    with phase('coerce', rows=len(df)):
+        for col in ['n_H (cm^-3)', 'B_Z (muG)']:
+            df[col] = (
+                df[col].astype(str)
+                    #    .replace('nan', 'Nan')
+                       .str.replace(r'\s*x\s*10\^', 'e', regex=True)
+            )
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    return df
 
 
-def get_crutcher2010(file_path=None, file_url=None, save_path=None):
+@timed('load.crutcher2010')
+def get_crutcher2010(file_path=None, file_url=None, save_path=None,
+                     cache=None, table_cache=None, chunksize=None, compact=False):
     """
     Load the Crutcher et al. (2010) Zeeman measurements into a DataFrame.
 
@@ -28,10 +81,25 @@ def get_crutcher2010(file_path=None, file_url=None, save_path=None):
         URL to download the ASCII data. If None, defaults are used.
     save_path : str, optional
         If provided, the resulting DataFrame is written to this CSV path.
+    cache : DownloadCache, bool or None, optional
+        Download cache used for remote fetches. None uses the default
+        cache, False always downloads.
+    table_cache : TableCache, bool or None, optional
+        Parsed-table cache. None uses the default cache, False always
+        re-parses the raw ASCII.
+    chunksize : int, optional
+        If given, return an iterator of DataFrame batches of this many rows
+        instead of a single DataFrame, for interface parity with the other
+        loaders. The tab-separated table uses a footer that the chunked
+        pandas readers cannot skip, so it is parsed whole before slicing.
+    compact : bool, optional
+        If True, return memory-compact dtypes: categoricals for repetitive
+        text columns, and float32 or small integer types chosen from the
+        declared column formats (see :func:`maguniverse.utils.compact_frame`).
 
     Returns
     -------
-    DataFrame
+    DataFrame or iterator of DataFrame
         Columns are:
         - 'Name'
         - 'Species'
@@ -47,39 +115,17 @@ def get_crutcher2010(file_path=None, file_url=None, save_path=None):
         )
 
     # Fetch raw ASCII (prefers local copy to avoid CAPTCHA)
-    raw = get_ascii(file_path, file_url, fmt='txt')
-
-    # Define column names and read into DataFrame
-    column_names = [
-        'Name',
-        'Species',
-        'Ref',
-        'n_H (cm^-3)',
-        'B_Z (muG)',
-        'sigma (muG)'
-    ]
+    raw = get_ascii(file_path, file_url, fmt='txt', cache=cache)
 
-    df = pd.read_csv(
-        StringIO(raw),
-        sep=r'\t+',
-        header=None,
-        names=column_names,
-        skiprows=5,
-        skipfooter=3,
-        engine='python'
-    )
+    df = parse_cached(raw, _parse_crutcher2010, cache=table_cache)
+    if compact:
+        df = compact_frame(df, FORMATS)
 
-    # Clean and coerce numeric columns
-    for col in ['n_H (cm^-3)', 'B_Z (muG)']:
-        df[col] = (
-            df[col].astype(str)
-                #    .replace('nan', 'Nan')
-                   .str.replace(r'\s*x\s*10\^', 'e', regex=True)
-        )
-        df[col] = pd.to_numeric(df[col], errors='coerce')
+    if chunksize:
+        return save_chunks(slice_chunks(df, chunksize), save_path)
 
     if save_path:
-        df.to_csv(save_path, index=False)
+        save_frame(df, save_path)
 
     return df
 
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+registry.py
+-----------
+
+Central catalog registry built from the source dictionaries of
+``maguniverse.data``.
+
+Every catalog description may carry a ``"loaders"`` entry mapping table
+names to ``"module:function"`` strings. Loaders are imported only when a
+table is actually requested, so importing :mod:`maguniverse` (and listing
+the catalogs) does not pull in pandas, numpy or requests.
+"""
+
+import importlib
+
+
+def registered_sources():
+    """
+    Return every registered catalog description keyed by catalog name.
+
+    Merges ``polarization_source``, ``zeeman_sources`` and ``gas_sources``.
+    """
+    from maguniverse.data.gas import gas_sources
+    from maguniverse.data.polarization import polarization_source
+    from maguniverse.data.zeeman import zeeman_sources
+
+    sources = {}
+    for group in (polarization_source, zeeman_sources, gas_sources):
+        sources.update(group)
+    return sources
+
+
+def registered_tables():
+    """Return ``(catalog, table)`` for every table with a registered loader."""
+    return [(catalog, table) for catalog, info in registered_sources().items()
+            for table in info.get('loaders', {})]
+
+
+def list_catalogs(with_info=False):
+    """
+    List the registered catalogs.
+
+    Parameters
+    ----------
+    with_info : bool, optional
+        If True, return a dict mapping each catalog name to a summary with
+        its 'title', 'year' and loadable 'tables'. Otherwise return the
+        sorted catalog names.
+
+    Returns
+    -------
+    list of str or dict
+    """
+    sources = registered_sources()
+    if not with_info:
+        return sorted(sources)
+    return {
+        name: {
+            'title' : info.get('title'),
+            'year'  : info.get('year'),
+            'tables': sorted(info.get('loaders', {})),
+        }
+        for name, info in sorted(sources.items())
+    }
+
+
+def get_loader(catalog, table=None):
+    """
+    Resolve and import the loader function of a catalog table.
+
+    Parameters
+    ----------
+    catalog : str
+        Catalog name as returned by :func:`list_catalogs`.
+    table : str, optional
+        Table name. May be omitted when the catalog has a single loader.
+
+    Returns
+    -------
+    callable
+
+    Raises
+    ------
+    KeyError
+        If the catalog or table is not registered.
+    """
+    sources = registered_sources()
+    if catalog not in sources:
+        raise KeyError("Unknown catalog %r; available: %s"
+                       % (catalog, ', '.join(sorted(sources))))
+    loaders = sources[catalog].get('loaders', {})
+    if table is None:
+        if len(loaders) != 1:
+            raise KeyError("Catalog %r has tables %s; pass table=."
+                           % (catalog, ', '.join(sorted(loaders))))
+        table = next(iter(loaders))
+    if table not in loaders:
+        raise KeyError("Unknown table %r for %s; available: %s"
+                       % (table, catalog, ', '.join(sorted(loaders))))
+
+    module_name, func_name = loaders[table].split(':')
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def load(catalog, table=None, **kwargs):
+    """
+    Load a registered catalog table.
+
+    Parameters
+    ----------
+    catalog : str
+        Catalog name, e.g. ``"Dotson2010"``.
+    table : str, optional
+        Table name, e.g. ``"t2"``. May be omitted for single-table catalogs.
+    **kwargs
+        Forwarded to the catalog's ``get_*`` loader.
+
+    Returns
+    -------
+    DataFrame
+        Whatever the loader returns.
+
+    Examples
+    --------
+    >>> import maguniverse
+    >>> df = maguniverse.load("Dotson2010", table="t2")
+    """
+    return get_loader(catalog, table)(**kwargs)
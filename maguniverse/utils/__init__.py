@@ -1,6 +1,93 @@
-from maguniverse.utils.fetch_ascii import get_default_data_paths, get_ascii
+"""
+Python helpers for fetching, caching and decoding tables.
 
-__all__ = [
-    'get_default_data_paths', 
-    'get_ascii'
-]
\ No newline at end of file
+Names are resolved lazily from their submodules, so importing a single
+helper does not import pandas or requests until they are needed.
+"""
+
+import importlib
+
+_EXPORTS = {
+    'get_default_data_paths' : 'fetch_ascii',
+    'get_ascii'              : 'fetch_ascii',
+    'get_ascii_file'         : 'fetch_ascii',
+    'CaptchaError'           : 'fetch_ascii',
+    'captcha_errors'         : 'fetch_ascii',
+    'open_compressed'        : 'compression',
+    'detect_compression'     : 'compression',
+    'FileLock'               : 'locking',
+    'resource_lock'          : 'locking',
+    'atomic_write'           : 'locking',
+    'DownloadCache'          : 'cache',
+    'get_default_cache'      : 'cache',
+    'TableCache'             : 'table_cache',
+    'get_default_table_cache': 'table_cache',
+    'parse_cached'           : 'table_cache',
+    'MRTColumn'              : 'mrt',
+    'parse_mrt_header'       : 'mrt',
+    'read_mrt'               : 'mrt',
+    'iter_mrt'               : 'mrt',
+    'save_chunks'            : 'chunked',
+    'slice_chunks'           : 'chunked',
+    'save_frame'             : 'chunked',
+    'FetchResult'            : 'fetch_bulk',
+    'fetch_all'              : 'fetch_bulk',
+    'iter_data_links'        : 'fetch_bulk',
+    'make_session'           : 'fetch_bulk',
+    'RA_COL'                 : 'coords',
+    'DEC_COL'                : 'coords',
+    'sexagesimal_to_deg'     : 'coords',
+    'parse_sexagesimal'      : 'coords',
+    'offsets_to_radec'       : 'coords',
+    'angular_separation'     : 'coords',
+    'MapSet'                 : 'mapgrid',
+    'grid_maps'              : 'mapgrid',
+    'write_maps'             : 'mapgrid',
+    'open_maps'              : 'mapgrid',
+    'GridIndex'              : 'spatial',
+    'SkyIndex'               : 'spatial',
+    'read_iop_ascii'         : 'iop_ascii',
+    'read_vizier_asu'        : 'vizier',
+    'vizier_query_url'       : 'vizier',
+    'apply_constraints'      : 'vizier',
+    'crossmatch'             : 'crossmatch',
+    'crossmatch_many'        : 'crossmatch',
+    'match_indices'          : 'crossmatch',
+    'KeyIndex'               : 'multitable',
+    'index_join'             : 'multitable',
+    'load_tables'            : 'multitable',
+    'normalize_name'         : 'names',
+    'normalize_names'        : 'names',
+    'NameIndex'              : 'names',
+    'build_name_index'       : 'names',
+    'compact_frame'          : 'compact',
+    'dtype_for_format'       : 'compact',
+    'memory_report'          : 'compact',
+    'memory_usage'           : 'compact',
+    'MetricEvent'            : 'metrics',
+    'MetricsCollector'       : 'metrics',
+    'add_hook'               : 'metrics',
+    'remove_hook'            : 'metrics',
+    'collect_metrics'        : 'metrics',
+    'IngestResult'           : 'ingest',
+    'ingest_all'             : 'ingest',
+    'ingest_report'          : 'ingest',
+    'build_store'            : 'store',
+    'open_store'             : 'store',
+    'CatalogStore'           : 'store',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    module = importlib.import_module('maguniverse.utils.' + _EXPORTS[name])
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
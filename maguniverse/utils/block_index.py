@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+block_index.py
+-----------
+
+Byte-offset index of the object blocks of grouped MRT tables.
+
+Tables such as Dotson2010 table 2 and Matthews2009 table 6 list the
+vectors of each object in consecutive records. :func:`build_block_index`
+scans the raw file once and records, for every value of the key column,
+the byte range and row numbers of each run of records. The index is kept
+as a JSON sidecar per file and key column in
+``<default_cache_dir()>/block_index``, together with the size,
+modification time and SHA-256 of the file it describes. Any process can
+then read a few objects with :func:`read_mrt_objects`, which seeks to
+their blocks and decodes only those bytes.
+
+A sidecar is trusted while the file's size and modification time are
+unchanged. Otherwise the file is hashed again: a matching hash only
+refreshes the stored file stats, and a different hash rebuilds the index.
+
+Offsets of compressed files refer to the decompressed text; reaching a
+block then decompresses the stream up to it, which still skips parsing
+every other object.
+"""
+
+import hashlib
+import json
+import os
+import warnings
+
+import numpy as np
+
+from maguniverse.utils.cache import _tmp_name, default_cache_dir
+from maguniverse.utils.compression import open_compressed
+from maguniverse.utils.locking import file_lock
+from maguniverse.utils.metrics import phase
+from maguniverse.utils.mrt import (
+    _decode_records, _select_columns, parse_mrt_header, read_mrt_header_file,
+)
+from maguniverse.utils.names import normalize_name
+
+INDEX_VERSION = 1
+
+# Bytes hashed at a time while validating a file
+HASH_BLOCK = 1024 * 1024
+
+
+def _file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _file_stat(path):
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def _key_column(columns, key):
+    if isinstance(key, int):
+        return columns[key]
+    for col in columns:
+        if col.label == key:
+            return col
+    raise KeyError("No column %r in the MRT header." % (key,))
+
+
+def _scan_blocks(body, col, offset):
+    """Runs of equal keys in `body`: (key, byte_start, byte_end, row, nrows)."""
+    buf = np.frombuffer(body, dtype=np.uint8)
+    ends = np.flatnonzero(buf == ord('\n')) + 1
+    if not ends.size or ends[-1] != buf.size:
+        ends = np.append(ends, buf.size)
+    starts = np.concatenate(([0], ends[:-1]))
+    # blank records are skipped by the decoder; they never start a block
+    filled = np.concatenate(([0], np.cumsum(~np.isin(buf, (ord(' '), ord('\n'), ord('\r'))))))
+    content = filled[ends] > filled[starts]
+    starts, ends = starts[content], ends[content]
+
+    width = col.end - col.start
+    pos = starts[:, None] + col.start + np.arange(width)
+    inside = pos < (ends - 1)[:, None]
+    field = np.where(inside, buf[np.minimum(pos, buf.size - 1)], ord(' ')).astype(np.uint8)
+    field[field == ord('\r')] = ord(' ')
+    keys = np.char.strip(np.ascontiguousarray(field).view('S%d' % width).ravel())
+
+    change = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+    first = np.concatenate(([0], change))
+    last = np.concatenate((change, [len(keys)]))
+    blocks = []
+    for a, b in zip(first, last):
+        key = keys[a].decode('utf-8', errors='replace')
+        blocks.append((key, int(offset + starts[a]), int(offset + ends[b - 1]), int(a),
+                       int(b - a)))
+    return blocks
+
+
+def index_path(path, directory=None, key=0):
+    """Sidecar location of the block index of the file at `path` on `key`."""
+    directory = directory or os.path.join(default_cache_dir(), 'block_index')
+    name = '%s\0%r' % (os.path.abspath(path), key)
+    name = hashlib.sha256(name.encode('utf-8')).hexdigest()[:32]
+    return os.path.join(directory, name + '.json')
+
+
+def build_block_index(path, key=0, directory=None):
+    """
+    Scan an MRT file and write its block index sidecar.
+
+    Parameters
+    ----------
+    path : str
+        MRT file.
+    key : int or str, optional
+        Key column, by position or MRT label; the first column by default.
+    directory : str, optional
+        Sidecar directory; see :func:`index_path`. Each key column has its
+        own sidecar.
+
+    Returns
+    -------
+    dict
+        The index: file 'sha256', 'size' and 'mtime_ns', the 'key' label
+        and 'blocks', mapping each key to a list of
+        ``[byte_start, byte_end, first_row, nrows]`` runs in file order.
+    """
+    with open_compressed(path, 'rb') as f:
+        data = f.read()
+    columns, data_start = parse_mrt_header(data)
+    body = data[data_start:]
+    col = _key_column(columns, key)
+    index = {
+        'version' : INDEX_VERSION,
+        'path'    : os.path.abspath(path),
+        'sha256'  : _file_sha256(path),
+        'key'     : col.label,
+        'data_start': data_start,
+        'nrows'   : 0,
+        'blocks'  : {},
+    }
+    index.update(_file_stat(path))
+    for name, start, end, row, nrows in _scan_blocks(body, col, data_start):
+        index['blocks'].setdefault(name, []).append([start, end, row, nrows])
+        index['nrows'] += nrows
+    _write_index(index, index_path(path, directory, key))
+    return index
+
+
+def _write_index(index, sidecar):
+    os.makedirs(os.path.dirname(sidecar), exist_ok=True)
+    tmp = _tmp_name(sidecar)
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp, sidecar)
+
+
+def _read_index(sidecar, path, key):
+    """The sidecar index if it matches `key` and the stats of `path`, else None."""
+    try:
+        with open(sidecar, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get('version') != INDEX_VERSION:
+        return None
+    if isinstance(key, str) and index.get('key') != key:
+        return None
+    stat = _file_stat(path)
+    if all(index.get(k) == v for k, v in stat.items()):
+        return index
+    return dict(index, stale=True)
+
+
+def load_block_index(path, key=0, directory=None):
+    """
+    Return the block index of `path`, building or refreshing it if needed.
+
+    Parameters are as for :func:`build_block_index`. Concurrent callers
+    refresh a sidecar one at a time and reuse each other's result.
+    """
+    sidecar = index_path(path, directory, key)
+    with phase('block_index') as m:
+        index = _read_index(sidecar, path, key)
+        if index is not None and not index.get('stale'):
+            m['cache'] = 'hit'
+            return index
+        with file_lock(sidecar):
+            # another process may have refreshed the sidecar while we waited
+            index = _read_index(sidecar, path, key)
+            if index is not None and not index.pop('stale', False):
+                m['cache'] = 'hit'
+                return index
+            if index is not None and index.get('sha256') == _file_sha256(path):
+                m['cache'] = 'revalidated'
+                index.update(_file_stat(path))
+                _write_index(index, sidecar)
+                return index
+            m['cache'] = 'miss'
+            return build_block_index(path, key, directory)
+
+
+def read_mrt_objects(path, objects, key=0, names=None, usecols=None, directory=None):
+    """
+    Read the records of selected objects from an MRT file.
+
+    Only the header and the byte ranges of the selected blocks are read.
+
+    Parameters
+    ----------
+    path : str
+        MRT file.
+    objects : iterable of str
+        Values of the key column to read, matched on their
+        :func:`maguniverse.utils.names.normalize_name` keys, so ``"OMC1"``
+        selects the ``OMC-1`` block. Values matching no block are skipped
+        with a warning.
+    key : int or str, optional
+        Key column of the index; see :func:`build_block_index`.
+    names, usecols
+        As for :func:`maguniverse.utils.read_mrt`.
+    directory : str, optional
+        Sidecar directory; see :func:`index_path`.
+
+    Returns
+    -------
+    DataFrame
+        The rows of the selected objects in file order, with the same
+        columns and dtypes as :func:`maguniverse.utils.read_mrt`.
+    """
+    if isinstance(objects, str):
+        objects = [objects]
+    index = load_block_index(path, key, directory)
+    blocks = {}
+    for name in index['blocks']:
+        blocks.setdefault(normalize_name(name), []).append(name)
+    selected, unknown = set(), []
+    for name in objects:
+        found = blocks.get(normalize_name(name))
+        if found is None:
+            unknown.append(name)
+        else:
+            selected.update(found)
+    if unknown:
+        warnings.warn("No %r blocks match %s in %r."
+                      % (index['key'], ', '.join(map(repr, unknown)), path), stacklevel=2)
+    runs = sorted(run for name in selected for run in index['blocks'][name])
+    with open_compressed(path, 'rb') as f:
+        columns, _ = read_mrt_header_file(f)
+    columns = _select_columns(columns, names, usecols)
+    # blocks are visited in file order, so compressed streams only seek forward
+    with open_compressed(path, 'rb') as f:
+        with phase('read', bytes=0) as m:
+            parts = []
+            for start, end, _, _ in runs:
+                f.seek(start)
+                parts.append(f.read(end - start))
+            body = b''.join(parts)
+            m['bytes'] = len(body)
+    with phase('parse', parser='read_mrt_objects', rows=sum(r[3] for r in runs)):
+        return _decode_records(body, columns)
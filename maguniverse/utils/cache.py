@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+"""
+cache.py
+-----------
+
+Persistent, content-addressed on-disk cache for downloaded ASCII tables.
+
+Each cached URL maps to a blob named after the SHA-256 of its content,
+together with the ETag/Last-Modified validators returned by the server.
+Fresh entries (younger than the TTL) are served without touching the
+network; stale entries are revalidated with a conditional GET, so an
+unchanged table costs a zero-byte 304 response instead of a full download.
+
+The cache may be shared by several processes. Updates of the index are
+serialized with a file lock, and each URL is fetched under its own lock:
+the first process downloads it while the others wait, then serve the
+fresh entry it recorded (see :mod:`maguniverse.utils.locking`).
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from maguniverse.utils.metrics import phase
+
+DEFAULT_TTL = 24 * 3600             # seconds before an entry is revalidated
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3   # LRU eviction threshold (2 GiB)
+
+CHUNK_SIZE = 1024 ** 2              # streaming block size for downloads
+VALIDATE_BYTES = 64 * 1024          # leading bytes shown to `validate`
+
+_STAT_KEYS = ('hits', 'misses', 'revalidated', 'bytes_downloaded', 'bytes_saved')
+
+# stats counter -> 'cache' field of the reported fetch phase
+_OUTCOME_NAMES = {'hits': 'hit', 'misses': 'miss', 'revalidated': 'revalidated'}
+
+# Request headers that let a server answer 304 Not Modified
+_CONDITIONAL_HEADERS = ('if-none-match', 'if-modified-since', 'if-match', 'if-unmodified-since',
+                        'if-range')
+
+
+def default_cache_dir():
+    """
+    Return the default cache directory.
+
+    The location can be overridden with the ``MAGUNIVERSE_CACHE_DIR``
+    environment variable; otherwise ``~/.cache/maguniverse`` is used.
+    """
+    return os.environ.get(
+        'MAGUNIVERSE_CACHE_DIR',
+        os.path.join(os.path.expanduser('~'), '.cache', 'maguniverse')
+    )
+
+
+def _tmp_name(path):
+    """Return a temporary sibling of `path` unique to this process and thread."""
+    return '%s.%d.%d.tmp' % (path, os.getpid(), threading.get_ident())
+
+
+def sha256_bytes(data):
+    """Return the hex SHA-256 digest of `data`."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class DownloadCache:
+    """
+    URL-keyed, content-addressed download cache with conditional revalidation.
+
+    Parameters
+    ----------
+    directory : str, optional
+        Cache root. Defaults to :func:`default_cache_dir`.
+    ttl : float or None, optional
+        Seconds an entry is served without revalidation. None never expires.
+    max_bytes : int or None, optional
+        Total blob size above which least-recently-used entries are evicted.
+        None disables eviction.
+    """
+
+    def __init__(self, directory=None, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or default_cache_dir()
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._blob_dir = os.path.join(self.directory, 'objects')
+        self._index_path = os.path.join(self.directory, 'index.json')
+        self._lock_dir = os.path.join(self.directory, 'locks')
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # index bookkeeping
+    # ------------------------------------------------------------------
+    def _load_index(self):
+        try:
+            with open(self._index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        index.setdefault('entries', {})
+        index.setdefault('stats', dict.fromkeys(_STAT_KEYS, 0))
+        return index
+
+    @contextmanager
+    def _index_locked(self):
+        """Hold the index for a read-modify-write, across threads and processes."""
+        from maguniverse.utils.locking import file_lock
+
+        with self._lock, file_lock(self._index_path):
+            yield
+
+    def _save_index(self, index):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = _tmp_name(self._index_path)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self._index_path)
+
+    def blob_path(self, digest):
+        """Return the on-disk path of the blob with content hash `digest`."""
+        return os.path.join(self._blob_dir, digest[:2], digest)
+
+    def _write_blob(self, chunks, validate=None):
+        """
+        Stream `chunks` into a content-addressed blob.
+
+        Returns (digest, size). `validate`, if given, sees the first
+        ``VALIDATE_BYTES`` of the content before the blob is committed.
+        """
+        os.makedirs(self._blob_dir, exist_ok=True)
+        tmp_path = _tmp_name(os.path.join(self._blob_dir, 'download'))
+        h = hashlib.sha256()
+        size = 0
+        head = b''
+        try:
+            with open(tmp_path, 'wb') as f:
+                for chunk in chunks:
+                    if not chunk:
+                        continue
+                    if validate is not None and len(head) < VALIDATE_BYTES:
+                        head += chunk[:VALIDATE_BYTES - len(head)]
+                    h.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+            if validate is not None:
+                validate(head)
+            digest = h.hexdigest()
+            path = self.blob_path(digest)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return digest, size
+
+    # ------------------------------------------------------------------
+    # public API
+    # ------------------------------------------------------------------
+    def lookup(self, url):
+        """
+        Return the index entry for `url`, or None if it is not cached.
+
+        The entry is a dict with keys 'sha256', 'size', 'etag',
+        'last_modified', 'encoding', 'fetched' and 'accessed'.
+        """
+        entry = self._load_index()['entries'].get(url)
+        if entry is not None and not os.path.exists(self.blob_path(entry['sha256'])):
+            return None
+        return entry
+
+    def fetch_file(self, url, session, headers=None, timeout=10, validate=None,
+                   chunk_size=CHUNK_SIZE):
+        """
+        Make `url` available on disk, using the cache whenever possible.
+
+        The response body is streamed to the blob store in chunks of
+        `chunk_size` bytes, so memory use does not grow with the file size.
+        The call is reported as a 'fetch' phase to the metrics hooks (see
+        :mod:`maguniverse.utils.metrics`), with the cache outcome, the
+        number of bytes downloaded and the seconds spent waiting for a
+        concurrent fetch of the same URL ('lock_wait').
+
+        Parameters
+        ----------
+        url : str
+            Resource to fetch.
+        session : requests.Session
+            Session used for (conditional) GET requests.
+        headers : dict, optional
+            Extra request headers.
+        timeout : float, optional
+            Request timeout in seconds.
+        validate : callable, optional
+            Called with the first bytes of a download before it is stored;
+            it may raise to prevent caching of an unusable response
+            (e.g. CAPTCHA).
+        chunk_size : int, optional
+            Streaming block size in bytes.
+
+        Returns
+        -------
+        tuple
+            (path, entry) with the cached file path and the index entry.
+
+        Raises
+        ------
+        requests.HTTPError
+            On an error status, or a 304 answer for a URL that is not cached
+            even after retrying without the conditional `headers`.
+        """
+        from maguniverse.utils.locking import resource_lock
+
+        with phase('fetch', url=url) as m, resource_lock(url, self._lock_dir) as lock:
+            m['lock_wait'] = round(lock.wait, 6)
+            # re-read after the lock: a concurrent fetch may just have stored `url`
+            entry = self._load_index()['entries'].get(url)
+            if entry is not None and not os.path.exists(self.blob_path(entry['sha256'])):
+                entry = None
+            now = time.time()
+
+            if entry is not None and (self.ttl is None or now - entry['fetched'] < self.ttl):
+                outcome = 'hits'
+            else:
+                request_headers = dict(headers or {})
+                if entry is not None:
+                    if entry.get('etag'):
+                        request_headers['If-None-Match'] = entry['etag']
+                    if entry.get('last_modified'):
+                        request_headers['If-Modified-Since'] = entry['last_modified']
+
+                resp = session.get(url, headers=request_headers, allow_redirects=True,
+                                   timeout=timeout, stream=True)
+                if resp.status_code == 304 and entry is None:
+                    # the caller's own validators matched, but there is no
+                    # cached copy to reuse: ask for the full content
+                    resp.close()
+                    request_headers = {k: v for k, v in request_headers.items()
+                                       if k.lower() not in _CONDITIONAL_HEADERS}
+                    resp = session.get(url, headers=request_headers, allow_redirects=True,
+                                       timeout=timeout, stream=True)
+                with resp:
+                    if resp.status_code == 304 and entry is not None:
+                        outcome = 'revalidated'
+                        entry = dict(entry, fetched=now)
+                    else:
+                        resp.raise_for_status()
+                        if resp.status_code == 304:
+                            import requests
+
+                            raise requests.HTTPError(
+                                "304 Not Modified for %s, which is not cached." % url,
+                                response=resp)
+                        digest, size = self._write_blob(
+                            resp.iter_content(chunk_size), validate=validate
+                        )
+                        outcome = 'misses'
+                        entry = {
+                            'sha256'       : digest,
+                            'size'         : size,
+                            'etag'         : resp.headers.get('ETag'),
+                            'last_modified': resp.headers.get('Last-Modified'),
+                            'encoding'     : resp.encoding or 'utf-8',
+                            'fetched'      : now,
+                        }
+
+            with self._index_locked():
+                index = self._load_index()
+                stats = index['stats']
+                stats[outcome] += 1
+                if outcome == 'misses':
+                    stats['bytes_downloaded'] += entry['size']
+                else:
+                    stats['bytes_saved'] += entry['size']
+                entry['accessed'] = now
+                index['entries'][url] = entry
+                self._evict(index)
+                self._save_index(index)
+            m['cache'] = _OUTCOME_NAMES[outcome]
+            m['bytes'] = entry['size'] if outcome == 'misses' else 0
+        return self.blob_path(entry['sha256']), entry
+
+    def fetch(self, url, session, headers=None, timeout=10, validate=None):
+        """
+        Return the content of `url`, using the cache whenever possible.
+
+        Same as :meth:`fetch_file`, but returns ``(content, entry)`` with the
+        raw bytes instead of the cached path.
+        """
+        path, entry = self.fetch_file(url, session, headers=headers,
+                                      timeout=timeout, validate=validate)
+        with open(path, 'rb') as f:
+            return f.read(), entry
+
+    def _evict(self, index):
+        """Drop least-recently-used entries until the cache fits `max_bytes`."""
+        entries = index['entries']
+        if self.max_bytes is None:
+            return
+        sizes = {}
+        for entry in entries.values():
+            sizes[entry['sha256']] = entry['size']
+        total = sum(sizes.values())
+        by_age = sorted(entries.items(), key=lambda item: item[1]['accessed'])
+        for url, entry in by_age[:-1]:   # never evict the entry just used
+            if total <= self.max_bytes:
+                break
+            del entries[url]
+            digest = entry['sha256']
+            if not any(e['sha256'] == digest for e in entries.values()):
+                total -= sizes.pop(digest)
+                try:
+                    os.remove(self.blob_path(digest))
+                except OSError:
+                    pass
+
+    def stats(self):
+        """
+        Return cumulative cache counters.
+
+        Returns
+        -------
+        dict
+            'hits' (served without network), 'revalidated' (304 responses),
+            'misses' (full downloads), 'bytes_downloaded', 'bytes_saved',
+            plus 'entries' and 'size' describing the current contents.
+        """
+        index = self._load_index()
+        stats = dict(index['stats'])
+        stats['entries'] = len(index['entries'])
+        stats['size'] = sum(
+            {e['sha256']: e['size'] for e in index['entries'].values()}.values()
+        )
+        return stats
+
+    def reset_stats(self):
+        """Zero the cumulative counters without touching cached content."""
+        with self._index_locked():
+            index = self._load_index()
+            index['stats'] = dict.fromkeys(_STAT_KEYS, 0)
+            self._save_index(index)
+
+    def clear(self):
+        """Remove every cached entry and blob."""
+        with self._index_locked():
+            index = self._load_index()
+            for entry in index['entries'].values():
+                try:
+                    os.remove(self.blob_path(entry['sha256']))
+                except OSError:
+                    pass
+            index['entries'] = {}
+            self._save_index(index)
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    """Return the process-wide :class:`DownloadCache` instance."""
+    global _default_cache
+    if _default_cache is None or _default_cache.directory != default_cache_dir():
+        _default_cache = DownloadCache()
+    return _default_cache
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+chunked.py
+-----------
+
+Helpers for the ``chunksize=`` iterator mode of the ``get_*`` loaders.
+
+Saved tables are written to a temporary sibling and renamed into place
+once complete, so readers sharing the data directory never see a
+partially written CSV file.
+"""
+
+import os
+
+from maguniverse.utils.cache import _tmp_name
+from maguniverse.utils.compression import compression_for_path
+from maguniverse.utils.locking import atomic_path
+from maguniverse.utils.metrics import phase
+
+
+def slice_chunks(df, chunksize):
+    """Yield consecutive row slices of `df` with at most `chunksize` rows."""
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+def save_chunks(chunks, save_path=None, **to_csv_kwargs):
+    """
+    Pass DataFrame batches through, appending each one to a CSV file.
+
+    Parameters
+    ----------
+    chunks : iterable of DataFrame
+        Batches produced by a loader.
+    save_path : str, optional
+        CSV destination. The header is written with the first batch only.
+        If None, the batches are passed through unchanged. A ``.gz``,
+        ``.xz`` or ``.zst`` name is compressed, one compressed member per
+        batch.
+    **to_csv_kwargs
+        Extra arguments for ``DataFrame.to_csv``.
+
+    Yields
+    ------
+    DataFrame
+
+    Notes
+    -----
+    Producing each batch is reported as a 'chunk' phase (with its 'rows')
+    and writing it as a 'save' phase to the metrics hooks.
+
+    The batches are appended to a temporary file that replaces `save_path`
+    after the last one; if the iteration is abandoned or fails, the
+    previous `save_path` is left untouched.
+    """
+    chunks = iter(chunks)
+    first = True
+    tmp_path = _tmp_name(save_path) if save_path else None
+    if save_path:
+        to_csv_kwargs.setdefault('compression', compression_for_path(save_path))
+    try:
+        while True:
+            with phase('chunk') as m:
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    m['rows'] = len(chunk)
+            if chunk is None:
+                break
+            if save_path:
+                with phase('save', path=save_path, rows=len(chunk)):
+                    chunk.to_csv(tmp_path, index=False, mode='w' if first else 'a',
+                                 header=first, **to_csv_kwargs)
+            first = False
+            yield chunk
+        if save_path and not first:
+            os.replace(tmp_path, save_path)
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def save_frame(df, save_path, **to_csv_kwargs):
+    """
+    Write `df` to the CSV file `save_path`, reported as a 'save' phase.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Table to write, without its index.
+    save_path : str
+        CSV destination; gzip, xz or zstd compressed when the name ends in
+        ``.gz``, ``.xz`` or ``.zst``. The file is replaced atomically.
+    **to_csv_kwargs
+        Extra arguments for ``DataFrame.to_csv``.
+    """
+    to_csv_kwargs.setdefault('compression', compression_for_path(save_path))
+    with phase('save', path=save_path, rows=len(df)), atomic_path(save_path) as tmp_path:
+        df.to_csv(tmp_path, index=False, **to_csv_kwargs)
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+columnar.py
+-----------
+
+Binary columnar serialization of DataFrames as one ``.npy`` file per
+column plus a JSON description.
+
+Numeric columns are written as plain fixed-width arrays so they can be
+memory-mapped back without a copy; strings are stored as fixed-width
+unicode arrays with a separate missing-value mask, and categoricals as
+integer codes plus their categories.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Version of the on-disk layout. It is part of the parsed-table cache key,
+# so bump it when cached tables must be re-parsed (2: MRT tables carry
+# their column formats in attrs)
+FORMAT_VERSION = 2
+META_FILE = 'meta.json'
+
+
+def _column_file(i, suffix=''):
+    return 'c%03d%s.npy' % (i, suffix)
+
+
+def _string_array(values, mask):
+    """Return (fixed-width unicode array, mask) for an object/str series."""
+    out = np.asarray(values, dtype=object).copy()
+    out[mask] = ''
+    return np.asarray(out.astype(str), dtype=str)
+
+
+def _write_series(series, directory, i):
+    """Write a single column and return its description."""
+    dtype = series.dtype
+    desc = {'file': _column_file(i), 'dtype': str(dtype)}
+
+    if isinstance(dtype, pd.CategoricalDtype):
+        categories = dtype.categories
+        desc['kind'] = 'category'
+        desc['ordered'] = bool(dtype.ordered)
+        desc['categories'] = _column_file(i, '_cat')
+        if categories.dtype.kind in 'biufM':
+            cat_values = categories.to_numpy()
+        else:
+            cat_values = _string_array(categories.to_numpy(), np.zeros(len(categories), bool))
+        np.save(os.path.join(directory, desc['categories']), cat_values)
+        np.save(os.path.join(directory, desc['file']), series.cat.codes.to_numpy())
+    elif dtype.kind in 'biufcM' and not pd.api.types.is_extension_array_dtype(dtype):
+        desc['kind'] = 'numeric'
+        np.save(os.path.join(directory, desc['file']), series.to_numpy())
+    else:
+        mask = series.isna().to_numpy()
+        desc['kind'] = 'string'
+        desc['mask'] = _column_file(i, '_mask')
+        np.save(os.path.join(directory, desc['file']), _string_array(series.to_numpy(), mask))
+        np.save(os.path.join(directory, desc['mask']), mask)
+    return desc
+
+
+def _read_series(desc, directory, mmap_mode):
+    path = os.path.join(directory, desc['file'])
+    kind = desc['kind']
+    if kind == 'numeric':
+        return np.load(path, mmap_mode=mmap_mode)
+    if kind == 'category':
+        categories = np.load(os.path.join(directory, desc['categories']))
+        codes = np.load(path, mmap_mode=mmap_mode)
+        return pd.Categorical.from_codes(codes, categories, ordered=desc['ordered'])
+
+    values = np.load(path).astype(object)
+    values[np.load(os.path.join(directory, desc['mask']))] = np.nan
+    series = pd.Series(values, dtype=object)
+    if desc['dtype'] != 'object':
+        try:
+            series = series.astype(desc['dtype'])
+        except TypeError:
+            pass
+    return series.to_numpy() if desc['dtype'] == 'object' else series.array
+
+
+def _json_attrs(attrs):
+    """The JSON-serializable entries of ``DataFrame.attrs``."""
+    out = {}
+    for key, value in attrs.items():
+        try:
+            json.dumps(value)
+        except (TypeError, ValueError):
+            continue
+        out[key] = value
+    return out
+
+
+def write_columns(df, directory, extra=None):
+    """
+    Write `df` to `directory` in the columnar ``.npy`` layout.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Table to serialize. A non-default index is stored as an extra column.
+    directory : str
+        Target directory; it is created if missing.
+    extra : dict, optional
+        JSON-serializable metadata stored alongside the column description.
+        The JSON-serializable part of ``df.attrs`` (e.g. column units) is
+        stored as well and restored by :func:`read_columns`.
+
+    Returns
+    -------
+    dict
+        The metadata written to ``meta.json``.
+    """
+    os.makedirs(directory, exist_ok=True)
+    index = df.index
+    has_index = not (isinstance(index, pd.RangeIndex)
+                     and index.start == 0 and index.step == 1)
+
+    columns = []
+    series_list = [(name, df.iloc[:, i]) for i, name in enumerate(df.columns)]
+    if has_index:
+        series_list.append((index.name, index.to_series()))
+    for i, (name, series) in enumerate(series_list):
+        desc = _write_series(series, directory, i)
+        desc['name'] = name
+        columns.append(desc)
+
+    meta = {
+        'format_version': FORMAT_VERSION,
+        'nrows'  : int(len(df)),
+        'columns': columns,
+        'index'  : has_index,
+    }
+    if extra:
+        meta['extra'] = extra
+    attrs = _json_attrs(df.attrs)
+    if attrs:
+        meta['attrs'] = attrs
+    with open(os.path.join(directory, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=1)
+    return meta
+
+
+def read_meta(directory):
+    """Return the ``meta.json`` contents of a columnar table directory."""
+    with open(os.path.join(directory, META_FILE), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def read_columns(directory, columns=None, mmap_mode='c'):
+    """
+    Read a table written by :func:`write_columns`.
+
+    Parameters
+    ----------
+    directory : str
+        Table directory.
+    columns : list of str, optional
+        Subset of columns to load. All columns by default.
+    mmap_mode : {'c', 'r', None}, optional
+        Memory-map mode for numeric columns. The default copy-on-write mode
+        avoids reading the data up front while keeping the result writable.
+
+    Returns
+    -------
+    DataFrame
+    """
+    meta = read_meta(directory)
+    descs = meta['columns']
+    index = None
+    if meta['index']:
+        index = pd.Index(_read_series(descs[-1], directory, mmap_mode), name=descs[-1]['name'])
+        descs = descs[:-1]
+    if columns is not None:
+        wanted = set(columns)
+        descs = [d for d in descs if d['name'] in wanted]
+
+    data = {d['name']: _read_series(d, directory, mmap_mode) for d in descs}
+    df = pd.DataFrame(data, index=index, copy=False)
+    if not descs:
+        df = pd.DataFrame(index=index if index is not None else pd.RangeIndex(meta['nrows']))
+    df.attrs.update(meta.get('attrs', {}))
+    return df
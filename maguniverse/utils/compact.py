@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+compact.py
+-----------
+
+Memory-compact dtypes for loaded catalogs.
+
+The tables are printed with narrow Fortran formats (``I3``, ``F5.1``,
+``A1``), so int64/float64 columns and per-row Python strings waste most
+of their memory. :func:`compact_frame` picks the smallest dtype that
+holds every value the declared format can express, and turns repetitive
+text columns (object names, flags, references) into categoricals.
+:func:`memory_report` shows the footprint of each table.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+# Text columns with at most this fraction of distinct values become categoricals
+CATEGORY_RATIO = 0.5
+
+# float32 represents every decimal of up to this many significant digits
+FLOAT32_DIGITS = 7
+
+_FORMAT = re.compile(r'^\s*([AIFEDaifed])(\d*)(?:\.(\d+))?\s*$')
+
+
+def dtype_for_format(fmt):
+    """
+    Smallest dtype able to hold any value written with Fortran format `fmt`.
+
+    Parameters
+    ----------
+    fmt : str
+        Format such as ``'I3'``, ``'F5.1'``, ``'E9.2'`` or ``'A12'``.
+
+    Returns
+    -------
+    numpy.dtype, str or None
+        An integer or float dtype, ``'category'`` for text formats, or
+        None if `fmt` is not recognized.
+    """
+    m = _FORMAT.match(fmt or '')
+    if m is None:
+        return None
+    letter, width, decimals = m.group(1).upper(), m.group(2), m.group(3)
+    width = int(width) if width else None
+    if letter == 'A':
+        return 'category'
+    if letter == 'I':
+        if width is None:
+            return np.dtype(np.int64)
+        for dtype, digits in ((np.int8, 2), (np.int16, 4), (np.int32, 9)):
+            if width <= digits:
+                return np.dtype(dtype)
+        return np.dtype(np.int64)
+
+    # significant digits: all but the sign and the point for F, the
+    # mantissa for E/D
+    if letter == 'F':
+        digits = width - 2 if width else None
+    else:
+        digits = int(decimals) + 1 if decimals else None
+    if digits is not None and digits <= FLOAT32_DIGITS:
+        return np.dtype(np.float32)
+    return np.dtype(np.float64)
+
+
+def _compact_text(series, category_ratio):
+    if not len(series) or series.nunique(dropna=True) > category_ratio * len(series):
+        return series
+    return series.astype('category')
+
+
+def _compact_series(series, dtype, category_ratio):
+    kind = series.dtype.kind
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    if isinstance(dtype, str) or (dtype is None and kind not in 'biufcmM'):
+        if kind in 'biufc':
+            return series
+        return _compact_text(series, category_ratio)
+
+    if dtype is None:
+        # undeclared numbers: lossless integer downcast only
+        if kind in 'iu':
+            return pd.to_numeric(series, downcast='integer')
+        return series
+
+    if dtype.kind == 'i':
+        if kind in 'iu':
+            return series.astype(dtype)
+        if kind == 'f' and series.isna().any():
+            # blanks force floats; small integers are exact in float32
+            width_ok = np.iinfo(dtype).max < 2 ** 24
+            return series.astype(np.float32 if width_ok else np.float64)
+        if kind == 'f':
+            return series.astype(dtype)
+        return series
+    if kind == 'f':
+        return series.astype(dtype)
+    return series
+
+
+def compact_frame(df, formats=None, category_ratio=CATEGORY_RATIO):
+    """
+    Return a copy of `df` with memory-compact column dtypes.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Loaded catalog.
+    formats : dict, optional
+        Fortran format per column. Defaults to ``df.attrs['formats']``.
+        Columns without a declared format only get lossless integer
+        downcasts and categoricals.
+    category_ratio : float, optional
+        Text columns with at most this fraction of distinct values are
+        converted to categoricals.
+
+    Returns
+    -------
+    DataFrame
+        Integer columns use the smallest int type holding the format width,
+        float columns float32 when the format has at most
+        ``FLOAT32_DIGITS`` significant digits, and repetitive text columns
+        are categorical.
+    """
+    if formats is None:
+        formats = df.attrs.get('formats', {})
+    out = df.copy(deep=False)
+    for name in df.columns:
+        dtype = dtype_for_format(formats.get(name))
+        out[name] = _compact_series(df[name], dtype, category_ratio)
+    out.attrs = dict(df.attrs)
+    return out
+
+
+def memory_usage(df):
+    """Total memory of `df` in bytes, including strings and the index."""
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def memory_report(tables, baseline=None):
+    """
+    Summarize the in-memory footprint of loaded tables.
+
+    Parameters
+    ----------
+    tables : DataFrame or dict
+        A table, or tables keyed by name.
+    baseline : DataFrame or dict, optional
+        The same tables in another representation (e.g. loaded without
+        ``compact=True``) to compare against.
+
+    Returns
+    -------
+    DataFrame
+        One row per table with 'rows', 'columns', 'bytes' and 'MiB', plus
+        'baseline bytes' and 'reduction' (baseline / bytes) if `baseline`
+        is given, and a 'total' row.
+
+    Examples
+    --------
+    >>> full = {'Dotson2010': get_dotson2010()}
+    >>> small = {'Dotson2010': get_dotson2010(compact=True)}
+    >>> print(memory_report(small, baseline=full))
+    """
+    if isinstance(tables, pd.DataFrame):
+        tables = {'table': tables}
+    if isinstance(baseline, pd.DataFrame):
+        baseline = {'table': baseline}
+
+    rows = []
+    for name, df in tables.items():
+        row = {'table': name, 'rows': len(df), 'columns': df.shape[1], 'bytes': memory_usage(df)}
+        if baseline is not None and name in baseline:
+            row['baseline bytes'] = memory_usage(baseline[name])
+        rows.append(row)
+    report = pd.DataFrame(rows).set_index('table')
+    report.loc['total'] = report.sum(numeric_only=True)
+    report['MiB'] = report['bytes'] / 1024 ** 2
+    if 'baseline bytes' in report:
+        report['reduction'] = report['baseline bytes'] / report['bytes']
+    return report
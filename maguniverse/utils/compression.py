@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+compression.py
+-----------
+
+Transparent gzip, xz and zstd compression of raw and processed tables.
+
+Files are read through :func:`open_compressed`, which recognizes the
+codec from the file's magic bytes, so a compressed file is decoded no
+matter what its name is. Files are written compressed when their name
+ends in ``.gz``, ``.xz`` or ``.zst``. Decompression streams into the
+parsers; nothing is unpacked to a temporary file.
+
+gzip and xz come with the standard library. zstd needs the optional
+``zstandard`` package (``pip install maguniverse[zstd]``).
+"""
+
+import gzip
+import io
+import lzma
+import os
+import shutil
+
+from maguniverse.utils.locking import atomic_path
+
+# codec -> (file extension, magic bytes)
+CODECS = {
+    'gzip': ('.gz', b'\x1f\x8b'),
+    'xz'  : ('.xz', b'\xfd7zXZ\x00'),
+    'zstd': ('.zst', b'\x28\xb5\x2f\xfd'),
+}
+
+EXTENSIONS = tuple(ext for ext, _ in CODECS.values())
+
+# Bytes copied at a time when recompressing
+COPY_BLOCK = 1024 * 1024
+
+
+def compression_for_path(path):
+    """Codec implied by the extension of `path`, or None for plain files."""
+    name = str(path).lower()
+    for codec, (ext, _) in CODECS.items():
+        if name.endswith(ext):
+            return codec
+    return None
+
+
+def sniff_compression(head):
+    """Codec whose magic bytes start `head`, or None."""
+    for codec, (_, magic) in CODECS.items():
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+def detect_compression(path):
+    """
+    Codec of the file at `path`, from its magic bytes.
+
+    Returns None for an uncompressed file.
+    """
+    with open(path, 'rb') as f:
+        return sniff_compression(f.read(6))
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            "zstd-compressed files require the 'zstandard' package "
+            "(pip install zstandard)."
+        ) from None
+    return zstandard
+
+
+def open_compressed(path, mode='rb', compression='infer', encoding=None, errors=None,
+                    newline=None):
+    """
+    Open `path`, decoding or encoding it with its compression codec.
+
+    Parameters
+    ----------
+    path : str
+        File path.
+    mode : str, optional
+        'rb', 'rt', 'wb', 'wt', 'ab' or 'at'.
+    compression : {'infer', 'gzip', 'xz', 'zstd', None}, optional
+        Codec. 'infer' sniffs the magic bytes when reading, and uses the
+        extension of `path` when writing.
+    encoding, errors, newline : optional
+        Text-mode options, as for :func:`open`.
+
+    Returns
+    -------
+    file object
+    """
+    if compression == 'infer':
+        if mode[0] == 'r':
+            compression = detect_compression(path)
+        else:
+            compression = compression_for_path(path)
+    if compression is None:
+        if 'b' in mode:
+            return open(path, mode)
+        return open(path, mode, encoding=encoding, errors=errors, newline=newline)
+    if compression not in CODECS:
+        raise ValueError("Unknown compression %r; use one of %s."
+                         % (compression, ', '.join(CODECS)))
+
+    binary_mode = mode[0] + 'b'
+    if compression == 'gzip':
+        f = gzip.open(path, binary_mode)
+    elif compression == 'xz':
+        f = lzma.open(path, binary_mode)
+    else:
+        f = _zstandard().open(path, binary_mode)
+    if 'b' in mode:
+        return f
+    return io.TextIOWrapper(f, encoding=encoding, errors=errors, newline=newline)
+
+
+def copy_file(src, dst):
+    """
+    Copy `src` to `dst`, converting between codecs as the names require.
+
+    The source codec is sniffed from its content, the target codec taken
+    from the extension of `dst`. Matching codecs are copied byte for byte.
+    `dst` is replaced atomically, so concurrent copies never leave a
+    partial file behind.
+    """
+    src_codec, dst_codec = detect_compression(src), compression_for_path(dst)
+    with atomic_path(dst) as tmp_path:
+        if src_codec == dst_codec:
+            shutil.copyfile(src, tmp_path)
+            return
+        with open_compressed(src, 'rb', compression=src_codec) as fin, \
+                open_compressed(tmp_path, 'wb', compression=dst_codec) as fout:
+            shutil.copyfileobj(fin, fout, COPY_BLOCK)
+
+
+def find_compressed(path):
+    """
+    Return `path` if it exists, else its first existing compressed sibling
+    (``path + '.gz'``, ``'.xz'`` or ``'.zst'``), else None.
+    """
+    if os.path.exists(path):
+        return path
+    for ext in EXTENSIONS:
+        if os.path.exists(path + ext):
+            return path + ext
+    return None
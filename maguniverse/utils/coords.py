@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+coords.py
+-----------
+
+Vectorized sky-coordinate normalization.
+
+Catalog positions come as split sexagesimal columns (Matthews2009),
+sexagesimal strings (VizieR ``-oc.form=sexa`` output, Jijina1999) or
+tangent-plane offsets from an object center (Dotson2010). The helpers
+here turn all of them into decimal-degree columns named ``RA_COL`` and
+``DEC_COL``. J2000/FK5 positions are used as ICRS; the two frames agree
+to well below the resolution of these catalogs.
+"""
+
+import numpy as np
+import pandas as pd
+
+RA_COL = 'RA_ICRS (deg)'
+DEC_COL = 'DE_ICRS (deg)'
+
+
+def sexagesimal_to_deg(major, minutes, seconds, sign=None, hours=False):
+    """
+    Convert split sexagesimal components to decimal degrees.
+
+    Parameters
+    ----------
+    major, minutes, seconds : array_like
+        Hours (or degrees), minutes and seconds. `major` may carry the sign.
+    sign : array_like of str, optional
+        Separate sign column ('-' or '+'/blank), as in MRT ``DE-`` columns.
+    hours : bool, optional
+        If True, `major` is in hours (right ascension).
+
+    Returns
+    -------
+    ndarray
+    """
+    major = np.asarray(major, dtype=np.float64)
+    value = (np.abs(major)
+             + np.asarray(minutes, dtype=np.float64) / 60.0
+             + np.asarray(seconds, dtype=np.float64) / 3600.0)
+    if sign is not None:
+        negative = pd.Series(np.asarray(sign, dtype=object)).astype(str).str.strip().eq('-').to_numpy()
+    else:
+        negative = np.signbit(major)
+    value = np.where(negative, -value, value)
+    return value * 15.0 if hours else value
+
+
+def parse_sexagesimal(values, hours=False):
+    """
+    Convert sexagesimal strings such as ``"04 04 43.0"`` or ``"-26:18:56"``.
+
+    Fields may be separated by blanks or colons; missing minute or second
+    fields count as zero and unparsable entries become NaN.
+
+    Parameters
+    ----------
+    values : array_like of str
+    hours : bool, optional
+        If True, the leading field is in hours (right ascension).
+
+    Returns
+    -------
+    ndarray
+    """
+    s = pd.Series(values, dtype=object).astype(str).str.strip()
+    negative = s.str.startswith('-').to_numpy()
+    parts = s.str.lstrip('+-').str.replace(':', ' ', regex=False).str.split(expand=True)
+    parts = parts.reindex(columns=range(3))
+    fields = parts.apply(pd.to_numeric, errors='coerce')
+    fields[[1, 2]] = fields[[1, 2]].fillna(0.0)
+    value = sexagesimal_to_deg(fields[0].to_numpy(), fields[1].to_numpy(), fields[2].to_numpy(),
+                               hours=hours)
+    return np.where(negative, -value, value)
+
+
+def offsets_to_radec(ra0, dec0, dra, ddec):
+    """
+    Convert tangent-plane offsets to absolute positions (gnomonic projection).
+
+    Parameters
+    ----------
+    ra0, dec0 : array_like
+        Reference (center) position in degrees.
+    dra, ddec : array_like
+        Offsets east and north of the center, in arcseconds.
+
+    Returns
+    -------
+    tuple of ndarray
+        (ra, dec) in degrees, with ra wrapped to [0, 360).
+    """
+    ra0 = np.radians(np.asarray(ra0, dtype=np.float64))
+    dec0 = np.radians(np.asarray(dec0, dtype=np.float64))
+    xi = np.radians(np.asarray(dra, dtype=np.float64) / 3600.0)
+    eta = np.radians(np.asarray(ddec, dtype=np.float64) / 3600.0)
+
+    denom = np.cos(dec0) - eta * np.sin(dec0)
+    ra = ra0 + np.arctan2(xi, denom)
+    dec = np.arctan2(np.sin(dec0) + eta * np.cos(dec0), np.hypot(xi, denom))
+    return np.degrees(ra) % 360.0, np.degrees(dec)
+
+
+def radec_to_unit(ra, dec):
+    """
+    Return unit vectors of shape (N, 3) for positions given in degrees.
+    """
+    ra = np.radians(np.asarray(ra, dtype=np.float64))
+    dec = np.radians(np.asarray(dec, dtype=np.float64))
+    cos_dec = np.cos(dec)
+    return np.column_stack([cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec)])
+
+
+def angular_separation(ra1, dec1, ra2, dec2):
+    """
+    Great-circle separation in degrees (Vincenty formula, stable at all scales).
+    """
+    ra1, dec1, ra2, dec2 = (np.radians(np.asarray(a, dtype=np.float64))
+                            for a in (ra1, dec1, ra2, dec2))
+    dra = ra2 - ra1
+    num = np.hypot(np.cos(dec2) * np.sin(dra),
+                   np.cos(dec1) * np.sin(dec2) - np.sin(dec1) * np.cos(dec2) * np.cos(dra))
+    den = np.sin(dec1) * np.sin(dec2) + np.cos(dec1) * np.cos(dec2) * np.cos(dra)
+    return np.degrees(np.arctan2(num, den))
+
+
+def add_icrs_columns(df, ra, dec):
+    """
+    Attach decimal-degree ICRS columns ``RA_COL``/``DEC_COL`` to `df` in place.
+
+    Returns
+    -------
+    DataFrame
+        `df`, for chaining.
+    """
+    df[RA_COL] = np.asarray(ra, dtype=np.float64)
+    df[DEC_COL] = np.asarray(dec, dtype=np.float64)
+    return df
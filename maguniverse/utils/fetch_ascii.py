@@ -5,15 +5,24 @@ fetch_ascii.py
 
 Utilities for resolving data paths and fetching ASCII tables, with
 CAPTCHA handling for remote downloads.
+
+Local files and saved copies may be gzip, xz or zstd compressed (see
+:mod:`maguniverse.utils.compression`); they are decoded while being read.
 """
 
 import os
 import sys
-import webbrowser
-
-import requests
+import tempfile
+import threading
+from contextlib import contextmanager
+from itertools import chain
 
 from maguniverse import __parent_dir__ as sys_parent
+from maguniverse.utils.cache import CHUNK_SIZE, VALIDATE_BYTES, _tmp_name, get_default_cache
+from maguniverse.utils.compression import (
+    compression_for_path, copy_file, find_compressed, open_compressed, sniff_compression,
+)
+from maguniverse.utils.metrics import phase
 
 
 def get_default_data_paths(file_path, file_url):
@@ -31,35 +40,166 @@ def get_default_data_paths(file_path, file_url):
     -------
     tuple
         (local_path, file_url), where `local_path` is the joined path
-        under `sys_parent` if it exists, otherwise None.
+        under `sys_parent` if it exists, or a compressed sibling of it
+        (``.gz``, ``.xz`` or ``.zst`` appended), otherwise None. When no
+        local copy exists, :func:`get_ascii` serves `file_url` through the
+        download cache.
     """
     if file_path is not None:
-        complete_path = os.path.join(sys_parent, file_path)
-        if not os.path.exists(complete_path):
-            complete_path = None
+        complete_path = find_compressed(os.path.join(sys_parent, file_path))
     else: complete_path = file_path
     return complete_path, file_url
 
 
-def get_ascii(file_path=None, file_url=None, save_path=None, fmt='txt'):
+def is_captcha(text):
+    """Return True if `text` is a publisher CAPTCHA page instead of data."""
+    return '<div class="h-captcha"' in text \
+        or 'We apologize for the inconvenience' in text
+
+
+class CaptchaError(Exception):
+    """Raised when a publisher returns a CAPTCHA page instead of data."""
+
+
+# Depth of nested captcha_errors() blocks; process-wide, so that the
+# worker threads of concurrent loaders raise as well
+_captcha_errors = 0
+_captcha_lock = threading.Lock()
+
+
+@contextmanager
+def captcha_errors():
     """
-    Fetch an ASCII table from a local file or remote URL, with CAPTCHA support.
+    Raise :class:`CaptchaError` on CAPTCHA pages inside the block.
+
+    By default a CAPTCHA opens the page in a browser and exits the
+    interpreter, which suits an interactive session. Batch jobs (pool
+    workers, :func:`maguniverse.utils.ingest.ingest_all`) run their loaders
+    in this block instead, so a CAPTCHA fails only the affected table.
+    """
+    global _captcha_errors
+    with _captcha_lock:
+        _captcha_errors += 1
+    try:
+        yield
+    finally:
+        with _captcha_lock:
+            _captcha_errors -= 1
+
+
+def _check_captcha(text, file_url):
+    """Prompt for and abort on a publisher CAPTCHA page instead of data."""
+    if is_captcha(text):
+        if _captcha_errors:
+            raise CaptchaError('CAPTCHA page returned instead of data: %s' % file_url)
+        import webbrowser
+
+        print("\nA CAPTCHA is required to access the content.")
+        print("Opening the URL in your default browser; please complete"
+              " the CAPTCHA there.")
+        webbrowser.open(file_url)
+        sys.exit(
+            "\nRequest aborted due to human-verification requirement.\n"
+            "Please download the ASCII file manually, save it locally, and "
+            "then re-run get_ascii() on your local copy."
+        )
+
+
+def _stream_to_file(response, path, file_url, chunk_size):
+    """
+    Write a streamed response body to `path` atomically.
+
+    The body is compressed on the fly when `path` has a compressed
+    extension, unless it arrives compressed already.
+    """
+    tmp_path = _tmp_name(path)
+    head = b''
+    chunks = response.iter_content(chunk_size)
+    first = next(chunks, b'')
+    codec = None if sniff_compression(first) else compression_for_path(path)
+    try:
+        with open_compressed(tmp_path, 'wb', compression=codec) as f:
+            for chunk in chain([first], chunks):
+                if len(head) < VALIDATE_BYTES:
+                    head += chunk[:VALIDATE_BYTES - len(head)]
+                f.write(chunk)
+        _check_captcha(head.decode('utf-8', errors='replace'), file_url)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _fetch_to_file(file_path, file_url, save_path, cache, chunk_size):
+    """Return (local path, encoding) of the requested ASCII resource."""
+    if file_path is None and file_url is None:
+        raise ValueError("Either file_path or file_url must be provided.")
+    if file_path is not None:
+        return file_path, 'utf-8'
+
+    # Remote fetch
+    import requests
+
+    session = requests.Session()
+    headers = {'User-Agent': 'python-requests/2.x'}
+
+    if cache is None:
+        cache = get_default_cache()
+
+    if cache is False:
+        if save_path:
+            path = save_path
+        else:
+            fd, path = tempfile.mkstemp(suffix='.txt', prefix='maguniverse-')
+            os.close(fd)
+        with phase('fetch', url=file_url, cache='off') as m, \
+                session.get(file_url, headers=headers, allow_redirects=True,
+                            timeout=10, stream=True) as response:
+            response.raise_for_status()
+            _stream_to_file(response, path, file_url, chunk_size)
+            encoding = response.encoding or 'utf-8'
+            m['bytes'] = os.path.getsize(path)
+        return path, encoding
+
+    def validate(data):
+        _check_captcha(data.decode('utf-8', errors='replace'), file_url)
+
+    path, entry = cache.fetch_file(file_url, session, headers=headers, timeout=10,
+                                   validate=validate, chunk_size=chunk_size)
+    if save_path:
+        copy_file(path, save_path)
+    return path, entry.get('encoding') or 'utf-8'
+
+
+def get_ascii_file(file_path=None, file_url=None, save_path=None, cache=None,
+                   chunk_size=CHUNK_SIZE):
+    """
+    Return a local path holding the ASCII table, downloading it if needed.
+
+    Remote content is streamed to disk in chunks and never held in memory
+    as a whole, which makes this the entry point for large tables that are
+    parsed incrementally.
 
     Parameters
     ----------
     file_path : str or None
-        Path to a local ASCII file. If provided, the file is read directly.
+        Path to a local ASCII file. If provided, it is returned unchanged.
     file_url : str or None
         URL of the ASCII resource. Used only if `file_path` is None.
     save_path : str or None
-        If provided (and fmt == 'txt'), the fetched text is written here.
-    fmt : {'txt'}, optional
-        Output format. Only 'txt' (raw text) is supported.
+        If provided, the downloaded file is also copied here, compressed
+        if the name ends in ``.gz``, ``.xz`` or ``.zst``.
+    cache : DownloadCache, bool or None, optional
+        Download cache to use. None uses the default cache; False streams
+        to `save_path` (or a temporary file) without caching.
+    chunk_size : int, optional
+        Streaming block size in bytes.
 
     Returns
     -------
     str
-        The raw ASCII text.
+        Path of the local copy. It may be compressed; open it with
+        :func:`maguniverse.utils.compression.open_compressed`.
 
     Raises
     ------
@@ -67,42 +207,63 @@ def get_ascii(file_path=None, file_url=None, save_path=None, fmt='txt'):
         If neither `file_path` nor `file_url` is provided.
     SystemExit
         After prompting and opening a browser when CAPTCHA is detected.
+    CaptchaError
+        Instead of SystemExit, inside :func:`captcha_errors`.
     """
-    if file_path is None and file_url is None:
-        raise ValueError("Either file_path or file_url must be provided.")
-    if file_path is not None:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
+    return _fetch_to_file(file_path, file_url, save_path, cache, chunk_size)[0]
 
-    # Remote fetch
-    session = requests.Session()
-    headers = {'User-Agent': 'python-requests/2.x'}
 
-    def fetch():
-        resp = session.get(file_url, headers=headers,
-                           allow_redirects=True, timeout=10)
-        resp.raise_for_status()
-        return resp
+def get_ascii(file_path=None, file_url=None, save_path=None, fmt='txt', cache=None):
+    """
+    Fetch an ASCII table from a local file or remote URL, with CAPTCHA support.
 
-    response = fetch()
-    text = response.text
+    Remote downloads go through the persistent download cache (see
+    :mod:`maguniverse.utils.cache`), so repeated calls for the same URL are
+    served from disk or revalidated with a conditional GET. The body is
+    streamed to disk before it is read back.
 
-    # CAPTCHA detection
-    if '<div class="h-captcha"' in text \
-       or 'We apologize for the inconvenience' in text:
-        print("\nA CAPTCHA is required to access the content.")
-        print("Opening the URL in your default browser; please complete"
-              " the CAPTCHA there.")
-        webbrowser.open(file_url)
-        sys.exit(
-            "\nRequest aborted due to human-verification requirement.\n"
-            "Please download the ASCII file manually, save it locally, and "
-            "then re-run get_ascii() on your local copy."
-        )
+    Parameters
+    ----------
+    file_path : str or None
+        Path to a local ASCII file, possibly gzip, xz or zstd compressed.
+        If provided, the file is read directly.
+    file_url : str or None
+        URL of the ASCII resource. Used only if `file_path` is None.
+    save_path : str or None
+        If provided (and fmt == 'txt'), the fetched text is written here,
+        compressed if the name ends in ``.gz``, ``.xz`` or ``.zst``.
+    fmt : {'txt'}, optional
+        Output format. Only 'txt' (raw text) is supported.
+    cache : DownloadCache, bool or None, optional
+        Download cache to use. None uses the default cache, False bypasses
+        caching entirely.
 
-    # Save if requested
-    if save_path and fmt == 'txt':
-        with open(save_path, 'w', encoding='utf-8') as f:
-            f.write(text)
+    Returns
+    -------
+    str
+        The raw ASCII text.
 
-    return text
+    Raises
+    ------
+    ValueError
+        If neither `file_path` nor `file_url` is provided.
+    SystemExit
+        After prompting and opening a browser when CAPTCHA is detected.
+    CaptchaError
+        Instead of SystemExit, inside :func:`captcha_errors`.
+    """
+    if file_path is not None:
+        save_path = None
+    path, encoding = _fetch_to_file(file_path, file_url,
+                                    save_path if fmt == 'txt' else None,
+                                    cache, CHUNK_SIZE)
+    errors = 'strict' if file_path is not None else 'replace'
+    try:
+        with phase('read', path=path) as m, \
+                open_compressed(path, 'rt', encoding=encoding, errors=errors) as f:
+            text = f.read()
+            m['bytes'] = os.path.getsize(path)
+        return text
+    finally:
+        if cache is False and file_path is None and not (save_path and fmt == 'txt'):
+            os.remove(path)
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+fetch_bulk.py
+-----------
+
+Concurrent download of every registered catalog table.
+
+All requests share one pooled ``requests.Session`` (keep-alive, gzip
+transfer encoding), run on a thread pool with a per-host concurrency cap,
+and are retried with exponential backoff on transient failures. Results
+go through the download cache, so a nightly refresh of unchanged tables
+costs only conditional GETs. CAPTCHA pages are reported per table instead
+of aborting the whole batch.
+"""
+
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from maguniverse.registry import registered_sources
+from maguniverse.utils.cache import get_default_cache
+from maguniverse.utils.fetch_ascii import CaptchaError, is_captcha
+
+FetchResult = namedtuple(
+    'FetchResult',
+    ['catalog', 'table', 'url', 'status', 'nbytes', 'elapsed', 'attempts', 'path', 'error'],
+)
+FetchResult.__doc__ = """
+Outcome of one download. `status` is 'ok', 'captcha' or 'error'; `path`
+is the cached copy of the content when the download succeeded.
+"""
+
+DEFAULT_HEADERS = {
+    'User-Agent'     : 'python-requests/2.x',
+    'Accept-Encoding': 'gzip, deflate',
+}
+
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def iter_data_links(sources=None):
+    """
+    Yield ``(catalog, table, url)`` for every downloadable table.
+
+    Parameters
+    ----------
+    sources : dict or iterable of str, optional
+        Catalog descriptions keyed by name (in the layout of
+        ``polarization_source``), or catalog names to select from the
+        registered sources. All registered catalogs by default.
+
+    Notes
+    -----
+    Local paths and the 'CDS' landing pages are skipped; only remote
+    table links are yielded.
+    """
+    if sources is None:
+        sources = registered_sources()
+    elif not isinstance(sources, dict):
+        registered = registered_sources()
+        sources = {name: registered[name] for name in sources}
+
+    for catalog, info in sources.items():
+        for table, link in info.get('data_link', {}).items():
+            if table == 'CDS' or not link.startswith(('http://', 'https://')):
+                continue
+            yield catalog, table, link
+
+
+def make_session(pool_size=16):
+    """
+    Return a ``requests.Session`` with a connection pool of `pool_size`.
+
+    The session keeps connections alive across requests and advertises
+    gzip/deflate transfer encoding.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+def _is_transient(exc):
+    import requests
+
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code in _RETRY_STATUS
+    return False
+
+
+def fetch_all(sources=None, max_workers=8, per_host=2, retries=3, backoff=0.5,
+              timeout=30, cache=None, session=None, callback=None):
+    """
+    Download every registered catalog table concurrently.
+
+    Parameters
+    ----------
+    sources : dict or iterable of str, optional
+        Catalogs to fetch; see :func:`iter_data_links`. All by default.
+    max_workers : int, optional
+        Number of concurrent downloads overall.
+    per_host : int, optional
+        Maximum number of concurrent requests to any single host.
+    retries : int, optional
+        Retries after a transient failure (connection error, timeout,
+        HTTP 429/5xx).
+    backoff : float, optional
+        Base delay in seconds; attempt ``k`` waits ``backoff * 2**k``.
+    timeout : float, optional
+        Per-request timeout in seconds.
+    cache : DownloadCache, optional
+        Download cache receiving the content. Defaults to the default cache.
+    session : requests.Session, optional
+        Shared session. A pooled session from :func:`make_session` is
+        created by default.
+    callback : callable, optional
+        Called as ``callback(result, done, total)`` after each table
+        finishes, from the worker thread.
+
+    Returns
+    -------
+    dict
+        :class:`FetchResult` keyed by ``(catalog, table)``.
+    """
+    cache = get_default_cache() if cache is None else cache
+    session = make_session(max_workers) if session is None else session
+    links = list(iter_data_links(sources))
+
+    host_locks = {}
+    for _, _, url in links:
+        host = urlsplit(url).netloc
+        host_locks.setdefault(host, threading.BoundedSemaphore(per_host))
+
+    progress_lock = threading.Lock()
+    done = [0]
+
+    def validate(data):
+        if is_captcha(data.decode('utf-8', errors='replace')):
+            raise CaptchaError('CAPTCHA page returned instead of data')
+
+    def run(catalog, table, url):
+        start = time.perf_counter()
+        attempts = 0
+        status, nbytes, path, error = 'error', 0, None, None
+        while True:
+            attempts += 1
+            try:
+                with host_locks[urlsplit(url).netloc]:
+                    path, entry = cache.fetch_file(url, session, timeout=timeout,
+                                                   validate=validate)
+                status, nbytes, error = 'ok', entry['size'], None
+                break
+            except CaptchaError as exc:
+                status, error = 'captcha', str(exc)
+                break
+            except Exception as exc:
+                error = '%s: %s' % (type(exc).__name__, exc)
+                if attempts > retries or not _is_transient(exc):
+                    break
+                time.sleep(backoff * 2 ** (attempts - 1))
+
+        result = FetchResult(catalog, table, url, status, nbytes,
+                             time.perf_counter() - start, attempts, path, error)
+        if callback is not None:
+            with progress_lock:
+                done[0] += 1
+                callback(result, done[0], len(links))
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(run, *link) for link in links]
+        results = [f.result() for f in futures]
+    return {(r.catalog, r.table): r for r in results}
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+ingest.py
+-----------
+
+Parallel ingestion of every registered catalog table on a process pool.
+
+Each table is an independent fetch-and-parse job, and most of the work
+(``read_fwf``, regex coercion, MRT decoding) holds the GIL, so the jobs
+run in separate processes. A worker does not send its DataFrame back
+through a pipe. It writes the table in the columnar ``.npy`` layout of
+:mod:`maguniverse.utils.columnar` and returns only the directory and its
+timings. The parent then memory-maps the numeric columns, so returning a
+table costs no pickling and no extra copy. With enough processes a full
+refresh takes about as long as the largest table, instead of the sum of
+all tables.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from maguniverse.registry import registered_tables
+from maguniverse.utils.columnar import read_columns, write_columns
+from maguniverse.utils.fetch_ascii import captcha_errors
+from maguniverse.utils.metrics import collect_metrics
+
+IngestResult = namedtuple(
+    'IngestResult',
+    ['catalog', 'table', 'status', 'rows', 'elapsed', 'phases', 'path', 'pid', 'error', 'frame'],
+)
+IngestResult.__doc__ = """
+Outcome of one table job. `status` is 'ok' or 'error'; `elapsed` is the
+wall time of the job in its worker, including writing the columnar copy.
+`phases` is the worker's metrics summary (fetch, parse, ... seconds; see
+:meth:`maguniverse.utils.MetricsCollector.summary`). `path` is the
+columnar directory (None for in-process jobs) and `frame` the loaded
+DataFrame.
+"""
+
+
+def _load(catalog, table, loader_kwargs):
+    """
+    Run one loader; return (DataFrame, metrics summary).
+
+    A CAPTCHA page raises :class:`~maguniverse.utils.fetch_ascii.CaptchaError`
+    instead of opening a browser and exiting, so it fails only this job.
+    """
+    from maguniverse.registry import load
+
+    with collect_metrics(keep_events=False) as metrics, captcha_errors():
+        df = load(catalog, table, **loader_kwargs)
+    return df, metrics.summary()
+
+
+def _ingest_worker(catalog, table, directory, loader_kwargs):
+    """Process-pool job: load a table and write it in columnar layout."""
+    start = time.perf_counter()
+    df, phases = _load(catalog, table, loader_kwargs)
+    if directory is not None:
+        write_columns(df, directory, extra={'catalog': catalog, 'table': table})
+    return len(df), time.perf_counter() - start, phases, os.getpid()
+
+
+def ingest_all(tables=None, processes=None, workdir=None, callback=None, frames=True,
+               **loader_kwargs):
+    """
+    Load several catalog tables in parallel.
+
+    Parameters
+    ----------
+    tables : iterable of (str, str) or dict, optional
+        ``(catalog, table)`` pairs, or a dict mapping them to keyword
+        arguments for that table's loader only (e.g. a local
+        ``file_path``). Every registered table by default.
+    processes : int, optional
+        Worker processes; one per table up to the CPU count by default.
+        1 loads the tables one after the other in this process.
+    workdir : str, optional
+        Directory receiving one columnar sub-directory per table. The
+        tables are kept there and the returned frames memory-map them.
+        By default a temporary directory is used; the frames are read into
+        memory and the directory is removed.
+    callback : callable, optional
+        Called as ``callback(result, done, total)`` each time a table
+        finishes.
+    frames : bool, optional
+        If False, the loaded tables are not returned (the results have no
+        frame and no path) and workers skip the columnar copy. Use it
+        when the loaders store the tables themselves, e.g. with a
+        per-table ``save_path``.
+    **loader_kwargs
+        Forwarded to every loader (e.g. ``compact=True``, ``icrs=True``).
+        Must be picklable.
+
+    Returns
+    -------
+    dict
+        :class:`IngestResult` keyed by ``(catalog, table)``, in the order of
+        `tables`. A failed job, including one that hit a CAPTCHA page, has
+        status 'error', the error message and no frame; the others still
+        complete.
+    """
+    if tables is None:
+        tables = registered_tables()
+    per_table = tables if isinstance(tables, dict) else {}
+    tables = [tuple(t) for t in tables]
+    if processes is None:
+        processes = min(len(tables), os.cpu_count() or 1)
+    results = {}
+    total = len(tables)
+
+    def kwargs_for(catalog, table):
+        return dict(loader_kwargs, **(per_table.get((catalog, table)) or {}))
+
+    def finish(result):
+        results[(result.catalog, result.table)] = result
+        if callback is not None:
+            callback(result, len(results), total)
+
+    if processes <= 1:
+        for catalog, table in tables:
+            start = time.perf_counter()
+            try:
+                df, phases = _load(catalog, table, kwargs_for(catalog, table))
+            except Exception as exc:
+                finish(IngestResult(catalog, table, 'error', 0, time.perf_counter() - start,
+                                    {}, None, os.getpid(),
+                                    '%s: %s' % (type(exc).__name__, exc), None))
+                continue
+            finish(IngestResult(catalog, table, 'ok', len(df), time.perf_counter() - start,
+                                phases, None, os.getpid(), None, df if frames else None))
+        return {key: results[key] for key in tables}
+
+    keep = workdir is not None
+    workdir = tempfile.mkdtemp(prefix='maguniverse-ingest-') if workdir is None else workdir
+    try:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = {}
+            for catalog, table in tables:
+                directory = None
+                if frames:
+                    directory = os.path.join(workdir, '%s_%s' % (catalog, table))
+                    shutil.rmtree(directory, ignore_errors=True)
+                future = pool.submit(_ingest_worker, catalog, table, directory,
+                                     kwargs_for(catalog, table))
+                futures[future] = (catalog, table, directory)
+            for future in as_completed(futures):
+                catalog, table, directory = futures[future]
+                try:
+                    rows, elapsed, phases, pid = future.result()
+                except Exception as exc:
+                    finish(IngestResult(catalog, table, 'error', 0, None, {}, None, None,
+                                        '%s: %s' % (type(exc).__name__, exc), None))
+                    continue
+                df = read_columns(directory, mmap_mode='c' if keep else None) if frames else None
+                finish(IngestResult(catalog, table, 'ok', rows, elapsed, phases,
+                                    directory if keep and frames else None, pid, None, df))
+    finally:
+        if not keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return {key: results[key] for key in tables}
+
+
+def ingest_report(results):
+    """Return per-table timings of :func:`ingest_all` as a fixed-width table."""
+    lines = ['%-26s %-6s %10s %10s %8s  %s'
+             % ('table', 'status', 'rows', 'seconds', 'pid', 'slowest phase')]
+    for r in results.values():
+        slowest = ''
+        if r.phases:
+            name, rec = max(((n, p) for n, p in r.phases.items() if not n.startswith('load.')),
+                            key=lambda item: item[1]['seconds'], default=('', None))
+            if rec is not None:
+                slowest = '%s %.4f s' % (name, rec['seconds'])
+        lines.append('%-26s %-6s %10d %10s %8s  %s' % (
+            '%s/%s' % (r.catalog, r.table), r.status, r.rows,
+            '' if r.elapsed is None else '%.4f' % r.elapsed,
+            '' if r.pid is None else r.pid, r.error or slowest))
+    return '\n'.join(lines)
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+iop_ascii.py
+-----------
+
+Generic reader for the tab-separated ASCII tables that IOP publishes as
+supplementary data (``..._ascii.txt`` links, e.g. Dotson2010 table 1 and
+Matthews2009 tables 1 and 5).
+
+These files have no byte-by-byte description. A few title lines precede
+a tab-separated header row, optionally followed by a row of units in
+parentheses; data rows follow, and table notes close the file. Column
+names take the form ``'Name (unit)'`` when a unit row is present, as in
+the other loaders.
+"""
+
+import re
+from io import StringIO
+
+import pandas as pd
+
+_UNIT = re.compile(r'^\(.*\)$')
+
+
+def _cells(line):
+    return [cell.strip() for cell in line.rstrip('\r\n').split('\t')]
+
+
+def _is_unit_row(cells):
+    filled = [c for c in cells if c]
+    return bool(filled) and all(_UNIT.match(c) for c in filled)
+
+
+def _unique(names):
+    seen = {}
+    out = []
+    for i, name in enumerate(names):
+        name = name or 'col%d' % (i + 1)
+        if name in seen:
+            seen[name] += 1
+            name = '%s %d' % (name, seen[name])
+        else:
+            seen[name] = 1
+        out.append(name)
+    return out
+
+
+def parse_iop_header(raw):
+    """
+    Locate the header of an IOP ASCII table.
+
+    Returns
+    -------
+    tuple
+        (column names, index of the first data line, title lines).
+    """
+    lines = raw.splitlines()
+    for i, line in enumerate(lines):
+        if '\t' in line:
+            break
+    else:
+        raise ValueError("No tab-separated header row found in the IOP ASCII table.")
+    names, title, start = _cells(lines[i]), [l.strip() for l in lines[:i] if l.strip()], i + 1
+    if start < len(lines) and _is_unit_row(_cells(lines[start])):
+        units = _cells(lines[start])
+        names = ['%s %s' % (n, u) if u else n
+                 for n, u in zip(names, units + [''] * (len(names) - len(units)))]
+        start += 1
+    while names and not names[-1]:
+        names.pop()             # trailing tabs after the last column
+    return _unique(names), start, title
+
+
+def read_iop_ascii(raw):
+    """
+    Parse an IOP supplementary ASCII table into a DataFrame.
+
+    Parameters
+    ----------
+    raw : str
+        File content.
+
+    Returns
+    -------
+    DataFrame
+        One column per header cell; numbers are parsed as numbers. The
+        title lines are kept in ``df.attrs['title']``.
+    """
+    names, start, title = parse_iop_header(raw)
+    rows = []
+    for line in raw.splitlines()[start:]:
+        if '\t' not in line:
+            if rows and line.strip():
+                break           # table notes
+            continue
+        cells = _cells(line)
+        rows.append('\t'.join((cells + [''] * len(names))[:len(names)]))
+    if not rows:
+        df = pd.DataFrame(columns=names)
+    else:
+        df = pd.read_csv(StringIO('\n'.join(rows)), sep='\t', header=None, names=names,
+                         skipinitialspace=True)
+    df.attrs['title'] = title
+    return df
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+locking.py
+-----------
+
+Inter-process file locks and atomic file commits for shared data
+directories.
+
+Several jobs may refresh the same cache and ``datafiles/`` tree at once,
+possibly on network storage. Two rules keep that safe:
+
+- Every file is written to a temporary sibling and renamed over its
+  target (:func:`atomic_write`), so a reader sees either the old or the
+  new file and never a torn one.
+- Work that must happen once (downloading a URL, parsing a raw table into
+  the table cache) runs under a per-resource :class:`FileLock`. The first
+  process does the work while the others wait, then find the result
+  already there and reuse it (single-flight).
+
+Locks are advisory: ``flock`` on POSIX (which Linux NFS clients map to
+server-side byte-range locks) and ``msvcrt.locking`` on Windows. Lock
+files are left in place after use, because removing them would let two
+processes lock different inodes of the same name.
+"""
+
+import errno
+import hashlib
+import os
+import time
+from contextlib import contextmanager
+
+from maguniverse.utils.cache import _tmp_name, default_cache_dir
+
+try:
+    import fcntl
+except ImportError:     # Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULT_POLL = 0.05     # seconds between attempts on a held lock
+
+
+def _try_lock(fd):
+    """Take the lock on `fd` without blocking; return False if it is held."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError as exc:
+        if exc.errno in (errno.EAGAIN, errno.EACCES, errno.EWOULDBLOCK, errno.EDEADLK):
+            return False
+        raise
+    return True
+
+
+def _unlock(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    """
+    Exclusive inter-process lock held on a lock file.
+
+    Parameters
+    ----------
+    path : str
+        Lock file; it and its directory are created if missing.
+    timeout : float or None, optional
+        Seconds to wait for the lock before :class:`TimeoutError` is
+        raised. None waits forever.
+    poll : float, optional
+        Seconds between attempts while the lock is held elsewhere.
+
+    Notes
+    -----
+    Each acquisition opens its own descriptor, so the lock also excludes
+    other threads of the same process. A lock object is not reentrant.
+    """
+
+    def __init__(self, path, timeout=None, poll=DEFAULT_POLL):
+        self.path = path
+        self.timeout = timeout
+        self.poll = poll
+        self.wait = 0.0
+        self._fd = None
+
+    def acquire(self):
+        """
+        Block until the lock is held.
+
+        Returns the seconds spent waiting, also kept as :attr:`wait`.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+        t0 = time.monotonic()
+        deadline = None if self.timeout is None else t0 + self.timeout
+        try:
+            while not _try_lock(fd):
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError("Timed out waiting for lock %s." % self.path)
+                time.sleep(self.poll)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+        self.wait = time.monotonic() - t0
+        return self.wait
+
+    def release(self):
+        """Release the lock."""
+        fd, self._fd = self._fd, None
+        if fd is not None:
+            try:
+                _unlock(fd)
+            finally:
+                os.close(fd)
+
+    @property
+    def locked(self):
+        """True while this object holds the lock."""
+        return self._fd is not None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+
+def lock_path(key, directory=None):
+    """Lock file of the resource `key` (e.g. a URL) under the cache directory."""
+    directory = directory or os.path.join(default_cache_dir(), 'locks')
+    return os.path.join(directory, hashlib.sha256(key.encode('utf-8')).hexdigest()[:32] + '.lock')
+
+
+def resource_lock(key, directory=None, timeout=None):
+    """Return the :class:`FileLock` guarding the resource `key`."""
+    return FileLock(lock_path(key, directory), timeout=timeout)
+
+
+def file_lock(path, timeout=None):
+    """Return the :class:`FileLock` guarding the file `path` (``path + '.lock'``)."""
+    return FileLock(path + '.lock', timeout=timeout)
+
+
+@contextmanager
+def atomic_write(path, mode='wb', compression='infer', **kwargs):
+    """
+    Write `path` atomically through a temporary sibling.
+
+    The target is replaced only when the block completes; on an error the
+    temporary file is removed and the previous content is left intact.
+
+    Parameters
+    ----------
+    path : str
+        Target file.
+    mode : {'wb', 'wt'}, optional
+        Open mode of the temporary file.
+    compression : {'infer', 'gzip', 'xz', 'zstd', None}, optional
+        Codec; 'infer' follows the extension of `path` (see
+        :mod:`maguniverse.utils.compression`).
+    **kwargs
+        Text-mode options (encoding, errors, newline).
+
+    Yields
+    ------
+    file object
+    """
+    from maguniverse.utils.compression import compression_for_path, open_compressed
+
+    if compression == 'infer':
+        compression = compression_for_path(path)
+    tmp_path = _tmp_name(path)
+    try:
+        with open_compressed(tmp_path, mode, compression=compression, **kwargs) as f:
+            yield f
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+@contextmanager
+def atomic_path(path):
+    """
+    Yield a temporary sibling of `path` to be written by other code (e.g.
+    ``DataFrame.to_csv``) and rename it over `path` when the block
+    completes.
+    """
+    tmp_path = _tmp_name(path)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -0,0 +1,410 @@
+# -*- coding: utf-8 -*-
+"""
+mapgrid.py
+-----------
+
+Dense per-object map arrays from tables of samples on a regular pixel
+grid, persisted as memory-mapped cubes.
+
+Polarimetry tables such as Dotson2010 list one row per pixel, with the
+pixel position given as (x, y) offsets in units of the pixel spacing.
+:func:`grid_maps` turns a whole table into a :class:`MapSet` in one
+vectorized pass: every quantity becomes a cube of shape
+``(maps, ny, nx)``, missing pixels are NaN and a boolean ``mask`` cube
+marks the observed ones. Maps smaller than the largest one are padded
+with NaN; ``maps.image(k, quantity)`` returns the ``(ny, nx)`` view of
+map `k` without the padding.
+
+An object observed in several pointings may have its samples on lattices
+shifted by a fraction of a pixel (mosaic fields). Rows are assigned to
+one map per (object, sub-pixel phase), so every map is a regular grid;
+the 'field' entry of the map metadata numbers the fields of an object.
+
+Each map carries WCS-like metadata, in the spirit of the FITS keywords:
+
+- 'shape': (ny, nx);
+- 'crpix': 1-based (x, y) pixel position of the zero offset (the object
+  center), so that ``offset = pixel - crpix`` in grid units;
+- 'cdelt': pixel spacing in arcsec (None when unknown);
+- 'crota': angle (deg) of the grid x axis clockwise from the R.A. axis;
+- 'crval': (RA, Dec) of the object center in degrees, when known.
+
+:func:`write_maps` stores a set as one ``.npy`` file per cube plus
+``maps.json``, and :func:`open_maps` maps the cubes back read-only, so
+image-style analyses across all objects are array slicing with no
+DataFrame pivots and no parsing.
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from maguniverse.utils.cache import _tmp_name
+from maguniverse.utils.coords import DEC_COL, RA_COL, offsets_to_radec
+
+FORMAT_VERSION = 1
+META_FILE = 'maps.json'
+MASK_FILE = 'mask.npy'
+
+
+def _cube_file(i):
+    return 'q%02d.npy' % i
+
+
+class MapSet:
+    """
+    Gridded maps of several quantities.
+
+    Parameters
+    ----------
+    cubes : dict
+        ``{quantity: ndarray}`` of shape ``(maps, ny, nx)`` each.
+    mask : ndarray of bool
+        Observed pixels, same shape as the cubes.
+    maps : list of dict
+        Metadata of each map (see the module notes).
+    meta : dict, optional
+        Set-level metadata, e.g. the grid 'resolution' and 'source'.
+    path : str, optional
+        Directory the set was opened from.
+
+    Attributes
+    ----------
+    objects : Index
+        Object of each map, in map order.
+    """
+
+    def __init__(self, cubes, mask, maps, meta=None, path=None):
+        self.cubes = cubes
+        self.mask = mask
+        self.maps = maps
+        self.meta = meta or {}
+        self.path = path
+        self.objects = pd.Index([m['object'] for m in maps], name='object')
+
+    def __repr__(self):
+        return '<MapSet %d maps of %s%s>' % (
+            len(self), ', '.join(self.cubes), '' if self.path is None else ' at %r' % self.path)
+
+    def __len__(self):
+        return len(self.maps)
+
+    def __contains__(self, quantity):
+        return quantity in self.cubes
+
+    def __getitem__(self, quantity):
+        return self.cubes[quantity]
+
+    def quantities(self):
+        """Names of the gridded quantities."""
+        return list(self.cubes)
+
+    def find(self, name):
+        """Indices of the maps (fields) of object `name`."""
+        return np.flatnonzero(self.objects == name)
+
+    def image(self, k, quantity=None):
+        """
+        The ``(ny, nx)`` image of map `k`, without the padding.
+
+        Parameters
+        ----------
+        k : int or str
+            Map index, or an object name (its first field).
+        quantity : str, optional
+            Gridded quantity; None returns the observed-pixel mask.
+
+        Returns
+        -------
+        ndarray
+            A view of the cube (of the memory map for an opened set).
+        """
+        if isinstance(k, str):
+            found = self.find(k)
+            if not len(found):
+                raise KeyError("No map of object %r." % k)
+            k = found[0]
+        ny, nx = self.maps[k]['shape']
+        cube = self.mask if quantity is None else self.cubes[quantity]
+        return cube[k, :ny, :nx]
+
+    def set_centers(self, centers):
+        """
+        Record object centers as the 'crval' of their maps.
+
+        Parameters
+        ----------
+        centers : dict or DataFrame
+            ICRS centers in degrees, as ``{name: (ra, dec)}`` or a
+            DataFrame indexed by name with 'RA_ICRS (deg)'/'DE_ICRS (deg)'
+            columns. Objects without a center get None.
+        """
+        for entry, center in zip(self.maps, _centers(centers, self.objects)):
+            entry['crval'] = center
+
+    def pixel_offsets(self, k):
+        """
+        Sky offsets of the pixels of map `k` from its object center.
+
+        Returns
+        -------
+        tuple of ndarray
+            (east, north) offsets in arcsec, each of shape ``(ny, nx)``;
+            the grid rotation 'crota' is applied.
+
+        Raises
+        ------
+        ValueError
+            If the pixel spacing of the maps is unknown.
+        """
+        entry = self.maps[k]
+        if entry['cdelt'] is None:
+            raise ValueError("The pixel spacing of these maps is unknown.")
+        ny, nx = entry['shape']
+        x = np.arange(1, nx + 1) - entry['crpix'][0]
+        y = np.arange(1, ny + 1) - entry['crpix'][1]
+        x, y = np.meshgrid(x, y)
+        angle = np.radians(entry['crota'])
+        east = entry['cdelt'] * (x * np.cos(angle) - y * np.sin(angle))
+        north = entry['cdelt'] * (x * np.sin(angle) + y * np.cos(angle))
+        return east, north
+
+    def pixel_radec(self, k):
+        """
+        ICRS positions (deg) of the pixels of map `k`, each ``(ny, nx)``.
+
+        Raises
+        ------
+        ValueError
+            If the center of the object or the pixel spacing is unknown.
+        """
+        entry = self.maps[k]
+        if entry['crval'] is None:
+            raise ValueError("No center is known for object %r." % entry['object'])
+        east, north = self.pixel_offsets(k)
+        return offsets_to_radec(entry['crval'][0], entry['crval'][1], east, north)
+
+
+def _per_object(values, objects, default):
+    """Map a scalar or ``{object: value}`` dict onto `objects`."""
+    if isinstance(values, dict):
+        return [values.get(name, default) for name in objects]
+    return [default if values is None else values] * len(objects)
+
+
+def _centers(centers, objects):
+    if centers is None:
+        return [None] * len(objects)
+    if isinstance(centers, dict):
+        return [None if centers.get(name) is None else [float(v) for v in centers[name]]
+                for name in objects]
+    ra = centers[RA_COL].reindex(objects).to_numpy(dtype=np.float64)
+    dec = centers[DEC_COL].reindex(objects).to_numpy(dtype=np.float64)
+    return [None if np.isnan(r) or np.isnan(d) else [float(r), float(d)]
+            for r, d in zip(ra, dec)]
+
+
+def grid_maps(df, columns, group_col='ID', x_col='Δx', y_col='Δy', resolution=0.1,
+              dtype=np.float64, pixel_scale=None, rotation=None, centers=None):
+    """
+    Grid the rows of a pixel table into per-object map cubes.
+
+    Parameters
+    ----------
+    df : DataFrame
+        One row per pixel.
+    columns : list of str
+        Quantities to grid.
+    group_col : str, optional
+        Object label column.
+    x_col, y_col : str, optional
+        Pixel offsets from the object center, in units of the pixel
+        spacing.
+    resolution : float, optional
+        Precision of the offsets (0.1 for the ``F5.1`` columns of
+        Dotson2010); sub-pixel phases are told apart at this precision.
+    dtype : dtype, optional
+        Data type of the cubes.
+    pixel_scale : float, optional
+        Pixel spacing in arcsec, recorded as 'cdelt'.
+    rotation : float or dict, optional
+        Angle (deg) of the grid x axis clockwise from R.A., for all
+        objects or as ``{object: angle}``; 0 by default.
+    centers : dict or DataFrame, optional
+        Object centers (ICRS, degrees), as ``{name: (ra, dec)}`` or a
+        DataFrame indexed by name with 'RA_ICRS (deg)'/'DE_ICRS (deg)'
+        columns, recorded as 'crval'.
+
+    Returns
+    -------
+    MapSet
+        Maps in the order of first appearance of their (object, field).
+        Rows with a missing object or offset are skipped. A row landing
+        on a pixel already filled by an earlier row of the same map is
+        dropped and counted in the map's 'collisions'.
+    """
+    steps = int(round(1.0 / resolution))
+    groups, labels = pd.factorize(df[group_col], use_na_sentinel=True)
+    x = df[x_col].to_numpy(dtype=np.float64)
+    y = df[y_col].to_numpy(dtype=np.float64)
+    rows = np.flatnonzero((groups >= 0) & np.isfinite(x) & np.isfinite(y))
+    groups = groups[rows]
+    xq = np.rint(x[rows] / resolution).astype(np.int64)
+    yq = np.rint(y[rows] / resolution).astype(np.int64)
+    # sub-pixel phase of each row; one map per (object, phase)
+    phase_x, phase_y = xq % steps, yq % steps
+    px, py = (xq - phase_x) // steps, (yq - phase_y) // steps
+    map_of_row, map_keys = pd.factorize((groups * steps + phase_x) * steps + phase_y,
+                                        sort=False)
+    nmaps = len(map_keys)
+    map_groups, map_phase = np.divmod(map_keys, steps * steps)
+    map_phase_x, map_phase_y = np.divmod(map_phase, steps)
+
+    x0 = np.full(nmaps, np.iinfo(np.int64).max)
+    y0 = np.full(nmaps, np.iinfo(np.int64).max)
+    x1 = np.full(nmaps, np.iinfo(np.int64).min)
+    y1 = np.full(nmaps, np.iinfo(np.int64).min)
+    np.minimum.at(x0, map_of_row, px)
+    np.minimum.at(y0, map_of_row, py)
+    np.maximum.at(x1, map_of_row, px)
+    np.maximum.at(y1, map_of_row, py)
+    nx, ny = x1 - x0 + 1, y1 - y0 + 1
+    shape = (nmaps, int(ny.max(initial=0)), int(nx.max(initial=0)))
+
+    i = px - x0[map_of_row]
+    j = py - y0[map_of_row]
+    flat = np.ravel_multi_index((map_of_row, j, i), shape)
+    _, first = np.unique(flat, return_index=True)
+    kept = np.sort(first)
+    collisions = np.bincount(map_of_row, minlength=nmaps) \
+        - np.bincount(map_of_row[kept], minlength=nmaps)
+    flat, rows = flat[kept], rows[kept]
+
+    mask = np.zeros(shape, dtype=bool)
+    mask.flat[flat] = True
+    cubes = {}
+    for column in columns:
+        cube = np.full(shape, np.nan, dtype=dtype)
+        cube.flat[flat] = df[column].to_numpy(dtype=np.float64)[rows]
+        cubes[column] = cube
+
+    crpix_x = 1 - x0 - map_phase_x / steps
+    crpix_y = 1 - y0 - map_phase_y / steps
+    objects = np.asarray(labels, dtype=object)[map_groups]
+    field = pd.Series(map_groups).groupby(map_groups).cumcount().to_numpy()
+    crota = _per_object(rotation, objects, 0.0)
+    npix = np.bincount(map_of_row[kept], minlength=nmaps)
+    maps = []
+    for k in range(nmaps):
+        maps.append({
+            'object'    : str(objects[k]),
+            'field'     : int(field[k]),
+            'shape'     : [int(ny[k]), int(nx[k])],
+            'crpix'     : [float(crpix_x[k]), float(crpix_y[k])],
+            'cdelt'     : None if pixel_scale is None else float(pixel_scale),
+            'crota'     : float(crota[k]),
+            'crval'     : None,
+            'npix'      : int(npix[k]),
+            'collisions': int(collisions[k]),
+        })
+    meta = {'resolution': resolution, 'group_col': group_col, 'x_col': x_col, 'y_col': y_col}
+    maps = MapSet(cubes, mask, maps, meta)
+    if centers is not None:
+        maps.set_centers(centers)
+    return maps
+
+
+def write_maps(maps, path, extra=None):
+    """
+    Store a :class:`MapSet` in a directory.
+
+    Parameters
+    ----------
+    maps : MapSet
+        Maps to write.
+    path : str
+        Target directory. An existing set there is replaced atomically
+        once the new one is complete.
+    extra : dict, optional
+        JSON-serializable metadata stored with the set (e.g. a source
+        fingerprint), merged into :attr:`MapSet.meta`.
+
+    Returns
+    -------
+    dict
+        The content of ``maps.json``.
+    """
+    path = os.path.abspath(path)
+    tmp_path = _tmp_name(path)
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    meta = dict(maps.meta, **(extra or {}))
+    description = {
+        'format_version': FORMAT_VERSION,
+        'meta'          : meta,
+        'quantities'    : [],
+        'maps'          : maps.maps,
+    }
+    try:
+        for i, (quantity, cube) in enumerate(maps.cubes.items()):
+            np.save(os.path.join(tmp_path, _cube_file(i)), cube)
+            description['quantities'].append({'name': quantity, 'file': _cube_file(i),
+                                              'dtype': cube.dtype.str})
+        np.save(os.path.join(tmp_path, MASK_FILE), maps.mask)
+        with open(os.path.join(tmp_path, META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(description, f, ensure_ascii=False, indent=1)
+
+        if os.path.isdir(path):
+            old_path = _tmp_name(path + '.old')
+            os.replace(path, old_path)
+            os.replace(tmp_path, path)
+            shutil.rmtree(old_path, ignore_errors=True)
+        else:
+            os.replace(tmp_path, path)
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    return description
+
+
+def read_maps_meta(path):
+    """Return the ``maps.json`` description of a stored set, or None."""
+    try:
+        with open(os.path.join(path, META_FILE), 'r', encoding='utf-8') as f:
+            description = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if description.get('format_version') != FORMAT_VERSION:
+        return None
+    return description
+
+
+def open_maps(path, mmap_mode='r'):
+    """
+    Open a set written by :func:`write_maps`.
+
+    Parameters
+    ----------
+    path : str
+        Set directory.
+    mmap_mode : {'r', 'c', None}, optional
+        Memory-map mode of the cubes; None reads them into memory.
+
+    Returns
+    -------
+    MapSet
+
+    Raises
+    ------
+    ValueError
+        If `path` holds no map set of a supported version.
+    """
+    description = read_maps_meta(path)
+    if description is None:
+        raise ValueError("No map set of format version %d in %r." % (FORMAT_VERSION, path))
+    cubes = {q['name']: np.load(os.path.join(path, q['file']), mmap_mode=mmap_mode)
+             for q in description['quantities']}
+    mask = np.load(os.path.join(path, MASK_FILE), mmap_mode=mmap_mode)
+    return MapSet(cubes, mask, description['maps'], description['meta'], path=path)
@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""
+metrics.py
+-----------
+
+Phase-level instrumentation of the fetch/parse/save pipeline.
+
+The download cache, the parsed-table cache and every ``get_*`` loader
+report what they do as named phases ('fetch', 'read', 'parse', 'coerce',
+'save', ...) carrying the elapsed time and fields such as 'bytes', 'rows'
+and 'cache' ('hit', 'miss', 'revalidated' or 'off'). Phases are delivered
+to hooks registered with :func:`add_hook`; with no hook registered each
+instrumentation point costs a single list check.
+
+Collect a summary of one nightly refresh with::
+
+    from maguniverse.utils.metrics import collect_metrics
+
+    with collect_metrics() as metrics:
+        df = get_crutcher2010(file_url=url)
+    print(metrics.report())
+"""
+
+import functools
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+MetricEvent = namedtuple('MetricEvent', ['name', 'seconds', 'fields', 'path', 'thread'])
+MetricEvent.__doc__ = """
+One finished phase. `seconds` is None for instantaneous events; `path`
+holds the names of the enclosing phases (outermost first) on the same
+thread, ending with `name`.
+"""
+
+# Fields aggregated by value count instead of by sum in summaries
+COUNTED_FIELDS = ('cache',)
+
+_hooks = []
+_local = threading.local()
+_hooks_lock = threading.Lock()
+
+
+def add_hook(hook):
+    """
+    Register `hook` to be called as ``hook(event)`` for every phase.
+
+    Hooks run synchronously on the thread that finished the phase (the
+    bulk downloader calls them from its worker threads) and must be
+    thread-safe. Returns `hook`, so this can be used as a decorator.
+    """
+    global _hooks
+    with _hooks_lock:
+        _hooks = _hooks + [hook]
+    return hook
+
+
+def remove_hook(hook):
+    """Unregister a hook added with :func:`add_hook`."""
+    global _hooks
+    with _hooks_lock:
+        _hooks = [h for h in _hooks if h is not hook]
+
+
+def enabled():
+    """Return True if at least one hook is registered."""
+    return bool(_hooks)
+
+
+def _emit(event):
+    for hook in _hooks:
+        hook(event)
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+class _NullPhase:
+    """Shared stand-in returned by :func:`phase` when nothing listens."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setitem__(self, key, value):
+        pass
+
+    def update(self, *args, **kwargs):
+        pass
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase(dict):
+    """Timed phase; the dict holds the event fields."""
+
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name, fields):
+        super().__init__(fields)
+        self.name = name
+
+    def __enter__(self):
+        _stack().append(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        stack = _stack()
+        path = tuple(stack)
+        stack.pop()
+        if exc_type is not None:
+            self['error'] = exc_type.__name__
+        _emit(MetricEvent(self.name, seconds, dict(self), path,
+                          threading.current_thread().name))
+        return False
+
+
+def phase(name, **fields):
+    """
+    Context manager timing the phase `name`.
+
+    The returned object accepts fields discovered inside the block, e.g.
+    ``m['rows'] = len(df)``. A phase left by an exception is still
+    reported, with an 'error' field naming the exception type.
+
+    Parameters
+    ----------
+    name : str
+        Phase name.
+    **fields
+        Initial event fields.
+    """
+    if not _hooks:
+        return _NULL_PHASE
+    return _Phase(name, fields)
+
+
+def event(name, **fields):
+    """Report an instantaneous event (no duration) to the hooks."""
+    if not _hooks:
+        return
+    path = tuple(_stack()) + (name,)
+    _emit(MetricEvent(name, None, fields, path, threading.current_thread().name))
+
+
+def timed(name):
+    """
+    Decorator running the wrapped function inside :func:`phase`.
+
+    When the result has a ``shape`` (a DataFrame or array), its length is
+    recorded as 'rows'. Iterators returned by chunked loaders are timed up
+    to their creation only; their batches are reported by
+    :func:`maguniverse.utils.save_chunks`.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _hooks:
+                return func(*args, **kwargs)
+            with _Phase(name, {}) as m:
+                result = func(*args, **kwargs)
+                shape = getattr(result, 'shape', None)
+                if shape:
+                    m['rows'] = shape[0]
+            return result
+        return wrapper
+    return decorate
+
+
+class MetricsCollector:
+    """
+    Hook accumulating events in memory.
+
+    Parameters
+    ----------
+    keep_events : bool, optional
+        Also keep the individual events in :attr:`events`.
+    """
+
+    def __init__(self, keep_events=True):
+        self.keep_events = keep_events
+        self.events = []
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        with self._lock:
+            if self.keep_events:
+                self.events.append(event)
+            total = self._totals.get(event.name)
+            if total is None:
+                total = self._totals[event.name] = {
+                    'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'fields': {},
+                }
+            total['calls'] += 1
+            if event.seconds is not None:
+                total['seconds'] += event.seconds
+                total['max_seconds'] = max(total['max_seconds'], event.seconds)
+            fields = total['fields']
+            for key, value in event.fields.items():
+                if key in COUNTED_FIELDS:
+                    counts = fields.setdefault(key, {})
+                    counts[value] = counts.get(value, 0) + 1
+                elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                    fields[key] = fields.get(key, 0) + value
+
+    def summary(self):
+        """
+        Aggregate the events by phase name.
+
+        Returns
+        -------
+        dict
+            ``{name: record}`` ordered by total time (descending), where each
+            record holds 'calls', 'seconds', 'mean_seconds', 'max_seconds',
+            the sums of the numeric fields (e.g. 'rows', 'bytes') and, for
+            'cache', a ``{outcome: count}`` dict.
+        """
+        with self._lock:
+            items = [(name, dict(t, fields=dict(t['fields']))) for name, t in self._totals.items()]
+        result = {}
+        for name, total in sorted(items, key=lambda item: -item[1]['seconds']):
+            record = {
+                'calls'       : total['calls'],
+                'seconds'     : total['seconds'],
+                'mean_seconds': total['seconds'] / total['calls'],
+                'max_seconds' : total['max_seconds'],
+            }
+            record.update(total['fields'])
+            result[name] = record
+        return result
+
+    def report(self):
+        """Return the summary as a fixed-width text table."""
+        lines = ['%-28s %6s %10s %10s %10s %12s %14s  %s'
+                 % ('phase', 'calls', 'total s', 'mean s', 'max s', 'rows', 'bytes', 'cache')]
+        for name, r in self.summary().items():
+            cache = ' '.join('%s=%d' % item for item in sorted(r.get('cache', {}).items()))
+            lines.append('%-28s %6d %10.4f %10.4f %10.4f %12s %14s  %s' % (
+                name, r['calls'], r['seconds'], r['mean_seconds'], r['max_seconds'],
+                r.get('rows', ''), r.get('bytes', ''), cache))
+        return '\n'.join(lines)
+
+    def clear(self):
+        """Drop everything collected so far."""
+        with self._lock:
+            self.events = []
+            self._totals = {}
+
+
+@contextmanager
+def collect_metrics(keep_events=True):
+    """
+    Collect the events emitted inside the block.
+
+    Yields
+    ------
+    MetricsCollector
+        Registered as a hook for the duration of the block.
+    """
+    collector = MetricsCollector(keep_events=keep_events)
+    add_hook(collector)
+    try:
+        yield collector
+    finally:
+        remove_hook(collector)
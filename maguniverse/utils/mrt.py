@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+"""
+mrt.py
+-----------
+
+Reader for CDS/AAS machine-readable tables (MRT).
+
+The "Byte-by-byte Description" header of an MRT file lists, for every
+column, its byte range, Fortran format, units and label. This module
+parses that header once and decodes the fixed-width body in a vectorized
+pass over a single bytes buffer: the records are laid out as a 2-D byte
+matrix and each column is converted with one numpy cast, instead of
+splitting and parsing the text line by line.
+"""
+
+import re
+from collections import namedtuple
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from maguniverse.utils.compression import open_compressed
+
+MRTColumn = namedtuple(
+    'MRTColumn', ['start', 'end', 'fmt', 'units', 'label', 'explanation']
+)
+MRTColumn.__doc__ = """
+Description of one MRT column. `start` and `end` are 0-based byte offsets
+suitable for slicing (``line[start:end]``).
+"""
+
+_BYTE_HEADER = re.compile(rb'^\s*Bytes\s+Format\s+Units\s+Label', re.M)
+_COLUMN_LINE = re.compile(
+    r'^\s*(\d+)\s*(?:-\s*(\d+))?\s+([AIFED])(\d+)(?:\.(\d+))?\s+(\S+)\s+(\S+)\s*(.*)$'
+)
+_SEPARATOR = re.compile(r'^[-=]{10,}\s*$')
+# an explanation starting with '?' (after optional limits such as
+# '[0/90]') marks a column that may be blank
+_OPTIONAL = re.compile(r'^(?:\[[^\]]*\]\s*)?\?')
+
+HEADER_BLOCK = 64 * 1024   # bytes read at a time while locating the header
+RECORD_BLOCK = 64 * 1024   # records copied at a time into a ragged byte matrix
+
+
+def _fortran_dtype(fmt):
+    """Map a Fortran format letter to a numpy dtype kind."""
+    return {'A': 'U', 'I': 'i', 'F': 'f', 'E': 'f', 'D': 'f'}[fmt[0]]
+
+
+def _is_optional(col):
+    """True if the header declares that `col` may be blank (``?`` flag)."""
+    return bool(_OPTIONAL.match(col.explanation))
+
+
+def parse_mrt_header(raw):
+    """
+    Parse the byte-by-byte description of an MRT file.
+
+    Parameters
+    ----------
+    raw : bytes or str
+        Contents of the MRT file (only the header part is inspected).
+
+    Returns
+    -------
+    tuple
+        (columns, data_start) where `columns` is a list of
+        :class:`MRTColumn` and `data_start` is the byte offset of the first
+        data record in `raw`.
+
+    Raises
+    ------
+    ValueError
+        If no byte-by-byte description is found.
+    """
+    if isinstance(raw, str):
+        raw = raw.encode('utf-8')
+    match = _BYTE_HEADER.search(raw)
+    if match is None:
+        raise ValueError("No 'Byte-by-byte Description' header found.")
+
+    pos = raw.index(b'\n', match.start()) + 1
+    columns = []
+    state = 'open'      # before the separator that opens the column table
+
+    while pos < len(raw):
+        end = raw.find(b'\n', pos)
+        end = len(raw) if end < 0 else end
+        line = raw[pos:end].decode('utf-8', errors='replace').rstrip('\r')
+        next_pos = end + 1
+
+        if state == 'open':
+            if _SEPARATOR.match(line):
+                state = 'columns'
+        elif state == 'columns':
+            if _SEPARATOR.match(line):
+                state = 'after'
+            else:
+                m = _COLUMN_LINE.match(line)
+                if m:
+                    first, last, letter, width, _, units, label, text = m.groups()
+                    fmt = letter + width + ('.' + m.group(5) if m.group(5) else '')
+                    columns.append(MRTColumn(
+                        int(first) - 1, int(last or first), fmt, units, label, text.strip()
+                    ))
+                elif columns and line.strip():
+                    # continuation of the previous explanation
+                    prev = columns[-1]
+                    columns[-1] = prev._replace(
+                        explanation=(prev.explanation + ' ' + line.strip()).strip()
+                    )
+        elif state == 'notes':
+            if _SEPARATOR.match(line):
+                state = 'after'
+        else:
+            # 'after' a separator: notes run up to the next separator,
+            # anything else is the first data record
+            if line.lstrip().startswith('Note'):
+                state = 'notes'
+            elif line.strip() and not _SEPARATOR.match(line):
+                return columns, pos
+        pos = next_pos
+
+    return columns, len(raw)
+
+
+def _byte_matrix(body):
+    """
+    Lay out the newline-separated records of `body` as a 2-D byte matrix.
+
+    Short records are right-padded with spaces so every row has the width
+    of the longest record. Blank records are dropped.
+    """
+    buf = np.frombuffer(body, dtype=np.uint8)
+    if not buf.size:
+        return np.empty((0, 0), dtype=np.uint8)
+    newlines = np.flatnonzero(buf == ord('\n'))
+    if not newlines.size or newlines[-1] != buf.size - 1:
+        newlines = np.append(newlines, buf.size)
+    starts = np.concatenate(([0], newlines[:-1] + 1))
+    lengths = newlines - starts
+
+    # drop a trailing carriage return from CRLF files
+    has_cr = np.zeros(len(starts), dtype=bool)
+    nonempty = lengths > 0
+    has_cr[nonempty] = buf[starts[nonempty] + lengths[nonempty] - 1] == ord('\r')
+    lengths = lengths - has_cr
+
+    width = int(lengths.max()) if lengths.size else 0
+    if not width:
+        return np.empty((0, 0), dtype=np.uint8)
+    if np.all(lengths == width) and not has_cr.any():
+        stride = width + 1
+        if newlines.size and newlines[-1] == buf.size:     # no final newline
+            buf = np.append(buf, np.uint8(ord('\n')))
+        matrix = buf[:len(starts) * stride].reshape(len(starts), stride)[:, :width]
+    else:
+        # one `width`-byte window per record, indexed by its start, then the
+        # bytes past the end of each record blanked: the index arrays hold
+        # one entry per line rather than one per byte, and the copies run
+        # in blocks of records to bound the temporaries
+        matrix = np.empty((len(starts), width), dtype=np.uint8)
+        windows = sliding_window_view(buf, width)
+        inside = int(np.searchsorted(starts, buf.size - width, side='right'))
+        for lo in range(0, inside, RECORD_BLOCK):
+            hi = min(lo + RECORD_BLOCK, inside)
+            matrix[lo:hi] = windows[starts[lo:hi]]
+        if inside < len(starts):
+            # the last records may end less than `width` bytes before the end
+            first = int(starts[inside])
+            tail = np.concatenate((buf[first:], np.full(width, ord(' '), dtype=np.uint8)))
+            matrix[inside:] = sliding_window_view(tail, width)[starts[inside:] - first]
+        offsets = np.arange(width)
+        for lo in range(0, len(starts), RECORD_BLOCK):
+            block = matrix[lo:lo + RECORD_BLOCK]
+            block[offsets >= lengths[lo:lo + RECORD_BLOCK, None]] = ord(' ')
+
+    blank = (matrix == ord(' ')).all(axis=1)
+    return matrix[~blank] if blank.any() else matrix
+
+
+def _decode_column(matrix, col):
+    """Decode one fixed-width column of the byte matrix into an array."""
+    width = col.end - col.start
+    field = np.ascontiguousarray(matrix[:, col.start:col.end])
+    if field.shape[1] < width:
+        pad = np.full((field.shape[0], width - field.shape[1]), ord(' '), dtype=np.uint8)
+        field = np.hstack([field, pad])
+    blank = (field == ord(' ')).all(axis=1)
+    values = field.view('S%d' % width).ravel()
+    kind = _fortran_dtype(col.fmt)
+
+    if kind == 'U':
+        stripped = np.char.strip(values)
+        try:
+            out = stripped.astype(str).astype(object)
+        except UnicodeDecodeError:
+            out = np.char.decode(stripped, 'utf-8', errors='replace').astype(object)
+        if blank.any():
+            out[blank] = np.nan
+        return out
+
+    if kind == 'i' and not _is_optional(col):
+        # the dtype follows the header, so every batch of a file agrees
+        if blank.any():
+            raise ValueError(
+                "Blank value in MRT column %r, which the header does not mark as "
+                "optional ('?')." % col.label)
+        return values.astype(np.int64)
+    if blank.any():
+        values = values.copy()
+        values[blank] = b'nan'
+    return values.astype(np.float64)
+
+
+def _select_columns(columns, names, usecols):
+    """Apply user column names and a column subset to MRT columns."""
+    if names is not None:
+        if len(names) != len(columns):
+            raise ValueError(
+                "Expected %d column names, got %d." % (len(columns), len(names))
+            )
+        columns = [c._replace(label=n) for c, n in zip(columns, names)]
+    if usecols is not None:
+        wanted = set(usecols)
+        columns = [c for c in columns if c.label in wanted]
+    return columns
+
+
+def _decode_records(body, columns, start_row=0):
+    """Decode a bytes block of whole records into a DataFrame."""
+    matrix = _byte_matrix(body)
+    df = pd.DataFrame({c.label: _decode_column(matrix, c) for c in columns})
+    if start_row:
+        df.index = pd.RangeIndex(start_row, start_row + len(df))
+    df.attrs['units'] = {c.label: c.units for c in columns}
+    df.attrs['formats'] = {c.label: c.fmt for c in columns}
+    return df
+
+
+def read_mrt(raw, names=None, usecols=None):
+    """
+    Read a CDS/AAS machine-readable table into a DataFrame.
+
+    Parameters
+    ----------
+    raw : bytes or str
+        Contents of the MRT file.
+    names : list of str, optional
+        Column names to use instead of the MRT labels, one per column.
+    usecols : list of str, optional
+        Subset of columns (by final name) to decode.
+
+    Returns
+    -------
+    DataFrame
+        Integer (I) columns are int64, or float64 with NaN for blanks when
+        the header marks them as optional (``?``); F/E/D columns are
+        float64 and A columns strings. The dtypes depend on the header
+        only, so :func:`iter_mrt` batches share them. The units and
+        Fortran formats of each column are available in
+        ``df.attrs['units']`` and ``df.attrs['formats']``.
+
+    Raises
+    ------
+    ValueError
+        If an integer column not marked as optional has a blank value.
+    """
+    if isinstance(raw, str):
+        raw = raw.encode('utf-8')
+    columns, data_start = parse_mrt_header(raw)
+    columns = _select_columns(columns, names, usecols)
+    return _decode_records(raw[data_start:], columns)
+
+
+def read_mrt_header_file(f):
+    """
+    Parse the MRT header from the binary file object `f`.
+
+    Reads the file in blocks only until the first data record is located.
+
+    Returns
+    -------
+    tuple
+        (columns, data_start) as returned by :func:`parse_mrt_header`.
+    """
+    f.seek(0)
+    header = b''
+    while True:
+        block = f.read(HEADER_BLOCK)
+        header += block
+        try:
+            columns, data_start = parse_mrt_header(header)
+        except ValueError:
+            if not block:
+                raise
+            continue
+        # the first record must be complete to be told apart from a
+        # separator cut at the block boundary
+        if header.find(b'\n', data_start) >= 0 or not block:
+            return columns, data_start
+
+
+def iter_mrt(path, chunksize, names=None, usecols=None):
+    """
+    Iterate over an MRT file in DataFrame batches of `chunksize` rows.
+
+    Only the header and one batch of records are held in memory at a time.
+
+    Parameters
+    ----------
+    path : str
+        Path to the MRT file, possibly gzip, xz or zstd compressed.
+    chunksize : int
+        Number of records per batch.
+    names, usecols
+        As for :func:`read_mrt`.
+
+    Yields
+    ------
+    DataFrame
+        Consecutive batches with the dtypes of :func:`read_mrt`; the index
+        continues across batches.
+    """
+    with open_compressed(path, 'rb') as f:
+        columns, data_start = read_mrt_header_file(f)
+    columns = _select_columns(columns, names, usecols)
+    # compressed streams only seek forward, so start over for the records
+    with open_compressed(path, 'rb') as f:
+        f.seek(data_start)
+        row = 0
+        while True:
+            lines = list(islice(f, chunksize))
+            if not lines:
+                break
+            df = _decode_records(b''.join(lines), columns, start_row=row)
+            row += len(df)
+            yield df
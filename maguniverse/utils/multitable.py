@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+multitable.py
+-----------
+
+Concurrent loading of the tables of one catalog and key-indexed joins
+into a core catalog.
+
+Most catalogs split an object list, per-object results and per-position
+measurements over several tables that share a key ('Seq' in Jijina1999,
+the object name in Dotson2010 and Matthews2009). :func:`load_tables` runs
+the table loaders on a thread pool, so the downloads overlap.
+:func:`index_join` then attaches the columns of each secondary table to
+the rows of the core table through a :class:`KeyIndex`: the secondary
+keys are sorted once, every core key is looked up with a binary search,
+and each joined column is gathered with a single ``take``. No merged
+intermediate frames are built, and the core rows keep their order and
+index.
+
+Secondary tables may repeat a key. Rows are then matched on the key plus
+a note column (VizieR ``n_Seq``) when both tables have one, and otherwise
+on the first row of the key; the number of rows per key can be reported
+as a count column.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from maguniverse.utils.metrics import phase
+
+
+class KeyIndex:
+    """
+    Sorted index of integer key codes.
+
+    Parameters
+    ----------
+    codes : array_like of int
+        Key code of every row; negative codes (missing keys) are not
+        indexed.
+
+    Attributes
+    ----------
+    keys : ndarray
+        Distinct codes, sorted.
+    first : ndarray
+        Row of the first occurrence of each key.
+    counts : ndarray
+        Number of rows of each key.
+    """
+
+    def __init__(self, codes):
+        codes = np.asarray(codes, dtype=np.int64)
+        rows = np.flatnonzero(codes >= 0)
+        order = rows[np.argsort(codes[rows], kind='stable')]
+        self.keys, first, self.counts = np.unique(codes[order], return_index=True,
+                                                  return_counts=True)
+        self.first = order[first]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, codes):
+        """
+        Find `codes` in the index.
+
+        Returns
+        -------
+        tuple of ndarray
+            (row, count): the first row of each code and its number of
+            rows, or (-1, 0) where the code is not indexed.
+        """
+        codes = np.asarray(codes, dtype=np.int64)
+        if not len(self.keys):
+            return np.full(len(codes), -1, dtype=np.int64), np.zeros(len(codes), dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.keys, codes), len(self.keys) - 1)
+        found = (self.keys[pos] == codes) & (codes >= 0)
+        return (np.where(found, self.first[pos], -1),
+                np.where(found, self.counts[pos], 0))
+
+
+def _key_values(df, column, normalize):
+    values = df[column]
+    if normalize is not None:
+        values = pd.Series(normalize(values), index=df.index)
+    if values.dtype == object or isinstance(values.dtype, pd.StringDtype):
+        values = values.str.strip()
+        values = values.mask(values == '')
+    return values
+
+
+def joint_codes(left, right):
+    """
+    Integer codes of the keys of two tables in one shared code space.
+
+    Parameters
+    ----------
+    left, right : list of Series
+        Key columns of each table (several columns form a compound key).
+
+    Returns
+    -------
+    tuple of ndarray
+        Codes of the left and right rows; -1 where a key part is missing.
+    """
+    n = len(left[0])
+    parts = [pd.concat([a, b], ignore_index=True) for a, b in zip(left, right)]
+    if len(parts) == 1:
+        codes, _ = pd.factorize(parts[0])
+    else:
+        missing = np.zeros(len(parts[0]), dtype=bool)
+        for part in parts:
+            missing |= part.isna().to_numpy()
+        codes, _ = pd.factorize(pd.MultiIndex.from_arrays(parts))
+        codes = np.where(missing, -1, codes)
+    return codes[:n], codes[n:]
+
+
+def index_join(left, right, key, right_key=None, note=None, columns=None, suffix=None,
+               count=None, normalize=None):
+    """
+    Attach the columns of `right` to the rows of `left` by key.
+
+    Parameters
+    ----------
+    left : DataFrame
+        Core table; its rows, order and index are kept.
+    right : DataFrame
+        Secondary table.
+    key : str
+        Key column of `left`.
+    right_key : str, optional
+        Key column of `right`; `key` by default.
+    note : str, optional
+        Column disambiguating repeated keys (e.g. 'n_Seq'). When both
+        tables have it, rows are matched on (key, note) first; left rows
+        without such a match take the first right row of their key.
+    columns : list of str, optional
+        Columns of `right` to attach; all but its key and note by default.
+    suffix : str, optional
+        Appended to attached columns whose name is already used in `left`.
+        Without it, such columns are skipped.
+    count : str, optional
+        Name of a column receiving the number of right rows of each key.
+    normalize : callable, optional
+        Applied to both key columns before matching, e.g.
+        :func:`maguniverse.utils.names.normalize_names` for object names.
+
+    Returns
+    -------
+    DataFrame
+        `left` with the attached columns; NaN where a key has no match.
+    """
+    right_key = right_key or key
+    if columns is None:
+        columns = [c for c in right.columns if c not in (right_key, note)]
+    lkeys = _key_values(left, key, normalize)
+    rkeys = _key_values(right, right_key, normalize)
+    lcodes, rcodes = joint_codes([lkeys], [rkeys])
+    rows, counts = KeyIndex(rcodes).lookup(lcodes)
+    if note is not None and note in left.columns and note in right.columns:
+        lnote = left[note].astype(object).where(left[note].notna(), '')
+        rnote = right[note].astype(object).where(right[note].notna(), '')
+        lcodes, rcodes = joint_codes([lkeys, lnote], [rkeys, rnote])
+        exact, _ = KeyIndex(rcodes).lookup(lcodes)
+        rows = np.where(exact >= 0, exact, rows)
+
+    attached = {}
+    for column in columns:
+        name = column
+        if name in left.columns or name in attached:
+            if suffix is None:
+                continue
+            name = column + suffix
+        values = pd.api.extensions.take(right[column].array, rows, allow_fill=True)
+        attached[name] = pd.Series(values, index=left.index)
+    if count is not None:
+        attached[count] = pd.Series(counts, index=left.index)
+    return left.assign(**attached)
+
+
+def load_tables(loaders, max_workers=None, file_paths=None, file_urls=None):
+    """
+    Run several table loaders concurrently.
+
+    Parameters
+    ----------
+    loaders : dict
+        ``{name: (loader, kwargs)}``; each loader is called as
+        ``loader(**kwargs)``.
+    max_workers : int, optional
+        Thread pool size; one thread per table by default.
+    file_paths, file_urls : dict, optional
+        ``file_path`` and ``file_url`` arguments of the loaders, keyed by
+        table name.
+
+    Returns
+    -------
+    dict
+        ``{name: DataFrame}`` in the order of `loaders`.
+
+    Notes
+    -----
+    Downloads and cache reads of the tables overlap; the first loader
+    error is re-raised once every loader has finished. The whole call is
+    reported as a 'load_tables' phase to the metrics hooks.
+    """
+    calls = {}
+    for name, (loader, kwargs) in loaders.items():
+        kwargs = dict(kwargs)
+        if file_paths and name in file_paths:
+            kwargs['file_path'] = file_paths[name]
+        if file_urls and name in file_urls:
+            kwargs['file_url'] = file_urls[name]
+        calls[name] = loader, kwargs
+    with phase('load_tables', tables=len(calls)):
+        with ThreadPoolExecutor(max_workers=max_workers or max(len(calls), 1)) as pool:
+            futures = {name: pool.submit(loader, **kwargs)
+                       for name, (loader, kwargs) in calls.items()}
+        return {name: future.result() for name, future in futures.items()}
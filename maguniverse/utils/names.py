@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+"""
+names.py
+-----------
+
+Source-name normalization and a persistent cross-catalog name index.
+
+The same object is spelled differently in every table: ``NGC_2024``
+(Dotson2010), ``NGC 2024`` (Crutcher2010), blank-padded IDs in
+Matthews2009 and Jijina1999, ``CRL 2688`` vs ``AFGL 2688``, ``TMC-1`` vs
+``TMC1``. :func:`normalize_name` maps all of these to one canonical key,
+and :class:`NameIndex` maps every key to the matching rows of each loaded
+catalog, so a lookup is a single dict access instead of a string scan over
+every DataFrame. Catalogs are indexed independently, so refreshing one
+only rebuilds its own entries.
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import re
+import unicodedata
+
+import pandas as pd
+
+from maguniverse.utils.cache import _tmp_name
+
+FORMAT_VERSION = 1
+
+# Columns tried, in order, when no name column is given
+NAME_COLUMNS = ('Name', 'ID')
+
+# Greek letters spelled out, as in "rho Oph"
+_GREEK = str.maketrans({'ρ': 'rho ', 'σ': 'sigma ', 'θ': 'theta ', 'ζ': 'zeta ', 'η': 'eta '})
+
+# Catalog prefixes with several spellings, mapped to one designation
+PREFIX_ALIASES = {
+    'LDN'        : 'L',
+    'LYNDS'      : 'L',
+    'BARNARD'    : 'B',
+    'CRL'        : 'AFGL',
+    'SAGITTARIUS': 'SGR',
+}
+
+# Regex rewrites applied in order to the upper-cased, stripped name
+_RULES = [
+    # catalog prefix aliases, when followed by a separator or a number
+    (re.compile(r'^(%s)(?=[\s_\d])' % '|'.join(PREFIX_ALIASES)),
+     lambda m: PREFIX_ALIASES[m.group(1)]),
+    # blanks and underscores carry no meaning
+    (re.compile(r'[\s_]+'), ''),
+    # hyphens joining a letter to a label ("TMC-1C", "W43-MM1"), but not
+    # signs of coordinates ("M-0.02-0.07") or of IRAS numbers
+    (re.compile(r'(?<=[A-Z])-(?![\d.]*\.)(?=[A-Z\d])|(?<=\d)-(?=[A-Z])'), ''),
+    # zero padding of numbered catalogs ("NGC 0253")
+    (re.compile(r'^(NGC|IC|L|B)0+(?=\d)'), r'\1'),
+]
+
+
+def normalize_name(name):
+    """
+    Return the canonical lookup key of a source name.
+
+    Case, blanks and underscores are ignored, prefix aliases such as
+    ``LDN``/``Lynds`` or ``CRL``/``AFGL`` are unified and cosmetic hyphens
+    are dropped, so ``"NGC_2024"``, ``"ngc 2024"`` and ``"NGC2024"`` all
+    give ``"NGC2024"``.
+
+    Parameters
+    ----------
+    name : str
+
+    Returns
+    -------
+    str or None
+        None for a missing name (None, NaN, NA), as :func:`normalize_names`
+        keeps them missing.
+    """
+    if pd.api.types.is_scalar(name) and pd.isna(name):
+        return None
+    key = unicodedata.normalize('NFKC', str(name)).translate(_GREEK).upper().strip()
+    for pattern, repl in _RULES:
+        key = pattern.sub(repl, key)
+    return key
+
+
+def normalize_names(names):
+    """
+    Vectorized :func:`normalize_name` over a Series or sequence of names.
+
+    Missing names stay missing. Catalog name columns repeat each object
+    many times, so only the distinct names are normalized.
+
+    Returns
+    -------
+    Series
+    """
+    codes, uniques = pd.factorize(pd.Series(names, dtype=object))
+    keys = pd.Series(uniques, dtype=object).astype('string')
+    keys = keys.str.normalize('NFKC').str.translate(_GREEK).str.upper().str.strip()
+    for pattern, repl in _RULES:
+        keys = keys.str.replace(pattern, repl, regex=True)
+    return pd.Series(keys.array.take(codes, allow_fill=True), dtype='string')
+
+
+def _fingerprint(names):
+    """Content hash of a name column (values and row labels)."""
+    hashed = pd.util.hash_pandas_object(names.astype('string'), index=True)
+    return hashlib.sha256(hashed.to_numpy().tobytes()).hexdigest()
+
+
+def _json_label(label):
+    return label.item() if hasattr(label, 'item') else label
+
+
+class NameIndex:
+    """
+    Map canonical source names to rows of several catalogs.
+
+    Parameters
+    ----------
+    path : str, optional
+        JSON file backing the index. It is read if it exists, and
+        :meth:`save` writes to it.
+
+    Examples
+    --------
+    >>> index = NameIndex()
+    >>> index.update('Dotson2010', get_dotson2010())
+    >>> index.update('Crutcher2010', get_crutcher2010())
+    >>> index.lookup('NGC 2024')
+    {'Crutcher2010': [5, 123], 'Dotson2010': [...]}
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        # per catalog: {'column', 'fingerprint', 'keys': {key: [row labels]}}
+        self._catalogs = {}
+        # merged: {key: {catalog: [row labels]}}
+        self._keys = {}
+        self._sorted = None
+        if path is not None and os.path.exists(path):
+            self._read(path)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, name):
+        return normalize_name(name) in self._keys
+
+    @property
+    def catalogs(self):
+        """Names of the indexed catalogs."""
+        return sorted(self._catalogs)
+
+    # ------------------------------------------------------------------
+    # building
+    # ------------------------------------------------------------------
+    def _merge(self, catalog, keys):
+        for key, rows in keys.items():
+            self._keys.setdefault(key, {})[catalog] = rows
+        self._sorted = None
+
+    def remove(self, catalog):
+        """Drop all entries of `catalog` from the index."""
+        entry = self._catalogs.pop(catalog, None)
+        if entry is None:
+            return
+        for key in entry['keys']:
+            hits = self._keys.get(key)
+            if hits is not None:
+                hits.pop(catalog, None)
+                if not hits:
+                    del self._keys[key]
+        self._sorted = None
+
+    def update(self, catalog, df, column=None):
+        """
+        Index (or re-index) the names of one loaded catalog.
+
+        Only the entries of `catalog` are rebuilt; if its name column is
+        unchanged since the last update, nothing is done.
+
+        Parameters
+        ----------
+        catalog : str
+            Label of the catalog in lookup results.
+        df : DataFrame
+            Loaded catalog.
+        column : str, optional
+            Name column. Defaults to the first of ``NAME_COLUMNS`` present.
+
+        Returns
+        -------
+        bool
+            True if the index changed.
+
+        Raises
+        ------
+        KeyError
+            If no name column is found.
+        """
+        if column is None:
+            column = next((c for c in NAME_COLUMNS if c in df.columns), None)
+            if column is None:
+                raise KeyError("No name column among %s; pass column=." % (NAME_COLUMNS,))
+        names = df[column]
+        fingerprint = _fingerprint(names)
+        previous = self._catalogs.get(catalog)
+        if previous is not None and previous['fingerprint'] == fingerprint \
+                and previous['column'] == column:
+            return False
+
+        labels = df.index.to_numpy()
+        keys = normalize_names(names.to_numpy()).to_numpy(dtype=object, na_value=None)
+        groups = pd.Series(labels, dtype=object).groupby(keys, sort=False).indices
+        entries = {key: [_json_label(labels[i]) for i in positions]
+                   for key, positions in groups.items() if key}
+
+        self.remove(catalog)
+        self._catalogs[catalog] = {'column': column, 'fingerprint': fingerprint, 'keys': entries}
+        self._merge(catalog, entries)
+        return True
+
+    def update_registered(self, catalog, table=None, column=None, **kwargs):
+        """
+        Load a registered catalog table and index it under its catalog name.
+
+        Extra keyword arguments are forwarded to the loader (see
+        :func:`maguniverse.load`).
+
+        Returns
+        -------
+        bool
+            True if the index changed.
+        """
+        from maguniverse.registry import load
+
+        return self.update(catalog, load(catalog, table, **kwargs), column=column)
+
+    # ------------------------------------------------------------------
+    # queries
+    # ------------------------------------------------------------------
+    def lookup(self, name, prefix=False):
+        """
+        Rows matching `name` in every indexed catalog.
+
+        Parameters
+        ----------
+        name : str
+            Source name in any spelling.
+        prefix : bool, optional
+            Also match keys starting with the normalized name, e.g. for
+            the truncated 12-character IDs of Dotson2010
+            (``"IRAS_16293-2"``). Uses a binary search over the sorted keys.
+
+        Returns
+        -------
+        dict
+            Row labels keyed by catalog name; empty if there is no match.
+        """
+        key = normalize_name(name)
+        if key is None:
+            return {}
+        if not prefix:
+            return {catalog: list(rows) for catalog, rows in self._keys.get(key, {}).items()}
+
+        if self._sorted is None:
+            self._sorted = sorted(self._keys)
+        found = {}
+        start = bisect.bisect_left(self._sorted, key)
+        for other in self._sorted[start:]:
+            if not other.startswith(key):
+                break
+            for catalog, rows in self._keys[other].items():
+                found.setdefault(catalog, []).extend(rows)
+        return found
+
+    def select(self, name, catalogs, prefix=False):
+        """
+        Rows matching `name`, taken from loaded catalogs.
+
+        Parameters
+        ----------
+        name : str
+        catalogs : dict
+            DataFrames keyed by catalog name, as indexed.
+        prefix : bool, optional
+            See :meth:`lookup`.
+
+        Returns
+        -------
+        dict
+            DataFrames keyed by catalog name, for catalogs with a match.
+        """
+        return {catalog: catalogs[catalog].loc[rows]
+                for catalog, rows in self.lookup(name, prefix=prefix).items()
+                if catalog in catalogs}
+
+    # ------------------------------------------------------------------
+    # persistence
+    # ------------------------------------------------------------------
+    def _read(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != FORMAT_VERSION:
+            return
+        self._catalogs = data['catalogs']
+        self._keys = {}
+        for catalog, entry in self._catalogs.items():
+            self._merge(catalog, entry['keys'])
+
+    def save(self, path=None):
+        """
+        Write the index to `path` (default: the path it was created with).
+
+        The file is replaced atomically.
+        """
+        path = path or self.path
+        if path is None:
+            raise ValueError("No path given for saving the name index.")
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = _tmp_name(path)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': FORMAT_VERSION, 'catalogs': self._catalogs}, f)
+        os.replace(tmp_path, path)
+        self.path = path
+
+
+def build_name_index(catalogs, path=None, columns=None):
+    """
+    Build (or incrementally refresh) a :class:`NameIndex`.
+
+    Parameters
+    ----------
+    catalogs : dict
+        Loaded DataFrames keyed by catalog name.
+    path : str, optional
+        Backing JSON file. An existing index there is reused, so only
+        catalogs whose names changed are re-indexed, and the result is
+        saved back.
+    columns : dict, optional
+        Name column per catalog, for catalogs not using ``NAME_COLUMNS``.
+
+    Returns
+    -------
+    NameIndex
+    """
+    columns = columns or {}
+    index = NameIndex(path)
+    changed = False
+    for catalog, df in catalogs.items():
+        changed |= index.update(catalog, df, column=columns.get(catalog))
+    if path is not None and changed:
+        index.save()
+    return index
@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+"""
+spatial.py
+-----------
+
+Spatial indexing for cone, box and pair searches.
+
+:class:`GridIndex` hashes points of any dimension into a uniform grid of
+cells, stores them sorted by cell key and answers fixed-radius queries by
+looking up only the neighbouring cells with ``searchsorted``; all queries
+of a batch are processed together in vectorized passes. :class:`SkyIndex`
+applies it to positions on the sphere (as 3-D unit vectors, so there is
+no RA wrap-around or pole singularity) and can be built over several
+catalogs at once.
+"""
+
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+from maguniverse.utils.coords import DEC_COL, RA_COL, angular_separation, radec_to_unit
+
+# Upper bound on the number of cells per axis, so cell keys fit in int64
+_MAX_CELLS_PER_AXIS = 2 ** 20
+
+# Number of query points processed per vectorized pass
+DEFAULT_CHUNK = 65536
+
+
+def expand_ranges(starts, counts):
+    """
+    Concatenate ``arange(s, s + c)`` for every (s, c) pair, vectorized.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    total = int(counts.sum())
+    if not total:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(np.asarray(starts, dtype=np.int64), counts) + offsets
+
+
+class GridIndex:
+    """
+    Uniform-grid index over points in d dimensions.
+
+    Parameters
+    ----------
+    points : array_like, shape (N, d)
+        Indexed points.
+    cell : float
+        Cell edge length. Queries with a radius close to `cell` are the most
+        efficient; the cell is enlarged if needed to keep keys in int64.
+    """
+
+    def __init__(self, points, cell):
+        points = np.asarray(points, dtype=np.float64)
+        if points.ndim == 1:
+            points = points[:, None]
+        self.points = points
+        ndim = points.shape[1]
+        if len(points):
+            self.origin = points.min(axis=0)
+            extent = float((points.max(axis=0) - self.origin).max())
+        else:
+            self.origin = np.zeros(ndim)
+            extent = 0.0
+        max_cells = min(_MAX_CELLS_PER_AXIS, int(2 ** (62 / ndim)))
+        self.cell = max(float(cell), extent / (max_cells - 1), 1e-300)
+
+        cells = self._cells(points)
+        self.dims = cells.max(axis=0) + 1 if len(points) else np.ones(ndim, dtype=np.int64)
+        self._strides = np.cumprod(np.concatenate(([1], self.dims[::-1][:-1])))[::-1]
+        keys = cells @ self._strides
+        self.order = np.argsort(keys, kind='stable')
+        self.keys = keys[self.order]
+        # occupied cells: one binary search per (query, cell) instead of two
+        self._ukeys, self._ustart, self._ucount = np.unique(
+            self.keys, return_index=True, return_counts=True)
+
+    def __len__(self):
+        return len(self.points)
+
+    def _cells(self, points):
+        return np.floor((points - self.origin) / self.cell).astype(np.int64)
+
+    def _sort_order(self, queries):
+        """Order of `queries` by grid cell, so lookups hit the keys in sequence."""
+        cells = np.clip(self._cells(queries), 0, self.dims - 1)
+        return np.argsort(cells @ self._strides, kind='stable')
+
+    def query_radius(self, queries, radius, chunk=DEFAULT_CHUNK):
+        """
+        Find all indexed points within `radius` of each query point.
+
+        Parameters
+        ----------
+        queries : array_like, shape (M, d)
+            Query points.
+        radius : float or array_like
+            Search radius, scalar or one per query.
+        chunk : int, optional
+            Number of queries handled per vectorized pass (bounds memory).
+
+        Returns
+        -------
+        tuple of ndarray
+            (query_idx, point_idx, distance), sorted by query then point.
+        """
+        queries = np.asarray(queries, dtype=np.float64)
+        if queries.ndim == 1:
+            queries = queries[:, None] if self.points.shape[1] == 1 else queries[None, :]
+        qi, pi, d = self._query(queries, radius, chunk)
+        order = np.lexsort((pi, qi))
+        return qi[order], pi[order], d[order]
+
+    def _query(self, queries, radius, chunk, upper=False):
+        """Unordered radius matches; with `upper`, only point indexes above the query's."""
+        radius = np.broadcast_to(np.asarray(radius, dtype=np.float64), (len(queries),))
+        out_q, out_p, out_d = [], [], []
+        if not len(self) or not len(queries):
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty(0)
+
+        # Visiting the queries in cell order keeps the binary searches
+        # local in memory, which dominates the cost for large indexes.
+        # queries with a missing coordinate or radius match nothing
+        finite = np.flatnonzero(np.isfinite(queries).all(axis=1) & np.isfinite(radius))
+        perm = finite[self._sort_order(queries[finite])]
+        for start in range(0, len(perm), chunk):
+            sel = perm[start:start + chunk]
+            q = queries[sel]
+            r = radius[sel]
+            qi, pi = self._candidates(q, float(r.max()))
+            if upper:
+                keep = sel[qi] < pi
+                qi, pi = qi[keep], pi[keep]
+            d2 = np.zeros(len(qi))
+            for axis in range(q.shape[1]):
+                d2 += (self.points[pi, axis] - q[qi, axis]) ** 2
+            d = np.sqrt(d2)
+            keep = d <= r[qi]
+            out_q.append(sel[qi[keep]])
+            out_p.append(pi[keep])
+            out_d.append(d[keep])
+
+        return _concat(out_q, np.int64), _concat(out_p, np.int64), _concat(out_d, float)
+
+    def _candidates(self, q, radius):
+        """(query, point) pairs from all cells within `radius` of each query."""
+        ndim = self.points.shape[1]
+        reach = int(np.ceil(radius / self.cell))
+        lo_cell = np.floor((q - radius - self.origin) / self.cell).astype(np.int64)
+        hi_cell = np.floor((q + radius - self.origin) / self.cell).astype(np.int64)
+
+        if (2 * reach + 1) ** ndim > max(len(self.keys) // 4, 27):
+            return self._candidates_by_occupied(lo_cell, hi_cell)
+
+        qcell = self._cells(q)
+        qkey = qcell @ self._strides
+        lo_cell = np.maximum(lo_cell, 0)
+        hi_cell = np.minimum(hi_cell, self.dims - 1)
+        # in_range[axis][o + reach]: neighbour at offset o along axis is searched
+        in_range = [[(qcell[:, axis] + o >= lo_cell[:, axis]) & (qcell[:, axis] + o <= hi_cell[:, axis])
+                     for o in range(-reach, reach + 1)] for axis in range(ndim)]
+        qis, pis = [], []
+        for offset in product(range(-reach, reach + 1), repeat=ndim):
+            valid = in_range[0][offset[0] + reach]
+            for axis in range(1, ndim):
+                valid = valid & in_range[axis][offset[axis] + reach]
+            rows = np.flatnonzero(valid)
+            if not len(rows):
+                continue
+            keys = qkey[rows] + int(np.dot(offset, self._strides))
+            pos = np.minimum(np.searchsorted(self._ukeys, keys), len(self._ukeys) - 1)
+            counts = np.where(self._ukeys[pos] == keys, self._ucount[pos], 0)
+            qis.append(np.repeat(rows, counts))
+            pis.append(self.order[expand_ranges(self._ustart[pos], counts)])
+        if not qis:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        return np.concatenate(qis), np.concatenate(pis)
+
+    def _candidates_by_occupied(self, lo_cell, hi_cell):
+        """Candidate pairs for large radii: scan the occupied cells instead."""
+        ukeys, ustart, ucount = self._ukeys, self._ustart, self._ucount
+        ucells = (ukeys[:, None] // self._strides) % self.dims
+        qis, pis = [], []
+        for i in range(len(lo_cell)):
+            hit = np.all((ucells >= lo_cell[i]) & (ucells <= hi_cell[i]), axis=1)
+            idx = self.order[expand_ranges(ustart[hit], ucount[hit])]
+            qis.append(np.full(len(idx), i, dtype=np.int64))
+            pis.append(idx)
+        return np.concatenate(qis), np.concatenate(pis)
+
+    def query_pairs(self, radius, chunk=DEFAULT_CHUNK):
+        """
+        Find all pairs ``i < j`` of indexed points closer than `radius`.
+
+        Returns
+        -------
+        tuple of ndarray
+            (i, j, distance), in no particular order.
+        """
+        return self._query(self.points, radius, chunk, upper=True)
+
+
+def _chord(radius_deg):
+    """Chord length on the unit sphere for an angular radius in degrees."""
+    return 2.0 * np.sin(np.radians(np.minimum(np.asarray(radius_deg, dtype=np.float64), 180.0)) / 2.0)
+
+
+def _concat(arrays, dtype):
+    return np.concatenate(arrays) if arrays else np.empty(0, dtype=dtype)
+
+
+class SkyIndex:
+    """
+    Spatial index over sky positions, optionally spanning several catalogs.
+
+    Parameters
+    ----------
+    ra, dec : array_like
+        Positions in degrees (ICRS).
+    cell_arcsec : float, optional
+        Grid cell size. Defaults to a size giving on average a few sources
+        per cell for a uniform sky distribution; choose a value close to the
+        typical query radius for clustered catalogs.
+    catalog : array_like of str, optional
+        Catalog label of every position.
+    row : array_like, optional
+        Row label (DataFrame index) of every position within its catalog.
+    """
+
+    def __init__(self, ra, dec, cell_arcsec=None, catalog=None, row=None):
+        self.ra = np.asarray(ra, dtype=np.float64)
+        self.dec = np.asarray(dec, dtype=np.float64)
+        finite = np.isfinite(self.ra) & np.isfinite(self.dec)
+        self._ids = np.flatnonzero(finite)
+        if cell_arcsec is None:
+            n = max(int(finite.sum()), 1)
+            cell = 2.0 * np.sqrt(4.0 * np.pi / n)
+        else:
+            cell = _chord(cell_arcsec / 3600.0)
+        self._grid = GridIndex(radec_to_unit(self.ra[finite], self.dec[finite]), cell)
+        self.catalog = None if catalog is None else np.asarray(catalog, dtype=object)
+        self.row = np.arange(len(self.ra)) if row is None else np.asarray(row)
+
+    @classmethod
+    def from_catalogs(cls, catalogs, ra_col=RA_COL, dec_col=DEC_COL, cell_arcsec=None):
+        """
+        Build one index over several loaded catalogs.
+
+        Parameters
+        ----------
+        catalogs : dict
+            DataFrames keyed by catalog name, each with decimal-degree
+            position columns.
+        ra_col, dec_col : str, optional
+            Names of the position columns.
+        cell_arcsec : float, optional
+            See :class:`SkyIndex`.
+        """
+        names, rows, ras, decs = [], [], [], []
+        for name, df in catalogs.items():
+            names.append(np.full(len(df), name, dtype=object))
+            rows.append(df.index.to_numpy())
+            ras.append(df[ra_col].to_numpy(dtype=np.float64))
+            decs.append(df[dec_col].to_numpy(dtype=np.float64))
+        return cls(_concat(ras, float), _concat(decs, float), cell_arcsec=cell_arcsec,
+                   catalog=_concat(names, object), row=_concat(rows, object))
+
+    def __len__(self):
+        return len(self.ra)
+
+    def _result(self, qi, ids, sep, as_frame):
+        if not as_frame:
+            return qi, ids, sep
+        out = pd.DataFrame({'query': qi, 'row': self.row[ids], 'sep (arcsec)': sep * 3600.0})
+        if self.catalog is not None:
+            out.insert(1, 'catalog', self.catalog[ids])
+        return out
+
+    def query_cones(self, ra, dec, radius_arcsec, as_frame=True, chunk=DEFAULT_CHUNK):
+        """
+        Batched cone search around many positions at once.
+
+        Parameters
+        ----------
+        ra, dec : array_like
+            Cone centers in degrees.
+        radius_arcsec : float or array_like
+            Cone radius, scalar or one per center.
+        as_frame : bool, optional
+            Return a DataFrame with 'query', ('catalog',) 'row' and
+            'sep (arcsec)' columns. Otherwise return the tuple
+            (query_idx, position_idx, separation_deg).
+
+        Returns
+        -------
+        DataFrame or tuple
+        """
+        ra = np.atleast_1d(np.asarray(ra, dtype=np.float64))
+        dec = np.atleast_1d(np.asarray(dec, dtype=np.float64))
+        radius = np.broadcast_to(np.asarray(radius_arcsec, dtype=np.float64) / 3600.0, ra.shape)
+        qi, pi, _ = self._grid.query_radius(radec_to_unit(ra, dec), _chord(radius), chunk=chunk)
+        ids = self._ids[pi]
+        sep = angular_separation(ra[qi], dec[qi], self.ra[ids], self.dec[ids])
+        keep = sep <= radius[qi]
+        return self._result(qi[keep], ids[keep], sep[keep], as_frame)
+
+    def query_cone(self, ra, dec, radius_arcsec):
+        """
+        Cone search around one position.
+
+        Returns
+        -------
+        tuple of ndarray
+            (position_idx, separation_arcsec) sorted by position index.
+        """
+        _, ids, sep = self.query_cones(ra, dec, radius_arcsec, as_frame=False)
+        return ids, sep * 3600.0
+
+    def query_box(self, ra_min, ra_max, dec_min, dec_max):
+        """
+        Positions inside an RA/Dec box (degrees); ``ra_min > ra_max`` wraps
+        through RA = 0.
+
+        Returns
+        -------
+        ndarray
+            Sorted position indices.
+        """
+        width = (ra_max - ra_min) % 360.0 or (360.0 if ra_max != ra_min else 0.0)
+        if width > 180.0 or dec_max - dec_min > 90.0:
+            candidates = self._ids
+        else:
+            ra_c = (ra_min + width / 2.0) % 360.0
+            dec_c = (dec_min + dec_max) / 2.0
+            edge_ra = np.array([ra_min, ra_max, ra_min, ra_max, ra_c, ra_c, ra_min, ra_max])
+            edge_dec = np.array([dec_min, dec_min, dec_max, dec_max, dec_min, dec_max, dec_c, dec_c])
+            radius = angular_separation(ra_c, dec_c, edge_ra, edge_dec).max()
+            # RA edges bulge poleward of their corners; pad the enclosing cone
+            radius = min(radius * 1.5 + 1e-9, 180.0)
+            candidates, _ = self.query_cone(ra_c, dec_c, radius * 3600.0)
+        ra = self.ra[candidates]
+        dec = self.dec[candidates]
+        in_ra = ((ra - ra_min) % 360.0) <= width
+        inside = in_ra & (dec >= dec_min) & (dec <= dec_max)
+        return np.sort(candidates[inside])
+
+    def nearest(self, ra, dec, max_radius_arcsec, as_frame=True, chunk=DEFAULT_CHUNK):
+        """
+        Nearest indexed position to each query within `max_radius_arcsec`.
+
+        Queries without a neighbour inside the radius are omitted.
+
+        Returns
+        -------
+        DataFrame or tuple
+            As for :meth:`query_cones`, with at most one row per query.
+        """
+        qi, ids, sep = self.query_cones(ra, dec, max_radius_arcsec, as_frame=False, chunk=chunk)
+        order = np.lexsort((sep, qi))
+        qi, ids, sep = qi[order], ids[order], sep[order]
+        first = np.ones(len(qi), dtype=bool)
+        first[1:] = qi[1:] != qi[:-1]
+        return self._result(qi[first], ids[first], sep[first], as_frame)
@@ -0,0 +1,372 @@
+# -*- coding: utf-8 -*-
+"""
+store.py
+-----------
+
+Consolidated, memory-mapped store of every loaded catalog table.
+
+:func:`build_store` runs the registered loaders (or takes ready
+DataFrames) and writes all tables into one directory:
+
+- ``data.bin`` holds every column as a fixed-width array at a 64-byte
+  aligned offset. Numeric columns are stored as is. Text columns are
+  dictionary-encoded as small integer codes plus a fixed-width unicode
+  array of the distinct values; object columns holding only numbers or
+  only booleans keep typed distinct values, and mixed-type columns are
+  rejected.
+- ``manifest.json`` describes each table: row count, column dtypes,
+  offsets and the ``DataFrame.attrs`` (units, formats).
+
+:func:`open_store` reads the manifest and maps ``data.bin`` read-only, so
+opening costs the same whatever the data size. Tables are assembled on
+demand as views of the mapping. Worker processes opening the same store
+share one copy of the data through the page cache, and nothing is parsed
+or copied.
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from maguniverse.registry import registered_tables
+from maguniverse.utils.cache import _tmp_name
+from maguniverse.utils.columnar import _json_attrs
+
+FORMAT_VERSION = 1
+DATA_FILE = 'data.bin'
+MANIFEST_FILE = 'manifest.json'
+
+# Byte alignment of every array in the data file
+ALIGNMENT = 64
+
+
+def table_key(catalog, table):
+    """Key of a table in the store, e.g. ``'Dotson2010/t2'``."""
+    return '%s/%s' % (catalog, table)
+
+
+def _code_dtype(n):
+    for dtype in (np.int8, np.int16, np.int32):
+        if n < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+class _DataWriter:
+    """Appends aligned arrays to the data file and describes them."""
+
+    def __init__(self, f):
+        self.f = f
+        self.offset = 0
+
+    def write(self, array):
+        array = np.ascontiguousarray(array)
+        pad = -self.offset % ALIGNMENT
+        self.f.write(b'\0' * pad)
+        self.offset += pad
+        desc = {'offset': self.offset, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+        self.f.write(array.tobytes())
+        self.offset += array.nbytes
+        return desc
+
+
+def _categories_array(categories, name):
+    """Distinct values of a dictionary-encoded column as a fixed-width array."""
+    values = categories.to_numpy()
+    if categories.dtype.kind in 'biufmM':
+        return values
+    kind = pd.api.types.infer_dtype(values, skipna=False)
+    if kind in ('string', 'empty'):
+        return np.asarray(values, dtype=str)
+    if kind == 'boolean':
+        return values.astype(bool)
+    if kind == 'integer':
+        return values.astype(np.int64)
+    if kind in ('floating', 'mixed-integer-float'):
+        return values.astype(np.float64)
+    raise TypeError("Column %r holds values of inferred type %r, which cannot be stored; "
+                    "convert it to a single type first." % (name, kind))
+
+
+def _write_column(writer, series):
+    """Write one column; return its manifest description."""
+    dtype = series.dtype
+    desc = {'dtype': str(dtype)}
+    if isinstance(dtype, pd.CategoricalDtype):
+        codes, categories = series.cat.codes.to_numpy(), dtype.categories
+        desc['ordered'] = bool(dtype.ordered)
+    elif dtype.kind in 'biufcmM' and not pd.api.types.is_extension_array_dtype(dtype):
+        desc['kind'] = 'numeric'
+        desc['data'] = writer.write(series.to_numpy())
+        return desc
+    else:
+        codes, categories = pd.factorize(series, use_na_sentinel=True)
+        categories = pd.Index(categories)
+    codes = codes.astype(_code_dtype(len(categories)))
+    desc['kind'] = 'dictionary'
+    desc['data'] = writer.write(codes)
+    desc['categories'] = writer.write(_categories_array(categories, series.name))
+    return desc
+
+
+def _write_table(writer, df):
+    index = df.index
+    has_index = not (isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1)
+    series_list = [(name, df.iloc[:, i]) for i, name in enumerate(df.columns)]
+    if has_index:
+        series_list.append((index.name, index.to_series()))
+    columns = []
+    for name, series in series_list:
+        desc = _write_column(writer, series)
+        desc['name'] = name
+        columns.append(desc)
+    entry = {'nrows': int(len(df)), 'columns': columns, 'index': has_index}
+    attrs = _json_attrs(df.attrs)
+    if attrs:
+        entry['attrs'] = attrs
+    return entry
+
+
+def build_store(path, tables=None, errors='raise', **loader_kwargs):
+    """
+    Write catalog tables into a consolidated memory-mappable store.
+
+    Parameters
+    ----------
+    path : str
+        Store directory. An existing store there is replaced atomically
+        once the new one is complete.
+    tables : dict or iterable of (str, str), optional
+        Either ``(catalog, table)`` pairs to load through the registry, or
+        a dict mapping such pairs (or ``'Catalog/table'`` keys) to
+        DataFrames that are already loaded. Every registered table by
+        default.
+    errors : {'raise', 'skip'}, optional
+        Whether a loader failure (e.g. an unreachable server) aborts the
+        build or only leaves that table out.
+    **loader_kwargs
+        Forwarded to every loader, e.g. ``compact=True`` or ``cache=``.
+
+    Returns
+    -------
+    dict
+        The manifest. Tables skipped after an error are listed under
+        'errors' with the error message.
+
+    Raises
+    ------
+    TypeError
+        If an object column mixes text with numbers, or holds values that
+        are neither text, numbers nor booleans.
+    """
+    from maguniverse.registry import load
+
+    if tables is None:
+        tables = registered_tables()
+    if not isinstance(tables, dict):
+        tables = dict.fromkeys(tables)
+
+    path = os.path.abspath(path)
+    tmp_path = _tmp_name(path)
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    manifest = {'format_version': FORMAT_VERSION, 'tables': {}, 'errors': {}}
+    try:
+        with open(os.path.join(tmp_path, DATA_FILE), 'wb') as f:
+            writer = _DataWriter(f)
+            for key, df in tables.items():
+                if isinstance(key, tuple):
+                    catalog, table = key
+                    key = table_key(catalog, table)
+                else:
+                    catalog, table = key.split('/', 1)
+                if df is None:
+                    try:
+                        df = load(catalog, table, **loader_kwargs)
+                    except Exception as exc:
+                        if errors != 'skip':
+                            raise
+                        manifest['errors'][key] = '%s: %s' % (type(exc).__name__, exc)
+                        continue
+                entry = _write_table(writer, df)
+                entry.update(catalog=catalog, table=table)
+                manifest['tables'][key] = entry
+            manifest['nbytes'] = writer.offset
+        with open(os.path.join(tmp_path, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+
+        if os.path.isdir(path):
+            old_path = _tmp_name(path + '.old')
+            os.replace(path, old_path)
+            os.replace(tmp_path, path)
+            shutil.rmtree(old_path, ignore_errors=True)
+        else:
+            os.replace(tmp_path, path)
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    return manifest
+
+
+class CatalogStore:
+    """
+    Read-only view of a store written by :func:`build_store`.
+
+    Parameters
+    ----------
+    path : str
+        Store directory.
+
+    Notes
+    -----
+    Numeric columns and dictionary codes are views of one read-only
+    ``np.memmap``; pandas copies a column only when it is modified.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('format_version') != FORMAT_VERSION:
+            raise ValueError("Unsupported store format version %r."
+                             % self.manifest.get('format_version'))
+        if self.manifest.get('nbytes'):
+            self._data = np.memmap(os.path.join(path, DATA_FILE), dtype=np.uint8, mode='r')
+        else:
+            self._data = np.empty(0, dtype=np.uint8)
+
+    def __repr__(self):
+        return '<CatalogStore %r: %d tables>' % (self.path, len(self.manifest['tables']))
+
+    def __contains__(self, key):
+        return key in self.manifest['tables']
+
+    def __iter__(self):
+        return iter(self.manifest['tables'])
+
+    def __len__(self):
+        return len(self.manifest['tables'])
+
+    def __getitem__(self, key):
+        return self.table(key)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        """Drop the mapping; DataFrames already returned keep it alive."""
+        self._data = None
+
+    @property
+    def closed(self):
+        """True once :meth:`close` was called."""
+        return self._data is None
+
+    def keys(self):
+        """Table keys ``'Catalog/table'`` in build order."""
+        return list(self.manifest['tables'])
+
+    def _array(self, desc):
+        dtype = np.dtype(desc['dtype'])
+        count = int(np.prod(desc['shape'], dtype=np.int64))
+        return np.frombuffer(self._data, dtype=dtype, count=count,
+                             offset=desc['offset']).reshape(desc['shape'])
+
+    def _column(self, desc, decode):
+        if desc['kind'] == 'numeric':
+            return self._array(desc['data'])
+        codes = self._array(desc['data'])
+        categories = self._array(desc['categories'])
+        if desc['dtype'] == 'category' or not decode:
+            dtype = pd.CategoricalDtype(categories, ordered=desc.get('ordered', False))
+            return pd.Categorical.from_codes(codes, dtype=dtype, validate=False)
+        values = pd.Series(categories.astype(object)).reindex(codes).to_numpy()
+        try:
+            return pd.array(values, dtype=desc['dtype'])
+        except TypeError:
+            return values
+
+    def table(self, catalog, table=None, columns=None, decode_strings=False):
+        """
+        Return a stored table as a DataFrame.
+
+        Parameters
+        ----------
+        catalog : str
+            Catalog name, or a full ``'Catalog/table'`` key.
+        table : str, optional
+            Table name; may be omitted when the catalog has a single table
+            in the store.
+        columns : list of str, optional
+            Subset of columns. All columns by default.
+        decode_strings : bool, optional
+            If True, dictionary-encoded columns (text, and object columns of
+            numbers or booleans) get their original dtype and values back,
+            which copies them. By default they are categoricals whose codes
+            are views of the store.
+
+        Returns
+        -------
+        DataFrame
+
+        Raises
+        ------
+        KeyError
+            If the table is not in the store.
+        ValueError
+            If the store was closed.
+        """
+        if self.closed:
+            raise ValueError("Cannot read from the closed store %r." % self.path)
+        key = self._resolve(catalog, table)
+        entry = self.manifest['tables'][key]
+        descs = entry['columns']
+        index = None
+        if entry['index']:
+            index = pd.Index(self._column(descs[-1], decode_strings), name=descs[-1]['name'])
+            descs = descs[:-1]
+        if columns is not None:
+            wanted = set(columns)
+            descs = [d for d in descs if d['name'] in wanted]
+        data = {d['name']: self._column(d, decode_strings) for d in descs}
+        df = pd.DataFrame(data, index=index, copy=False)
+        if not descs:
+            df = pd.DataFrame(index=index if index is not None else pd.RangeIndex(entry['nrows']))
+        df.attrs.update(entry.get('attrs', {}))
+        return df
+
+    def _resolve(self, catalog, table):
+        tables = self.manifest['tables']
+        if table is not None:
+            key = table_key(catalog, table)
+        elif catalog in tables:
+            key = catalog
+        else:
+            matches = [k for k, e in tables.items() if e['catalog'] == catalog]
+            if len(matches) != 1:
+                raise KeyError("Catalog %r has %s in the store; pass table=."
+                               % (catalog, ', '.join(matches) or 'no tables'))
+            key = matches[0]
+        if key not in tables:
+            raise KeyError("Table %r is not in the store; available: %s"
+                           % (key, ', '.join(tables)))
+        return key
+
+
+def open_store(path):
+    """
+    Open a store written by :func:`build_store`.
+
+    Only the manifest is read; the data file is memory-mapped.
+
+    Returns
+    -------
+    CatalogStore
+    """
+    return CatalogStore(path)
@@ -0,0 +1,345 @@
+# -*- coding: utf-8 -*-
+"""
+table_cache.py
+-----------
+
+Second cache tier holding parsed DataFrames in the binary columnar layout
+of :mod:`maguniverse.utils.columnar`.
+
+Entries are keyed on the SHA-256 of the raw ASCII text and a fingerprint
+of the parser function (the source of its module and of every package
+module it reaches, e.g. :mod:`maguniverse.utils.mrt`, and any parser
+options), so a warm load memory-maps the stored columns instead of
+re-running ``read_csv``/``read_fwf``. Editing a parser or one of the
+readers it calls, or receiving a new raw file, changes the key, and
+entries written by an outdated parser are removed.
+
+Derived columns computed from a parsed table (see :func:`derive_cached`)
+are stored the same way, keyed on the raw text, the parser and the
+derivation function, so they are computed once per data version.
+
+Misses are single-flight: the parse of an entry runs under a lock on that
+entry, so when several processes load the same table at once one of them
+parses it and the others memory-map its result.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import sys
+
+from maguniverse.utils.cache import _tmp_name, default_cache_dir, sha256_bytes
+from maguniverse.utils.columnar import FORMAT_VERSION, read_columns, write_columns
+from maguniverse.utils.locking import file_lock
+from maguniverse.utils.metrics import phase
+
+
+_PACKAGE = __name__.split('.')[0]
+
+
+def _in_package(module):
+    """True if the module name `module` belongs to this package."""
+    module = module or ''
+    return module == _PACKAGE or module.startswith(_PACKAGE + '.')
+
+
+def _referenced_names(code):
+    """Global and attribute names used by `code` and its nested functions."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _referenced_names(const)
+    return names
+
+
+def _code_bytes(code):
+    """Bytecode and constants of `code`, without memory addresses."""
+    out = code.co_code
+    for const in code.co_consts:
+        out += _code_bytes(const) if inspect.iscode(const) else repr(const).encode('utf-8')
+    return out
+
+
+def _reached_modules(func, seen, modules):
+    """
+    Add to `modules` the module of `func` and of every function or class
+    of the package it reaches, directly, through a module attribute
+    (``mrt.read_mrt``) or through a function-level import.
+    """
+    func = inspect.unwrap(func)
+    if func in seen:
+        return
+    seen.add(func)
+    modules[func.__module__] = func
+
+    namespace = getattr(func, '__globals__', {})
+    names = _referenced_names(func.__code__)
+    values = []
+    for name in names:
+        value = namespace.get(name, sys.modules.get(name))
+        if inspect.ismodule(value):
+            if _in_package(value.__name__):
+                values += [getattr(value, attr) for attr in names if hasattr(value, attr)]
+        elif value is not None:
+            values.append(value)
+
+    for value in values:
+        if inspect.isfunction(value) and _in_package(value.__module__):
+            _reached_modules(value, seen, modules)
+        elif inspect.isclass(value) and _in_package(value.__module__) and value not in seen:
+            seen.add(value)
+            for attr in vars(value).values():
+                attr = getattr(attr, '__func__', attr)
+                if inspect.isfunction(attr):
+                    _reached_modules(attr, seen, modules)
+
+
+def _module_bytes(name, func):
+    """Source of module `name`, or the bytecode of `func` when it has none."""
+    try:
+        return inspect.getsource(sys.modules[name]).encode('utf-8')
+    except (KeyError, OSError, TypeError):
+        return _code_bytes(inspect.unwrap(func).__code__)
+
+
+# parser -> digest of its definition; parsers are module-level functions,
+# so the memo lives as long as the process (reload a module to refit it)
+_definitions = {}
+
+
+def _definition_digest(parser):
+    """
+    Hash of the source of every package module `parser` reaches: its code,
+    the constants it reads and the readers it delegates to, but none of
+    the modules' runtime state.
+    """
+    digest = _definitions.get(parser)
+    if digest is None:
+        modules = {}
+        _reached_modules(parser, set(), modules)
+        h = hashlib.sha256()
+        for name in sorted(modules):
+            h.update(name.encode('utf-8') + b'\0')
+            h.update(_module_bytes(name, modules[name]))
+        digest = _definitions[parser] = h.hexdigest()
+    return digest
+
+
+def parser_fingerprint(parser, **options):
+    """
+    Return a short hash identifying the definition of `parser`.
+
+    The fingerprint covers the source of the parser's module and of every
+    package module it reaches (transitively, through the functions and
+    classes it calls), the columnar format version and the keyword
+    `options` passed to it. The module part is computed once per parser
+    and process.
+    """
+    h = hashlib.sha256(_definition_digest(parser).encode('ascii'))
+    h.update(json.dumps(options, sort_keys=True, default=str).encode('utf-8'))
+    h.update(str(FORMAT_VERSION).encode('ascii'))
+    return h.hexdigest()[:16]
+
+
+def _options_digest(options):
+    return hashlib.sha256(
+        json.dumps(options, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:8]
+
+
+def _parser_name(parser):
+    return '%s.%s' % (parser.__module__, getattr(parser, '__qualname__', parser.__name__))
+
+
+class TableCache:
+    """
+    On-disk cache of parsed tables.
+
+    Parameters
+    ----------
+    directory : str, optional
+        Cache root. Defaults to ``<default_cache_dir()>/tables``.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.path.join(default_cache_dir(), 'tables')
+
+    def entry_dir(self, raw, parser, **options):
+        """Return the directory holding the parsed form of `raw`."""
+        if isinstance(raw, str):
+            raw = raw.encode('utf-8')
+        return os.path.join(
+            self.directory,
+            _parser_name(parser),
+            '%s-%s' % (parser_fingerprint(parser, **options), _options_digest(options)),
+            sha256_bytes(raw)[:32],
+        )
+
+    def load(self, raw, parser, **options):
+        """Return the cached DataFrame for `raw`, or None on a miss."""
+        path = self.entry_dir(raw, parser, **options)
+        try:
+            return read_columns(path)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def lock(self, raw, parser, **options):
+        """Return the :class:`~maguniverse.utils.locking.FileLock` of an entry."""
+        return file_lock(self.entry_dir(raw, parser, **options))
+
+    def store(self, raw, parser, df, **options):
+        """Store `df` as the parsed form of `raw` and prune outdated entries."""
+        path = self.entry_dir(raw, parser, **options)
+        tmp_path = _tmp_name(path)
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        write_columns(df, tmp_path)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+
+        # entries written with the same options by a different parser
+        # definition (or by an older cache layout) are dead
+        parser_dir = os.path.dirname(os.path.dirname(path))
+        current = os.path.basename(os.path.dirname(path))
+        suffix = current[current.index('-'):]
+        for name in os.listdir(parser_dir):
+            if name != current and '.tmp' not in name and ('-' not in name or name.endswith(suffix)):
+                shutil.rmtree(os.path.join(parser_dir, name), ignore_errors=True)
+
+    def clear(self):
+        """Remove every cached table."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+_default_table_cache = None
+
+
+def get_default_table_cache():
+    """Return the process-wide :class:`TableCache` instance."""
+    global _default_table_cache
+    directory = os.path.join(default_cache_dir(), 'tables')
+    if _default_table_cache is None or _default_table_cache.directory != directory:
+        _default_table_cache = TableCache(directory)
+    return _default_table_cache
+
+
+def _compute_and_store(cache, raw, func, compute, m, options):
+    """
+    Store ``compute()`` as the `func` entry of `raw` under the entry lock,
+    unless a concurrent caller did.
+    """
+    try:
+        lock = cache.lock(raw, func, **options)
+        lock.acquire()
+    except OSError:
+        # unwritable cache: compute without storing
+        m['cache'] = 'miss'
+        return compute()
+    try:
+        m['lock_wait'] = round(lock.wait, 6)
+        df = cache.load(raw, func, **options)
+        if df is not None:
+            return df
+        m['cache'] = 'miss'
+        df = compute()
+        try:
+            with phase('table_cache.store'):
+                cache.store(raw, func, df, **options)
+        except OSError:
+            pass
+        return df
+    finally:
+        lock.release()
+
+
+def parse_cached(raw, parser, cache=None, **options):
+    """
+    Return ``parser(raw, **options)``, using the parsed-table cache.
+
+    Parameters
+    ----------
+    raw : str
+        Raw ASCII text.
+    parser : callable
+        Function turning the raw text into a DataFrame.
+    cache : TableCache, bool or None, optional
+        Table cache to use. None uses the default cache, False always parses.
+    **options
+        Keyword arguments forwarded to `parser`; they are part of the key.
+
+    Returns
+    -------
+    DataFrame
+
+    Notes
+    -----
+    The call is reported as a 'parse' phase to the metrics hooks, with the
+    parser name, the number of rows and the table-cache outcome. On a miss
+    it also reports the seconds spent waiting for a concurrent parse of the
+    same entry ('lock_wait'); that wait ends in a 'hit' when the other
+    process stored the table.
+    """
+    with phase('parse', parser=_parser_name(parser)) as m:
+        if cache is False:
+            m['cache'] = 'off'
+            df = parser(raw, **options)
+        else:
+            if cache is None:
+                cache = get_default_table_cache()
+
+            df = cache.load(raw, parser, **options)
+            m['cache'] = 'hit'
+            if df is None:
+                df = _compute_and_store(cache, raw, parser,
+                                        lambda: parser(raw, **options), m, options)
+        m['rows'] = len(df)
+    return df
+
+
+def derive_cached(raw, df, func, cache=None, parser=None, **options):
+    """
+    Return ``func(df, **options)``, cached next to the parsed form of `raw`.
+
+    Parameters
+    ----------
+    raw : str
+        Raw ASCII text `df` was parsed from.
+    df : DataFrame
+        Parsed table.
+    func : callable
+        Function computing a DataFrame of derived columns from `df`.
+    cache : TableCache, bool or None, optional
+        Table cache to use. None uses the default cache, False always
+        computes.
+    parser : callable, optional
+        Parser that produced `df`; its fingerprint is part of the key, so
+        editing the parser also invalidates the derived columns.
+    **options
+        Keyword arguments forwarded to `func`; they are part of the key.
+
+    Returns
+    -------
+    DataFrame
+
+    Notes
+    -----
+    The call is reported as a 'derive' phase to the metrics hooks, with the
+    function name, the number of rows and the table-cache outcome.
+    """
+    with phase('derive', func=_parser_name(func)) as m:
+        if cache is False:
+            m['cache'] = 'off'
+            out = func(df, **options)
+        else:
+            if cache is None:
+                cache = get_default_table_cache()
+            key = dict(options)
+            if parser is not None:
+                key['_parser'] = parser_fingerprint(parser)
+
+            out = cache.load(raw, func, **key)
+            m['cache'] = 'hit'
+            if out is None:
+                out = _compute_and_store(cache, raw, func, lambda: func(df, **options), m, key)
+        m['rows'] = len(out)
+    return out
@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+"""
+vizier.py
+-----------
+
+Reader for VizieR ``asu-txt`` query output.
+
+The fixed-width body is preceded by ``#Column`` lines giving the name,
+Fortran format and description of every output column, a header line, a
+units line and a line of dashes whose runs mark the byte range of each
+column. The layout is derived from that header instead of being
+hard-coded, so the same reader serves any ``-out=`` column selection.
+
+:func:`vizier_query_url` pushes a column selection, row constraints and a
+cone down into the query string of an ``asu-txt`` URL, so only the needed
+rows and columns are downloaded. :func:`apply_constraints` evaluates the
+same constraints on a DataFrame, so a local copy of a table can be
+filtered with the same meaning.
+"""
+
+import re
+from fnmatch import fnmatchcase
+from io import StringIO
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit, urlunsplit
+
+import numpy as np
+import pandas as pd
+
+_COLUMN_LINE = re.compile(r'^#Column\t([^\t]+)\t\(([^)]*)\)\t?([^\t]*)')
+_DASHES = re.compile(r'^[- ]*-[- ]*$')
+
+
+def parse_vizier_header(raw):
+    """
+    Parse the header of a VizieR ``asu-txt`` response.
+
+    Parameters
+    ----------
+    raw : str
+        Response text.
+
+    Returns
+    -------
+    tuple
+        (columns, colspecs, data_start) where `columns` is a list of
+        (name, format, description) tuples, `colspecs` the matching
+        (start, end) character ranges and `data_start` the index of the
+        first data line.
+
+    Raises
+    ------
+    ValueError
+        If no dashed column-separator line is found.
+    """
+    lines = raw.splitlines()
+    columns = []
+    for i, line in enumerate(lines):
+        m = _COLUMN_LINE.match(line)
+        if m:
+            columns.append((m.group(1).strip(), m.group(2).strip(), m.group(3).strip()))
+            continue
+        if line.startswith('#') or not _DASHES.match(line):
+            continue
+
+        colspecs = [m.span() for m in re.finditer(r'-+', line)]
+        if len(columns) != len(colspecs):
+            # fall back to the header line above the units line
+            header = lines[i - 2] if i >= 2 and not lines[i - 2].startswith('#') else lines[i - 1]
+            columns = [(name, '', '') for name in header.split()]
+            if len(columns) != len(colspecs):
+                columns = [(header[a:b].strip() or 'col%d' % k, '', '')
+                           for k, (a, b) in enumerate(colspecs)]
+        return columns, colspecs, i + 1
+
+    raise ValueError("No VizieR column separator line found.")
+
+
+def read_vizier_asu(raw, names=None):
+    """
+    Read a VizieR ``asu-txt`` response into a DataFrame.
+
+    Parameters
+    ----------
+    raw : str
+        Response text.
+    names : list of str, optional
+        Column names to use instead of the VizieR labels.
+
+    Returns
+    -------
+    DataFrame
+        The Fortran formats of the columns are available in
+        ``df.attrs['formats']``.
+    """
+    columns, colspecs, data_start = parse_vizier_header(raw)
+    lines = raw.splitlines()[data_start:]
+    # the body ends at the first blank or comment line
+    end = next((k for k, line in enumerate(lines)
+                if not line.strip() or line.startswith('#')), len(lines))
+    labels = names if names is not None else [c[0] for c in columns]
+    if not end:
+        return pd.DataFrame(columns=labels)
+
+    df = pd.read_fwf(
+        StringIO('\n'.join(lines[:end])),
+        names=labels,
+        colspecs=colspecs,
+        header=None,
+    )
+    df.attrs['formats'] = {label: c[1] for label, c in zip(labels, columns)}
+    return df
+
+
+_UNIT_SUFFIX = re.compile(r' \([^()]*(\([^()]*\))?[^()]*\)$')
+_OPERATORS = ('>=', '<=', '!=', '>', '<', '=')
+
+
+def vizier_label(name):
+    """VizieR label of a loader column, e.g. ``'Tkin (K)'`` -> ``'Tkin'``."""
+    return _UNIT_SUFFIX.sub('', name)
+
+
+def is_vizier_query(url):
+    """Return True if `url` is a VizieR ``asu-*`` query URL."""
+    return url is not None and '/viz-bin/asu-' in url
+
+
+def _format_value(value):
+    if isinstance(value, (float, np.floating)):
+        return repr(float(value))
+    return str(value)
+
+
+def format_constraint(value):
+    """
+    Format a row constraint in the VizieR query syntax.
+
+    Parameters
+    ----------
+    value : str, number, tuple or list
+        A string is used as is (e.g. ``'>10'``, ``'1..50'``, ``'L1551*'``).
+        A ``(low, high)`` tuple is an inclusive range, where None leaves a
+        side open; a list or set matches any of its values; any other
+        value must be equal.
+
+    Returns
+    -------
+    str
+    """
+    if isinstance(value, str):
+        return value
+    if isinstance(value, tuple):
+        low, high = value
+        if low is None and high is None:
+            raise ValueError("A range constraint needs at least one bound.")
+        if low is None:
+            return '<=' + _format_value(high)
+        if high is None:
+            return '>=' + _format_value(low)
+        return '%s..%s' % (_format_value(low), _format_value(high))
+    if isinstance(value, (list, set, frozenset, np.ndarray, pd.Index, pd.Series)):
+        values = sorted(set(value)) if isinstance(value, (set, frozenset)) else list(value)
+        if not values:
+            raise ValueError("A list constraint needs at least one value.")
+        return ','.join(_format_value(v) for v in values)
+    return _format_value(value)
+
+
+def vizier_query_url(url, columns=None, where=None, cone=None, max_rows=None):
+    """
+    Push a selection down into a VizieR ``asu-txt`` query URL.
+
+    Parameters
+    ----------
+    url : str
+        Base query, e.g. a ``data_link`` of ``gas_sources``.
+    columns : list of str, optional
+        Output columns (VizieR labels or loader names with a unit suffix),
+        replacing the ``-out=`` list of `url`.
+    where : dict, optional
+        Row constraints keyed by column; values as in
+        :func:`format_constraint`. Constraints combine with AND.
+    cone : tuple, optional
+        ``(ra, dec, radius)``: ICRS center in degrees and radius in arcmin.
+    max_rows : int or 'unlimited', optional
+        Replaces the ``-out.max`` limit of `url`.
+
+    Returns
+    -------
+    str
+    """
+    parts = urlsplit(url)
+    params = [(k, v.strip()) for k, v in parse_qsl(parts.query, keep_blank_values=True)]
+    if columns is not None:
+        params = [(k, v) for k, v in params if k != '-out']
+        params += [('-out', vizier_label(c)) for c in columns]
+    if cone is not None:
+        ra, dec, radius = cone
+        drop = {'-c', '-c.r', '-c.rm', '-c.rs', '-c.rd', '-c.u', '-c.eq'}
+        params = [(k, v) for k, v in params if k not in drop]
+        params += [('-c', '%.7f %+.7f' % (ra, dec)), ('-c.eq', 'J2000'),
+                   ('-c.r', _format_value(radius)), ('-c.u', 'arcmin')]
+    if max_rows is not None:
+        params = [(k, v) for k, v in params if k != '-out.max']
+        params.append(('-out.max', str(max_rows)))
+    if where:
+        labels = {vizier_label(c) for c in where}
+        params = [(k, v) for k, v in params if k not in labels]
+        params += [(vizier_label(c), format_constraint(v)) for c, v in where.items()]
+    query = urlencode(params, quote_via=quote, safe='/:.,*')
+    return urlunsplit(parts._replace(query=query))
+
+
+def _parse_number(text):
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError("Invalid numeric constraint value %r." % (text,)) from None
+
+
+def constraint_mask(values, constraint):
+    """
+    Boolean mask of `values` satisfying a VizieR constraint string.
+
+    Supports ``=``, ``!=``, ``<``, ``<=``, ``>``, ``>=``, inclusive ranges
+    ``low..high``, comma-separated value lists and ``*``/``?`` wildcards on
+    text columns. Missing values never match.
+    """
+    values = pd.Series(values)
+    numeric = pd.api.types.is_numeric_dtype(values.dtype)
+    constraint = constraint.strip()
+    op = next((o for o in _OPERATORS if constraint.startswith(o)), None)
+    operand = constraint[len(op):].strip() if op else constraint
+
+    if numeric:
+        x = values.to_numpy(dtype=np.float64)
+        with np.errstate(invalid='ignore'):
+            if op is None and '..' in operand:
+                low, high = operand.split('..', 1)
+                return (x >= _parse_number(low)) & (x <= _parse_number(high))
+            if op is None and ',' in operand:
+                return np.isin(x, [_parse_number(v) for v in operand.split(',')])
+            v = _parse_number(operand)
+            return {
+                '>=': x >= v, '<=': x <= v, '!=': (x != v) & ~np.isnan(x),
+                '>': x > v, '<': x < v, '=': x == v, None: x == v,
+            }[op]
+
+    text = values.astype(object).where(values.notna(), None)
+    strings = [None if t is None else str(t).strip() for t in text]
+    if op in ('>', '<', '>=', '<='):
+        raise ValueError("Comparison %r on a text column." % (constraint,))
+    patterns = operand.split(',') if op is None else [operand]
+    mask = np.array([s is not None and any(fnmatchcase(s, p.strip()) for p in patterns)
+                     for s in strings], dtype=bool)
+    if op == '!=':
+        mask = ~mask & np.array([s is not None for s in strings], dtype=bool)
+    return mask
+
+
+def apply_constraints(df, where=None, cone=None, positions=None):
+    """
+    Filter `df` as :func:`vizier_query_url` would on the server.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Table whose columns are VizieR labels or loader names with a unit
+        suffix.
+    where : dict, optional
+        Row constraints, as in :func:`vizier_query_url`.
+    cone : tuple, optional
+        ``(ra, dec, radius)`` in degrees, degrees and arcmin.
+    positions : tuple of array_like, optional
+        ICRS (ra, dec) in degrees of the rows of `df`; required by `cone`.
+
+    Returns
+    -------
+    DataFrame
+        The matching rows, index reset.
+
+    Raises
+    ------
+    KeyError
+        If a constraint refers to a column that is not in `df`.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    by_label = {vizier_label(c): c for c in df.columns}
+    for column, value in (where or {}).items():
+        name = column if column in df.columns else by_label.get(vizier_label(column))
+        if name is None:
+            raise KeyError("Constraint on unknown column %r." % (column,))
+        mask &= constraint_mask(df[name], format_constraint(value))
+    if cone is not None:
+        if positions is None:
+            raise ValueError("A cone constraint needs the row positions.")
+        from maguniverse.utils.coords import angular_separation
+
+        ra, dec, radius = cone
+        with np.errstate(invalid='ignore'):
+            mask &= angular_separation(ra, dec, *positions) * 60.0 <= radius
+    return df[mask].reset_index(drop=True)
+
+
+def select_columns(df, columns):
+    """
+    Subset of `df` with `columns` given as VizieR labels or loader names.
+
+    Raises
+    ------
+    KeyError
+        If a column is not in `df`.
+    """
+    by_label = {vizier_label(c): c for c in df.columns}
+    names = []
+    for column in columns:
+        name = column if column in df.columns else by_label.get(vizier_label(column))
+        if name is None:
+            raise KeyError("Unknown column %r." % (column,))
+        names.append(name)
+    return df[names]
+
+
+def has_selection(columns=None, where=None, cone=None, max_rows=None):
+    """Return True if any of the selection arguments of a loader is set."""
+    return columns is not None or bool(where) or cone is not None or max_rows is not None
+
+
+def apply_selection(df, columns=None, where=None, cone=None, max_rows=None, positions=None):
+    """
+    Apply a loader selection to a table parsed from a local copy.
+
+    Same arguments and meaning as :func:`vizier_query_url`; see
+    :func:`apply_constraints` for `positions`.
+    """
+    df = apply_constraints(df, where, cone, positions)
+    if max_rows is not None and max_rows != 'unlimited':
+        df = df.iloc[:int(max_rows)]
+    if columns is not None:
+        df = select_columns(df, columns)
+    return df
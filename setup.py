@@ -5,6 +5,8 @@ setup(
     version="0.1.0",
     packages=find_packages(),
     install_requires=["requests", "pandas"],
+    extras_require={"zstd": ["zstandard"], "parquet": ["pyarrow"]},
+    entry_points={"console_scripts": ["maguniverse=maguniverse.cli:main"]},
     author="X. Li",
     description="A Python-based data manager for working with tabulated data from publications of observational surveys of cosmic magnetic fields.",
     url="https://github.com/xli2522/maguniverse",
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+test_block_index.py
+-----------
+
+Reading selected objects through the block index against a full parse.
+"""
+
+import gzip
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from maguniverse import __parent_dir__
+from maguniverse.utils.block_index import load_block_index, read_mrt_objects
+from maguniverse.utils.metrics import collect_metrics
+from maguniverse.utils.mrt import read_mrt
+
+DOTSON_T2 = os.path.join(__parent_dir__, 'datafiles', 'polarization', 'dotson2010_t2.txt')
+
+
+@pytest.fixture
+def table(tmp_path):
+    path = tmp_path / 'dotson2010_t2.txt'
+    shutil.copyfile(DOTSON_T2, path)
+    return str(path)
+
+
+def _expected(path, names):
+    with open(path, 'rb') as f:
+        df = read_mrt(f.read())
+    return df[df['Name'].isin(names)].reset_index(drop=True)
+
+
+def _outcome(path, directory):
+    with collect_metrics() as metrics:
+        load_block_index(path, directory=directory)
+    return [e.fields['cache'] for e in metrics.events if e.name == 'block_index']
+
+
+def test_selected_objects_match_a_full_parse(table, tmp_path):
+    sidecars = str(tmp_path / 'index')
+    df = read_mrt_objects(table, ['W3', 'NGC_253'], directory=sidecars)
+    pd.testing.assert_frame_equal(df, _expected(table, ['W3', 'NGC_253']))
+    assert df['Name'].iloc[0] == 'NGC_253'          # file order
+
+
+def test_names_are_matched_on_normalized_keys(table, tmp_path):
+    sidecars = str(tmp_path / 'index')
+    df = read_mrt_objects(table, 'ngc 253', directory=sidecars)
+    pd.testing.assert_frame_equal(df, _expected(table, ['NGC_253']))
+    with pytest.warns(UserWarning, match='NO_SUCH'):
+        df = read_mrt_objects(table, ['NO_SUCH', 'W3'], directory=sidecars)
+    assert set(df['Name']) == {'W3'}
+
+
+def test_sidecar_is_reused_and_rebuilt(table, tmp_path):
+    sidecars = str(tmp_path / 'index')
+    assert _outcome(table, sidecars) == ['miss']
+    assert _outcome(table, sidecars) == ['hit']
+
+    os.utime(table, ns=(0, 0))
+    assert _outcome(table, sidecars) == ['revalidated']
+
+    with open(table, 'rb') as f:
+        raw = f.read()
+    with open(table, 'wb') as f:
+        f.write(raw.replace(b'NGC_253  ', b'NGC_0253 '))
+    assert _outcome(table, sidecars) == ['miss']
+    df = read_mrt_objects(table, 'NGC_0253', directory=sidecars)
+    assert len(df) == len(_expected(DOTSON_T2, ['NGC_253']))
+
+
+def test_compressed_file(table, tmp_path):
+    path = table + '.gz'
+    with open(table, 'rb') as src, gzip.open(path, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    df = read_mrt_objects(path, ['W3', 'M17'], directory=str(tmp_path / 'index'))
+    pd.testing.assert_frame_equal(df, _expected(table, ['W3', 'M17']))
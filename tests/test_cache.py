@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+test_cache.py
+-----------
+
+Download cache hits, conditional revalidation and 304 handling, against
+a fake HTTP session.
+"""
+
+import pytest
+import requests
+
+from maguniverse.utils.cache import DownloadCache
+from maguniverse.utils.metrics import collect_metrics
+
+URL = 'https://example.org/table.txt'
+
+
+class FakeResponse:
+
+    def __init__(self, status_code, content=b'', etag=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = {'ETag': etag} if etag else {}
+        self.encoding = 'utf-8'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        pass
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError('%d error' % self.status_code, response=self)
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+
+class FakeSession:
+    """Serves `content` with an ETag and honours If-None-Match."""
+
+    def __init__(self, content, etag='"v1"'):
+        self.content, self.etag = content, etag
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        headers = dict(headers or {})
+        self.requests.append(headers)
+        if headers.get('If-None-Match') == self.etag:
+            return FakeResponse(304)
+        return FakeResponse(200, self.content, self.etag)
+
+
+def _fetch(cache, session, **kwargs):
+    with collect_metrics() as metrics:
+        content, entry = cache.fetch(URL, session, **kwargs)
+    outcome = [e.fields['cache'] for e in metrics.events if e.name == 'fetch']
+    return content, outcome
+
+
+def test_miss_then_hit(tmp_path):
+    cache = DownloadCache(str(tmp_path), ttl=None)
+    session = FakeSession(b'a b c\n' * 1000)
+    assert _fetch(cache, session) == (b'a b c\n' * 1000, ['miss'])
+    assert _fetch(cache, session) == (b'a b c\n' * 1000, ['hit'])
+    assert len(session.requests) == 1
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (1, 1)
+
+
+def test_expired_entry_is_revalidated(tmp_path):
+    cache = DownloadCache(str(tmp_path), ttl=0)
+    session = FakeSession(b'first')
+    _fetch(cache, session)
+    assert _fetch(cache, session) == (b'first', ['revalidated'])
+    assert session.requests[-1]['If-None-Match'] == '"v1"'
+
+    session.content, session.etag = b'second', '"v2"'
+    assert _fetch(cache, session) == (b'second', ['miss'])
+    assert cache.lookup(URL)['etag'] == '"v2"'
+
+
+def test_304_without_a_cached_copy_is_retried(tmp_path):
+    cache = DownloadCache(str(tmp_path), ttl=None)
+    session = FakeSession(b'body')
+    # the caller's own validator matches, but nothing is cached yet
+    content, outcome = _fetch(cache, session, headers={'If-None-Match': '"v1"'})
+    assert (content, outcome) == (b'body', ['miss'])
+    assert 'If-None-Match' not in session.requests[-1]
+
+
+def test_304_for_an_uncached_url_raises(tmp_path):
+    cache = DownloadCache(str(tmp_path), ttl=None)
+
+    class NotModified(FakeSession):
+        def get(self, url, headers=None, **kwargs):
+            self.requests.append(dict(headers or {}))
+            return FakeResponse(304)
+
+    with pytest.raises(requests.HTTPError):
+        cache.fetch(URL, NotModified(b''))
+    assert cache.lookup(URL) is None
+
+
+def test_rejected_download_is_not_cached(tmp_path):
+    cache = DownloadCache(str(tmp_path), ttl=None)
+    session = FakeSession(b'<div class="h-captcha"></div>')
+
+    def validate(head):
+        if b'h-captcha' in head:
+            raise ValueError('CAPTCHA')
+
+    with pytest.raises(ValueError):
+        cache.fetch(URL, session, validate=validate)
+    assert cache.lookup(URL) is None
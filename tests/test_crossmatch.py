@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+test_crossmatch.py
+-----------
+
+Sky index queries and positional matches against brute-force searches.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from maguniverse.utils.coords import angular_separation
+from maguniverse.utils.crossmatch import crossmatch, match_indices
+from maguniverse.utils.spatial import GridIndex, SkyIndex
+
+
+def _sky(n, seed, ra=(0.0, 360.0), dec=(-90.0, 90.0)):
+    rng = np.random.default_rng(seed)
+    sin_dec = rng.uniform(np.sin(np.radians(dec[0])), np.sin(np.radians(dec[1])), n)
+    return rng.uniform(*ra, n) % 360.0, np.degrees(np.arcsin(sin_dec))
+
+
+def _clustered(seed):
+    """Positions around RA = 0 (wrapping) and the north pole, plus a few missing."""
+    ra1, dec1 = _sky(300, seed, ra=(-2.0, 2.0), dec=(-2.0, 2.0))
+    ra2, dec2 = _sky(300, seed + 1, dec=(87.0, 90.0))
+    ra, dec = np.concatenate((ra1, ra2)), np.concatenate((dec1, dec2))
+    ra[::97] = np.nan
+    return ra, dec
+
+
+def _brute(ra1, dec1, ra2, dec2, radius_arcsec):
+    sep = angular_separation(ra1[:, None], dec1[:, None], ra2[None, :], dec2[None, :]) * 3600.0
+    radius = np.broadcast_to(radius_arcsec, ra1.shape)[:, None]
+    with np.errstate(invalid='ignore'):
+        inside = sep <= radius
+    return sep, inside
+
+
+def test_cone_queries_match_brute_force():
+    ra, dec = _clustered(0)
+    qra, qdec = _clustered(10)
+    radius = np.random.default_rng(2).uniform(60.0, 1800.0, len(qra))
+    index = SkyIndex(ra, dec, cell_arcsec=600.0)
+    qi, ids, sep = index.query_cones(qra, qdec, radius, as_frame=False)
+
+    sep_all, inside = _brute(qra, qdec, ra, dec, radius)
+    expected_q, expected_ids = np.nonzero(inside)
+    got = sorted(zip(qi.tolist(), ids.tolist()))
+    assert got == sorted(zip(expected_q.tolist(), expected_ids.tolist()))
+    np.testing.assert_allclose(sep * 3600.0, sep_all[qi, ids], rtol=1e-9)
+
+
+def test_nearest_matches_brute_force():
+    ra1, dec1 = _clustered(20)
+    ra2, dec2 = _clustered(30)
+    i1, i2, sep = match_indices(ra1, dec1, ra2, dec2, 900.0)
+
+    sep_all, inside = _brute(ra1, dec1, ra2, dec2, 900.0)
+    matched = inside.any(axis=1)
+    np.testing.assert_array_equal(i1, np.flatnonzero(matched))
+    best = np.where(inside, sep_all, np.inf).min(axis=1)[matched]
+    np.testing.assert_allclose(sep, best, rtol=1e-9)
+    np.testing.assert_allclose(sep_all[i1, i2], best, rtol=1e-9)
+
+
+def test_all_matches_sorted_by_separation():
+    ra1, dec1 = _clustered(40)
+    ra2, dec2 = _clustered(50)
+    i1, i2, sep = match_indices(ra1, dec1, ra2, dec2, 600.0, how='all')
+    _, inside = _brute(ra1, dec1, ra2, dec2, 600.0)
+    assert len(i1) == inside.sum()
+    assert inside[i1, i2].all()
+    order = np.lexsort((sep, i1))
+    np.testing.assert_array_equal(order, np.arange(len(i1)))
+
+
+def test_missing_positions_and_radii_are_unmatched():
+    ra2, dec2 = np.array([10.0, 20.0]), np.array([0.0, 0.0])
+    i1, i2, _ = match_indices([10.0, np.nan, 20.0, 20.0], [0.0, 0.0, 0.0, np.nan], ra2, dec2,
+                              [1.0, 1.0, np.nan, 1.0])
+    assert i1.tolist() == [0] and i2.tolist() == [0]
+
+
+def test_crossmatch_frames():
+    cat1 = pd.DataFrame({'Name': ['a', 'b', 'c'], 'RA_ICRS (deg)': [10.0, 50.0, 200.0],
+                         'DE_ICRS (deg)': [5.0, -20.0, 60.0]}, index=[7, 8, 9])
+    cat2 = pd.DataFrame({'Name': ['x', 'y'], 'RA_ICRS (deg)': [200.0005, 10.0],
+                         'DE_ICRS (deg)': [60.0, 5.0003]})
+    df = crossmatch(cat1, cat2, 5.0)
+    assert df['Name_1'].tolist() == ['a', 'c']
+    assert df['Name_2'].tolist() == ['y', 'x']
+
+
+def test_box_query_matches_brute_force():
+    ra, dec = _sky(5000, 60)
+    index = SkyIndex(ra, dec)
+    for box in [(350.0, 10.0, -5.0, 5.0), (100.0, 140.0, 30.0, 60.0), (0.0, 360.0, 80.0, 90.0)]:
+        ra_min, ra_max, dec_min, dec_max = box
+        width = (ra_max - ra_min) % 360.0 or 360.0
+        inside = (((ra - ra_min) % 360.0) <= width) & (dec >= dec_min) & (dec <= dec_max)
+        np.testing.assert_array_equal(index.query_box(*box), np.flatnonzero(inside))
+
+
+@pytest.mark.parametrize('dims', [1, 2, 3])
+def test_grid_pairs_match_brute_force(dims):
+    points = np.random.default_rng(dims).uniform(0.0, 10.0, (400, dims))
+    i, j, d = GridIndex(points, 0.7).query_pairs(0.7)
+    dist = np.sqrt(((points[:, None, :] - points[None, :, :]) ** 2).sum(axis=-1))
+    ei, ej = np.nonzero(np.triu(dist < 0.7, k=1))
+    assert sorted(zip(i.tolist(), j.tolist())) == sorted(zip(ei.tolist(), ej.tolist()))
+    np.testing.assert_allclose(d, dist[i, j])
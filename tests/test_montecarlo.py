@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+test_montecarlo.py
+-----------
+
+Monte Carlo propagation is reproducible per source, whatever the
+chunking.
+"""
+
+import numpy as np
+import pandas as pd
+
+from maguniverse.analysis.montecarlo import mass_to_flux, propagate
+
+
+def _ratio(log_column, field):
+    return {'lambda': mass_to_flux(10.0 ** log_column, field)}
+
+
+def _inputs(n=200):
+    rng = np.random.default_rng(4)
+    values = {'log_column': rng.uniform(21.0, 23.0, n), 'field': rng.uniform(5.0, 50.0, n)}
+    errors = {'log_column': 0.3, 'field': rng.uniform(1.0, 5.0, n)}
+    return values, errors
+
+
+def test_results_do_not_depend_on_chunking():
+    values, errors = _inputs()
+    expected = propagate(_ratio, values, errors, draws=500, seed=7)
+    for chunk_bytes in (1, 10 ** 5):
+        got = propagate(_ratio, values, errors, draws=500, seed=7, chunk_bytes=chunk_bytes)
+        pd.testing.assert_frame_equal(got, expected)
+    got = propagate(_ratio, values, errors, draws=500, seed=7, chunk_bytes=10 ** 5, processes=2)
+    pd.testing.assert_frame_equal(got, expected)
+
+
+def test_exact_inputs_and_subsets_keep_the_streams():
+    values, errors = _inputs()
+    expected = propagate(_ratio, values, errors, draws=500, seed=7)
+
+    def with_exact(log_column, field, offset):
+        return _ratio(log_column + offset, field)
+
+    got = propagate(with_exact, dict(values, offset=np.zeros(200)), errors, draws=500, seed=7,
+                    chunk_bytes=10 ** 5)
+    pd.testing.assert_frame_equal(got, expected)
+
+    head = propagate(_ratio, {k: v[:50] for k, v in values.items()},
+                     {'log_column': 0.3, 'field': errors['field'][:50]}, draws=500, seed=7)
+    pd.testing.assert_frame_equal(head, expected.iloc[:50])
+
+
+def test_statistics():
+    out = propagate(lambda x: x, {'x': [0.0, 10.0]}, {'x': [1.0, 0.0]}, draws=20000, seed=1)
+    assert list(out.columns.get_level_values(1)[:2]) == ['mean', 'std']
+    assert abs(out.loc[0, ('value', 'mean')]) < 0.05
+    assert abs(out.loc[0, ('value', 'std')] - 1.0) < 0.05
+    assert out.loc[1, ('value', 'p50')] == 10.0 and out.loc[1, ('value', 'std')] == 0.0
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+test_mrt.py
+-----------
+
+The vectorized MRT decoder against ``pandas.read_fwf``.
+"""
+
+import os
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from maguniverse import __parent_dir__
+from maguniverse.utils.mrt import iter_mrt, parse_mrt_header, read_mrt
+
+DOTSON_T2 = os.path.join(__parent_dir__, 'datafiles', 'polarization', 'dotson2010_t2.txt')
+
+HEADER = b'''\
+Title: Synthetic table
+================================================================================
+Byte-by-byte Description of file: synthetic.txt
+--------------------------------------------------------------------------------
+   Bytes Format Units   Label     Explanations
+--------------------------------------------------------------------------------
+   1-  8 A8     ---     Name      Object name
+  10- 12 I3     ---     N         Number of measurements
+  14- 18 F5.2   %       P         [0/100]? Polarization, blank if unknown
+  20- 22 I3     ---     Flag      [0/9]? Quality flag
+--------------------------------------------------------------------------------
+'''
+
+
+def _fwf(raw):
+    columns, start = parse_mrt_header(raw)
+    return pd.read_fwf(BytesIO(raw[start:]), colspecs=[(c.start, c.end) for c in columns],
+                       names=[c.label for c in columns], header=None)
+
+
+def test_dotson_table_matches_read_fwf():
+    with open(DOTSON_T2, 'rb') as f:
+        raw = f.read()
+    df = read_mrt(raw)
+    expected = _fwf(raw)
+    assert len(df) == 4372
+    pd.testing.assert_frame_equal(df, expected)
+    assert df.attrs['units']['PA'] == 'deg'
+    assert df.attrs['formats']['Num'] == 'I3'
+
+
+def test_iter_mrt_batches_match_read_mrt():
+    with open(DOTSON_T2, 'rb') as f:
+        df = read_mrt(f.read())
+    chunks = list(iter_mrt(DOTSON_T2, 1000))
+    assert [len(c) for c in chunks] == [1000, 1000, 1000, 1000, 372]
+    pd.testing.assert_frame_equal(pd.concat(chunks), df)
+
+
+def test_ragged_and_crlf_records_match_read_fwf():
+    body = b'L1544      3 12.50   1\nOMC-1     12\nW3        10  1.25\n\nS106       1  0.50   9\n'
+    df = read_mrt(HEADER + body)
+    pd.testing.assert_frame_equal(df, _fwf(HEADER + body))
+    crlf = read_mrt(HEADER + body.replace(b'\n', b'\r\n'))
+    pd.testing.assert_frame_equal(crlf, df)
+    assert df['Name'].tolist() == ['L1544', 'OMC-1', 'W3', 'S106']
+
+
+def test_optional_integer_columns_keep_one_dtype(tmp_path):
+    body = b'A          1  1.00   1\nB          2  2.00   2\nC          3  3.00\nD          4  4.00   4\n'
+    path = tmp_path / 'table.txt'
+    path.write_bytes(HEADER + body)
+    chunks = list(iter_mrt(str(path), 2))
+    assert [c['Flag'].dtype for c in chunks] == [np.float64, np.float64]
+    assert [c['N'].dtype for c in chunks] == [np.int64, np.int64]
+    assert np.isnan(chunks[1]['Flag'].iloc[0])
+    assert list(chunks[1].index) == [2, 3]
+
+
+def test_blank_in_a_required_integer_column():
+    with pytest.raises(ValueError, match="'N'"):
+        read_mrt(HEADER + b'A             1.00   1\n')
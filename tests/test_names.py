@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+test_names.py
+-----------
+
+Canonical source-name keys.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from maguniverse.utils.names import normalize_name, normalize_names
+
+
+@pytest.mark.parametrize('names, key', [
+    (['NGC_2024', 'ngc 2024', 'NGC2024', ' NGC  2024 ', 'NGC 02024'], 'NGC2024'),
+    (['CRL 2688', 'AFGL 2688', 'AFGL2688'], 'AFGL2688'),
+    (['LDN 1544', 'Lynds 1544', 'L1544', 'L_1544'], 'L1544'),
+    (['Barnard 335', 'B335'], 'B335'),
+    (['TMC-1', 'TMC1', 'tmc 1'], 'TMC1'),
+    (['W43-MM1', 'W43MM1'], 'W43MM1'),
+    (['Sagittarius B2', 'Sgr B2', 'SGR_B2'], 'SGRB2'),
+    (['ρ Oph A', 'rho Oph A'], 'RHOOPHA'),
+])
+def test_spellings_share_one_key(names, key):
+    assert {normalize_name(name) for name in names} == {key}
+
+
+def test_signs_are_kept():
+    assert normalize_name('M-0.02-0.07') == 'M-0.02-0.07'
+    assert normalize_name('IRAS 16293-2422') == 'IRAS16293-2422'
+    assert normalize_name('G34.3+0.2') == 'G34.3+0.2'
+
+
+def test_distinct_objects_stay_distinct():
+    assert normalize_name('L1544') != normalize_name('L1551')
+    assert normalize_name('LDN 1544') != normalize_name('LDN1544A')
+
+
+@pytest.mark.parametrize('missing', [None, np.nan, pd.NA])
+def test_missing_names(missing):
+    assert normalize_name(missing) is None
+
+
+def test_vectorized_matches_scalar():
+    names = ['NGC_2024', 'CRL 2688', None, 'TMC-1', 'NGC_2024', 'M-0.02-0.07', np.nan,
+             'ρ Oph A', 'Lynds 1544']
+    keys = normalize_names(pd.Series(names))
+    assert keys.dtype == 'string'
+    expected = [normalize_name(name) for name in names]
+    assert [None if pd.isna(k) else k for k in keys] == expected
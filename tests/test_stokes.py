@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+test_stokes.py
+-----------
+
+Stokes parameters and the MAS / Ricean debiasing of polarization
+fractions.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from maguniverse.analysis.stokes import (
+    debias_polarization, polarization_angle, stokes_columns, stokes_qu,
+)
+
+
+def test_stokes_round_trip():
+    p = np.array([1.0, 2.5, 10.0, 3.0])
+    theta = np.array([0.0, 45.0, 135.0, 179.5])
+    q, u = stokes_qu(p, theta)
+    np.testing.assert_allclose(q, [1.0, 0.0, 0.0, 3.0 * np.cos(np.radians(359.0))], atol=1e-12)
+    np.testing.assert_allclose(np.hypot(q, u), p)
+    np.testing.assert_allclose(polarization_angle(q, u), theta)
+
+
+def test_ricean_formula():
+    p = np.array([3.0, 5.0, 1.0, 0.5, np.nan, 2.0])
+    sigma = np.array([0.0, 3.0, 1.0, 1.0, 1.0, np.nan])
+    out = debias_polarization(p, sigma, 'ricean')
+    np.testing.assert_array_equal(out[:4], [3.0, 4.0, 0.0, 0.0])
+    assert np.isnan(out[4:]).all()
+
+
+def test_mas_formula():
+    p = np.array([4.0, 1.0, 0.0, 2.0, np.nan])
+    sigma = np.array([1.0, 1.0, 1.0, 0.0, 1.0])
+    out = debias_polarization(p, sigma, 'mas')
+    expected = p[:2] - sigma[:2] ** 2 * (1.0 - np.exp(-p[:2] ** 2 / sigma[:2] ** 2)) / (2.0 * p[:2])
+    np.testing.assert_allclose(out[:2], expected)
+    assert out[2] == 0.0 and out[3] == 2.0 and np.isnan(out[4])
+
+
+def test_mas_is_continuous_and_below_p():
+    p = np.linspace(0.01, 10.0, 500)
+    out = debias_polarization(p, 1.0, 'mas')
+    assert (out < p).all() and (np.diff(out) > 0).all()
+    assert np.abs(out - p)[-1] < 0.06
+
+
+def _measured(p0, sigma, n, seed):
+    """Polarization fractions measured with Gaussian noise on q and u."""
+    rng = np.random.default_rng(seed)
+    q = p0 + rng.normal(0.0, sigma, n)
+    u = rng.normal(0.0, sigma, n)
+    return np.hypot(q, u)
+
+
+@pytest.mark.parametrize('snr', [2.0, 3.0, 5.0])
+def test_estimators_remove_the_bias(snr):
+    p = _measured(snr, 1.0, 200000, int(snr))
+    raw_bias = p.mean() - snr
+    for method in ('mas', 'ricean'):
+        bias = debias_polarization(p, 1.0, method).mean() - snr
+        assert abs(bias) < raw_bias / 2.0
+    # MAS is nearly unbiased above a signal-to-noise ratio of 2
+    assert abs(debias_polarization(p, 1.0, 'mas').mean() - snr) < 0.1
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        debias_polarization([1.0], [1.0], 'wardle')
+    np.testing.assert_array_equal(debias_polarization([1.0, 2.0], [1.0, 1.0], None), [1.0, 2.0])
+
+
+def test_stokes_columns():
+    df = pd.DataFrame({'P': [4.0, 1.0], 'sigma(P)': [1.0, 2.0], 'theta': [0.0, 90.0],
+                       'Intensity': [200.0, 50.0]}, index=[5, 6])
+    out = stokes_columns(df, intensity_col='Intensity')
+    assert list(out.index) == [5, 6]
+    np.testing.assert_allclose(out['q (%)'], [4.0, -1.0])
+    np.testing.assert_allclose(out['SNR_P'], [4.0, 0.5])
+    np.testing.assert_allclose(out['Q (Jy/beam)'], [8.0, -0.5])
+    np.testing.assert_allclose(out['PI_debiased (Jy/beam)'],
+                               out['P_debiased (%)'] * df['Intensity'] / 100.0)
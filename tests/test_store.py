@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+test_store.py
+-----------
+
+Round trips through the consolidated memory-mapped store.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from maguniverse.utils.store import build_store, open_store
+
+
+def _frames():
+    vectors = pd.DataFrame({
+        'Name' : ['NGC_253', 'NGC_253', None, 'W3'],
+        'P'    : [14.28, 13.52, np.nan, 0.5],
+        'Num'  : np.array([7, 7, 11, 15], dtype=np.int64),
+        'small': np.array([1, 2, 3, 4], dtype=np.int16),
+        'good' : [True, False, True, True],
+        'kind' : pd.Categorical(['a', 'b', 'a', None], categories=['b', 'a'], ordered=True),
+        'flag' : pd.Series([1.5, None, 2.5, 1.5], dtype=object),
+    })
+    vectors.attrs['units'] = {'P': '%'}
+    objects = pd.DataFrame({'RA (deg)': [10.0, 20.0]},
+                           index=pd.Index(['NGC 253', 'W3'], name='Name'))
+    return {('Dotson2010', 't2'): vectors, 'Dotson2010/t1': objects}
+
+
+def test_round_trip(tmp_path):
+    frames = _frames()
+    manifest = build_store(str(tmp_path / 'store'), frames)
+    assert list(manifest['tables']) == ['Dotson2010/t2', 'Dotson2010/t1']
+
+    store = open_store(str(tmp_path / 'store'))
+    assert store.keys() == ['Dotson2010/t2', 'Dotson2010/t1']
+    expected = frames[('Dotson2010', 't2')]
+    df = store.table('Dotson2010', 't2', decode_strings=True)
+    pd.testing.assert_frame_equal(df, expected.astype({'flag': np.float64}), check_dtype=False)
+    for column in ('P', 'Num', 'small', 'good', 'kind'):
+        assert df[column].dtype == expected[column].dtype
+    assert df.attrs['units'] == {'P': '%'}
+
+    pd.testing.assert_frame_equal(store.table('Dotson2010/t1', decode_strings=True),
+                                  frames['Dotson2010/t1'])
+
+
+def test_text_columns_are_categorical_views(tmp_path):
+    build_store(str(tmp_path / 'store'), _frames())
+    store = open_store(str(tmp_path / 'store'))
+    df = store.table('Dotson2010/t2', columns=['Name', 'P'])
+    assert list(df.columns) == ['Name', 'P']
+    assert isinstance(df['Name'].dtype, pd.CategoricalDtype)
+    assert df['Name'].astype(object).where(df['Name'].notna(), None).tolist() == \
+        ['NGC_253', 'NGC_253', None, 'W3']
+    assert not df['P'].to_numpy().flags.writeable
+
+
+def test_missing_and_closed(tmp_path):
+    build_store(str(tmp_path / 'store'), _frames())
+    store = open_store(str(tmp_path / 'store'))
+    with pytest.raises(KeyError):
+        store.table('Crutcher2010')
+    with pytest.raises(KeyError):
+        store.table('Dotson2010')       # two tables: table= is needed
+    store.close()
+    with pytest.raises(ValueError):
+        store.table('Dotson2010/t1')
+
+
+def test_rebuild_replaces_the_store(tmp_path):
+    path = str(tmp_path / 'store')
+    build_store(path, _frames())
+    build_store(path, {'Crutcher2010/t1': pd.DataFrame({'B': [1.0, 2.0]})})
+    store = open_store(path)
+    assert store.keys() == ['Crutcher2010/t1']
+    assert store.table('Crutcher2010')['B'].tolist() == [1.0, 2.0]
+
+
+def test_mixed_object_column_is_rejected(tmp_path):
+    df = pd.DataFrame({'mixed': pd.Series(['a', 1.0], dtype=object)})
+    with pytest.raises(TypeError, match='mixed'):
+        build_store(str(tmp_path / 'store'), {'X/t1': df})
+    assert not (tmp_path / 'store').exists()
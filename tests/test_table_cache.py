@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+test_table_cache.py
+-----------
+
+Parsed-table cache keys follow the readers a parser delegates to.
+"""
+
+import importlib.util
+import sys
+
+import pandas as pd
+
+from maguniverse.data.zeeman.crutcher2010 import _parse_crutcher2010
+from maguniverse.utils import table_cache
+from maguniverse.utils.metrics import collect_metrics
+from maguniverse.utils.table_cache import TableCache, parse_cached, parser_fingerprint
+
+READER = '''
+import pandas as pd
+
+SUFFIX = %r
+
+
+def read_text(raw):
+    return pd.DataFrame({'value': [raw.%s() + SUFFIX]})
+'''
+
+PARSERS = '''
+from maguniverse import _test_reader
+from maguniverse._test_reader import read_text
+
+
+def parse_direct(raw):
+    return read_text(raw)
+
+
+def parse_attribute(raw):
+    return _test_reader.read_text(raw)
+
+
+def parse_local_import(raw):
+    from maguniverse._test_reader import read_text as reader
+    return reader(raw)
+'''
+
+
+def _load(name, path, monkeypatch):
+    spec = importlib.util.spec_from_file_location(name, str(path))
+    module = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, name, module)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _modules(tmp_path, monkeypatch, method, suffix=''):
+    reader = tmp_path / '_test_reader.py'
+    reader.write_text(READER % (suffix, method))
+    _load('maguniverse._test_reader', reader, monkeypatch)
+    parsers = tmp_path / '_test_parsers.py'
+    parsers.write_text(PARSERS)
+    return _load('maguniverse._test_parsers', parsers, monkeypatch)
+
+
+def _parse(raw, parser, cache):
+    with collect_metrics() as metrics:
+        df = parse_cached(raw, parser, cache=cache)
+    return df, [e.fields['cache'] for e in metrics.events if e.name == 'parse']
+
+
+def test_editing_a_reader_in_another_module_misses(tmp_path, monkeypatch):
+    cache = TableCache(str(tmp_path / 'tables'))
+    for name in ('parse_direct', 'parse_attribute', 'parse_local_import'):
+        parsers = _modules(tmp_path, monkeypatch, 'upper')
+        df, outcome = _parse('abc', getattr(parsers, name), cache)
+        assert outcome == ['miss'] and df['value'].tolist() == ['ABC']
+        df, outcome = _parse('abc', getattr(parsers, name), cache)
+        assert outcome == ['hit'] and df['value'].tolist() == ['ABC']
+
+        parsers = _modules(tmp_path, monkeypatch, 'title')
+        df, outcome = _parse('abc', getattr(parsers, name), cache)
+        assert outcome == ['miss'], name
+        assert df['value'].tolist() == ['Abc']
+        cache.clear()
+
+
+def test_editing_a_reader_constant_misses(tmp_path, monkeypatch):
+    cache = TableCache(str(tmp_path / 'tables'))
+    parsers = _modules(tmp_path, monkeypatch, 'upper')
+    _parse('abc', parsers.parse_direct, cache)
+    parsers = _modules(tmp_path, monkeypatch, 'upper', suffix='!')
+    df, outcome = _parse('abc', parsers.parse_direct, cache)
+    assert outcome == ['miss'] and df['value'].tolist() == ['ABC!']
+
+
+def test_unchanged_parser_hits(tmp_path, monkeypatch):
+    cache = TableCache(str(tmp_path / 'tables'))
+    parsers = _modules(tmp_path, monkeypatch, 'upper')
+    expected = pd.DataFrame({'value': ['ABC']})
+    _parse('abc', parsers.parse_direct, cache)
+    parsers = _modules(tmp_path, monkeypatch, 'upper')
+    df, outcome = _parse('abc', parsers.parse_direct, cache)
+    assert outcome == ['hit']
+    pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+
+
+def test_fingerprint_ignores_module_state(monkeypatch):
+    # the parser reaches metrics.phase, whose registered hooks are state,
+    # not part of the definition
+    expected = parser_fingerprint(_parse_crutcher2010)
+    monkeypatch.setattr(table_cache, '_definitions', {})
+    with collect_metrics():
+        assert parser_fingerprint(_parse_crutcher2010) == expected
+    assert _parse_crutcher2010 in table_cache._definitions
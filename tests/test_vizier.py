@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+test_vizier.py
+-----------
+
+VizieR query pushdown checked against hand-written query strings and
+canned ``asu-txt`` responses.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from maguniverse.data.gas import jijina1999
+from maguniverse.utils.vizier import (
+    apply_selection, constraint_mask, format_constraint, read_vizier_asu, vizier_query_url,
+)
+
+BASE = 'https://vizier.cds.unistra.fr/viz-bin/asu-txt'
+
+# Table A1 of J/ApJS/125/161 as VizieR returns it for the t1_targets link
+TARGETS = '''\
+#
+#   VizieR Astronomical Server vizier.cds.unistra.fr
+#
+#RESOURCE=yCat_21250161
+#Name: J/ApJS/125/161
+#Title: Dense cores mapped in ammonia (Jijina+, 1999)
+#Table\tJ_ApJS_125_161_tablea1:
+#Name: J/ApJS/125/161/tablea1
+#Title: Positions of the cores
+#Column\tSeq\t(I3)\tDatabase reference number\t[ucd=meta.record]
+#Column\tn_Seq\t(A1)\t[a-e] Note on Seq\t[ucd=meta.note]
+#Column\tName\t(A16)\tName of the NH3 source\t[ucd=meta.id;meta.main]
+#Column\t_RA.icrs\t(A10)\tRight ascension (ICRS)\t[ucd=pos.eq.ra;meta.main]
+#Column\t_DE.icrs\t(A9)\tDeclination (ICRS)\t[ucd=pos.eq.dec;meta.main]
+Seq n Name             _RA.icrs   _DE.icrs
+                       "h:m:s"    "d:m:s"
+--- - ---------------- ---------- ---------
+%s
+#END#
+'''
+
+ROWS = {
+    1: '  1   L1498            04 10 51.5 +25 09 58',
+    2: '  2 a L1517B           04 55 18.8 +30 38 04',
+    3: '  3   L1544            05 04 16.6 +25 10 48',
+    4: '  4   TMC-2            04 32 48.7 +24 25 12',
+}
+
+
+def _targets(*seqs):
+    return TARGETS % '\n'.join(ROWS[s] for s in seqs)
+
+
+def test_query_url_selection():
+    url = BASE + '?-source=J/ApJS/125/161/tablea2&-out.max=50&-out=Seq&-out=Name'
+    got = vizier_query_url(url, columns=['Seq', 'Tkin (K)'],
+                           where={'Tkin (K)': (10, None), 'Seq': [3, 1, 2]},
+                           max_rows='unlimited')
+    assert got == (BASE + '?-source=J/ApJS/125/161/tablea2&-out=Seq&-out=Tkin'
+                   '&-out.max=unlimited&Tkin=%3E%3D10&Seq=3,1,2')
+
+
+def test_query_url_cone_replaces_the_link_cone():
+    url = BASE + '?-source=J/ApJS/125/161/tablea1&-c.eq=J2000&-c.r=  2&-c.u=arcmin&-out=Name'
+    got = vizier_query_url(url, cone=(83.8221, -5.3911, 2.5), max_rows=10)
+    assert got == (BASE + '?-source=J/ApJS/125/161/tablea1&-out=Name'
+                   '&-c=83.8221000%20-5.3911000&-c.eq=J2000&-c.r=2.5&-c.u=arcmin'
+                   '&-out.max=10')
+
+
+def test_query_url_without_selection_keeps_the_query():
+    url = BASE + '?-source=J/ApJS/125/161/tablea3&-out=log(Liras)&-out=Name'
+    assert vizier_query_url(url) == (BASE + '?-source=J/ApJS/125/161/tablea3'
+                                     '&-out=log%28Liras%29&-out=Name')
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('L1551*', 'L1551*'),
+    ((1.5, 2), '1.5..2'),
+    ((None, 5), '<=5'),
+    ((10, None), '>=10'),
+    ({3, 1}, '1,3'),
+    (7, '7'),
+])
+def test_format_constraint(value, expected):
+    assert format_constraint(value) == expected
+
+
+@pytest.mark.parametrize('value', [(None, None), []])
+def test_format_constraint_rejects_empty(value):
+    with pytest.raises(ValueError):
+        format_constraint(value)
+
+
+def test_constraint_mask():
+    numbers = pd.Series([1.0, 5.0, np.nan, 10.0])
+    assert constraint_mask(numbers, '>=5').tolist() == [False, True, False, True]
+    assert constraint_mask(numbers, '1..5').tolist() == [True, True, False, False]
+    assert constraint_mask(numbers, '!=5').tolist() == [True, False, False, True]
+    names = pd.Series(['L1551 IRS5', 'L1544', None])
+    assert constraint_mask(names, 'L1551*').tolist() == [True, False, False]
+    assert constraint_mask(names, '!=L1544').tolist() == [True, False, False]
+    with pytest.raises(ValueError):
+        constraint_mask(names, '>L1544')
+
+
+def test_read_canned_response():
+    df = read_vizier_asu(_targets(1, 2, 3, 4))
+    assert list(df.columns) == ['Seq', 'n_Seq', 'Name', '_RA.icrs', '_DE.icrs']
+    assert df['Seq'].tolist() == [1, 2, 3, 4]
+    assert df['n_Seq'].isna().tolist() == [True, False, True, True]
+    assert df['Name'].tolist() == ['L1498', 'L1517B', 'L1544', 'TMC-2']
+    assert df.loc[1, '_RA.icrs'] == '04 55 18.8'
+    assert df.loc[3, '_DE.icrs'] == '+24 25 12'
+    assert df.attrs['formats']['Name'] == 'A16'
+
+
+def test_read_empty_response():
+    df = read_vizier_asu(_targets())
+    assert df.empty and list(df.columns) == ['Seq', 'n_Seq', 'Name', '_RA.icrs', '_DE.icrs']
+
+
+def test_loader_pushes_the_selection_into_the_query(monkeypatch):
+    requested = []
+
+    def get_ascii(file_path, file_url, *args, **kwargs):
+        requested.append(file_url)
+        return _targets(2, 3)      # what VizieR answers for Seq=2..3
+
+    monkeypatch.setattr(jijina1999, 'get_ascii', get_ascii)
+    df = jijina1999.get_jijina1999_targets(where={'Seq': (2, 3)}, cache=False,
+                                           table_cache=False)
+    assert requested == [
+        BASE + '?-oc.form=sexa&-out.max=unlimited&-c.eq=J2000&-c.r=2&-c.u=arcmin'
+        '&-c.geom=r&-source=J/ApJS/125/161/tablea1&-order=I&-out=Seq&-out=n_Seq'
+        '&-out=Name&-out=RA1950&-out=DE1950&-out=Tel&-out=SFR&-out=_RA.icrs'
+        '&-out=_DE.icrs&Seq=2..3'
+    ]
+    assert df['Name'].tolist() == ['L1517B', 'L1544']
+
+
+def test_local_copy_is_filtered_like_the_query(tmp_path):
+    path = tmp_path / 'tablea1.txt'
+    path.write_text(_targets(1, 2, 3, 4))
+    df = jijina1999.get_jijina1999_targets(file_path=str(path), where={'Seq': (2, 3)},
+                                           table_cache=False)
+    expected = read_vizier_asu(_targets(2, 3))
+    pd.testing.assert_frame_equal(df, expected)
+
+    df = jijina1999.get_jijina1999_targets(file_path=str(path), columns=['Name'],
+                                           where={'Name': 'L15*'}, max_rows=1,
+                                           table_cache=False)
+    assert df.to_dict('list') == {'Name': ['L1517B']}
+
+
+def test_apply_selection_cone():
+    df = read_vizier_asu(_targets(1, 2, 3, 4))
+    ra = np.array([62.7146, 73.8283, 76.0692, 68.2029])
+    dec = np.array([25.1661, 30.6344, 25.18, 24.42])
+    got = apply_selection(df, cone=(76.0, 25.2, 5.0), positions=(ra, dec))
+    assert got['Name'].tolist() == ['L1544']
+
+
+def test_ysos_request_the_whole_table(monkeypatch):
+    requested = []
+
+    def get_ascii(file_path, file_url, *args, **kwargs):
+        requested.append(file_url)
+        raise RuntimeError('stop')
+
+    monkeypatch.setattr(jijina1999, 'get_ascii', get_ascii)
+    with pytest.raises(RuntimeError):
+        jijina1999.get_jijina1999_ysos(
+            file_url=BASE + '?-source=J/ApJS/125/161/tablea3&-out.max=50', cache=False)
+    assert requested == [BASE + '?-source=J/ApJS/125/161/tablea3&-out.max=unlimited']
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+test_zeeman.py
+-----------
+
+The closed-form Zeeman likelihood against numerical quadrature, and the
+tabulated grid against direct evaluation.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from maguniverse.analysis.zeeman import (
+    LikelihoodTable, bmax_model, log_likelihood_grid, los_likelihood, los_pdf,
+)
+
+# fine enough for the kinks of g at |u| = f and of the Gaussian at sigma / B_max = 0.01
+U = np.linspace(-1.0, 1.0, 400001)
+
+
+def _quadrature(bz, sigma, bmax, f):
+    integrand = los_pdf(U, f) * np.exp(-0.5 * ((bz - bmax * U) / sigma) ** 2) \
+        / (np.sqrt(2.0 * np.pi) * sigma)
+    return np.trapezoid(integrand, U)
+
+
+def test_los_pdf_is_normalized():
+    for f in (0.01, 0.3, 0.9):
+        assert np.trapezoid(los_pdf(U, f), U) == pytest.approx(1.0, rel=1e-4)
+
+
+@pytest.mark.parametrize('bz, sigma, bmax', [
+    (10.0, 5.0, 30.0),      # broad noise
+    (-25.0, 2.0, 40.0),     # negative field
+    (12.0, 0.4, 40.0),      # narrow noise
+    (80.0, 10.0, 40.0),     # beyond B_max
+    (0.0, 3.0, 100.0),      # at the peak of g
+])
+def test_likelihood_matches_quadrature(bz, sigma, bmax):
+    f = np.array([0.02, 0.2, 0.5, 0.95])
+    expected = [_quadrature(bz, sigma, bmax, fi) for fi in f]
+    # each piece is integrated exactly: only the interpolation of -ln u
+    # between nodes differs from the quadrature
+    np.testing.assert_allclose(los_likelihood(bz, sigma, bmax, f, nodes=1024), expected,
+                               rtol=1e-4)
+    np.testing.assert_allclose(los_likelihood(bz, sigma, bmax, f), expected, rtol=0.03)
+
+
+def test_likelihood_shape_and_f_range():
+    like = los_likelihood(np.array([1.0, 2.0, 3.0]), 1.0, np.array([[10.0], [20.0]]), [0.1, 0.5])
+    assert like.shape == (2, 3, 2)
+    with pytest.raises(ValueError):
+        los_likelihood(1.0, 1.0, 10.0, 1.0)
+
+
+def test_table_interpolates_direct_evaluation():
+    bz, sigma, f = np.array([5.0, -12.0, 30.0]), np.array([2.0, 3.0, 4.0]), np.array([0.1, 0.6])
+    table = LikelihoodTable(bz, sigma, f, (5.0, 500.0), size=2048)
+    log_bmax = np.log(np.array([[8.0, 20.0, 60.0], [100.0, 300.0, 45.0]]))
+    direct = np.log(los_likelihood(bz, sigma, np.exp(log_bmax), f)).sum(axis=1)
+    np.testing.assert_allclose(table.log_likelihood(log_bmax), direct, rtol=1e-3)
+
+
+def test_grid_matches_direct_evaluation():
+    data = pd.DataFrame({'n_H (cm^-3)': [1e2, 1e3, 1e4, 1e5],
+                         'B_Z (muG)'  : [5.0, -8.0, 30.0, 100.0],
+                         'sigma (muG)': [2.0, 3.0, 5.0, 20.0]})
+    b0, n0, alpha, f = [5.0, 10.0], [100.0, 300.0], [0.5, 0.65], [0.03, 0.5]
+    grid = log_likelihood_grid(data, b0, n0, alpha, f)
+    assert grid.shape == (2, 2, 2, 2)
+    for idx in np.ndindex(grid.shape[:3]):
+        bmax = bmax_model(data['n_H (cm^-3)'], b0[idx[0]], n0[idx[1]], alpha[idx[2]])
+        direct = np.log(los_likelihood(data['B_Z (muG)'], data['sigma (muG)'], bmax, f))
+        np.testing.assert_allclose(grid[idx], direct.sum(axis=0), rtol=1e-3)